@@ -1,18 +1,22 @@
 import sys
+import argparse
 from antlr4 import *
 from antlr4.error.ErrorListener import ErrorListener
 
-from ExprLexer import ExprLexer
-from ExprParser import ExprParser
+from fast_lexer import LEXER_CHOICES, get_lexer_class
+from parallel_lexer import lex_parallel_store
+from token_store import TokenStore, tokenize
+from source_input import open_source
+from compiler_log import LOG_LEVELS, CompilerLog, DEBUG, ERROR, INFO
 
 class LexicoErrorListener(ErrorListener):
     """Listener personalizado para capturar erros léxicos do ANTLR"""
     
-    def __init__(self, output_file=None):
+    def __init__(self, logger=None):
         super().__init__()
         self.errors = []
-        self.output_file = output_file
-        self.log_buffer = []
+        # CompilerLog compartilhado com o Scanner; sem ele, só imprime
+        self.logger = logger if logger is not None else CompilerLog(echo=True)
     
     def syntaxError(self, recognizer, offendingSymbol, line, column, msg, e):
         """Chamado quando ocorre um erro de sintaxe"""
@@ -26,105 +30,148 @@ class LexicoErrorListener(ErrorListener):
         self.errors.append(error_msg)
         self.log(error_msg)
     
-    def log(self, message):
-        print(message)
-        self.log_buffer.append(message)
-        
-        if self.output_file:
-            with open(self.output_file, 'a', encoding='utf-8') as f:
-                f.write(f"{message}\n")
+    def log(self, message, level=ERROR):
+        self.logger.write(level, message)
+    
+    @property
+    def log_buffer(self):
+        """Últimas mensagens (quantidade limitada, ver CompilerLog.recent)."""
+        return self.logger.recent
     
     def get_errors(self):
         return self.errors
 
 class Scanner:
-    def __init__(self, lexer_class, input_file, log_file=None, output_file=None):
+    # Quantidade de linhas formatadas acumuladas antes de cada escrita em lote
+    WRITE_BATCH = 65536
+
+    def __init__(self, lexer_class, input_file, log_file=None, output_file=None, jobs=1, output_format='texto',
+                 *, logger=None):
         self.lexer_class = lexer_class
         self.input_file = input_file
         self.log_file = log_file
+        # Um único CompilerLog por execução, dividido com o listener de erros.
+        # Sem `logger`, cada analyze() abre o seu sobre log_file (truncado) e o
+        # fecha no fim, como o Scanner fazia antes do log compartilhado.
+        self._own_logger = logger is None
+        self.logger = logger if logger is not None else CompilerLog(echo=True)
         self.output_file = output_file
-        self.tokens = []
+        self.jobs = jobs
+        self.output_format = output_format
+        self.tokens = TokenStore()
         self.errors = []
-        self.log_buffer = []
-        self.lexer = None
-        self.error_listener = LexicoErrorListener(log_file)
+        self.error_listener = LexicoErrorListener(self.logger)
     
-    def log(self, message):
-        print(message)
-        self.log_buffer.append(message)
-        
-        if self.log_file:
-            with open(self.log_file, 'a', encoding='utf-8') as f:
-                f.write(f"{message}\n")
+    def log(self, message, level=INFO):
+        self.logger.write(level, message)
+    
+    @property
+    def log_buffer(self):
+        """Últimas mensagens (quantidade limitada, ver CompilerLog.recent)."""
+        return self.logger.recent
     
-    def save_tokens(self):
-        if self.output_file:
-            with open(self.output_file, 'w', encoding='utf-8') as f:
-                for token in self.tokens:
-                    f.write(f"{self.format_token(token)}\n")
-            self.log(f"Tokens salvos em {self.output_file}")
+    def _write_lines(self, f, lines):
+        batch = []
+        for line in lines:
+            batch.append(line)
+            if len(batch) == self.WRITE_BATCH:
+                f.write('\n'.join(batch) + '\n')
+                batch.clear()
+        if batch:
+            f.write('\n'.join(batch) + '\n')
+    
+    def _lexical_error(self, i):
+        store = self.tokens
+        error_msg = f"ERRO LÉXICO [Linha {store.lines[i]}, Coluna {store.columns[i]}]: Símbolo '{store.text(i)}' inválido"
+        self.errors.append(error_msg)
+        self.log(error_msg, ERROR)
     
-    def format_token(self, token):
-        token_name = self.lexer.symbolicNames[token.type]
-        if not token_name:
-            token_name = str(token.type)
-        return f"<{token_name},{token.text}> [L{token.line},C{token.column}]"
+    def _report_tokens(self):
+        """Registra cada token no log formatando-o uma única vez; a mesma linha é repassada para o arquivo de saída."""
+        store = self.tokens
+        error_type = self.lexer_class.symbolicNames.index("ErrorChar")
+        trace = self.logger.enabled(DEBUG)
+        for i, line in enumerate(store.format_lines(self.lexer_class.symbolicNames)):
+            if store.types[i] == error_type:
+                self._lexical_error(i)
+            elif trace:
+                self.log(f"Token encontrado: {line}", DEBUG)
+            yield line
+    
+    def _report_errors(self):
+        """Como _report_tokens, sem formatar os tokens (sem arquivo de texto e sem log por token)."""
+        error_type = self.lexer_class.symbolicNames.index("ErrorChar")
+        for i, token_type in enumerate(self.tokens.types):
+            if token_type == error_type:
+                self._lexical_error(i)
     
     def analyze(self):
+        if not self._own_logger:
+            return self._analyze()
+        self.logger = self.error_listener.logger = CompilerLog(self.log_file, echo=True)
+        try:
+            return self._analyze()
+        finally:
+            self.logger.close()
+
+    def _analyze(self):
         try:
-            if self.log_file:
-                open(self.log_file, 'w').close()
-            
             self.log(f"Iniciando análise léxica do arquivo: {self.input_file}")
             
-            input_stream = FileStream(self.input_file, encoding='utf-8')
-            self.lexer = self.lexer_class(input_stream)
+            input_stream = open_source(self.input_file)
             
-            self.lexer.removeErrorListeners()
-            self.lexer.addErrorListener(self.error_listener)
+            if self.jobs > 1:
+                # Modo paralelo: blocos de linhas analisados em processos separados
+                self.tokens = lex_parallel_store(input_stream, self.lexer_class, self.jobs)
+            else:
+                self.tokens = tokenize(input_stream, self.lexer_class, self.error_listener)
             
-            token_stream = CommonTokenStream(self.lexer)
-            token_stream.fill()
-            
-            self.tokens = [t for t in token_stream.tokens if t.type != Token.EOF]
-            
-            for token in self.tokens:
-                token_name = self.lexer.symbolicNames[token.type]
-                
-                if token_name == "ErrorChar":
-                    char = token.text
-                    error_msg = f"ERRO LÉXICO [Linha {token.line}, Coluna {token.column}]: Símbolo '{char}' inválido"
-                    self.errors.append(error_msg)
-                    self.log(error_msg)
-                else:
-                    self.log(f"Token encontrado: {self.format_token(token)}")
+            if self.output_file and self.output_format == 'texto':
+                with open(self.output_file, 'w', encoding='utf-8') as f:
+                    self._write_lines(f, self._report_tokens())
+            elif self.logger.enabled(DEBUG):
+                for _ in self._report_tokens():
+                    pass
+            else:
+                self._report_errors()
             
             self.errors.extend(self.error_listener.get_errors())
             
             self.log(f"Análise léxica concluída. {len(self.tokens)} tokens encontrados, {len(self.errors)} erros.")
             
-            self.save_tokens()
+            if self.output_file:
+                if self.output_format == 'binario':
+                    self.tokens.save(self.output_file)
+                self.log(f"Tokens salvos em {self.output_file}")
             
             return self.tokens, self.errors
         
         except Exception as e:
             error_msg = f"Erro ao analisar o arquivo: {str(e)}"
-            self.log(error_msg)
-            return [], [error_msg]
+            self.log(error_msg, ERROR)
+            return TokenStore(), [error_msg]
 
 
 def main():
-    if len(sys.argv) < 3:
-        print("Uso: python scanner.py <arquivo_entrada> <arquivo_saida> [arquivo_log]")
-        sys.exit(1)
-    
-    input_file = sys.argv[1]
-    output_file = sys.argv[2]
-    log_file = sys.argv[3] if len(sys.argv) > 3 else None
+    arg_parser = argparse.ArgumentParser(description='Analisador léxico da linguagem LION.')
+    arg_parser.add_argument('input_file', help="Arquivo de código-fonte ('-' para ler da entrada padrão).")
+    arg_parser.add_argument('output_file', help='Arquivo onde os tokens serão salvos.')
+    arg_parser.add_argument('log_file', nargs='?', default=None, help='Arquivo de log (opcional).')
+    arg_parser.add_argument('--lexer', choices=LEXER_CHOICES, default='antlr', help='Analisador léxico a ser usado (padrão: antlr).')
+    arg_parser.add_argument('--lexer-jobs', type=int, default=1, help='Número de processos para a análise léxica paralela (padrão: 1).')
+    arg_parser.add_argument('--formato-saida', choices=['texto', 'binario'], default='texto', help='Formato do arquivo de tokens (padrão: texto).')
+    arg_parser.add_argument('--log', choices=LOG_LEVELS, default='detalhe', help='Nível das mensagens impressas e gravadas no log (padrão: detalhe, uma linha por token).')
+    arg_parser.add_argument('--log-thread', action='store_true', help='Grava o arquivo de log em uma thread separada.')
+    args = arg_parser.parse_args()
     
     try:
-        scanner = Scanner(ExprLexer, input_file, log_file, output_file)
-        tokens, errors = scanner.analyze()
+        # O arquivo de log é truncado ao ser aberto
+        with CompilerLog(args.log_file, LOG_LEVELS[args.log], echo=True, background=args.log_thread) as log:
+            scanner = Scanner(get_lexer_class(args.lexer), args.input_file, output_file=args.output_file,
+                              jobs=args.lexer_jobs, output_format=args.formato_saida, logger=log)
+            tokens, errors = scanner.analyze()
+            # O store (e o mapeamento, se houver) não é mais usado
+            tokens.close()
         
         if errors:
             print(f"\nAnálise concluída com {len(errors)} erros:")
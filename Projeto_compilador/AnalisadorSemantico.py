@@ -1,149 +1,343 @@
 from antlr4 import *
 from ExprLexer import ExprLexer
 from ExprParser import ExprParser
+from source_input import open_source
+from compiler_log import CompilerLog, DEBUG, ERROR
+from symbol_table import SymbolTable
+from lion_ast import (Program, VarDecl, Assign, Read, Write, If, While,
+                      Name, Number, String, Paren, Concat, Arith, Compare, Logical, Not,
+                      lower)
+
+# Categoria de uma expressão da AST, como a alternativa do ExprParser que a
+# originou: 'logic' (LogicExpr), 'arith' (ArithExpr) ou 'expr' (as demais).
+# Parênteses tomam a categoria do que envolvem.
+LOGIC_NODES = (Logical, Compare, Not)
+ARITH_NODES = (Arith, Name, Number)
+CATEGORY = dict.fromkeys(LOGIC_NODES, "logic")
+CATEGORY.update(dict.fromkeys(ARITH_NODES, "arith"))
+
+def expression_category(node):
+    while type(node) is Paren:
+        node = node.expr
+    return CATEGORY.get(type(node), "expr")
+
+# Como eval_expression trata cada classe de nó
+E_TEXT, E_CONCAT, E_LOGIC, E_ARITH, E_PAREN = range(5)
+EVAL_KIND = {String: E_TEXT, Concat: E_CONCAT, Paren: E_PAREN}
+EVAL_KIND.update(dict.fromkeys(LOGIC_NODES, E_LOGIC))
+EVAL_KIND.update(dict.fromkeys(ARITH_NODES, E_ARITH))
+
+NODE_CLASSES = (Program, VarDecl, Assign, Read, Write, If, While,
+                Name, Number, String, Paren, Concat, Arith, Compare, Logical, Not)
+# Mensagens de log de cada classe, montadas uma vez só
+VISIT_MESSAGES = {cls: f"[LOG] Visitando nó: {cls.__name__}" for cls in NODE_CLASSES}
+EVAL_MESSAGES = {cls: f"[LOG] Avaliando expressão: {cls.__name__}" for cls in NODE_CLASSES}
+
+# Marcadores empilhados em volta dos blocos de if/else/while: abrem e fecham
+# o escopo do bloco na tabela de símbolos quando saem da pilha
+class EnterScope:
+    __slots__ = ()
+
+class ExitScope:
+    __slots__ = ()
+
+ENTER_SCOPE, EXIT_SCOPE = EnterScope(), ExitScope()
+
+# --- Filhos de cada classe, empilhados em ordem inversa para saírem na ordem do código ---
+
+def _push_body(node, pending):
+    pending.extend(reversed(node.body))
+
+def _push_block(body, pending):
+    pending.append(EXIT_SCOPE)
+    pending.extend(reversed(body))
+    pending.append(ENTER_SCOPE)
+
+def _push_if(node, pending):
+    if node.else_body is not None:
+        _push_block(node.else_body, pending)
+    _push_block(node.then_body, pending)
+    pending.append(node.cond)
+
+def _push_while(node, pending):
+    _push_block(node.body, pending)
+    pending.append(node.cond)
+
+def _push_expr(node, pending):
+    pending.append(node.expr)
+
+def _push_operands(node, pending):
+    pending.extend(reversed(node.operands))
+
+def _push_compare(node, pending):
+    pending.append(node.right)
+    pending.append(node.left)
+
+def _push_operand(node, pending):
+    pending.append(node.operand)
+
+PUSH_CHILDREN = {
+    Program: _push_body, If: _push_if, While: _push_while,
+    # Folhas: nada a empilhar
+    Read: None, Name: None, Number: None, String: None,
+    Write: _push_expr, Paren: _push_expr, Compare: _push_compare, Not: _push_operand,
+    Concat: _push_operands, Arith: _push_operands, Logical: _push_operands,
+}
+
+# --- Tipos anotados nas expressões (SemanticAnalyzer.annotate) ---
+# Tipo do resultado de cada classe e tipos aceitos nos operandos (None: folha).
+# Compare aceita dois operandos de um mesmo tipo; Name e Paren são tratados à
+# parte. Um nó cujos operandos não combinam fica com tipo None.
+RESULT_TYPE = {Number: "int", String: "text", Concat: "text", Arith: "int",
+               Compare: "bool", Logical: "bool", Not: "bool"}
+OPERAND_TYPES = {Number: None, String: None, Concat: frozenset(("text",)), Arith: frozenset(("int",)),
+                 Logical: frozenset(("int", "bool")), Not: frozenset(("int", "bool"))}
 
 class SemanticAnalyzer:
-    def __init__(self, log_file):
-        self.symbol_table = {}
+    def __init__(self, logger=None, symbols=None):
+        # Tabela de símbolos com escopos por bloco (symbol_table.py), repassada
+        # depois ao TACGenerator e ao LLVMGenerator
+        self.symbols = symbols if symbols is not None else SymbolTable()
         self.errors = []
-        self.log_file = log_file
+        # CompilerLog compartilhado com as outras fases (None: sem log). As
+        # mensagens por nó só são montadas quando `trace` está ligado.
+        self.logger = logger
+        self.trace = logger is not None and logger.enabled(DEBUG)
+        # Tratamento de cada classe de nó em visit(): mensagem de log e função
+        # (nó, pilha) ou None; as que não fazem verificações só empilham os filhos
+        self._visitors = {cls: (VISIT_MESSAGES[cls], push) for cls, push in PUSH_CHILDREN.items()}
+        self._visitors[VarDecl] = (VISIT_MESSAGES[VarDecl], self._visit_var_decl)
+        self._visitors[Assign] = (VISIT_MESSAGES[Assign], self._visit_assign)
+        self._visitors[Read] = (VISIT_MESSAGES[Read], self._visit_read)
+        self._visitors[Write] = (VISIT_MESSAGES[Write], self._visit_write)
+        self._visitors[If] = (VISIT_MESSAGES[If], self._visit_if)
+        self._visitors[While] = (VISIT_MESSAGES[While], self._visit_while)
+        # Marcadores de escopo: sem mensagem de log
+        self._visitors[EnterScope] = (None, lambda node, pending: self.symbols.enter_scope())
+        self._visitors[ExitScope] = (None, lambda node, pending: self.symbols.exit_scope())
 
-    def log(self, message):
-        with open(self.log_file, 'a', encoding='utf-8') as f:
-            f.write(message + '\n')
+    def log(self, message, level=DEBUG):
+        if self.logger is not None:
+            self.logger.write(level, message)
 
-    def analyze(self, ctx):
-        self.visit(ctx)
+    def _error(self, erro):
+        self.errors.append(erro)
+        self.log(f"[ERRO] {erro}", ERROR)
+
+    def analyze(self, node):
+        self.visit(node)
+        # O TACGenerator refaz as ligações na ordem das declarações
+        self.symbols.rewind()
         return self.errors
 
-    def visit(self, ctx):
-        node_name = type(ctx).__name__
-        self.log(f"[LOG] Visitando nó: {node_name}")
-
-        if node_name == "VariableDeclarationContext":
-            var_name = ctx.ID().getText()
-            var_type = ctx.type_().getText()
-            if var_name in self.symbol_table:
-                erro = f"Erro: variável '{var_name}' já declarada."
-                self.errors.append(erro)
-                self.log(f"[ERRO] {erro}")
+    def visit(self, node):
+        # Pré-ordem com uma pilha explícita, sem recursão, despachando pela
+        # classe do nó. If e While: a versão sobre a árvore do ANTLR procurava
+        # um filho cujo nome começasse com "ExpressionContext", o que nunca
+        # ocorre (as alternativas rotuladas geram LogicExprContext etc.), então
+        # o tipo da condição não é verificado. Mantido assim para que os
+        # diagnósticos não mudem.
+        # Os nós já trazem o ID do nome: com a tabela estendida até o último
+        # nome internado, as consultas abaixo indexam `visible` direto
+        self.symbols.reserve()
+        visitors = self._visitors
+        trace = self.trace
+        write = self.logger.write if trace else None
+        pending = [node]
+        while pending:
+            node = pending.pop()
+            message, visitor = visitors[type(node)]
+            if trace and message is not None:
+                write(DEBUG, message)
+            if visitor is not None:
+                visitor(node, pending)
+
+    def annotate(self, node):
+        """
+        Anota em `type` o tipo de cada nó da expressão `node`. Os nós são
+        listados em largura (cada um antes dos seus filhos) e tipados com a
+        lista ao contrário, então os filhos sempre antes dos pais. Cada
+        identificador sem declaração visível é um erro, na ordem do código:
+        o TACGenerator não teria o que ligar a ele. As demais verificações e
+        mensagens continuam em eval_expression.
+        """
+        cls = type(node)
+        if cls is Number:
+            # Atalho para o caso mais comum, a expressão de um só literal
+            node.type = "int"
+            return
+        visible = self.symbols.visible
+        declared = self.symbols.symbols
+        order = [node]
+        for node in order:
+            cls = type(node)
+            if cls is Arith or cls is Concat or cls is Logical:
+                order.extend(node.operands)
+            elif cls is Compare:
+                order.append(node.left)
+                order.append(node.right)
+            elif cls is Paren:
+                order.append(node.expr)
+            elif cls is Not:
+                order.append(node.operand)
+        undeclared = None
+        for node in reversed(order):
+            cls = type(node)
+            if cls is Name:
+                symbol = visible[node.name_id]
+                if symbol >= 0:
+                    node.type = declared[symbol].type_name
+                else:
+                    node.type = None
+                    if undeclared is None:
+                        undeclared = []
+                    undeclared.append(node)
+            elif cls is Paren:
+                node.type = node.expr.type
+            elif cls is Compare:
+                left = node.left.type
+                node.type = "bool" if left is not None and left == node.right.type else None
             else:
-                self.symbol_table[var_name] = var_type
+                accepted = OPERAND_TYPES[cls]
+                if accepted is None:
+                    node.type = RESULT_TYPE[cls]
+                else:
+                    operands = (node.operand,) if cls is Not else node.operands
+                    for operand in operands:
+                        if operand.type not in accepted:
+                            node.type = None
+                            break
+                    else:
+                        node.type = RESULT_TYPE[cls]
+        if undeclared is not None:
+            undeclared.sort(key=lambda name: (name.line, name.column))
+            for name in undeclared:
+                self._error(f"Erro: variável '{name.name}' não declarada em expressão.")
+
+    def _visit_write(self, node, pending):
+        self.annotate(node.expr)
+        _push_expr(node, pending)
+
+    def _visit_if(self, node, pending):
+        self.annotate(node.cond)
+        _push_if(node, pending)
+
+    def _visit_while(self, node, pending):
+        self.annotate(node.cond)
+        _push_while(node, pending)
+
+    def _visit_var_decl(self, node, pending):
+        var_name = node.name
+        var_type = node.type_name
+        # Só é erro redeclarar no mesmo escopo; em um bloco interno a nova
+        # declaração esconde a de fora até o fim do bloco
+        node.symbol = self.symbols.declare(node.name_id, var_type)
+        if node.symbol < 0:
+            self._error(f"Erro: variável '{var_name}' já declarada.")
+        else:
+            if self.trace:
                 self.log(f"[LOG] Declarando variável '{var_name}' do tipo '{var_type}'")
-            for child in ctx.getChildren():
-                if isinstance(child, ParserRuleContext):
-                    self.visit(child)
 
-        elif node_name == "AssignmentContext":
-            var_name = ctx.ID().getText()
-            expr_ctx = ctx.expression()
+    def _visit_read(self, node, pending):
+        if self.symbols.visible[node.name_id] < 0:
+            self._error(f"Erro: variável '{node.name}' não declarada.")
+
+    def _visit_assign(self, node, pending):
+        var_name = node.name
+        if self.trace:
             self.log(f"[LOG] Atribuindo valor à variável '{var_name}'")
 
-            if var_name not in self.symbol_table:
-                erro = f"Erro: variável '{var_name}' não declarada."
-                self.errors.append(erro)
-                self.log(f"[ERRO] {erro}")
-                self.visit(expr_ctx)
-            else:
-                expected_type = self.symbol_table[var_name]
-                expr_type = self.eval_expression(expr_ctx)
-                if expr_type is None:
-                    pass
-                elif expr_type != expected_type:
-                    erro = (f"Erro: tipo incompatível na atribuição à variável '{var_name}'. "
+        symbol = self.symbols.visible[node.name_id]
+        if symbol < 0:
+            self._error(f"Erro: variável '{var_name}' não declarada.")
+            self.annotate(node.expr)
+            # A expressão é visitada logo em seguida, antes do próximo comando
+            pending.append(node.expr)
+        else:
+            self.annotate(node.expr)
+            expected_type = self.symbols.symbols[symbol].type_name
+            expr_type = self.eval_expression(node.expr)
+            if expr_type is None:
+                pass
+            elif expr_type != expected_type:
+                self._error(f"Erro: tipo incompatível na atribuição à variável '{var_name}'. "
                             f"Esperado '{expected_type}', encontrado '{expr_type}'.")
-                    self.errors.append(erro)
-                    self.log(f"[ERRO] {erro}")
-
-        elif node_name in ("IfCommandContext", "WhileCommandContext"):
-            expr_ctx = None
-            for child in ctx.getChildren():
-                if type(child).__name__.startswith("ExpressionContext"):
-                    expr_ctx = child
+
+    def eval_expression(self, node):
+        # Sem recursão: cada Concat em avaliação fica em `concats` como
+        # [nó, índice do operando sendo avaliado, tipo acumulado]. Parênteses
+        # fora das categorias lógica/aritmética devolvem o tipo do conteúdo,
+        # então basta descer para ele.
+        concats = []
+        trace = self.trace
+        while True:
+            if trace:
+                self.log(EVAL_MESSAGES[type(node)])
+            kind = EVAL_KIND.get(type(node))
+
+            if kind == E_CONCAT:
+                concats.append([node, 0, None])
+                node = node.operands[0]
+                continue
+            if kind == E_PAREN:
+                category = expression_category(node)
+                if category == "expr":
+                    node = node.expr
+                    continue
+                kind = E_LOGIC if category == "logic" else E_ARITH
+            if kind == E_TEXT:
+                result = "text"
+            elif kind == E_LOGIC:
+                result = self.eval_logical_expression(node)
+            elif kind == E_ARITH:
+                result = self.eval_arithmetic_expression(node)
+            else:
+                result = None
+
+            # Entrega o resultado aos Concat abertos até algum ter outro operando
+            while concats:
+                frame = concats[-1]
+                concat, index, left_type = frame
+                if index == 0:
+                    left_type = result
+                elif left_type == "text" and result == "text":
+                    left_type = "text"
+                else:
+                    self._error("Erro: operador '+' para concatenação requer dois textos.")
+                    left_type = None
+                index += 1
+                if index < len(concat.operands):
+                    frame[1], frame[2] = index, left_type
+                    node = concat.operands[index]
                     break
-            if expr_ctx:
-                expr_type = self.eval_expression(expr_ctx)
-                if expr_type != "bool":
-                    erro = (f"Erro: expressão condicional deve ser do tipo bool, encontrado '{expr_type}'.")
-                    self.errors.append(erro)
-                    self.log(f"[ERRO] {erro}")
-            for child in ctx.getChildren():
-                if isinstance(child, ParserRuleContext):
-                    self.visit(child)
-        else:
-            for child in ctx.getChildren():
-                if isinstance(child, ParserRuleContext):
-                    self.visit(child)
-
-    def eval_expression(self, ctx):
-        node_name = type(ctx).__name__
-        self.log(f"[LOG] Avaliando expressão: {node_name}")
-
-        if hasattr(ctx, "STRING") and ctx.STRING():
-            return "text"
-        if hasattr(ctx, "NUMBER") and ctx.NUMBER():
-            return "int"
-        if hasattr(ctx, "ID") and ctx.ID():
-            var_name = ctx.ID().getText()
-            if var_name not in self.symbol_table:
-                erro = f"Erro: variável '{var_name}' não declarada."
-                self.errors.append(erro)
-                self.log(f"[ERRO] {erro}")
-                return None
-            return self.symbol_table[var_name]
-        if node_name == "ParenExprContext":
-            return self.eval_expression(ctx.expression())
-        if node_name == "ConcatExprContext":
-            left_type = self.eval_expression(ctx.expression(0))
-            right_type = self.eval_expression(ctx.expression(1))
-            if left_type == "text" and right_type == "text":
-                return "text"
+                concats.pop()
+                result = left_type
             else:
-                erro = "Erro: operador '+' para concatenação requer dois textos."
-                self.errors.append(erro)
-                self.log(f"[ERRO] {erro}")
-                return None
-        if node_name == "LogicExprContext":
-            return self.eval_logical_expression(ctx.logicalExpression())
-        if node_name == "ArithExprContext":
-            return self.eval_arithmetic_expression(ctx.arithmeticExpression())
-
-        return None
-
-    def eval_logical_expression(self, ctx):
-        self.log(f"[LOG] Avaliando expressão lógica")
+                return result
+
+    def eval_logical_expression(self, node):
+        if self.trace:
+            self.log("[LOG] Avaliando expressão lógica")
         return "bool"
 
-    def eval_arithmetic_expression(self, ctx):
-        self.log(f"[LOG] Avaliando expressão aritmética")
-        tokens = ctx.getChildren()
-        for child in tokens:
-            if hasattr(child, "getText") and child.getText() is not None:
-                text = child.getText()
-                if text == '/':
-                    right = list(tokens)[-1].getText()
-                    if right == '0':
-                        erro = "Erro: divisão por zero detectada."
-                        self.errors.append(erro)
-                        self.log(f"[ERRO] {erro}")
-                elif text.isidentifier() and text not in self.symbol_table:
-                    erro = f"Erro: variável '{text}' não declarada em expressão aritmética."
-                    self.errors.append(erro)
-                    self.log(f"[ERRO] {erro}")
+    def eval_arithmetic_expression(self, node):
+        if self.trace:
+            self.log("[LOG] Avaliando expressão aritmética")
+        # Identificadores sem declaração já foram relatados por annotate()
         return "int"
 
 def main(file_path, log_path):
-    input_stream = FileStream(file_path, encoding="utf-8")
+    input_stream = open_source(file_path)
     lexer = ExprLexer(input_stream)
     tokens = CommonTokenStream(lexer)
     parser = ExprParser(tokens)
-    tree = parser.program()
-
-    # Limpa o arquivo de log antes de iniciar
-    open(log_path, 'w').close()
+    symbols = SymbolTable()
+    program = lower(parser.program(), symbols.names)
 
-    semantic = SemanticAnalyzer(log_path)
-    errors = semantic.analyze(tree)
+    # O arquivo de log é truncado ao ser aberto
+    with CompilerLog(log_path) as log:
+        semantic = SemanticAnalyzer(log, symbols)
+        errors = semantic.analyze(program)
 
     # Apenas imprime o resultado no terminal
     print("\n=== Resultado da Análise Semântica ===")
@@ -2,6 +2,9 @@ from antlr4 import *
 from ExprLexer import ExprLexer
 from ExprParser import ExprParser
 from antlr4.error.ErrorListener import ErrorListener
+from source_input import open_source
+from lion_ast import lower
+from symbol_table import NameTable
 import graphviz
 import sys
 
@@ -16,11 +19,14 @@ class ASTNode:
     def to_dot(self, dot=None, parent=None):
         if dot is None:
             dot = graphviz.Digraph()
-        dot.node(str(id(self)), self.name)
-        if parent:
-            dot.edge(str(id(parent)), str(id(self)))
-        for child in self.children:
-            child.to_dot(dot, self)
+        # Pré-ordem com uma pilha explícita de (nó, pai), sem recursão
+        pending = [(self, parent)]
+        while pending:
+            node, parent = pending.pop()
+            dot.node(str(id(node)), node.name)
+            if parent:
+                dot.edge(str(id(parent)), str(id(node)))
+            pending.extend((child, node) for child in reversed(node.children))
         return dot
 
 class CustomErrorListener(ErrorListener):
@@ -35,17 +41,56 @@ class CustomErrorListener(ErrorListener):
     def get_errors(self):
         return self.errors
 
-def build_ast(ctx):
-    node = ASTNode(type(ctx).__name__)
-    for child in ctx.getChildren():
-        if isinstance(child, ParserRuleContext):
-            node.add_child(build_ast(child))
-        else:
-            node.add_child(ASTNode(child.getText()))
-    return node
+# Atributos exibidos no rótulo de cada nó da AST compacta
+LABEL_FIELDS = {
+    "VarDecl": ("name", "type_name"),
+    "Assign": ("name",),
+    "Read": ("name",),
+    "Name": ("name",),
+    "Number": ("text",),
+    "String": ("text",),
+    "Arith": ("ops",),
+    "Compare": ("op",),
+    "Logical": ("op",),
+}
+
+def _label(node):
+    node_name = type(node).__name__
+    values = [getattr(node, field) for field in LABEL_FIELDS.get(node_name, ())]
+    return " ".join([node_name] + [" ".join(v) if isinstance(v, tuple) else v for v in values])
+
+def build_ast(node):
+    # Pré-ordem com uma pilha explícita de (nó da AST compacta ou lista de
+    # comandos de um bloco, nome do bloco, pai), sem recursão: cada ASTNode
+    # entra na lista de filhos do pai quando sai da pilha, na ordem do código
+    root = ASTNode(None)
+    pending = [(node, None, root)]
+    while pending:
+        node, block_name, parent = pending.pop()
+        if block_name is not None:
+            # Blocos de comandos viram um nó intermediário (then/else/corpo)
+            block = ASTNode(block_name)
+            parent.add_child(block)
+            pending.extend((statement, None, block) for statement in reversed(node))
+            continue
+        ast_node = ASTNode(_label(node))
+        parent.add_child(ast_node)
+        children = []
+        for field in node._fields:
+            value = getattr(node, field)
+            if value is None:
+                continue
+            if field.endswith("body"):
+                children.append((value, field, ast_node))
+            elif isinstance(value, list):
+                children.extend((child, None, ast_node) for child in value)
+            else:
+                children.append((value, None, ast_node))
+        pending.extend(reversed(children))
+    return root.children[0]
 
 def generate_ast(input_path, output_dot_path):
-    input_stream = FileStream(input_path, encoding='utf-8')
+    input_stream = open_source(input_path)
     lexer = ExprLexer(input_stream)
     token_stream = CommonTokenStream(lexer)
     parser = ExprParser(token_stream)
@@ -63,8 +108,8 @@ def generate_ast(input_path, output_dot_path):
         print("\n".join(errors))
         return
 
-    # Gera AST
-    ast_root = build_ast(tree)
+    # Gera AST (a partir da AST compacta, ver lion_ast.py)
+    ast_root = build_ast(lower(tree, NameTable()))
     dot = ast_root.to_dot()
     dot.render(output_dot_path, format='dot', cleanup=True)
     print(f"AST gerada com sucesso em: {output_dot_path}.dot")
@@ -1,5 +1,6 @@
 # Generated from Expr.g4 by ANTLR 4.13.2
 from antlr4 import *
+from atn_snapshot import load_atn
 from io import StringIO
 import sys
 if sys.version_info[1] > 5:
@@ -98,7 +99,7 @@ def serializedATN():
 
 class ExprLexer(Lexer):
 
-    atn = ATNDeserializer().deserialize(serializedATN())
+    atn = load_atn(serializedATN(), __file__)
 
     decisionsToDFA = [ DFA(ds, i) for i, ds in enumerate(atn.decisionToState) ]
 
@@ -1,6 +1,7 @@
 # Generated from Expr.g4 by ANTLR 4.13.2
 # encoding: utf-8
 from antlr4 import *
+from atn_snapshot import load_atn
 from io import StringIO
 import sys
 if sys.version_info[1] > 5:
@@ -79,7 +80,7 @@ class ExprParser ( Parser ):
 
     grammarFileName = "Expr.g4"
 
-    atn = ATNDeserializer().deserialize(serializedATN())
+    atn = load_atn(serializedATN(), __file__)
 
     decisionsToDFA = [ DFA(ds, i) for i, ds in enumerate(atn.decisionToState) ]
 
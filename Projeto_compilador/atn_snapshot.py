@@ -0,0 +1,280 @@
+# atn_snapshot.py
+#
+# Snapshots do ATN já desserializado do ExprParser e do ExprLexer. Os módulos
+# gerados pelo ANTLR reconstroem o ATN a partir de serializedATN() toda vez que
+# são importados; aqui o resultado dessa desserialização (estados, transições,
+# decisionToState, ruleToStartState, ações do lexer...) é gravado em um
+# arquivo <Modulo>.atnsnap ao lado do módulo e recarregado na importação.
+#
+# O arquivo é uma tabela de objetos lida com marshal, que não executa código:
+# os objetos ficam agrupados por classe, com uma coluna por atributo, e os
+# valores que apontam para outros objetos guardam o índice deles na tabela.
+# Na leitura só são criadas instâncias das classes do ATN do runtime
+# (estados, transições, ações do lexer, IntervalSet e o próprio ATN), sem
+# chamar __init__, e só os atributos declarados em __slots__ nelas são
+# preenchidos; qualquer outra coisa invalida o snapshot.
+#
+# Passo de build (rodar de novo sempre que o ANTLR regerar os analisadores):
+#     python atn_snapshot.py ExprParser ExprLexer
+# Com --patch, a linha `atn = ATNDeserializer().deserialize(serializedATN())`
+# dos módulos gerados é trocada por uma chamada a load_atn().
+#
+# O snapshot guarda o próprio serializedATN() de origem; se ele não bater com
+# o do módulo (gramática regerada), se o arquivo não existir ou estiver
+# corrompido, load_atn() volta para o ATNDeserializer sem reclamar.
+
+import argparse
+import importlib
+import inspect
+import marshal
+import os
+import re
+import sys
+
+from antlr4 import IntervalSet as interval_set_module
+from antlr4.atn import ATN as atn_module
+from antlr4.atn import ATNState as state_module
+from antlr4.atn import LexerAction as action_module
+from antlr4.atn import Transition as transition_module
+from antlr4.atn.ATNDeserializer import ATNDeserializer
+from antlr4.atn.ATNType import ATNType
+from antlr4.atn.LexerAction import LexerActionType
+
+SNAPSHOT_MAGIC = b'LIONATN'
+SNAPSHOT_VERSION = 2
+SNAPSHOT_ENV = 'LION_ATN_SNAPSHOT_DIR'
+
+_DESERIALIZE_LINE = re.compile(r'^(\s*)atn = ATNDeserializer\(\)\.deserialize\(serializedATN\(\)\)$', re.MULTILINE)
+_LOADER_IMPORT = 'from atn_snapshot import load_atn\n'
+
+
+def _attributes(cls):
+    # Atributos declarados em __slots__ pela classe e pelas bases (um
+    # __slots__ de um nome só pode ser a própria string)
+    names = set()
+    for base in cls.__mro__:
+        slots = base.__dict__.get('__slots__', ())
+        names.update((slots,) if type(slots) is str else slots)
+    return frozenset(names)
+
+
+# Classes que um snapshot pode instanciar, com os atributos de cada uma
+_CLASSES = {cls.__name__: (cls, _attributes(cls))
+            for module in (atn_module, state_module, transition_module, action_module, interval_set_module)
+            for _, cls in inspect.getmembers(module, inspect.isclass)
+            if cls.__module__ == module.__name__ and not issubclass(cls, LexerActionType)}
+_ENUMS = {'ATNType': ATNType, 'LexerActionType': LexerActionType}
+
+
+# Como cada coluna de atributo é gravada: valores do marshal como estão, um
+# objeto da tabela (pelo índice), uma lista de objetos, ou valores marcados
+# (_encode_value) para o resto
+COLUMN_PLAIN, COLUMN_OBJECT, COLUMN_OBJECTS, COLUMN_TAGGED = range(4)
+_PLAIN_TYPES = (int, bool, str, type(None))
+
+
+def _encode_atn(atn):
+    """
+    Tabela de objetos alcançáveis a partir do ATN, agrupados por classe e com
+    um atributo por coluna: [(classe, quantidade, [(atributo, tipo da
+    coluna, valores)])]. Os objetos são numerados na ordem dos grupos, com o
+    ATN no índice 0.
+    """
+    order = [atn]
+    seen = {id(atn)}
+
+    def references(value):
+        kind = type(value)
+        if kind is list or kind is tuple:
+            for item in value:
+                yield from references(item)
+        elif kind is dict:
+            for item in value.values():
+                yield from references(item)
+        elif kind.__name__ in _CLASSES and getattr(kind, 'INSTANCE', None) is not value:
+            yield value
+
+    # Descobre os objetos e os agrupa por classe, ATN primeiro
+    for value in order:
+        if _CLASSES.get(type(value).__name__, (None,))[0] is not type(value):
+            raise ValueError(f"Valor sem representação no snapshot: {value!r}")
+        if getattr(value, '__dict__', None):
+            raise ValueError(f"Atributos fora de __slots__ em {value!r}")
+        for name in _CLASSES[type(value).__name__][1]:
+            for referenced in references(getattr(value, name, None)):
+                if id(referenced) not in seen:
+                    seen.add(id(referenced))
+                    order.append(referenced)
+    groups = {}
+    for value in order:
+        groups.setdefault(type(value), []).append(value)
+    indexes = {}
+    for group in groups.values():
+        for value in group:
+            indexes[id(value)] = len(indexes)
+
+    def encode_value(value):
+        kind = type(value)
+        if kind in _PLAIN_TYPES:
+            return value
+        if kind is list:
+            return [encode_value(item) for item in value]
+        if kind is dict:
+            return {key: encode_value(item) for key, item in value.items()}
+        if kind is range:
+            return ('range', value.start, value.stop)
+        if kind in _ENUMS.values():
+            return ('enum', kind.__name__, value.name)
+        if getattr(kind, 'INSTANCE', None) is value:
+            # Ações sem parâmetros do lexer: singletons comparados por
+            # identidade no runtime
+            return ('instance', kind.__name__)
+        return ('object', indexes[id(value)])
+
+    table = []
+    for cls, group in groups.items():
+        columns = []
+        for name in sorted(_CLASSES[cls.__name__][1]):
+            missing = object()
+            values = [getattr(value, name, missing) for value in group]
+            if all(value is missing for value in values):
+                continue
+            if all(type(value) in _PLAIN_TYPES for value in values):
+                columns.append((name, COLUMN_PLAIN, values))
+            elif all(id(value) in indexes for value in values):
+                columns.append((name, COLUMN_OBJECT, [indexes[id(value)] for value in values]))
+            elif all(type(value) is list and all(id(item) in indexes for item in value) for value in values):
+                columns.append((name, COLUMN_OBJECTS, [[indexes[id(item)] for item in value]
+                                                       for value in values]))
+            else:
+                columns.append((name, COLUMN_TAGGED, [('missing',) if value is missing else encode_value(value)
+                                                      for value in values]))
+        table.append((cls.__name__, len(group), columns))
+    return table
+
+
+def _decode_value(value, objects):
+    kind = type(value)
+    if kind is tuple:
+        tag = value[0]
+        if tag == 'object':
+            return objects[value[1]]
+        if tag == 'range':
+            return range(value[1], value[2])
+        if tag == 'enum':
+            return _ENUMS[value[1]][value[2]]
+        if tag == 'instance':
+            return _CLASSES[value[1]][0].INSTANCE
+        raise ValueError(f"Valor desconhecido no snapshot: {value!r}")
+    if kind is list:
+        return [_decode_value(item, objects) for item in value]
+    if kind is dict:
+        return {key: _decode_value(item, objects) for key, item in value.items()}
+    return value
+
+
+def _decode_atn(table):
+    """Reconstrói o ATN de _encode_atn; ValueError, KeyError, TypeError... se a tabela não for válida."""
+    objects = []
+    groups = []
+    for name, count, columns in table:
+        cls, allowed = _CLASSES[name]
+        start = len(objects)
+        objects.extend(cls.__new__(cls) for _ in range(count))
+        groups.append((objects[start:], allowed, columns))
+    for group, allowed, columns in groups:
+        for name, kind, values in columns:
+            if name not in allowed or len(values) != len(group):
+                raise ValueError(f"Coluna {name!r} inválida no snapshot")
+            if kind == COLUMN_PLAIN:
+                for value, column_value in zip(group, values):
+                    if type(column_value) not in _PLAIN_TYPES:
+                        raise ValueError(f"Valor inválido na coluna {name!r}")
+                    setattr(value, name, column_value)
+            elif kind == COLUMN_OBJECT:
+                for value, index in zip(group, values):
+                    setattr(value, name, objects[index])
+            elif kind == COLUMN_OBJECTS:
+                for value, indexes in zip(group, values):
+                    setattr(value, name, [objects[index] for index in indexes])
+            elif kind == COLUMN_TAGGED:
+                for value, column_value in zip(group, values):
+                    if column_value != ('missing',):
+                        setattr(value, name, _decode_value(column_value, objects))
+            else:
+                raise ValueError(f"Tipo de coluna desconhecido: {kind!r}")
+    if not objects or type(objects[0]) is not atn_module.ATN:
+        raise ValueError("O primeiro objeto do snapshot não é um ATN")
+    return objects[0]
+
+
+def snapshot_path(module_file, directory=None):
+    """Caminho do snapshot de um módulo gerado ($LION_ATN_SNAPSHOT_DIR ou ao lado dele)."""
+    directory = directory or os.environ.get(SNAPSHOT_ENV) or os.path.dirname(os.path.abspath(module_file))
+    name = os.path.splitext(os.path.basename(module_file))[0]
+    return os.path.join(directory, f"{name}.atnsnap")
+
+
+def load_atn(serialized, module_file):
+    """Devolve o ATN do snapshot de `module_file`, ou o desserializa de `serialized`."""
+    try:
+        with open(snapshot_path(module_file), 'rb') as f:
+            if f.read(len(SNAPSHOT_MAGIC) + 1) == SNAPSHOT_MAGIC + bytes([SNAPSHOT_VERSION]):
+                data = marshal.loads(f.read())
+                if type(data) is tuple and len(data) == 2 and data[0] == serialized:
+                    return _decode_atn(data[1])
+    except (OSError, EOFError, ValueError, TypeError, KeyError, IndexError, AttributeError):
+        # Snapshot ausente, de outra versão do runtime ou corrompido
+        pass
+    return ATNDeserializer().deserialize(serialized)
+
+
+def write_snapshot(module, directory=None):
+    """Desserializa o ATN de `module` e grava o snapshot correspondente."""
+    serialized = module.serializedATN()
+    atn = ATNDeserializer().deserialize(serialized)
+    path = snapshot_path(module.__file__, directory)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    temp_path = path + '.tmp'
+    with open(temp_path, 'wb') as f:
+        f.write(SNAPSHOT_MAGIC + bytes([SNAPSHOT_VERSION]))
+        marshal.dump((serialized, _encode_atn(atn)), f)
+    os.replace(temp_path, path)
+    return path
+
+
+def patch_module(module_file):
+    """
+    Faz o módulo gerado carregar o ATN via load_atn(). Retorna False se ele
+    já estava ajustado.
+    """
+    with open(module_file, encoding='utf-8') as f:
+        source = f.read()
+    if _LOADER_IMPORT in source:
+        return False
+    source, count = _DESERIALIZE_LINE.subn(r'\1atn = load_atn(serializedATN(), __file__)', source)
+    if count != 1:
+        raise ValueError(f"Linha de desserialização do ATN não encontrada em {module_file}")
+    source = source.replace('from antlr4 import *\n', 'from antlr4 import *\n' + _LOADER_IMPORT, 1)
+    with open(module_file, 'w', encoding='utf-8') as f:
+        f.write(source)
+    return True
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description='Gera snapshots do ATN dos analisadores gerados pelo ANTLR.')
+    arg_parser.add_argument('modules', nargs='*', default=['ExprParser', 'ExprLexer'],
+                            help='Módulos gerados (padrão: ExprParser ExprLexer).')
+    arg_parser.add_argument('--patch', action='store_true', help='Ajusta os módulos para usar load_atn().')
+    arg_parser.add_argument('--dir', help=f'Diretório dos snapshots (padrão: ${SNAPSHOT_ENV} ou o do módulo).')
+    args = arg_parser.parse_args()
+
+    for name in args.modules:
+        module = importlib.import_module(name)
+        if args.patch and patch_module(module.__file__):
+            print(f"{module.__file__}: ajustado para usar load_atn()")
+        print(f"Snapshot gravado em: {write_snapshot(module, args.dir)}")
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,2007 @@
+# benchmark.py
+#
+# Medições de desempenho do compilador LION sobre programas gerados.
+# Uso: python benchmark.py <experimento> [opções]
+
+import argparse
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import time
+
+from antlr4 import DFA, InputStream, Token
+from antlr4.atn.PredictionMode import PredictionMode
+from antlr4.error.ErrorListener import ErrorListener
+
+
+def gerar_programa(linhas, semente=42):
+    """
+    Gera um programa LION válido com aproximadamente `linhas` linhas,
+    misturando declarações, atribuições, E/S, if/else, while e comentários.
+    """
+    rng = random.Random(semente)
+    variaveis = [f"v{i}" for i in range(8)]
+    textos = ["t0", "t1"]
+    saida = ["@start"]
+    for nome in variaveis:
+        saida.append(f"    roar {nome} as int;")
+    for nome in textos:
+        saida.append(f"    roar {nome} as text;")
+
+    def expressao_aritmetica():
+        termos = []
+        for _ in range(rng.randint(1, 4)):
+            if rng.random() < 0.5:
+                termos.append(rng.choice(variaveis))
+            else:
+                termos.append(str(rng.randint(0, 999)))
+        partes = [termos[0]]
+        for termo in termos[1:]:
+            partes.append(rng.choice(["+", "-", "*", "/"]))
+            partes.append(termo)
+        texto = " ".join(partes)
+        return f"({texto})" if rng.random() < 0.2 else texto
+
+    def condicao():
+        comparacao = f"{expressao_aritmetica()} {rng.choice(['==', '!=', '<', '>', '<=', '>='])} {expressao_aritmetica()}"
+        if rng.random() < 0.3:
+            outra = f"{rng.choice(variaveis)} > {rng.randint(0, 9)}"
+            return f"{comparacao} {rng.choice(['&&', '||'])} !{outra}"
+        return comparacao
+
+    while len(saida) < linhas - 1:
+        escolha = rng.random()
+        if escolha < 0.45:
+            saida.append(f"    {rng.choice(variaveis)} = {expressao_aritmetica()};")
+        elif escolha < 0.55:
+            saida.append(f"    {rng.choice(textos)} = \"texto {rng.randint(0, 99)}\" + {rng.choice(textos)};")
+        elif escolha < 0.65:
+            saida.append(f"    roarout({rng.choice(variaveis + textos)});")
+        elif escolha < 0.70:
+            saida.append(f"    hunt({rng.choice(variaveis)});")
+        elif escolha < 0.80:
+            saida.append(f"    // comentario {rng.randint(0, 9999)}")
+        elif escolha < 0.90:
+            saida.append(f"    if {condicao()} then {{")
+            saida.append(f"        {rng.choice(variaveis)} = {expressao_aritmetica()};")
+            saida.append("    } else {")
+            saida.append(f"        roarout(\"ramo {rng.randint(0, 99)}\");")
+            saida.append("    }")
+        else:
+            saida.append(f"    while {condicao()} strike {{")
+            saida.append(f"        {rng.choice(variaveis)} = {expressao_aritmetica()};")
+            saida.append("    }")
+    saida.append("@end")
+    return "\n".join(saida) + "\n"
+
+
+def _tokens_de(lexer_class, texto):
+    lexer = lexer_class(InputStream(texto))
+    tokens = []
+    token = lexer.nextToken()
+    while token.type != Token.EOF:
+        tokens.append(token)
+        token = lexer.nextToken()
+    tokens.append(token)
+    return tokens
+
+
+def _assinatura(token):
+    return (token.type, token.start, token.stop, token.line, token.column, token.text)
+
+
+def benchmark_lexico(args):
+    """Compara tokens/s do ExprLexer (ANTLR) com o FastLexer."""
+    from fast_lexer import get_lexer_class
+
+    for linhas in args.linhas:
+        texto = gerar_programa(linhas)
+        print(f"\n== {linhas} linhas ({len(texto)} caracteres) ==")
+        referencia = None
+        for nome in args.lexers:
+            lexer_class = get_lexer_class(nome)
+            inicio = time.perf_counter()
+            tokens = _tokens_de(lexer_class, texto)
+            duracao = time.perf_counter() - inicio
+            print(f"  {nome:>6}: {len(tokens):>9} tokens em {duracao:8.3f}s "
+                  f"({len(tokens) / duracao:>12,.0f} tokens/s)")
+            assinaturas = [_assinatura(t) for t in tokens]
+            if referencia is None:
+                referencia = assinaturas
+            elif assinaturas != referencia:
+                print(f"  ERRO: tokens do analisador '{nome}' divergem dos de '{args.lexers[0]}'")
+                return 1
+    return 0
+
+
+def benchmark_lexico_paralelo(args):
+    """Mede a escalabilidade da análise léxica paralela com o número de processos."""
+    from fast_lexer import get_lexer_class
+    from parallel_lexer import lex_parallel
+
+    lexer_class = get_lexer_class(args.lexer)
+    texto = gerar_programa(args.linhas)
+    entrada = InputStream(texto)
+    print(f"{args.linhas} linhas ({len(texto) / 1e6:.1f} MB), analisador '{args.lexer}'")
+    referencia = None
+    base = None
+    for jobs in args.jobs:
+        inicio = time.perf_counter()
+        tokens, _ = lex_parallel(entrada, lexer_class, jobs)
+        duracao = time.perf_counter() - inicio
+        base = base or duracao
+        print(f"  {jobs:>3} processo(s): {duracao:8.3f}s  ({len(tokens) / duracao:>12,.0f} tokens/s, "
+              f"speedup {base / duracao:4.2f}x)")
+        assinaturas = [_assinatura(t) + (t.tokenIndex,) for t in tokens]
+        if referencia is None:
+            referencia = assinaturas
+        elif assinaturas != referencia:
+            print(f"  ERRO: tokens com {jobs} processos divergem da análise com {args.jobs[0]}")
+            return 1
+    return 0
+
+
+_MEDIR_ENTRADA = """
+import resource, sys
+from antlr4 import FileStream, Token
+from fast_lexer import get_lexer_class
+from source_input import open_source
+modo, caminho, lexer = sys.argv[1:4]
+entrada = FileStream(caminho, encoding='utf-8') if modo == 'filestream' else open_source(caminho)
+analisador = get_lexer_class(lexer)(entrada)
+total = 0
+while analisador.nextToken().type != Token.EOF:
+    total += 1
+print(total, resource.getrusage(resource.RUSAGE_SELF).ru_maxrss)
+"""
+
+
+def benchmark_entrada(args):
+    """Compara o pico de memória (RSS) da leitura com FileStream e com open_source."""
+    with tempfile.TemporaryDirectory() as pasta:
+        caminho = os.path.join(pasta, 'programa.lion')
+        with open(caminho, 'w', encoding='utf-8') as f:
+            f.write(gerar_programa(args.linhas))
+        print(f"{args.linhas} linhas ({os.path.getsize(caminho) / 1e6:.1f} MB), analisador '{args.lexer}'")
+        for modo in ('filestream', 'mmap'):
+            inicio = time.perf_counter()
+            resultado = subprocess.run([sys.executable, '-c', _MEDIR_ENTRADA, modo, caminho, args.lexer],
+                                       capture_output=True, text=True, check=True,
+                                       cwd=os.path.dirname(os.path.abspath(__file__)))
+            duracao = time.perf_counter() - inicio
+            tokens, pico_kb = resultado.stdout.split()
+            print(f"  {modo:>10}: {tokens} tokens, pico de RSS {int(pico_kb) / 1024:8.1f} MB, {duracao:6.2f}s")
+    return 0
+
+
+def benchmark_tokens(args):
+    """Compara a memória de uma lista de CommonTokens com a do TokenStore e mede o dump binário."""
+    import tracemalloc
+    from antlr4 import CommonTokenStream
+    from fast_lexer import get_lexer_class
+    from token_store import TokenStore, tokenize
+
+    texto = gerar_programa(args.linhas)
+    lexer_class = get_lexer_class(args.lexer)
+    print(f"{args.linhas} linhas ({len(texto) / 1e6:.1f} MB), analisador '{args.lexer}'")
+
+    tracemalloc.start()
+    inicio = time.perf_counter()
+    fluxo = CommonTokenStream(lexer_class(InputStream(texto)))
+    fluxo.fill()
+    duracao = time.perf_counter() - inicio
+    memoria = tracemalloc.get_traced_memory()[0]
+    print(f"  lista de CommonToken: {len(fluxo.tokens):>9} tokens, {memoria / 1e6:8.1f} MB, {duracao:6.2f}s")
+    del fluxo
+    tracemalloc.stop()
+
+    tracemalloc.start()
+    inicio = time.perf_counter()
+    store = tokenize(InputStream(texto), lexer_class)
+    duracao = time.perf_counter() - inicio
+    memoria = tracemalloc.get_traced_memory()[0]
+    print(f"  TokenStore          : {len(store):>9} tokens, {memoria / 1e6:8.1f} MB, {duracao:6.2f}s")
+    tracemalloc.stop()
+
+    with tempfile.TemporaryDirectory() as pasta:
+        caminho = os.path.join(pasta, 'tokens.bin')
+        inicio = time.perf_counter()
+        store.save(caminho)
+        gravacao = time.perf_counter() - inicio
+        inicio = time.perf_counter()
+        with TokenStore.load(caminho) as lido:
+            leitura = time.perf_counter() - inicio
+            print(f"  dump binário        : {os.path.getsize(caminho) / 1e6:8.1f} MB, gravação {gravacao:6.3f}s, "
+                  f"leitura (mmap) {leitura:6.3f}s")
+            for nome in ('types', 'starts', 'stops', 'lines', 'columns'):
+                if list(getattr(lido, nome)) != list(getattr(store, nome)):
+                    print(f"  ERRO: coluna '{nome}' difere após a leitura do dump")
+                    return 1
+            if lido.source != store.source:
+                print("  ERRO: código-fonte difere após a leitura do dump")
+                return 1
+
+        # Leitura dos bytes do arquivo, como outra ferramenta faria: as
+        # posições das colunas têm que cair no código-fonte gravado, também
+        # com texto não ASCII
+        acentuado = tokenize(InputStream('@start\n    roar s as text;\n    s = "olá" + "ação";\n'
+                                         '    roarout(s);\n@end\n'), lexer_class)
+        for amostra in (store, acentuado):
+            amostra.save(caminho)
+            problema = _conferir_dump_bruto(caminho, amostra)
+            if problema:
+                print(f"  ERRO: {problema}")
+                return 1
+    return 0
+
+
+def _conferir_dump_bruto(caminho, store):
+    """Confere o texto de cada token lido direto dos bytes de um dump do TokenStore."""
+    import struct
+
+    with open(caminho, 'rb') as arquivo:
+        dados = arquivo.read()
+    cabecalho = struct.Struct('<7sBBxxxQQ')
+    _, _, ordem, quantidade, caracteres = cabecalho.unpack_from(dados, 0)
+    formato = '<' if ordem == 0 else '>'
+    colunas = []
+    posicao = cabecalho.size
+    for _ in range(5):
+        colunas.append(struct.unpack_from(f"{formato}{quantidade}i", dados, posicao))
+        posicao += quantidade * 4
+    fonte = struct.unpack_from(f"{formato}{caracteres}I", dados, posicao)
+    _, inicios, fins, _, _ = colunas
+    for i in range(quantidade):
+        texto = ''.join(map(chr, fonte[inicios[i]:fins[i] + 1]))
+        if texto != store.text(i):
+            return f"token {i} lido dos bytes do dump como {texto!r} em vez de {store.text(i)!r}"
+    return None
+
+
+def _arvore(parser, estrategia):
+    from parser_driver import parse_two_stage
+
+    if estrategia == 'll':
+        parser._interp.predictionMode = PredictionMode.LL
+        return parser.program()
+    return parse_two_stage(parser, ErrorListener())
+
+
+def benchmark_parser(args):
+    """Compara a análise sintática só em LL com a estratégia SLL-depois-LL."""
+    from antlr4 import CommonTokenStream
+    from ExprParser import ExprParser
+    from fast_lexer import FastLexer
+    from parser_driver import STATS
+
+    print(f"{args.programas} programas de {args.linhas} linhas")
+    textos = [gerar_programa(args.linhas, semente) for semente in range(args.programas)]
+    referencia = []
+    for estrategia in ('ll', 'sll-ll'):
+        # DFA vazio a cada estratégia, para nenhuma herdar o cache da outra
+        ExprParser.decisionsToDFA = [DFA(s, i) for i, s in enumerate(ExprParser.atn.decisionToState)]
+        inicio = time.perf_counter()
+        for indice, texto in enumerate(textos):
+            parser = ExprParser(CommonTokenStream(FastLexer(InputStream(texto))))
+            arvore = _arvore(parser, estrategia).toStringTree(recog=parser)
+            if estrategia == 'll':
+                referencia.append(arvore)
+            elif arvore != referencia[indice]:
+                print(f"  ERRO: árvore do programa {indice} difere entre LL e SLL")
+                return 1
+        duracao = time.perf_counter() - inicio
+        print(f"  {estrategia:>6}: {duracao:8.3f}s")
+    print(f"  {STATS.report()}")
+    return 0
+
+
+_MEDIR_PARSER = """
+import sys, time
+from antlr4 import CommonTokenStream, InputStream
+from antlr4.error.ErrorListener import ErrorListener
+from ExprParser import ExprParser
+from fast_lexer import FastLexer
+from parser_driver import parse_two_stage
+from dfa_cache import load_dfa_cache, save_dfa_cache
+modo, caminho = sys.argv[1:3]
+inicio = time.perf_counter()
+if modo != 'frio':
+    load_dfa_cache(ExprParser)
+parser = ExprParser(CommonTokenStream(FastLexer(InputStream(open(caminho, encoding='utf-8').read()))))
+parse_two_stage(parser, ErrorListener())
+print(time.perf_counter() - inicio)
+if modo == 'aquecer':
+    save_dfa_cache(ExprParser)
+"""
+
+
+def benchmark_cache_dfa(args):
+    """Tempo de carga do cache + análise sintática em processos novos, com e sem o cache de DFAs."""
+    with tempfile.TemporaryDirectory() as pasta:
+        caminho = os.path.join(pasta, 'programa.lion')
+        with open(caminho, 'w', encoding='utf-8') as f:
+            f.write(gerar_programa(args.linhas))
+        ambiente = dict(os.environ, LION_CACHE_DIR=os.path.join(pasta, 'cache'))
+
+        def executar(modo):
+            resultado = subprocess.run([sys.executable, '-c', _MEDIR_PARSER, modo, caminho],
+                                       capture_output=True, text=True, check=True, env=ambiente,
+                                       cwd=os.path.dirname(os.path.abspath(__file__)))
+            return float(resultado.stdout)
+
+        executar('aquecer')
+        print(f"{args.execucoes} processos analisando um programa de {args.linhas} linhas")
+        for modo in ('frio', 'cache'):
+            tempos = sorted(executar(modo) for _ in range(args.execucoes))
+            print(f"  {modo:>5}: mediana {tempos[len(tempos) // 2] * 1000:8.1f} ms, "
+                  f"mínimo {tempos[0] * 1000:8.1f} ms")
+    return 0
+
+
+_PRIMEIRO_TOKEN = """
+import sys
+import compilador
+from fast_lexer import get_lexer_class
+from source_input import open_source
+print(get_lexer_class('antlr')(open_source(sys.argv[1])).nextToken().text)
+"""
+
+
+def benchmark_partida(args):
+    """Tempo até o primeiro token e de uma compilação curta, com e sem snapshots do ATN."""
+    from atn_snapshot import SNAPSHOT_ENV, write_snapshot
+    import ExprLexer
+    import ExprParser
+
+    pasta_projeto = os.path.dirname(os.path.abspath(__file__))
+    with tempfile.TemporaryDirectory() as pasta:
+        caminho = os.path.join(pasta, 'tiny.lion')
+        with open(caminho, 'w', encoding='utf-8') as f:
+            f.write(gerar_programa(args.linhas))
+        snapshots = os.path.join(pasta, 'snapshots')
+        for modulo in (ExprParser, ExprLexer):
+            write_snapshot(modulo, snapshots)
+        sem_snapshots = os.path.join(pasta, 'vazio')
+        os.mkdir(sem_snapshots)
+
+        comandos = {
+            'primeiro token': [sys.executable, '-c', _PRIMEIRO_TOKEN, caminho],
+            'compilador.py': [sys.executable, 'compilador.py', caminho, '--sem-cache-dfa'],
+        }
+        print(f"{args.execucoes} execuções, programa de {args.linhas} linhas")
+        for nome, comando in comandos.items():
+            for rotulo, diretorio in (('sem snapshot', sem_snapshots), ('com snapshot', snapshots)):
+                ambiente = dict(os.environ, **{SNAPSHOT_ENV: diretorio})
+                tempos = []
+                for _ in range(args.execucoes):
+                    inicio = time.perf_counter()
+                    subprocess.run(comando, capture_output=True, env=ambiente, cwd=pasta_projeto)
+                    tempos.append(time.perf_counter() - inicio)
+                tempos.sort()
+                print(f"  {nome:>14}, {rotulo}: mediana {tempos[len(tempos) // 2] * 1000:7.1f} ms, "
+                      f"mínimo {tempos[0] * 1000:7.1f} ms")
+    return 0
+
+
+def gerar_expressao(rng, profundidade=0):
+    """Expressão aleatória, nem sempre válida (ex.: '"s" > x', comparações encadeadas)."""
+    if profundidade > 3 or rng.random() < 0.25:
+        return rng.choice(['x', 'y', 'z', '1', '2', '"s"'])
+    escolha = rng.randint(0, 9)
+    if escolha == 0:
+        return f"({gerar_expressao(rng, profundidade + 1)})"
+    if escolha == 1:
+        return f"!{gerar_expressao(rng, profundidade + 1)}"
+    operador = rng.choice(['+', '+', '+', '-', '*', '/', '>', '<', '==', '&&', '||'])
+    return f"{gerar_expressao(rng, profundidade + 1)} {operador} {gerar_expressao(rng, profundidade + 1)}"
+
+
+def _programa_de_expressao(rng):
+    expressao = gerar_expressao(rng)
+    molde = rng.choice(["x = {};", "roarout({});", "if {} then {{ x = 1; }}", "while {} strike {{ x = 1; }}"])
+    # Os nomes de gerar_expressao declarados, para que as expressões bem
+    # tipadas cheguem ao TAC
+    return "@start\n    roar x as int;\n    roar y as int;\n    roar z as int;\n    " + molde.format(expressao) + "\n@end\n"
+
+
+def _mutar(rng, texto):
+    """Remove, duplica ou troca um token de um programa válido."""
+    from fast_lexer import FastLexer
+
+    tokens = _tokens_de(FastLexer, texto)[:-1]
+    alvo = tokens[rng.randrange(len(tokens))]
+    operacao = rng.randrange(3)
+    if operacao == 0:
+        substituto = ""
+    elif operacao == 1:
+        substituto = alvo.text + " " + alvo.text
+    else:
+        substituto = rng.choice(tokens).text
+    return texto[:alvo.start] + substituto + texto[alvo.stop + 1:]
+
+
+def _assinatura_arvore(arvore):
+    """Forma completa da árvore: regra, invokingState, tokens de início/fim e folhas."""
+    from antlr4.tree.Tree import TerminalNode
+
+    assinatura = []
+    pendentes = [arvore]
+    while pendentes:
+        no = pendentes.pop()
+        if isinstance(no, TerminalNode):
+            assinatura.append(('token', no.symbol.tokenIndex))
+            continue
+        assinatura.append((type(no).__name__, no.invokingState,
+                           no.start.tokenIndex if no.start else None,
+                           no.stop.tokenIndex if no.stop else None,
+                           len(no.children or ())))
+        pendentes.extend(reversed(no.children or ()))
+    return assinatura
+
+
+def _analisar(texto, analisador):
+    from antlr4 import CommonTokenStream
+    from compilador import CustomSyntaxErrorListener
+    from ExprParser import ExprParser
+    from fast_lexer import FastLexer
+    from parser_driver import parse_two_stage
+    from rd_parser import RecursiveDescentParser
+    from source_input import SourceStream
+
+    erros = CustomSyntaxErrorListener()
+    tokens = CommonTokenStream(FastLexer(SourceStream(texto)))
+    if analisador == 'rd':
+        arvore = RecursiveDescentParser(tokens, erros).program()
+    else:
+        arvore = parse_two_stage(ExprParser(tokens), erros)
+    return arvore, erros.errors
+
+
+def benchmark_parser_rd(args):
+    """Teste diferencial do parser descendente recursivo contra o ANTLR e comparação de tempo."""
+    rng = random.Random(args.semente)
+    corpus = [gerar_programa(40, semente) for semente in range(args.programas)]
+    corpus += [_programa_de_expressao(rng) for _ in range(args.expressoes)]
+    corpus += [_mutar(rng, gerar_programa(40, semente)) for semente in range(args.mutacoes)]
+
+    validos = invalidos = mesma_mensagem = mesma_posicao = 0
+    for indice, texto in enumerate(corpus):
+        arvore_antlr, erros_antlr = _analisar(texto, 'antlr')
+        arvore_rd, erros_rd = _analisar(texto, 'rd')
+        if not erros_antlr:
+            validos += 1
+            if erros_rd or _assinatura_arvore(arvore_rd) != _assinatura_arvore(arvore_antlr):
+                print(f"  ERRO: programa {indice} aceito pelo ANTLR com árvore diferente no parser rd")
+                print(texto)
+                return 1
+        else:
+            invalidos += 1
+            if not erros_rd:
+                print(f"  ERRO: programa {indice} rejeitado pelo ANTLR e aceito pelo parser rd")
+                print(texto)
+                return 1
+            if erros_rd[0] == erros_antlr[0]:
+                mesma_mensagem += 1
+            if erros_rd[0].split(']')[0] == erros_antlr[0].split(']')[0]:
+                mesma_posicao += 1
+            elif args.detalhar:
+                print(f"  {erros_antlr[0]}\n  {erros_rd[0]}\n{texto}")
+    print(f"{len(corpus)} programas: {validos} válidos com árvores idênticas, "
+          f"{invalidos} inválidos rejeitados pelos dois")
+    if invalidos:
+        print(f"  primeiro erro na mesma linha/coluna do ANTLR em {mesma_posicao}/{invalidos} "
+              f"({100 * mesma_posicao / invalidos:.1f}%), com a mesma mensagem em {mesma_mensagem} "
+              f"({100 * mesma_mensagem / invalidos:.1f}%)")
+
+    texto = gerar_programa(args.linhas)
+    print(f"Programa de {args.linhas} linhas, léxico + sintático (DFAs do ANTLR já aquecidos):")
+    _analisar(texto, 'antlr')
+    tempos = {}
+    for analisador in ('antlr', 'rd'):
+        inicio = time.perf_counter()
+        _analisar(texto, analisador)
+        tempos[analisador] = time.perf_counter() - inicio
+        print(f"  {analisador:>5}: {tempos[analisador]:8.3f}s")
+    print(f"  aceleração: {tempos['antlr'] / tempos['rd']:.1f}x")
+    return 0
+
+
+def _percorrer(raiz, filhos):
+    """Visita todos os nós a partir de `raiz` com uma pilha explícita; devolve quantos são."""
+    total = 0
+    pendentes = [raiz]
+    while pendentes:
+        no = pendentes.pop()
+        total += 1
+        pendentes.extend(filhos(no))
+    return total
+
+
+def benchmark_ast(args):
+    """Memória por linha e tempo de travessia: árvore de derivação x AST compacta."""
+    import tracemalloc
+    from antlr4 import CommonTokenStream
+    from antlr4.tree.Tree import TerminalNode
+    from fast_lexer import FastLexer
+    from lion_ast import iter_children, lower
+    from rd_parser import RecursiveDescentParser
+    from symbol_table import NameTable
+
+    texto = gerar_programa(args.linhas)
+    print(f"{args.linhas} linhas, tokens já em memória antes das medições")
+    analisador = RecursiveDescentParser(CommonTokenStream(FastLexer(InputStream(texto))))
+
+    tracemalloc.start()
+    arvore = analisador.program()
+    memoria_arvore = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+
+    tracemalloc.start()
+    programa = lower(arvore, NameTable())
+    memoria_ast = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+
+    def filhos_arvore(no):
+        # Os terminais também são nós da árvore de derivação
+        return () if isinstance(no, TerminalNode) else no.children or ()
+
+    for nome, raiz, filhos, memoria in (('árvore de derivação', arvore, filhos_arvore, memoria_arvore),
+                                        ('AST compacta', programa, iter_children, memoria_ast)):
+        tempos = []
+        for _ in range(args.repeticoes):
+            inicio = time.perf_counter()
+            nos = _percorrer(raiz, filhos)
+            tempos.append(time.perf_counter() - inicio)
+        print(f"  {nome:<20}: {nos:>9} nós, {memoria / 1e6:7.1f} MB ({memoria / args.linhas:6.0f} bytes/linha), "
+              f"travessia {min(tempos) * 1000:8.1f} ms")
+    return 0
+
+
+def _compilar_em_lote(texto):
+    """Caminho normal do compilador: árvore, AST, análise semântica e lista de TAC."""
+    from AnalisadorSemantico import SemanticAnalyzer
+    from lion_ast import lower
+    from tac_generator import TACGenerator
+
+    arvore, erros = _analisar(texto, 'antlr')
+    if erros:
+        return erros, [], []
+    semantica = SemanticAnalyzer()
+    programa = lower(arvore, semantica.symbols.names)
+    semantica.analyze(programa)
+    tac = TACGenerator(symbols=semantica.symbols).visit(programa) if not semantica.errors else []
+    return erros, semantica.errors, [str(instrucao) for instrucao in tac]
+
+
+def _compilar_em_streaming(texto, emitir=None):
+    from AnalisadorSemantico import SemanticAnalyzer
+    from compilador import CustomSyntaxErrorListener
+    from fast_lexer import FastLexer
+    from source_input import SourceStream
+    from streaming_frontend import compile_two_stage
+
+    tac = []
+
+    def tentativa():
+        tac.clear()
+        return (CustomSyntaxErrorListener(), SemanticAnalyzer(),
+                emitir or (lambda instrucao: tac.append(str(instrucao))))
+
+    erros, semantica = compile_two_stage(lambda: FastLexer(SourceStream(texto)), tentativa)
+    if erros.errors:
+        return erros.errors, [], []
+    return erros.errors, semantica.errors, tac if not semantica.errors else []
+
+
+def _llvm_em_lote_e_streaming(texto):
+    """
+    Saídas com o gerador LLVM como consumidor, em lotes e em streaming: para
+    cada uma, (erros sintáticos, erros semânticos, LLVM IR ou a exceção do
+    gerador). Em lotes o gerador recebe a lista de TAC com a mesma alocação
+    sob demanda do streaming, então o IR também deve ser o mesmo.
+    """
+    from AnalisadorSemantico import SemanticAnalyzer
+    from compilador import CustomSyntaxErrorListener
+    from fast_lexer import FastLexer
+    from lion_ast import lower
+    from llvm_generator import LLVMGenerator
+    from source_input import SourceStream
+    from streaming_frontend import compile_two_stage
+    from tac_generator import TACGenerator
+
+    def gerador_para(semantica):
+        gerador = LLVMGenerator(semantica.symbols)
+        gerador.begin(lazy_allocation=True)
+        return gerador
+
+    arvore, erros = _analisar(texto, 'antlr')
+    if erros:
+        lote = (erros, [], None)
+    else:
+        semantica = SemanticAnalyzer()
+        programa = lower(arvore, semantica.symbols.names)
+        semantica.analyze(programa)
+        if semantica.errors:
+            lote = (erros, semantica.errors, None)
+        else:
+            gerador = gerador_para(semantica)
+            try:
+                for instrucao in TACGenerator(symbols=semantica.symbols).visit(programa):
+                    gerador.emit(instrucao)
+                lote = (erros, [], gerador.finish())
+            except (NameError, TypeError) as erro:
+                lote = (erros, [], f"{type(erro).__name__}: {erro}")
+
+    geradores = []
+
+    def tentativa():
+        semantica = SemanticAnalyzer()
+        geradores[:] = [gerador_para(semantica)]
+        return CustomSyntaxErrorListener(), semantica, geradores[0].emit
+
+    try:
+        erros, semantica = compile_two_stage(lambda: FastLexer(SourceStream(texto)), tentativa)
+    except (NameError, TypeError) as erro:
+        # Só chega aqui sem erros sintáticos nem semânticos
+        return lote, ([], [], f"{type(erro).__name__}: {erro}")
+    if erros.errors:
+        return lote, (erros.errors, [], None)
+    if semantica.errors:
+        return lote, ([], semantica.errors, None)
+    return lote, ([], [], geradores[0].finish())
+
+
+def benchmark_streaming(args):
+    """Front end em streaming x caminho em lotes: mesmas saídas e pico de memória."""
+    import tracemalloc
+
+    rng = random.Random(args.semente)
+    corpus = [gerar_programa(40, semente) for semente in range(args.programas)]
+    corpus += [_programa_de_expressao(rng) for _ in range(args.expressoes)]
+    corpus += [_mutar(rng, gerar_programa(40, semente)) for semente in range(args.mutacoes)]
+    contagem = {'sintáticos': 0, 'semânticos': 0, 'TAC': 0}
+    for indice, texto in enumerate(corpus):
+        lote = _compilar_em_lote(texto)
+        streaming = _compilar_em_streaming(texto)
+        if lote != streaming:
+            print(f"  ERRO: programa {indice} tem saídas diferentes em lote e em streaming")
+            print(texto)
+            return 1
+        chave = 'sintáticos' if lote[0] else 'semânticos' if lote[1] else 'TAC'
+        contagem[chave] += 1
+    print(f"{len(corpus)} programas com saídas idênticas: {contagem['sintáticos']} com erros sintáticos, "
+          f"{contagem['semânticos']} com erros semânticos, {contagem['TAC']} com TAC")
+
+    # Com o gerador LLVM como consumidor: programas que chegam ao LLVM, com
+    # escopos (nomes usados depois do bloco) e nomes nunca declarados
+    corpus = [_programa_sem_erros(40, semente) for semente in range(args.programas)]
+    corpus += [_programa_executavel(rng)[0] for _ in range(args.programas)]
+    corpus += [_programa_com_escopos(rng) for _ in range(args.escopos)]
+    corpus += ["@start roarout(x); @end\n", "@start roar a as int; a = x * 2; @end\n",
+               "@start roar a as int; if (a > 1) then { roar y as int; y = 2; } roarout(y); @end\n"]
+    contagem = {'sintáticos': 0, 'semânticos': 0, 'LLVM': 0, 'exceções': 0}
+    for indice, texto in enumerate(corpus):
+        lote, streaming = _llvm_em_lote_e_streaming(texto)
+        if lote != streaming:
+            print(f"  ERRO: programa {indice} tem saídas diferentes em lote e em streaming com o gerador LLVM")
+            print(texto)
+            return 1
+        chave = ('sintáticos' if lote[0] else 'semânticos' if lote[1] else
+                 'LLVM' if lote[2].startswith('; ModuleID') else 'exceções')
+        contagem[chave] += 1
+    print(f"{len(corpus)} programas com saídas idênticas com o gerador LLVM: "
+          f"{contagem['sintáticos']} com erros sintáticos, {contagem['semânticos']} com erros semânticos, "
+          f"{contagem['LLVM']} com LLVM IR, {contagem['exceções']} com erro do gerador")
+
+    print("Pico de memória (tracemalloc) da compilação até o TAC, texto já em memória:")
+    for linhas in args.linhas:
+        texto = gerar_programa(linhas)
+        picos = {}
+        for modo in ('lote', 'streaming'):
+            tracemalloc.start()
+            inicio = time.perf_counter()
+            if modo == 'lote':
+                _compilar_em_lote(texto)
+            else:
+                _compilar_em_streaming(texto, emitir=lambda instrucao: None)
+            duracao = time.perf_counter() - inicio
+            picos[modo] = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+        print(f"  {linhas:>7} linhas: lote {picos['lote'] / 1e6:8.1f} MB, "
+              f"streaming {picos['streaming'] / 1e6:6.1f} MB ({duracao:6.2f}s)")
+    return 0
+
+
+def _editar(rng, texto):
+    """
+    Edição aleatória, como as de um editor: troca, apaga ou duplica um token,
+    insere ou apaga linhas inteiras, abre ou fecha blocos e digita texto solto.
+    Devolve (início, fim, texto novo).
+    """
+    from fast_lexer import FastLexer
+
+    tokens = _tokens_de(FastLexer, texto)[:-1]
+    alvo = tokens[rng.randrange(len(tokens))] if tokens else None
+    operacao = rng.randrange(7)
+    if alvo is not None and operacao == 0:
+        return alvo.start, alvo.stop + 1, rng.choice(tokens).text
+    if alvo is not None and operacao == 1:
+        return alvo.start, alvo.stop + 1, ""
+    if alvo is not None and operacao == 2:
+        return alvo.start, alvo.start, alvo.text + " "
+    inicio_linhas = [0] + [i + 1 for i, c in enumerate(texto) if c == '\n']
+    if operacao == 3:
+        linha = rng.choice(["    x = x + 1;", "    roarout(x);", "    roar x as int;",
+                            "    if x > 1 then {", "    while x < 3 strike {", "    } else {", "    }"])
+        posicao = rng.choice(inicio_linhas)
+        return posicao, posicao, linha + "\n"
+    if operacao == 4:
+        primeira = rng.randrange(len(inicio_linhas))
+        ultima = min(primeira + rng.randint(1, 3), len(inicio_linhas) - 1)
+        return inicio_linhas[primeira], inicio_linhas[ultima], ""
+    posicao = rng.randrange(len(texto) + 1)
+    return posicao, posicao, rng.choice(["x", " ", ";", "{", "}", "(", "\n", "1 +", "then", "@end"])
+
+
+def benchmark_incremental(args):
+    """
+    Análise incremental: teste diferencial contra a análise completa depois
+    de cada edição e latência de edição até os erros para vários tamanhos.
+    """
+    from compilador import CustomSyntaxErrorListener
+    from fast_lexer import FastLexer
+    from incremental_parser import IncrementalParser
+
+    rng = random.Random(args.semente)
+    edicoes = parciais = 0
+    for semente in range(args.programas):
+        documento = IncrementalParser(gerar_programa(args.tamanho, semente), CustomSyntaxErrorListener)
+        for _ in range(args.edicoes):
+            inicio, fim, novo = _editar(rng, documento.text)
+            erros = documento.edit(inicio, fim, novo)
+            texto = documento.text
+            arvore, esperados = _analisar(texto, 'antlr')
+            # `tree` deixa todos os tokens com posições absolutas
+            incremental = _assinatura_arvore(documento.tree)
+            tokens = [_assinatura(token) for token in documento.tokens]
+            if tokens != [_assinatura(token) for token in _tokens_de(FastLexer, texto)]:
+                print(f"  ERRO: tokens diferentes da análise léxica completa (programa {semente})")
+                return 1
+            if erros != esperados or incremental != _assinatura_arvore(arvore):
+                print(f"  ERRO: resultado diferente da análise completa (programa {semente}, "
+                      f"edição [{inicio}, {fim}) -> {novo!r})")
+                print("\n".join(erros))
+                print("esperado:")
+                print("\n".join(esperados))
+                return 1
+            edicoes += 1
+        parciais += documento.partial_parses
+    print(f"{edicoes} edições idênticas à análise completa; {parciais} resolvidas com reanálise parcial "
+          f"({100 * parciais / edicoes:.1f}%)")
+
+    print("Latência por edição (ms):")
+    for linhas in args.linhas:
+        texto = gerar_programa(linhas)
+        inicio = time.perf_counter()
+        documento = IncrementalParser(texto, CustomSyntaxErrorListener)
+        completa = time.perf_counter() - inicio
+
+        # Digitação de um comando no meio do arquivo, tecla a tecla
+        meio = texto.index('\n', len(texto) // 2) + 1
+        comando = "    v0 = v1 + 2 * (v3 - 4);\n"
+        duracoes = []
+        for posicao, tecla in enumerate(comando, meio):
+            inicio = time.perf_counter()
+            documento.edit(posicao, posicao, tecla)
+            duracoes.append(time.perf_counter() - inicio)
+        digitacao = sorted(duracoes)
+
+        # Edições em pontos aleatórios (o gap acompanha cada salto)
+        saltos = []
+        for _ in range(args.saltos):
+            inicio_linhas = documento.text.index('\n', rng.randrange(len(documento.text) // 2)) + 1
+            inicio = time.perf_counter()
+            documento.edit(inicio_linhas, inicio_linhas, "    v1 = 1;\n")
+            saltos.append(time.perf_counter() - inicio)
+        saltos.sort()
+        print(f"  {linhas:>7} linhas: completa {completa * 1e3:8.1f} | digitação mediana "
+              f"{digitacao[len(digitacao) // 2] * 1e3:6.2f}, máx {digitacao[-1] * 1e3:6.2f} | "
+              f"saltos mediana {saltos[len(saltos) // 2] * 1e3:6.2f}, máx {saltos[-1] * 1e3:6.2f} "
+              f"({documento.partial_parses} parciais, {documento.full_parses} completas)")
+    return 0
+
+
+_CADEIAS = {
+    'soma': lambda n: "x = " + " + ".join(["x"] * n) + ";",
+    'produto': lambda n: "x = " + " * ".join(["x"] * n) + ";",
+    'logica': lambda n: "if " + " && ".join(["x > 1"] * n) + " then { x = 1; }",
+    'texto': lambda n: "t = " + " + ".join(['"a"'] * n) + ";",
+}
+
+
+def _medir_cadeia(texto, analisador, gerar_llvm, gerar_dot=False):
+    """
+    Tempo de cada fase para um programa. Se uma fase estourar a pilha, as
+    seguintes não rodam e tempos['estouro'] guarda o nome dela.
+    """
+    from AnalisadorSemantico import SemanticAnalyzer
+    from AnalisadorSintatico import build_ast
+    from lion_ast import lower
+    from llvm_generator import LLVMGenerator
+    from tac_generator import TACGenerator
+
+    tempos = {}
+    fase = 'sintático'
+    try:
+        inicio = time.perf_counter()
+        arvore, erros = _analisar(texto, analisador)
+        tempos[fase] = time.perf_counter() - inicio
+        if erros:
+            raise ValueError(erros[0])
+        fase = 'lower'
+        semantica = SemanticAnalyzer()
+        inicio = time.perf_counter()
+        programa = lower(arvore, semantica.symbols.names)
+        tempos[fase] = time.perf_counter() - inicio
+        fase = 'semântico'
+        inicio = time.perf_counter()
+        semantica.analyze(programa)
+        tempos[fase] = time.perf_counter() - inicio
+        fase = 'TAC'
+        inicio = time.perf_counter()
+        tac = TACGenerator(symbols=semantica.symbols).visit(programa)
+        tempos[fase] = time.perf_counter() - inicio
+        if gerar_llvm:
+            fase = 'LLVM'
+            inicio = time.perf_counter()
+            LLVMGenerator(semantica.symbols).generate(tac)
+            tempos[fase] = time.perf_counter() - inicio
+        if gerar_dot:
+            fase = 'AST/dot'
+            inicio = time.perf_counter()
+            build_ast(programa).to_dot()
+            tempos[fase] = time.perf_counter() - inicio
+    except RecursionError:
+        tempos['estouro'] = fase
+    return tempos
+
+
+def benchmark_cadeias(args):
+    """
+    Tempo de cada fase para um comando com uma cadeia de n operandos. Com
+    custo linear, o tempo por operando se mantém quando n cresce.
+    """
+    import gc
+
+    fases = ('sintático', 'lower', 'semântico', 'TAC', 'LLVM')
+    print(f"Analisador sintático '{args.parser}'; tempos em µs por operando")
+    for tipo in args.tipos:
+        # Aquecimento: tabelas e DFAs do parser não entram na primeira medição
+        _medir_cadeia(f"@start\n    roar x as int;\n    {_CADEIAS[tipo](10)}\n@end\n", args.parser, False)
+        print(f"\n== {tipo} ==")
+        print(f"  {'operandos':>9} " + " ".join(f"{fase:>10}" for fase in fases))
+        por_operando = []
+        for n in args.operandos:
+            texto = f"@start\n    roar x as int;\n    roar t as text;\n    {_CADEIAS[tipo](n)}\n@end\n"
+            # Como no timeit, as coletas do gc (que crescem com o heap) ficam fora da medição
+            gc.collect()
+            gc.disable()
+            try:
+                tempos = _medir_cadeia(texto, args.parser, True)
+            except ValueError as erro:
+                print(f"  ERRO: a cadeia '{tipo}' com {n} operandos tem erros sintáticos: {erro}")
+                return 1
+            finally:
+                gc.enable()
+            if 'estouro' in tempos:
+                print(f"  {n:>9} estouro de recursão na fase '{tempos['estouro']}'")
+                continue
+            print(f"  {n:>9} " + " ".join(f"{tempos[fase] * 1e6 / n:>10.2f}" if fase in tempos else f"{'-':>10}"
+                                          for fase in fases))
+            por_operando.append(sum(tempos.values()) / n)
+        if len(por_operando) > 1:
+            print(f"  total por operando, maior / menor n: {por_operando[-1] / por_operando[0]:.2f}x")
+    return 0
+
+
+def benchmark_semantico(args):
+    """
+    Tempo da análise semântica sobre a AST de um programa grande, com o log
+    desligado, gravado pela própria thread e gravado por uma thread separada.
+    """
+    import gc
+
+    from AnalisadorSemantico import SemanticAnalyzer
+    from compiler_log import DEBUG, OFF, CompilerLog
+    from lion_ast import lower
+    from symbol_table import NameTable, SymbolTable
+
+    for linhas in args.linhas:
+        arvore, _ = _analisar(gerar_programa(linhas), 'rd')
+        nomes = NameTable()
+        programa = lower(arvore, nomes)
+        print(f"{linhas} linhas:")
+        with tempfile.TemporaryDirectory() as pasta:
+            caminho = os.path.join(pasta, 'semantico.log')
+            for nome, nivel, thread in (('desligado', OFF, False), ('detalhe', DEBUG, False),
+                                        ('detalhe + thread', DEBUG, True)):
+                tempos = []
+                for _ in range(args.repeticoes):
+                    gc.collect()
+                    gc.disable()
+                    inicio = time.perf_counter()
+                    # Abertura e fechamento (que espera a thread) entram na medição
+                    with CompilerLog(caminho, nivel, background=thread) as log:
+                        analisador = SemanticAnalyzer(log, SymbolTable(nomes))
+                        analisador.analyze(programa)
+                    tempos.append(time.perf_counter() - inicio)
+                    gc.enable()
+                print(f"  {nome:<17}: {min(tempos) * 1000:9.1f} ms ({min(tempos) * 1e6 / linhas:6.2f} µs/linha), "
+                      f"{len(analisador.errors)} erros, log de {os.path.getsize(caminho) / 1e6:.1f} MB")
+    return 0
+
+
+def _aninhar_blocos(n):
+    """n comandos if/while aninhados, cada um com uma atribuição antes do próximo nível."""
+    linhas = []
+    for nivel in range(n):
+        if nivel % 2:
+            linhas.append(f"while x < {nivel} strike {{ x = x + 1;")
+        else:
+            linhas.append(f"if x > {nivel} then {{ x = x - 1;")
+    return "\n".join(linhas) + "\n" + "}" * n
+
+
+_ANINHAMENTOS = {
+    'blocos': (_aninhar_blocos, True),
+    'parenteses': (lambda n: "x = " + "(" * n + "x + 1" + ")" * n + ";", True),
+    'negacao': (lambda n: "if " + "!" * n + "x > 1 then { x = 1; }", True),
+    # Concatenações dentro de parênteses: uma pilha de Concat em eval_expression
+    'texto': (lambda n: "t = " + '("a" + ' * n + '"a"' + ")" * n + ";", True),
+}
+
+
+def benchmark_aninhamento(args):
+    """
+    Tempo de cada fase (parser rd) para programas com n níveis de aninhamento,
+    sem alterar o limite de recursão do Python. As fases percorrem a árvore com
+    pilhas explícitas; o ExprParser gerado pelo ANTLR continua recursivo e
+    estoura com algumas centenas de níveis (--parser antlr).
+    """
+    import gc
+
+    fases = ('sintático', 'lower', 'semântico', 'TAC', 'LLVM', 'AST/dot')
+    print(f"Analisador sintático '{args.parser}', limite de recursão {sys.getrecursionlimit()}; "
+          f"tempos em µs por nível")
+    for tipo in args.tipos:
+        gerar, gerar_llvm = _ANINHAMENTOS[tipo]
+        _medir_cadeia(f"@start\n    roar x as int;\n    roar t as text;\n    {gerar(10)}\n@end\n",
+                      args.parser, False)
+        print(f"\n== {tipo} ==")
+        print(f"  {'níveis':>9} " + " ".join(f"{fase:>10}" for fase in fases))
+        for n in args.niveis:
+            texto = f"@start\n    roar x as int;\n    roar t as text;\n    {gerar(n)}\n@end\n"
+            gc.collect()
+            gc.disable()
+            try:
+                tempos = _medir_cadeia(texto, args.parser, gerar_llvm, gerar_dot=True)
+            except ValueError as erro:
+                print(f"  ERRO: o aninhamento '{tipo}' com {n} níveis tem erros sintáticos: {erro}")
+                return 1
+            finally:
+                gc.enable()
+            if 'estouro' in tempos:
+                print(f"  {n:>9} estouro de recursão na fase '{tempos['estouro']}'")
+                continue
+            print(f"  {n:>9} " + " ".join(f"{tempos[fase] * 1e6 / n:>10.2f}" if fase in tempos else f"{'-':>10}"
+                                          for fase in fases))
+    return 0
+
+
+def _programa_com_escopos(rng, comandos=40):
+    """
+    Programa com declarações dentro de blocos: variáveis que escondem as de
+    fora, nomes usados depois do fim do bloco e redeclarações no mesmo escopo.
+    """
+    nomes = ['a', 'b', 'c', 'd']
+    saida = ['@start', '    roar a as int;', '    roar b as int;', '    roar t as text;']
+    abertos = []
+    for _ in range(comandos):
+        sorteio = rng.random()
+        nome = rng.choice(nomes)
+        recuo = '    ' * (len(abertos) + 1)
+        if sorteio < 0.15:
+            saida.append(f"{recuo}if ({nome} > {rng.randint(0, 9)}) then {{")
+            abertos.append('if')
+        elif sorteio < 0.25:
+            saida.append(f"{recuo}while ({nome} < {rng.randint(0, 9)}) strike {{")
+            abertos.append('while')
+        elif sorteio < 0.4 and abertos:
+            if abertos[-1] == 'if' and rng.random() < 0.5:
+                saida.append(f"{recuo[4:]}}} else {{")
+                abertos[-1] = 'else'
+            else:
+                saida.append(f"{recuo[4:]}}}")
+                abertos.pop()
+        elif sorteio < 0.55:
+            saida.append(f"{recuo}roar {nome} as {rng.choice(['int', 'int', 'text'])};")
+        elif sorteio < 0.8:
+            saida.append(f"{recuo}{nome} = {rng.choice(nomes)} * {rng.randint(1, 9)} + {rng.choice(nomes)};")
+        elif sorteio < 0.9:
+            saida.append(f"{recuo}t = \"x\" + t;")
+        else:
+            saida.append(f"{recuo}roarout({nome});")
+    saida.extend('    ' * nivel + '}' for nivel in range(len(abertos), 0, -1))
+    saida.append('@end')
+    return '\n'.join(saida) + '\n'
+
+
+def benchmark_tac(args):
+    """
+    Memória por instrução do TAC (opcodes inteiros, instruções com __slots__ e
+    operandos compartilhados) e tempo por instrução da geração do TAC e da
+    tradução para LLVM, em programas grandes.
+    """
+    import gc
+    import tracemalloc
+
+    from AnalisadorSemantico import SemanticAnalyzer
+    from lion_ast import lower
+    from llvm_generator import LLVMGenerator
+    from tac_generator import TACGenerator
+
+    for linhas in args.linhas:
+        semantica = SemanticAnalyzer()
+        programa = lower(_analisar(gerar_programa(linhas), 'rd')[0], semantica.symbols.names)
+        semantica.analyze(programa)
+
+        gc.collect()
+        gc.disable()
+        inicio = time.perf_counter()
+        tac = TACGenerator(symbols=semantica.symbols).visit(programa)
+        duracao = time.perf_counter() - inicio
+        gc.enable()
+        # A memória é medida numa segunda geração: o tracemalloc deixa a primeira lenta
+        del tac
+        gc.collect()
+        tracemalloc.start()
+        tac = TACGenerator(symbols=semantica.symbols).visit(programa)
+        memoria = tracemalloc.get_traced_memory()[0]
+        tracemalloc.stop()
+
+        n = len(tac)
+        usos = [operando for instrucao in tac for operando in (instrucao.result, instrucao.arg1, instrucao.arg2)
+                if operando is not None]
+        print(f"{linhas} linhas: {n} instruções, {memoria / n:6.1f} bytes/instrução, "
+              f"{len(usos)} usos de {len(set(map(id, usos)))} operandos distintos")
+        print(f"  TAC : {duracao * 1e6 / n:6.2f} µs/instrução")
+        if not args.sem_llvm:
+            gc.collect()
+            gc.disable()
+            inicio = time.perf_counter()
+            LLVMGenerator(semantica.symbols).generate(tac)
+            duracao = time.perf_counter() - inicio
+            gc.enable()
+            print(f"  LLVM: {duracao * 1e6 / n:6.2f} µs/instrução")
+        del tac, usos
+    return 0
+
+
+def _assinatura_tac(tac):
+    """Texto e tipos dos operandos de cada instrução: tudo o que o gerador LLVM usa."""
+    return [(str(instrucao), tuple(operando.type if operando is not None else None
+                                   for operando in (instrucao.result, instrucao.arg1, instrucao.arg2)))
+            for instrucao in tac]
+
+
+def _tipos_dedutiveis(tac):
+    """
+    Se read_text() deduz do texto os mesmos tipos: todos os operandos têm
+    tipo, toda variável foi declarada, cada atribuição tem o tipo da variável
+    e as variáveis que nunca recebem uma atribuição são 'int'. Erros
+    semânticos podem quebrar as três primeiras condições.
+    """
+    from tac_generator import OP_ASSIGN, Label, Var
+
+    atribuidas = set()
+    for instrucao in tac:
+        if instrucao.opcode == OP_ASSIGN:
+            if instrucao.arg1.type != instrucao.result.type:
+                return False
+            atribuidas.add(id(instrucao.result))
+    for instrucao in tac:
+        for operando in (instrucao.result, instrucao.arg1, instrucao.arg2):
+            if operando is None or type(operando) is Label:
+                continue
+            if operando.type is None:
+                return False
+            if type(operando) is Var and (operando.symbol < 0 or
+                                          id(operando) not in atribuidas and operando.type != 'int'):
+                return False
+    return True
+
+
+def benchmark_tac_io(args):
+    """
+    Leitura e gravação do TAC (tac_io.py): equivalência das voltas pelo
+    formato texto e pelo binário, e tempo e tamanho de cada formato x o tempo
+    de refazer o front end.
+    """
+    import gc
+
+    from AnalisadorSemantico import SemanticAnalyzer
+    from lion_ast import lower
+    from llvm_generator import LLVMGenerator
+    from tac_generator import TACGenerator
+    from tac_io import load_binary, read_text, save_binary, write_text
+
+    def front_end(texto):
+        arvore, erros = _analisar(texto, 'rd')
+        if erros:
+            return None, None
+        semantica = SemanticAnalyzer()
+        programa = lower(arvore, semantica.symbols.names)
+        semantica.analyze(programa)
+        return semantica, TACGenerator(symbols=semantica.symbols).visit(programa)
+
+    rng = random.Random(args.semente)
+    corpus = [gerar_programa(40, semente) for semente in range(args.programas)]
+    corpus += [_programa_de_expressao(rng) for _ in range(args.expressoes)]
+    corpus += [_programa_com_escopos(rng) for _ in range(args.escopos)]
+    contagem = {'binário': 0, 'texto': 0, 'sem tipo': 0, 'LLVM': 0}
+    with tempfile.TemporaryDirectory() as pasta:
+        caminho_texto = os.path.join(pasta, 'programa.tac')
+        caminho_binario = os.path.join(pasta, 'programa.tacb')
+        for indice, texto in enumerate(corpus):
+            semantica, tac = front_end(texto)
+            if tac is None:
+                continue
+            original = _assinatura_tac(tac)
+            save_binary(tac, caminho_binario)
+            binario = load_binary(caminho_binario)
+            if _assinatura_tac(binario) != original:
+                print(f"  ERRO: programa {indice} muda na volta pelo formato binário")
+                print(texto)
+                return 1
+            contagem['binário'] += 1
+            # O texto não guarda tipos: só os programas em que read_text()
+            # consegue deduzi-los
+            if not _tipos_dedutiveis(tac):
+                contagem['sem tipo'] += 1
+                continue
+            write_text(tac, caminho_texto)
+            lido = read_text(caminho_texto)
+            if _assinatura_tac(lido) != original:
+                print(f"  ERRO: programa {indice} muda na volta pelo formato texto")
+                print(texto)
+                return 1
+            contagem['texto'] += 1
+            if contagem['LLVM'] < args.llvm:
+                try:
+                    esperado = LLVMGenerator(semantica.symbols).generate(tac)
+                except (NameError, TypeError):
+                    # Variável usada sem nunca receber valor: não há o que alocar
+                    continue
+                if LLVMGenerator().generate(lido) != esperado or LLVMGenerator().generate(binario) != esperado:
+                    print(f"  ERRO: programa {indice} gera outro LLVM a partir do TAC lido")
+                    print(texto)
+                    return 1
+                contagem['LLVM'] += 1
+    print(f"Voltas idênticas: {contagem['binário']} pelo binário e {contagem['texto']} pelo texto "
+          f"({contagem['sem tipo']} com tipos que o texto não guarda), {contagem['LLVM']} delas "
+          f"com o mesmo LLVM pelos dois formatos")
+
+    for linhas in args.linhas:
+        gc.collect()
+        gc.disable()
+        inicio = time.perf_counter()
+        _, tac = front_end(gerar_programa(linhas))
+        refazer = time.perf_counter() - inicio
+        gc.enable()
+        print(f"{linhas} linhas, {len(tac)} instruções; refazer o front end: {refazer:6.2f}s")
+        with tempfile.TemporaryDirectory() as pasta:
+            for nome, extensao, gravar, ler in (('texto', '.tac', write_text, read_text),
+                                                ('binário', '.tacb', save_binary, load_binary)):
+                caminho = os.path.join(pasta, 'programa' + extensao)
+                gc.collect()
+                gc.disable()
+                inicio = time.perf_counter()
+                gravar(tac, caminho)
+                gravacao = time.perf_counter() - inicio
+                inicio = time.perf_counter()
+                lido = ler(caminho)
+                leitura = time.perf_counter() - inicio
+                gc.enable()
+                print(f"  {nome:<7}: {os.path.getsize(caminho) / 1e6:7.1f} MB, gravação {gravacao:6.2f}s, "
+                      f"leitura {leitura:6.2f}s")
+                del lido
+    return 0
+
+
+def _dominadores_ingenuos(grafo):
+    """
+    Dominadores pela definição, com conjuntos: Dom(b) = {b} ∪ ∩ Dom(p) sobre
+    os predecessores alcançáveis, iterado até estabilizar. Quadrático; serve
+    de referência para ControlFlowGraph.
+    """
+    alcancaveis = set(grafo.reverse_postorder)
+    todos = frozenset(alcancaveis)
+    dominadores = {bloco: todos for bloco in alcancaveis}
+    dominadores[0] = frozenset((0,))
+    mudou = True
+    while mudou:
+        mudou = False
+        for bloco in grafo.reverse_postorder[1:]:
+            predecessores = [p for p in grafo.blocks[bloco].predecessors if p in alcancaveis]
+            novo = frozenset.intersection(*(dominadores[p] for p in predecessores)) | {bloco}
+            if novo != dominadores[bloco]:
+                dominadores[bloco] = novo
+                mudou = True
+    return dominadores
+
+
+def _conferir_cfg(grafo, lacos_esperados):
+    """Compara o grafo com as referências ingênuas; devolve a lista de divergências."""
+    problemas = []
+    dominadores = _dominadores_ingenuos(grafo)
+    for bloco, doms in dominadores.items():
+        # O dominador imediato é o dominador estrito mais próximo: o de maior conjunto
+        estritos = doms - {bloco}
+        esperado = max(estritos, key=lambda d: len(dominadores[d])) if estritos else 0
+        if grafo.idom[bloco] != esperado:
+            problemas.append(f"idom do bloco {bloco}: {grafo.idom[bloco]}, esperado {esperado}")
+        for outro in dominadores:
+            if grafo.dominates(outro, bloco) != (outro in doms):
+                problemas.append(f"dominates({outro}, {bloco}) errado")
+    # Fronteira de dominância pela definição: b domina um predecessor de f
+    # mas não domina f estritamente
+    fronteiras = grafo.dominance_frontiers()
+    for bloco in dominadores:
+        esperada = {f for f in dominadores
+                    if any(p in dominadores and bloco in dominadores[p] for p in grafo.blocks[f].predecessors)
+                    and not (bloco in dominadores[f] and bloco != f)}
+        if fronteiras[bloco] != esperada:
+            problemas.append(f"fronteira de dominância do bloco {bloco}")
+    # Laços: um por while. O corpo pela definição é o cabeçalho mais o que
+    # chega às origens das arestas de retorno sem passar por ele; o laço de
+    # um bloco é o de menor corpo que o contém
+    if len(grafo.loops) != lacos_esperados:
+        problemas.append(f"{len(grafo.loops)} laços, esperados {lacos_esperados}")
+    corpos = {}
+    for origem in dominadores:
+        for cabecalho in grafo.blocks[origem].successors:
+            if cabecalho in dominadores[origem]:
+                corpo = corpos.setdefault(cabecalho, {cabecalho})
+                pendentes = [origem]
+                while pendentes:
+                    bloco = pendentes.pop()
+                    if bloco not in corpo:
+                        corpo.add(bloco)
+                        pendentes.extend(p for p in grafo.blocks[bloco].predecessors if p in dominadores)
+    if sorted(corpos) != sorted(laco.header for laco in grafo.loops):
+        problemas.append("cabeçalhos de laço diferentes")
+    for bloco in dominadores:
+        contem = [c for c in corpos if bloco in corpos[c]]
+        esperado = min(contem, key=lambda c: len(corpos[c])) if contem else None
+        laco = grafo.loop_of[bloco]
+        if (laco.header if laco else None) != esperado or grafo.loop_depth(bloco) != len(contem):
+            problemas.append(f"laço do bloco {bloco}")
+        for laco in grafo.loops:
+            if grafo.in_loop(bloco, laco) != (bloco in corpos[laco.header]):
+                problemas.append(f"in_loop({bloco}, laço {laco.header}) errado")
+    return problemas
+
+
+def benchmark_cfg(args):
+    """
+    Grafo de fluxo de controle do TAC (tac_cfg.py): dominadores, fronteiras
+    e laços conferidos com as definições em programas pequenos, e tempo de
+    construção em programas com muitos blocos.
+    """
+    import gc
+
+    from AnalisadorSemantico import SemanticAnalyzer
+    from lion_ast import While, lower
+    from tac_cfg import ControlFlowGraph
+    from tac_generator import TACGenerator
+
+    def tac_de(texto):
+        arvore, erros = _analisar(texto, 'rd')
+        if erros:
+            return None, 0
+        semantica = SemanticAnalyzer()
+        programa = lower(arvore, semantica.symbols.names)
+        semantica.analyze(programa)
+        # Laços esperados: um por while
+        whiles, pendentes = 0, [programa]
+        while pendentes:
+            no = pendentes.pop()
+            whiles += type(no) is While
+            for campo in ('body', 'then_body', 'else_body'):
+                pendentes.extend(getattr(no, campo, None) or ())
+        return TACGenerator(symbols=semantica.symbols).visit(programa), whiles
+
+    rng = random.Random(args.semente)
+    corpus = [gerar_programa(60, semente) for semente in range(args.programas)]
+    corpus += [_programa_com_escopos(rng, 80) for _ in range(args.escopos)]
+    corpus += [f"@start\n    roar x as int;\n    {_aninhar_blocos(n)}\n@end\n" for n in (1, 2, 5, 20)]
+    conferidos = 0
+    for indice, texto in enumerate(corpus):
+        tac, whiles = tac_de(texto)
+        if tac is None:
+            continue
+        problemas = _conferir_cfg(ControlFlowGraph(tac), whiles)
+        if problemas:
+            print(f"  ERRO: programa {indice}: {'; '.join(problemas[:5])}")
+            print(texto)
+            return 1
+        conferidos += 1
+    print(f"{conferidos} programas com dominadores, fronteiras e laços iguais aos das definições")
+
+    print("Construção do CFG (blocos, pós-ordem reversa, dominadores e laços) e fronteiras de dominância:")
+    for nome, texto in ([(f"{linhas} linhas", gerar_programa(linhas)) for linhas in args.linhas] +
+                        [(f"{niveis} níveis", f"@start\n    roar x as int;\n    {_aninhar_blocos(niveis)}\n@end\n")
+                         for niveis in args.niveis]):
+        tac, _ = tac_de(texto)
+        gc.collect()
+        gc.disable()
+        inicio = time.perf_counter()
+        grafo = ControlFlowGraph(tac)
+        construcao = time.perf_counter() - inicio
+        inicio = time.perf_counter()
+        grafo.dominance_frontiers()
+        fronteiras = time.perf_counter() - inicio
+        gc.enable()
+        print(f"  {nome:>14}: {len(grafo):>7} blocos, {len(grafo.loops):>6} laços; construção "
+              f"{construcao * 1000:8.1f} ms ({construcao * 1e6 / len(grafo):5.2f} µs/bloco), "
+              f"fronteiras {fronteiras * 1000:7.1f} ms")
+    return 0
+
+
+def _programa_executavel(rng, comandos=30):
+    """
+    Programa que termina e só lê variáveis já atribuídas, para comparar a
+    saída de traduções diferentes: as variáveis começam com hunt() ou uma
+    constante e cada while tem o seu contador, limitado a 3 voltas.
+    Devolve o texto e a entrada que os hunt() leem.
+    """
+    inteiros = [f"n{i}" for i in range(5)]
+    textos = [f"s{i}" for i in range(3)]
+    contadores = []
+    corpo, entrada = [], []
+    for nome in inteiros:
+        if rng.random() < 0.3:
+            corpo.append(f"hunt({nome});")
+            entrada.append(str(rng.randint(-20, 20)))
+        else:
+            corpo.append(f"{nome} = {rng.randint(0, 9)} - {rng.randint(0, 9)};")
+    for nome in textos:
+        if rng.random() < 0.3:
+            corpo.append(f"hunt({nome});")
+            entrada.append(rng.choice(["leao", "zebra", "gnu"]))
+        else:
+            corpo.append(f"{nome} = \"{rng.choice(['a', 'b', 'ab'])}\";")
+
+    def termo():
+        return rng.choice(inteiros) if rng.random() < 0.6 else str(rng.randint(0, 9))
+
+    def aritmetica():
+        partes = [termo()]
+        for _ in range(rng.randint(0, 2)):
+            operador = rng.choice(["+", "-", "*", "/"])
+            # Divisão só por constantes não nulas
+            partes += [operador, str(rng.randint(1, 9)) if operador == "/" else termo()]
+        return " ".join(partes)
+
+    def condicao():
+        if rng.random() < 0.2:
+            comparacao = f"{rng.choice(textos)} {rng.choice(['==', '!=', '<', '>'])} {rng.choice(textos)}"
+        else:
+            comparacao = f"{aritmetica()} {rng.choice(['==', '!=', '<', '>', '<=', '>='])} {aritmetica()}"
+        if rng.random() < 0.3:
+            return f"{comparacao} {rng.choice(['&&', '||'])} !({termo()} > {rng.randint(0, 5)})"
+        return comparacao
+
+    def bloco(quantidade, profundidade):
+        linhas = []
+        for _ in range(quantidade):
+            escolha = rng.random()
+            if escolha < 0.35:
+                linhas.append(f"{rng.choice(inteiros)} = {aritmetica()};")
+            elif escolha < 0.45:
+                # Textos só recebem literais (a análise semântica tipa nomes como int)
+                literais = [f"\"{letra}\"" for letra in rng.sample("xyz", rng.randint(1, 2))]
+                linhas.append(f"{rng.choice(textos)} = {' + '.join(literais)};")
+            elif escolha < 0.55:
+                # Troca de valores: depois da propagação de cópias, os phi
+                # dos laços formam um ciclo
+                a, b = rng.sample(inteiros, 2)
+                linhas.append(f"aux = {a}; {a} = {b}; {b} = aux;")
+            elif escolha < 0.7:
+                linhas.append(f"roarout({rng.choice(inteiros + textos)});")
+            elif escolha < 0.85 and profundidade < 3:
+                linhas.append(f"if {condicao()} then {{")
+                linhas += bloco(rng.randint(0, 3), profundidade + 1)
+                if rng.random() < 0.5:
+                    linhas.append("} else {")
+                    linhas += bloco(rng.randint(0, 3), profundidade + 1)
+                linhas.append("}")
+            elif profundidade < 3:
+                contador = f"c{len(contadores)}"
+                contadores.append(contador)
+                linhas.append(f"{contador} = 0;")
+                linhas.append(f"while {contador} < 3 && ({condicao()}) strike {{")
+                linhas += bloco(rng.randint(0, 3), profundidade + 1)
+                linhas.append(f"{contador} = {contador} + 1;")
+                linhas.append("}")
+        return linhas
+
+    corpo += bloco(comandos, 0)
+    corpo += [f"roarout({nome});" for nome in inteiros + textos]
+    declaracoes = [f"roar {nome} as int;" for nome in inteiros + ["aux"] + contadores]
+    declaracoes += [f"roar {nome} as text;" for nome in textos]
+    texto = "@start\n" + "\n".join("    " + linha for linha in declaracoes + corpo) + "\n@end\n"
+    return texto, "\n".join(entrada) + "\n"
+
+
+def _programa_sem_erros(linhas, semente=42):
+    """gerar_programa sem as concatenações com variáveis, que a análise semântica recusa."""
+    return "\n".join(linha for linha in gerar_programa(linhas, semente).split("\n") if '" +' not in linha)
+
+
+def _tac_e_simbolos(texto):
+    """TAC e tabela de símbolos de um programa, ou (None, None) se houver erros."""
+    from AnalisadorSemantico import SemanticAnalyzer
+    from lion_ast import lower
+    from tac_generator import TACGenerator
+
+    arvore, erros = _analisar(texto, 'rd')
+    if erros:
+        return None, None
+    semantica = SemanticAnalyzer()
+    programa = lower(arvore, semantica.symbols.names)
+    semantica.analyze(programa)
+    if semantica.errors:
+        return None, None
+    return TACGenerator(symbols=semantica.symbols).visit(programa), semantica.symbols
+
+
+def _conferir_ssa(ssa):
+    """Propriedades da forma SSA: uma definição por versão, dominando os usos; devolve as divergências."""
+    from tac_generator import OP_WRITE, Var
+    from tac_ssa import SSAVar
+
+    grafo = ssa.cfg
+    problemas, definicoes = [], {}
+    for bloco in grafo.blocks:
+        for phi in ssa.phis[bloco.id]:
+            if phi.result in definicoes or len(phi.args) != len(bloco.predecessors) or None in phi.args:
+                problemas.append(f"phi {phi} no bloco {bloco.id}")
+            definicoes[phi.result] = (bloco.id, -1)
+        for posicao, instrucao in enumerate(bloco.instructions):
+            operandos = (instrucao.result,) if instrucao.opcode == OP_WRITE else (instrucao.arg1, instrucao.arg2)
+            if any(type(operando) is Var for operando in operandos + (instrucao.result,)):
+                problemas.append(f"variável sem versão em '{instrucao}'")
+            if type(instrucao.result) is SSAVar and instrucao.opcode != OP_WRITE:
+                if instrucao.result in definicoes:
+                    problemas.append(f"{instrucao.result} definida duas vezes")
+                definicoes[instrucao.result] = (bloco.id, posicao)
+
+    def domina(versao, bloco, posicao):
+        if versao.version == 0:
+            return True
+        origem, posicao_origem = definicoes[versao]
+        return posicao_origem < posicao if origem == bloco else grafo.dominates(origem, bloco)
+
+    for bloco in grafo.blocks:
+        if not grafo.reachable(bloco.id):
+            continue
+        for posicao, instrucao in enumerate(bloco.instructions):
+            operandos = (instrucao.result,) if instrucao.opcode == OP_WRITE else (instrucao.arg1, instrucao.arg2)
+            for operando in operandos:
+                if type(operando) is SSAVar and not domina(operando, bloco.id, posicao):
+                    problemas.append(f"uso de {operando} sem a definição antes, em '{instrucao}'")
+        for phi in ssa.phis[bloco.id]:
+            for predecessor, argumento in zip(bloco.predecessors, phi.args):
+                if type(argumento) is SSAVar and grafo.reachable(predecessor) and \
+                        not domina(argumento, predecessor, len(grafo.blocks[predecessor].instructions)):
+                    problemas.append(f"argumento {argumento} de {phi} sem a definição no predecessor")
+    return problemas
+
+
+def _propagar_copias(ssa):
+    """
+    Troca os usos de cada `x.N := y.M` (ou de uma constante) pela origem,
+    inclusive nos phi. Deixa versões da mesma variável vivas ao mesmo tempo,
+    o caso que a saída da SSA precisa separar.
+    """
+    from tac_generator import OP_ASSIGN, OP_WRITE, Constant
+    from tac_ssa import SSAVar
+
+    copias = {}
+    for bloco in ssa.cfg.blocks:
+        for instrucao in bloco.instructions:
+            if instrucao.opcode == OP_ASSIGN and type(instrucao.result) is SSAVar \
+                    and type(instrucao.arg1) in (SSAVar, Constant):
+                copias[instrucao.result] = instrucao.arg1
+
+    def origem(operando):
+        while operando in copias:
+            operando = copias[operando]
+        return operando
+
+    for bloco in ssa.cfg.blocks:
+        for instrucao in bloco.instructions:
+            if instrucao.opcode == OP_WRITE:
+                instrucao.result = origem(instrucao.result)
+            else:
+                instrucao.arg1, instrucao.arg2 = origem(instrucao.arg1), origem(instrucao.arg2)
+        for phi in ssa.phis[bloco.id]:
+            phi.args = [origem(argumento) for argumento in phi.args]
+    return len(copias)
+
+
+def _executar_llvm(codigos, entrada, pasta, runtime):
+    """Compila cada LLVM IR com llc e o compilador C e devolve as saídas dos executáveis."""
+    saidas = []
+    for indice, codigo in enumerate(codigos):
+        base = os.path.join(pasta, f"variante{indice}")
+        with open(base + '.ll', 'w', encoding='utf-8') as arquivo:
+            arquivo.write(codigo)
+        subprocess.run(['llc', '-relocation-model=pic', '-filetype=obj', base + '.ll', '-o', base + '.o'], check=True)
+        subprocess.run([runtime[0], base + '.o', runtime[1], '-o', base], check=True)
+        saidas.append(subprocess.run([base], input=entrada, capture_output=True, text=True, timeout=30).stdout)
+    return saidas
+
+
+def _instrucoes_llvm(codigo):
+    """Quantas instruções, e quantas são alloca/load/store, há no LLVM IR de main."""
+    corpo = codigo[codigo.index('define i32 @"main"'):]
+    corpo = corpo[:corpo.index('\n}')]
+    linhas = [linha.strip() for linha in corpo.split('\n') if linha.startswith('  ')]
+    memoria = sum(1 for linha in linhas if ' = alloca ' in linha or ' = load ' in linha or linha.startswith('store '))
+    return len(linhas), memoria
+
+
+def benchmark_ssa(args):
+    """
+    Forma SSA do TAC (tac_ssa.py): propriedades conferidas em programas
+    gerados; a mesma saída, executando, do LLVM com alloca, do LLVM com phi e
+    do TAC de volta da SSA (também depois de uma propagação de cópias); e o
+    custo da construção e o tamanho do LLVM IR em programas grandes.
+    """
+    import gc
+    import shutil
+
+    from llvm_generator import LLVMGenerator
+    from tac_ssa import SSAForm
+
+    rng = random.Random(args.semente)
+    corpus = [_programa_sem_erros(60, semente) for semente in range(args.programas)]
+    corpus += [_programa_com_escopos(rng, 80) for _ in range(args.escopos)]
+    corpus += [_programa_executavel(rng)[0] for _ in range(args.programas)]
+    conferidos = phis = 0
+    for indice, texto in enumerate(corpus):
+        tac, _ = _tac_e_simbolos(texto)
+        if tac is None:
+            continue
+        ssa = SSAForm(tac)
+        problemas = _conferir_ssa(ssa)
+        _propagar_copias(ssa)
+        problemas += [f"depois da propagação: {problema}" for problema in _conferir_ssa(ssa)]
+        # A volta da SSA tem que ser SSA de novo com o mesmo número de phi ou menos
+        problemas += [f"volta: {problema}" for problema in _conferir_ssa(SSAForm(ssa.to_tac()))]
+        if problemas:
+            print(f"  ERRO: programa {indice}: {'; '.join(problemas[:5])}")
+            print(texto)
+            return 1
+        conferidos += 1
+        phis += ssa.phi_count()
+    print(f"{conferidos} programas em SSA sem divergências ({phis} phi)")
+
+    compilador_c = shutil.which('gcc') or shutil.which('clang') or shutil.which('cc')
+    if args.execucoes and shutil.which('llc') and compilador_c:
+        variantes = ("alloca", "phi", "volta da SSA", "phi com cópias propagadas", "volta com cópias propagadas")
+        with tempfile.TemporaryDirectory() as pasta:
+            helpers = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'helpers.c')
+            runtime = (compilador_c, os.path.join(pasta, 'helpers.o'))
+            subprocess.run([compilador_c, '-c', helpers, '-o', runtime[1]], check=True)
+            separadas = 0
+            for indice in range(args.execucoes):
+                texto, entrada = _programa_executavel(rng)
+                tac, simbolos = _tac_e_simbolos(texto)
+                ssa = SSAForm(tac)
+                codigos = [LLVMGenerator(simbolos).generate(tac), LLVMGenerator(simbolos).generate_ssa(ssa),
+                           LLVMGenerator(simbolos).generate(ssa.to_tac())]
+                _propagar_copias(ssa)
+                volta = ssa.to_tac()
+                # Variáveis próprias criadas para versões em conflito ('x.N')
+                separadas += len({instrucao.result.name for instrucao in volta
+                                  if '.' in str(instrucao.result.name)})
+                codigos += [LLVMGenerator(simbolos).generate_ssa(ssa), LLVMGenerator(simbolos).generate(volta)]
+                saidas = _executar_llvm(codigos, entrada, pasta, runtime)
+                for variante, saida in zip(variantes[1:], saidas[1:]):
+                    if saida != saidas[0]:
+                        print(f"  ERRO: saída de '{variante}' difere da com alloca no programa {indice}:")
+                        print(f"    {saidas[0]!r}\n    {saida!r}")
+                        print(texto)
+                        return 1
+            print(f"{args.execucoes} programas executados com a mesma saída em {len(variantes)} traduções "
+                  f"({separadas} versões com variável própria na volta depois da propagação)")
+    elif args.execucoes:
+        print("llc ou um compilador C não encontrados: execução não conferida")
+
+    print("Construção da SSA, volta ao TAC e LLVM IR (alloca/load/store contra phi):")
+    for linhas in args.linhas:
+        tac, simbolos = _tac_e_simbolos(_programa_sem_erros(linhas))
+        n = len(tac)
+        gc.collect()
+        gc.disable()
+        inicio = time.perf_counter()
+        ssa = SSAForm(tac)
+        construcao = time.perf_counter() - inicio
+        inicio = time.perf_counter()
+        ssa.to_tac()
+        volta = time.perf_counter() - inicio
+        inicio = time.perf_counter()
+        com_alloca = LLVMGenerator(simbolos).generate(tac)
+        llvm_alloca = time.perf_counter() - inicio
+        inicio = time.perf_counter()
+        com_phi = LLVMGenerator(simbolos).generate_ssa(SSAForm(tac))
+        llvm_phi = time.perf_counter() - inicio
+        gc.enable()
+        instrucoes_alloca, memoria_alloca = _instrucoes_llvm(com_alloca)
+        instrucoes_phi, memoria_phi = _instrucoes_llvm(com_phi)
+        print(f"  {linhas} linhas: {n} instruções TAC, {ssa.phi_count()} phi")
+        print(f"    SSA {construcao * 1e6 / n:5.2f} µs/instrução, volta {volta * 1e6 / n:5.2f} µs/instrução")
+        print(f"    LLVM com alloca: {llvm_alloca * 1000:7.1f} ms, {instrucoes_alloca} instruções "
+              f"({memoria_alloca} alloca/load/store)")
+        print(f"    LLVM com phi   : {llvm_phi * 1000:7.1f} ms (com a SSA), {instrucoes_phi} instruções "
+              f"({memoria_phi} alloca/load/store)")
+        if shutil.which('llc'):
+            tempos = []
+            for codigo in (com_alloca, com_phi):
+                with tempfile.NamedTemporaryFile('w', suffix='.ll', delete=False) as arquivo:
+                    arquivo.write(codigo)
+                inicio = time.perf_counter()
+                subprocess.run(['llc', '-O0', '-filetype=obj', arquivo.name, '-o', os.devnull], check=True)
+                tempos.append(time.perf_counter() - inicio)
+                os.unlink(arquivo.name)
+            print(f"    llc -O0: {tempos[0] * 1000:7.1f} ms com alloca, {tempos[1] * 1000:7.1f} ms com phi")
+    return 0
+
+
+def benchmark_otimizacao(args):
+    """
+    -O (tac_optimizer.py): o TAC otimizado de programas gerados continua
+    bem formado (SSA conferida e ida e volta pelo formato texto); a saída
+    executando é a mesma sem e com -O (com alloca e com phi); e quanto cai o
+    número de instruções TAC e LLVM, com o tempo da otimização.
+    """
+    import gc
+    import shutil
+
+    from llvm_generator import LLVMGenerator
+    from tac_io import parse_text
+    from tac_optimizer import OptimizationStats, optimize
+    from tac_ssa import SSAForm
+
+    rng = random.Random(args.semente)
+    corpus = [_programa_sem_erros(60, semente) for semente in range(args.programas)]
+    corpus += [_programa_com_escopos(rng, 80) for _ in range(args.escopos)]
+    corpus += [_programa_executavel(rng)[0] for _ in range(args.programas)]
+    stats = OptimizationStats()
+    conferidos = llvm_antes = llvm_depois = 0
+    for indice, texto in enumerate(corpus):
+        tac, simbolos = _tac_e_simbolos(texto)
+        if tac is None:
+            continue
+        otimizado = optimize(tac, stats)
+        problemas = _conferir_ssa(SSAForm(otimizado))
+        linhas = [str(instrucao) for instrucao in otimizado]
+        if [str(instrucao) for instrucao in parse_text(linhas)] != linhas:
+            problemas.append("o TAC otimizado não volta igual do formato texto")
+        if problemas:
+            print(f"  ERRO: programa {indice}: {'; '.join(problemas[:5])}")
+            print(texto)
+            return 1
+        conferidos += 1
+        llvm_antes += _instrucoes_llvm(LLVMGenerator(simbolos).generate(tac))[0]
+        llvm_depois += _instrucoes_llvm(LLVMGenerator(simbolos).generate(otimizado))[0]
+    print(f"{conferidos} programas otimizados sem divergências")
+    print(f"  {stats.report()}")
+    print(f"  LLVM IR: {llvm_antes} -> {llvm_depois} instruções "
+          f"({(llvm_antes - llvm_depois) * 100 / llvm_antes:.1f}% a menos)")
+
+    compilador_c = shutil.which('gcc') or shutil.which('clang') or shutil.which('cc')
+    if args.execucoes and shutil.which('llc') and compilador_c:
+        variantes = ("sem -O", "-O", "-O com phi")
+        with tempfile.TemporaryDirectory() as pasta:
+            helpers = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'helpers.c')
+            runtime = (compilador_c, os.path.join(pasta, 'helpers.o'))
+            subprocess.run([compilador_c, '-c', helpers, '-o', runtime[1]], check=True)
+            desvios = 0
+            for indice in range(args.execucoes):
+                texto, entrada = _programa_executavel(rng)
+                tac, simbolos = _tac_e_simbolos(texto)
+                execucao = OptimizationStats()
+                otimizado = optimize(tac, execucao)
+                desvios += execucao.branches
+                codigos = [LLVMGenerator(simbolos).generate(tac), LLVMGenerator(simbolos).generate(otimizado),
+                           LLVMGenerator(simbolos).generate_ssa(SSAForm(otimizado))]
+                saidas = _executar_llvm(codigos, entrada, pasta, runtime)
+                for variante, saida in zip(variantes[1:], saidas[1:]):
+                    if saida != saidas[0]:
+                        print(f"  ERRO: saída de '{variante}' difere da sem -O no programa {indice}:")
+                        print(f"    {saidas[0]!r}\n    {saida!r}")
+                        print(texto)
+                        return 1
+            print(f"{args.execucoes} programas executados com a mesma saída em {len(variantes)} traduções "
+                  f"({desvios} desvios com condição constante resolvidos)")
+    elif args.execucoes:
+        print("llc ou um compilador C não encontrados: execução não conferida")
+
+    print("Otimização em programas grandes:")
+    for linhas in args.linhas:
+        for nome, texto in (("gerado", _programa_sem_erros(linhas)),
+                            ("executável", _programa_executavel(random.Random(linhas), linhas // 4)[0])):
+            tac, simbolos = _tac_e_simbolos(texto)
+            gc.collect()
+            gc.disable()
+            inicio = time.perf_counter()
+            otimizado = optimize(tac)
+            tempo = time.perf_counter() - inicio
+            gc.enable()
+            antes = _instrucoes_llvm(LLVMGenerator(simbolos).generate(tac))[0]
+            depois = _instrucoes_llvm(LLVMGenerator(simbolos).generate(otimizado))[0]
+            print(f"  {linhas} linhas ({nome}): TAC {len(tac)} -> {len(otimizado)}, LLVM {antes} -> {depois} "
+                  f"instruções, {tempo * 1e6 / len(tac):5.2f} µs/instrução")
+    return 0
+
+
+def benchmark_codigo_morto(args):
+    """
+    Eliminação de código morto (tac_optimizer.eliminate_dead_code): o que sai
+    sozinha e depois da propagação de constantes, a mesma saída executando
+    (os READ e WRITE ficam), e o tempo do LLVMGenerator e do llc antes e
+    depois em programas grandes.
+    """
+    import gc
+    import shutil
+
+    from llvm_generator import LLVMGenerator
+    from tac_generator import OP_READ, OP_WRITE
+    from tac_optimizer import OptimizationStats, eliminate_dead_code, optimize
+
+    def entrada_e_saida(tac):
+        return sum(1 for instrucao in tac if instrucao.opcode == OP_READ or instrucao.opcode == OP_WRITE)
+
+    rng = random.Random(args.semente)
+    corpus = [_programa_sem_erros(60, semente) for semente in range(args.programas)]
+    corpus += [_programa_executavel(rng)[0] for _ in range(args.programas)]
+    so_morto, completo = OptimizationStats(), OptimizationStats()
+    total = depois_morto = depois_completo = 0
+    for texto in corpus:
+        tac, _ = _tac_e_simbolos(texto)
+        if tac is None:
+            continue
+        total += len(tac)
+        inalcancaveis = so_morto.unreachable_blocks
+        sem_morto = eliminate_dead_code(tac, so_morto)
+        so_morto.instructions_before += len(tac)
+        so_morto.instructions_after += len(sem_morto)
+        depois_morto += len(sem_morto)
+        depois_completo += len(optimize(tac, completo))
+        # Sem blocos inalcançáveis no original, nenhum READ/WRITE pode sumir
+        if so_morto.unreachable_blocks == inalcancaveis and entrada_e_saida(sem_morto) != entrada_e_saida(tac):
+            print("  ERRO: a eliminação de código morto removeu um READ ou WRITE")
+            print(texto)
+            return 1
+    print(f"{len(corpus)} programas, {total} instruções TAC:")
+    print(f"  só código morto: {depois_morto} ({(total - depois_morto) * 100 / total:.1f}% a menos)")
+    print(f"    {so_morto.report()}")
+    print(f"  -O completo    : {depois_completo} ({(total - depois_completo) * 100 / total:.1f}% a menos)")
+    print(f"    {completo.report()}")
+
+    compilador_c = shutil.which('gcc') or shutil.which('clang') or shutil.which('cc')
+    if args.execucoes and shutil.which('llc') and compilador_c:
+        variantes = ("sem otimização", "só código morto", "-O")
+        with tempfile.TemporaryDirectory() as pasta:
+            helpers = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'helpers.c')
+            runtime = (compilador_c, os.path.join(pasta, 'helpers.o'))
+            subprocess.run([compilador_c, '-c', helpers, '-o', runtime[1]], check=True)
+            for indice in range(args.execucoes):
+                texto, entrada = _programa_executavel(rng)
+                tac, simbolos = _tac_e_simbolos(texto)
+                codigos = [LLVMGenerator(simbolos).generate(codigo)
+                           for codigo in (tac, eliminate_dead_code(tac), optimize(tac))]
+                saidas = _executar_llvm(codigos, entrada, pasta, runtime)
+                for variante, saida in zip(variantes[1:], saidas[1:]):
+                    if saida != saidas[0]:
+                        print(f"  ERRO: saída de '{variante}' difere da sem otimização no programa {indice}:")
+                        print(f"    {saidas[0]!r}\n    {saida!r}")
+                        print(texto)
+                        return 1
+            print(f"{args.execucoes} programas executados com a mesma saída em {len(variantes)} traduções")
+    elif args.execucoes:
+        print("llc ou um compilador C não encontrados: execução não conferida")
+
+    print("Programas grandes (LLVMGenerator e llc -O0 sem e com -O):")
+    for linhas in args.linhas:
+        for nome, texto in (("gerado", _programa_sem_erros(linhas)),
+                            ("executável", _programa_executavel(random.Random(linhas), linhas // 4)[0])):
+            tac, simbolos = _tac_e_simbolos(texto)
+            gc.collect()
+            gc.disable()
+            inicio = time.perf_counter()
+            sem_morto = eliminate_dead_code(tac)
+            tempo_morto = time.perf_counter() - inicio
+            inicio = time.perf_counter()
+            otimizado = optimize(tac)
+            tempo_otimizacao = time.perf_counter() - inicio
+            codigos, tempos = [], []
+            for codigo in (tac, otimizado):
+                inicio = time.perf_counter()
+                codigos.append(LLVMGenerator(simbolos).generate(codigo))
+                tempos.append(time.perf_counter() - inicio)
+            gc.enable()
+            print(f"  {linhas} linhas ({nome}): TAC {len(tac)}, só código morto {len(sem_morto)} "
+                  f"({tempo_morto * 1e6 / len(tac):.2f} µs/instrução), -O {len(otimizado)} "
+                  f"({tempo_otimizacao * 1e6 / len(tac):.2f} µs/instrução)")
+            print(f"    LLVMGenerator: {tempos[0] * 1000:7.1f} ms -> {tempos[1] * 1000:7.1f} ms")
+            if shutil.which('llc'):
+                tempos = []
+                for codigo in codigos:
+                    with tempfile.NamedTemporaryFile('w', suffix='.ll', delete=False) as arquivo:
+                        arquivo.write(codigo)
+                    inicio = time.perf_counter()
+                    subprocess.run(['llc', '-O0', '-filetype=obj', arquivo.name, '-o', os.devnull], check=True)
+                    tempos.append(time.perf_counter() - inicio)
+                    os.unlink(arquivo.name)
+                print(f"    llc -O0      : {tempos[0] * 1000:7.1f} ms -> {tempos[1] * 1000:7.1f} ms")
+    return 0
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description='Benchmarks do compilador LION.')
+    experimentos = arg_parser.add_subparsers(dest='experimento', required=True)
+
+    lexico = experimentos.add_parser('lexico', help='Vazão dos analisadores léxicos (tokens/s).')
+    lexico.add_argument('--linhas', type=int, nargs='+', default=[10000, 100000])
+    lexico.add_argument('--lexers', nargs='+', default=['antlr', 'fast'], choices=['antlr', 'fast'])
+    lexico.set_defaults(executar=benchmark_lexico)
+
+    paralelo = experimentos.add_parser('lexico-paralelo', help='Escalabilidade da análise léxica paralela.')
+    paralelo.add_argument('--linhas', type=int, default=200000)
+    paralelo.add_argument('--jobs', type=int, nargs='+', default=[1, 2, 4, 8])
+    paralelo.add_argument('--lexer', default='fast', choices=['antlr', 'fast'])
+    paralelo.set_defaults(executar=benchmark_lexico_paralelo)
+
+    entrada = experimentos.add_parser('entrada', help='Pico de memória da camada de entrada.')
+    entrada.add_argument('--linhas', type=int, default=500000)
+    entrada.add_argument('--lexer', default='fast', choices=['antlr', 'fast'])
+    entrada.set_defaults(executar=benchmark_entrada)
+
+    tokens = experimentos.add_parser('tokens', help='Memória do armazenamento de tokens e dump binário.')
+    tokens.add_argument('--linhas', type=int, default=160000)
+    tokens.add_argument('--lexer', default='fast', choices=['antlr', 'fast'])
+    tokens.set_defaults(executar=benchmark_tokens)
+
+    sintatico = experimentos.add_parser('parser', help='Análise sintática LL x SLL com fallback para LL.')
+    sintatico.add_argument('--linhas', type=int, default=5000)
+    sintatico.add_argument('--programas', type=int, default=5)
+    sintatico.set_defaults(executar=benchmark_parser)
+
+    cache_dfa = experimentos.add_parser('cache-dfa', help='Análise sintática com e sem o cache persistente de DFAs.')
+    cache_dfa.add_argument('--linhas', type=int, default=40)
+    cache_dfa.add_argument('--execucoes', type=int, default=10)
+    cache_dfa.set_defaults(executar=benchmark_cache_dfa)
+
+    partida = experimentos.add_parser('partida', help='Latência de partida (primeiro token) com e sem snapshots do ATN.')
+    partida.add_argument('--linhas', type=int, default=10)
+    partida.add_argument('--execucoes', type=int, default=20)
+    partida.set_defaults(executar=benchmark_partida)
+
+    parser_rd = experimentos.add_parser('parser-rd', help='Parser descendente recursivo x ANTLR: equivalência e tempo.')
+    parser_rd.add_argument('--programas', type=int, default=50)
+    parser_rd.add_argument('--expressoes', type=int, default=3000)
+    parser_rd.add_argument('--mutacoes', type=int, default=1000)
+    parser_rd.add_argument('--linhas', type=int, default=5000)
+    parser_rd.add_argument('--semente', type=int, default=7)
+    parser_rd.add_argument('--detalhar', action='store_true', help='Mostra os erros cuja posição difere da do ANTLR.')
+    parser_rd.set_defaults(executar=benchmark_parser_rd)
+
+    ast = experimentos.add_parser('ast', help='Memória e tempo de travessia da AST compacta x árvore de derivação.')
+    ast.add_argument('--linhas', type=int, default=20000)
+    ast.add_argument('--repeticoes', type=int, default=5)
+    ast.set_defaults(executar=benchmark_ast)
+
+    streaming = experimentos.add_parser('streaming', help='Front end em streaming x lotes: equivalência e pico de memória.')
+    streaming.add_argument('--programas', type=int, default=50)
+    streaming.add_argument('--expressoes', type=int, default=1000)
+    streaming.add_argument('--mutacoes', type=int, default=500)
+    streaming.add_argument('--escopos', type=int, default=100)
+    streaming.add_argument('--linhas', type=int, nargs='+', default=[1000, 4000, 16000])
+    streaming.add_argument('--semente', type=int, default=11)
+    streaming.set_defaults(executar=benchmark_streaming)
+
+    incremental = experimentos.add_parser('incremental', help='Análise incremental: equivalência e latência por edição.')
+    incremental.add_argument('--programas', type=int, default=20)
+    incremental.add_argument('--tamanho', type=int, default=60, help='Linhas de cada programa do teste diferencial.')
+    incremental.add_argument('--edicoes', type=int, default=100, help='Edições acumuladas em cada programa.')
+    incremental.add_argument('--linhas', type=int, nargs='+', default=[1000, 4000, 16000])
+    incremental.add_argument('--saltos', type=int, default=50)
+    incremental.add_argument('--semente', type=int, default=13)
+    incremental.set_defaults(executar=benchmark_incremental)
+
+    cadeias = experimentos.add_parser('cadeias', help='Escalabilidade das fases com cadeias longas de operadores.')
+    cadeias.add_argument('--operandos', type=int, nargs='+', default=[1000, 2000, 4000, 8000])
+    cadeias.add_argument('--tipos', nargs='+', default=list(_CADEIAS), choices=list(_CADEIAS))
+    cadeias.add_argument('--parser', default='rd', choices=['antlr', 'rd'],
+                         help="Analisador sintático (padrão: rd; a predição LL do ANTLR é quadrática em somas).")
+    cadeias.set_defaults(executar=benchmark_cadeias)
+
+    semantico = experimentos.add_parser('semantico', help='Tempo da análise semântica com o log desligado, em lotes e em uma thread.')
+    semantico.add_argument('--linhas', type=int, nargs='+', default=[20000, 80000])
+    semantico.add_argument('--repeticoes', type=int, default=3)
+    semantico.set_defaults(executar=benchmark_semantico)
+
+    aninhamento = experimentos.add_parser('aninhamento', help='Fases do compilador com blocos e parênteses profundamente aninhados.')
+    aninhamento.add_argument('--niveis', type=int, nargs='+', default=[1000, 10000, 100000])
+    aninhamento.add_argument('--tipos', nargs='+', default=list(_ANINHAMENTOS), choices=list(_ANINHAMENTOS))
+    aninhamento.add_argument('--parser', default='rd', choices=['antlr', 'rd'])
+    aninhamento.set_defaults(executar=benchmark_aninhamento)
+
+    tac = experimentos.add_parser('tac', help='Memória por instrução do TAC e tempo da geração do TAC e do LLVM.')
+    tac.add_argument('--linhas', type=int, nargs='+', default=[40000, 400000])
+    tac.add_argument('--sem-llvm', action='store_true', help='Não mede a tradução para LLVM (a mais lenta).')
+    tac.set_defaults(executar=benchmark_tac)
+
+    tac_io = experimentos.add_parser('tac-io', help='Leitura e gravação do TAC em texto e em binário: equivalência, tempo e tamanho.')
+    tac_io.add_argument('--programas', type=int, default=30)
+    tac_io.add_argument('--expressoes', type=int, default=500)
+    tac_io.add_argument('--escopos', type=int, default=200)
+    tac_io.add_argument('--llvm', type=int, default=100, help='Quantos programas também comparam o LLVM gerado.')
+    tac_io.add_argument('--linhas', type=int, nargs='+', default=[40000, 400000])
+    tac_io.add_argument('--semente', type=int, default=3)
+    tac_io.set_defaults(executar=benchmark_tac_io)
+
+    cfg = experimentos.add_parser('cfg', help='Grafo de fluxo de controle do TAC: dominadores e laços conferidos e tempo de construção.')
+    cfg.add_argument('--programas', type=int, default=30)
+    cfg.add_argument('--escopos', type=int, default=200)
+    cfg.add_argument('--linhas', type=int, nargs='+', default=[40000, 400000])
+    cfg.add_argument('--niveis', type=int, nargs='+', default=[10000, 100000])
+    cfg.add_argument('--semente', type=int, default=5)
+    cfg.set_defaults(executar=benchmark_cfg)
+
+    ssa = experimentos.add_parser('ssa', help='Forma SSA do TAC: propriedades, execução comparada e tamanho do LLVM IR.')
+    ssa.add_argument('--programas', type=int, default=30)
+    ssa.add_argument('--escopos', type=int, default=200)
+    ssa.add_argument('--execucoes', type=int, default=40)
+    ssa.add_argument('--linhas', type=int, nargs='+', default=[4000, 40000])
+    ssa.add_argument('--semente', type=int, default=7)
+    ssa.set_defaults(executar=benchmark_ssa)
+
+    otimizacao = experimentos.add_parser('otimizacao', help='-O: propagação e dobra de constantes conferidas, execução comparada e instruções removidas.')
+    otimizacao.add_argument('--programas', type=int, default=30)
+    otimizacao.add_argument('--escopos', type=int, default=200)
+    otimizacao.add_argument('--execucoes', type=int, default=40)
+    otimizacao.add_argument('--linhas', type=int, nargs='+', default=[4000, 40000])
+    otimizacao.add_argument('--semente', type=int, default=11)
+    otimizacao.set_defaults(executar=benchmark_otimizacao)
+
+    codigo_morto = experimentos.add_parser('codigo-morto', help='Eliminação de código morto e de blocos inalcançáveis: o que sai, execução comparada e tempo de geração.')
+    codigo_morto.add_argument('--programas', type=int, default=30)
+    codigo_morto.add_argument('--execucoes', type=int, default=40)
+    codigo_morto.add_argument('--linhas', type=int, nargs='+', default=[4000, 40000])
+    codigo_morto.add_argument('--semente', type=int, default=13)
+    codigo_morto.set_defaults(executar=benchmark_codigo_morto)
+
+    args = arg_parser.parse_args()
+    sys.exit(args.executar(args))
+
+
+if __name__ == '__main__':
+    main()
@@ -1,16 +1,27 @@
 # compilador.py (VERSÃO FINAL COMPLETA)
 
+import os
 import sys
 import argparse
 from antlr4 import *
 from antlr4.error.ErrorListener import ErrorListener
 
 # Importa todas as classes necessárias das outras fases
-from ExprLexer import ExprLexer
 from ExprParser import ExprParser
+from fast_lexer import LEXER_CHOICES, get_lexer_class
+from parallel_lexer import lex_parallel
+from source_input import STDIN_PATH, open_source
+from parser_driver import STATS as PARSE_STATS, expression_decisions, parse_two_stage
+from parser_profiler import ProfilingATNSimulator
+from dfa_cache import dfa_state_count, load_dfa_cache, save_dfa_cache
+from rd_parser import PARSER_CHOICES, RecursiveDescentParser
+from lion_ast import lower
 from AnalisadorSemantico import SemanticAnalyzer
+from symbol_table import SymbolTable
+from compiler_log import LOG_LEVELS, CompilerLog
 from tac_generator import TACGenerator
-from llvm_generator import LLVMGenerator
+from streaming_frontend import TACFileWriter, compile_two_stage
+from tac_io import TAC_EXTENSIONS, BinaryTACWriter, load as load_tac, save_binary, write_text
 
 class CustomSyntaxErrorListener(ErrorListener):
     """
@@ -32,96 +43,268 @@ class CustomSyntaxErrorListener(ErrorListener):
         
         self.errors.append(error_msg)
 
+def abort_on_errors(errors, kind):
+    """Se a fase encontrou erros, lista-os e interrompe a compilação."""
+    if errors:
+        print(f"\nERRO: {len(errors)} erro(s) {kind}(s) encontrado(s). Compilação interrompida.")
+        for error in errors:
+            print(f"  - {error}")
+        sys.exit(1)
+
+def print_llvm_done(llvm_file, base_name):
+    print(f"Geração de LLVM IR concluída. Código salvo em: {llvm_file}")
+    print("\nPara compilar e executar o código gerado, você precisará do LLVM instalado.")
+    print("Use os seguintes comandos:")
+    print(f"  1. llc -filetype=obj {llvm_file} -o {base_name}.o")
+    print(f"  2. clang {base_name}.o -o {base_name}")
+    print(f"  3. ./{base_name}")
+
+def open_log(args, log_file):
+    """Log da análise semântica, com o nível e o modo de escrita das opções --log e --log-thread."""
+    return CompilerLog(log_file, LOG_LEVELS[args.log], background=args.log_thread)
+
+def compile_streaming(args, make_token_source, log_file, tac_file, llvm_file, base_name):
+    """
+    Modo --streaming: fases 2 a 5 em uma única passada, sem árvore de
+    derivação, sem buffer de tokens e sem a lista de TAC em memória (ver
+    streaming_frontend.py). O TAC vai direto para o arquivo e/ou para o
+    gerador LLVM; as saídas só são gravadas se não houver erros. O log vai
+    para um arquivo temporário e só substitui o anterior quando a análise
+    semântica termina, como no caminho em lotes, que não abre o log se houver
+    erros sintáticos.
+    """
+    outputs = {}
+
+    def discard_outputs():
+        if outputs.get('tac'):
+            outputs['tac'].discard()
+        if outputs.get('log'):
+            outputs['log'].close()
+            os.remove(outputs['log'].path)
+        outputs.clear()
+
+    def start_attempt():
+        # Cada tentativa (SLL e, se preciso, LL) recomeça log e saídas do zero
+        discard_outputs()
+        outputs['log'] = open_log(args, log_file + '.tmp')
+        semantic = SemanticAnalyzer(outputs['log'])
+        consumers = []
+        if args.gerar_tac:
+            outputs['tac'] = (BinaryTACWriter if args.tac_binario else TACFileWriter)(tac_file)
+            consumers.append(outputs['tac'])
+        if args.gerar_llvm:
+            from llvm_generator import LLVMGenerator
+            outputs['llvm'] = LLVMGenerator(semantic.symbols)
+            outputs['llvm'].begin(lazy_allocation=True)
+            consumers.append(outputs['llvm'].emit)
+
+        def emit(instruction):
+            for consumer in consumers:
+                consumer(instruction)
+        return CustomSyntaxErrorListener(), semantic, emit
+
+    cached_states = 0 if args.sem_cache_dfa else load_dfa_cache(ExprParser)
+    try:
+        error_listener, semantic_analyzer = compile_two_stage(make_token_source, start_attempt)
+        if not args.sem_cache_dfa and dfa_state_count(ExprParser) > cached_states:
+            save_dfa_cache(ExprParser)
+        abort_on_errors(error_listener.errors, "sintático")
+        print("Análise sintática concluída sem erros.")
+        # Análise semântica completa: o log fica, mesmo com erros semânticos
+        outputs['log'].close()
+        os.replace(outputs.pop('log').path, log_file)
+        abort_on_errors(semantic_analyzer.errors, "semântico")
+    except BaseException:
+        discard_outputs()
+        raise
+    print(f"Análise semântica concluída sem erros. Log disponível em '{log_file}'.")
+
+    if 'tac' in outputs:
+        outputs['tac'].commit()
+        print(f"\nArquivo TAC salvo em: {tac_file}")
+    if 'llvm' in outputs:
+        with open(llvm_file, 'w', encoding='utf-8') as f:
+            f.write(outputs['llvm'].finish())
+        print()
+        print_llvm_done(llvm_file, base_name)
+
+def save_tac(args, tac_code, tac_file):
+    """Grava o TAC no formato texto ou, com --tac-binario, no binário."""
+    print("\nSalvando Código de Três Endereços (TAC)...")
+    if args.tac_binario:
+        save_binary(tac_code, tac_file)
+    else:
+        write_text(tac_code, tac_file)
+    print(f"Arquivo TAC salvo em: {tac_file}")
+
+def optimize_tac(tac_code):
+    """-O: constantes e código morto, sobre o TAC (ver tac_optimizer.py)."""
+    from tac_optimizer import OptimizationStats, optimize
+    stats = OptimizationStats()
+    tac_code = optimize(tac_code, stats)
+    print(stats.report())
+    return tac_code
+
+def generate_llvm(tac_code, symbols, llvm_file, base_name, ssa=False):
+    print("\nIniciando geração de Código Final (LLVM IR)...")
+    # Importado só aqui: carregar o llvmlite domina a partida do compilador
+    from llvm_generator import LLVMGenerator
+    llvm_gen = LLVMGenerator(symbols)
+    if ssa:
+        # Variáveis como valores e phi, sem alloca/load/store (ver tac_ssa.py)
+        from tac_ssa import SSAForm
+        llvm_ir_code = llvm_gen.generate_ssa(SSAForm(tac_code))
+    else:
+        llvm_ir_code = llvm_gen.generate(tac_code) # Passa a lista de TAC
+
+    with open(llvm_file, 'w', encoding='utf-8') as f:
+        f.write(llvm_ir_code)
+    print_llvm_done(llvm_file, base_name)
+
+def compile_from_tac(args, input_path, tac_file, llvm_file, base_name):
+    """
+    Entrada .tac ou .tacb: o TAC é lido do arquivo (ver tac_io.py) e só a
+    fase 5 é executada. Com --gerar-tac o TAC é regravado no formato pedido,
+    o que converte um formato no outro.
+    """
+    tac_code = load_tac(input_path)
+    print(f"TAC lido de '{input_path}': {len(tac_code)} instruções.")
+    if args.otimizar:
+        tac_code = optimize_tac(tac_code)
+    if args.gerar_tac and tac_file != input_path:
+        save_tac(args, tac_code, tac_file)
+    if args.gerar_llvm:
+        # Sem tabela de símbolos: o gerador LLVM aloca pelas instruções
+        generate_llvm(tac_code, None, llvm_file, base_name, args.ssa)
+
 def main():
     """
     Função principal que orquestra todo o pipeline do compilador.
     """
     # --- Configuração dos Argumentos ---
     arg_parser = argparse.ArgumentParser(description='Compilador para a linguagem LION.')
-    arg_parser.add_argument('input_file', type=str, help='Arquivo de código-fonte a ser compilado.')
+    arg_parser.add_argument('input_file', type=str, help="Arquivo de código-fonte a ser compilado ('-' para ler da entrada padrão), ou um TAC já gerado (.tac ou .tacb).")
     arg_parser.add_argument('--gerar-tac', action='store_true', help='Salva o arquivo de Código de Três Endereços (TAC).')
+    arg_parser.add_argument('--tac-binario', action='store_true', help='Salva o TAC no formato binário (.tacb), que guarda os tipos, em vez do texto.')
     arg_parser.add_argument('--gerar-llvm', action='store_true', help='Gera o código final em LLVM IR.')
+    arg_parser.add_argument('--ssa', action='store_true', help='Gera o LLVM IR a partir da forma SSA do TAC: variáveis viram valores com phi em vez de alloca/load/store.')
+    arg_parser.add_argument('-O', '--otimizar', action='store_true', help='Otimiza o TAC antes de salvá-lo e de gerar o LLVM IR: propagação e dobra de constantes, identidades algébricas, desvios com condição constante e eliminação de código morto e de blocos inalcançáveis.')
+    arg_parser.add_argument('--lexer', choices=LEXER_CHOICES, default='antlr', help='Analisador léxico a ser usado (padrão: antlr).')
+    arg_parser.add_argument('--lexer-jobs', type=int, default=1, help='Número de processos para a análise léxica paralela (padrão: 1).')
     
+    arg_parser.add_argument('--parser', choices=PARSER_CHOICES, default='antlr', help='Analisador sintático a ser usado (padrão: antlr). rd = descendente recursivo, mais rápido: aceita os mesmos programas com a mesma árvore, mas para no primeiro erro sintático, e a posição e a mensagem desse erro podem diferir das do ANTLR.')
+    arg_parser.add_argument('--estatisticas-parser', action='store_true', help='Mostra quantas análises terminaram em SLL e quantas caíram para LL.')
+    arg_parser.add_argument('--sem-cache-dfa', action='store_true', help='Não lê nem grava o cache persistente dos DFAs do parser.')
+    arg_parser.add_argument('--profile-parser', action='store_true', help='Mostra o perfil das decisões de predição do parser (chamadas, lookahead, fallbacks LL, tempo).')
+    arg_parser.add_argument('--streaming', action='store_true', help='Compila em uma passada, sem árvore de derivação nem TAC em memória (memória limitada pelo aninhamento).')
+    arg_parser.add_argument('--log', choices=LOG_LEVELS, default='detalhe', help='Nível do log da análise semântica (padrão: detalhe, uma linha por nó visitado; desligado não formata nenhuma mensagem).')
+    arg_parser.add_argument('--log-thread', action='store_true', help='Grava o log em uma thread separada.')
     args = arg_parser.parse_args()
+    if args.streaming and (args.parser == 'rd' or args.estatisticas_parser or args.profile_parser):
+        arg_parser.error('--streaming usa o parser do ANTLR e não combina com --parser rd, '
+                         '--estatisticas-parser ou --profile-parser')
+    if args.parser == 'rd' and (args.estatisticas_parser or args.profile_parser or args.sem_cache_dfa):
+        arg_parser.error('--parser rd não usa a predição do ANTLR e não combina com --estatisticas-parser, '
+                         '--profile-parser ou --sem-cache-dfa')
+    if args.streaming and args.ssa:
+        arg_parser.error('--ssa precisa do TAC inteiro e não combina com --streaming')
+    if args.streaming and args.otimizar:
+        arg_parser.error('-O precisa do TAC inteiro e não combina com --streaming')
     input_path = args.input_file
 
     # --- Definição dos Nomes de Arquivos de Saída ---
-    base_name = input_path.rsplit('.', 1)[0]
+    # Ao ler da entrada padrão, as saídas recebem o nome 'stdin'
+    base_name = 'stdin' if input_path == STDIN_PATH else input_path.rsplit('.', 1)[0]
     log_file = base_name + '.log'
-    tac_file = base_name + '.tac'
+    tac_file = base_name + ('.tacb' if args.tac_binario else '.tac')
     llvm_file = base_name + '.ll'
 
     print(f"Compilando o arquivo: {input_path}")
 
     try:
+        if input_path.endswith(TAC_EXTENSIONS):
+            compile_from_tac(args, input_path, tac_file, llvm_file, base_name)
+            return
+
         # --- FASE 1: ANÁLISE LÉXICA ---
-        input_stream = FileStream(input_path, encoding='utf-8')
-        lexer = ExprLexer(input_stream)
-        token_stream = CommonTokenStream(lexer)
+        input_stream = open_source(input_path)
+        lexer_class = get_lexer_class(args.lexer)
+        if args.streaming:
+            def make_token_source():
+                # Chamada de novo se o estágio SLL desistir: recomeça do início
+                input_stream.seek(0)
+                if args.lexer_jobs > 1:
+                    return lex_parallel(input_stream, lexer_class, args.lexer_jobs)[1]
+                return lexer_class(input_stream)
+            compile_streaming(args, make_token_source, log_file, tac_file, llvm_file, base_name)
+            return
+        if args.lexer_jobs > 1:
+            # Análise léxica paralela: os tokens já chegam prontos ao parser
+            _, token_source = lex_parallel(input_stream, lexer_class, args.lexer_jobs)
+        else:
+            token_source = lexer_class(input_stream)
+        token_stream = CommonTokenStream(token_source)
         
         # --- FASE 2: ANÁLISE SINTÁTICA ---
-        parser = ExprParser(token_stream)
-        
         # Configurando nosso listener de erro customizado
-        parser.removeErrorListeners()
         error_listener = CustomSyntaxErrorListener()
-        parser.addErrorListener(error_listener)
-        
-        # Executando o parser
-        tree = parser.program()
+
+        if args.parser == 'rd':
+            # Descendente recursivo: mesma árvore, sem predição pelo ATN; nos
+            # programas inválidos, só o primeiro erro (nem sempre o do ANTLR)
+            tree = RecursiveDescentParser(token_stream, error_listener).program()
+        else:
+            # DFAs de predição aprendidos em execuções anteriores (ver dfa_cache.py)
+            cached_states = 0 if args.sem_cache_dfa else load_dfa_cache(ExprParser)
+            parser = ExprParser(token_stream)
+            if args.profile_parser:
+                parser._interp = ProfilingATNSimulator(parser, parser.atn, parser.decisionsToDFA,
+                                                       parser.sharedContextCache, expression_decisions(parser))
+
+            # Executando o parser: SLL primeiro, LL completo só se o SLL falhar
+            tree = parse_two_stage(parser, error_listener)
+            if not args.sem_cache_dfa and dfa_state_count(ExprParser) > cached_states:
+                save_dfa_cache(ExprParser)
+            if args.estatisticas_parser:
+                print(PARSE_STATS.report())
+            if args.profile_parser:
+                print(parser._interp.report())
         
         # Verificando se ocorreram erros sintáticos
-        syntax_errors = error_listener.errors
-        if syntax_errors:
-            print(f"\nERRO: {len(syntax_errors)} erro(s) sintático(s) encontrado(s). Compilação interrompida.")
-            for error in syntax_errors:
-                print(f"  - {error}")
-            sys.exit(1)
+        abort_on_errors(error_listener.errors, "sintático")
             
         print("Análise sintática concluída sem erros.")
 
+        # Conversão para a AST compacta; a árvore de derivação e os tokens não
+        # são mais usados pelas fases seguintes e podem ser liberados. Os
+        # identificadores são internados na tabela de nomes desta compilação.
+        symbols = SymbolTable()
+        program = lower(tree, symbols.names)
+        tree = token_stream = parser = None
+
         # --- FASE 3: ANÁLISE SEMÂNTICA ---
-        open(log_file, 'w').close() # Limpa o log anterior
-        semantic_analyzer = SemanticAnalyzer(log_file)
-        semantic_errors = semantic_analyzer.analyze(tree)
-
-        if semantic_errors:
-            print(f"\nERRO: {len(semantic_errors)} erro(s) semântico(s) encontrado(s). Compilação interrompida.")
-            for error in semantic_errors:
-                print(f"  - {error}")
-            sys.exit(1)
+        with open_log(args, log_file) as log: # Trunca o log anterior
+            semantic_analyzer = SemanticAnalyzer(log, symbols)
+            semantic_analyzer.analyze(program)
+        abort_on_errors(semantic_analyzer.errors, "semântico")
         
         print(f"Análise semântica concluída sem erros. Log disponível em '{log_file}'.")
 
         # --- FASE 4: GERAÇÃO DE CÓDIGO INTERMEDIÁRIO (TAC) ---
         # Esta etapa agora é executada internamente para que a FASE 5 tenha o que processar.
-        tac_gen = TACGenerator()
-        tac_code = tac_gen.visit(tree)
+        tac_gen = TACGenerator(symbols=semantic_analyzer.symbols)
+        tac_code = tac_gen.visit(program)
+        if args.otimizar:
+            tac_code = optimize_tac(tac_code)
         
         # O flag --gerar-tac agora apenas controla se o arquivo .tac é salvo no disco
         if args.gerar_tac:
-            print("\nSalvando Código de Três Endereços (TAC)...")
-            with open(tac_file, 'w', encoding='utf-8') as f:
-                f.write("--- CÓDIGO DE TRÊS ENDEREÇOS (TAC) ---\n\n")
-                for instruction in tac_code:
-                    f.write(str(instruction) + '\n')
-            print(f"Arquivo TAC salvo em: {tac_file}")
+            save_tac(args, tac_code, tac_file)
 
         # --- FASE 5: GERAÇÃO DE CÓDIGO FINAL (LLVM IR) ---
         # Esta seção só é executada se o flag --gerar-llvm for fornecido.
         if args.gerar_llvm:
-            print("\nIniciando geração de Código Final (LLVM IR)...")
-            llvm_gen = LLVMGenerator()
-            llvm_ir_code = llvm_gen.generate(tac_code) # Passa a lista de TAC
-
-            with open(llvm_file, 'w', encoding='utf-8') as f:
-                f.write(llvm_ir_code)
-            print(f"Geração de LLVM IR concluída. Código salvo em: {llvm_file}")
-            print("\nPara compilar e executar o código gerado, você precisará do LLVM instalado.")
-            print("Use os seguintes comandos:")
-            print(f"  1. llc -filetype=obj {llvm_file} -o {base_name}.o")
-            print(f"  2. clang {base_name}.o -o {base_name}")
-            print(f"  3. ./{base_name}")
+            generate_llvm(tac_code, semantic_analyzer.symbols, llvm_file, base_name, args.ssa)
 
     except FileNotFoundError:
         print(f"ERRO: O arquivo de entrada '{input_path}' não foi encontrado.")
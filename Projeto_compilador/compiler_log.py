@@ -0,0 +1,114 @@
+# compiler_log.py
+#
+# Log compartilhado pelas fases do compilador (Scanner, LexicoErrorListener e
+# SemanticAnalyzer). Antes cada mensagem abria e fechava o arquivo de log; um
+# CompilerLog mantém um único arquivo aberto por execução e o escreve em
+# lotes de mensagens, opcionalmente a partir de uma thread em segundo plano.
+#
+# Níveis de detalhe: ERROR (erros), INFO (início e fim das fases) e DEBUG (uma
+# mensagem por token ou por nó visitado). Mensagens acima do nível configurado
+# são descartadas; quem as gera em laços (um token, um nó) consulta enabled()
+# uma vez e só monta a mensagem se o nível estiver ligado, de modo que com o
+# log desligado nada é formatado.
+
+import collections
+import queue
+import threading
+
+OFF, ERROR, INFO, DEBUG = range(4)
+# Nomes aceitos nas opções de linha de comando
+LOG_LEVELS = {'desligado': OFF, 'erro': ERROR, 'info': INFO, 'detalhe': DEBUG}
+
+
+class CompilerLog:
+    """
+    `path`: arquivo de log, truncado na abertura (None: nenhum arquivo);
+    `echo`: também imprime cada mensagem no terminal; `recent`: quantas das
+    últimas mensagens ficam em memória, em `recent`; `background`: as escritas
+    no arquivo são feitas por uma thread. close() grava o que falta.
+    """
+    # Mensagens acumuladas antes de cada escrita no arquivo
+    BATCH = 4096
+    # Lotes que podem esperar pela thread de escrita; com a fila cheia (disco
+    # lento), quem escreve no log espera, e a memória usada fica limitada
+    QUEUED_BATCHES = 8
+
+    def __init__(self, path=None, level=DEBUG, echo=False, recent=1000, background=False):
+        self.path = path
+        self.level = level
+        self.echo = echo
+        self.recent = collections.deque(maxlen=recent)
+        self._pending = []
+        self._file = open(path, 'w', encoding='utf-8') if path is not None else None
+        self._queue = None
+        self._writer = None
+        self._writer_error = None
+        if background and self._file is not None:
+            self._queue = queue.Queue(maxsize=self.QUEUED_BATCHES)
+            self._writer = threading.Thread(target=self._write_batches, name='compiler-log', daemon=True)
+            self._writer.start()
+
+    def enabled(self, level):
+        return level <= self.level
+
+    def write(self, level, message):
+        if level > self.level:
+            return
+        self.recent.append(message)
+        if self.echo:
+            print(message)
+        if self._file is not None:
+            self._pending.append(message)
+            if len(self._pending) >= self.BATCH:
+                self._flush_pending()
+
+    def error(self, message):
+        self.write(ERROR, message)
+
+    def info(self, message):
+        self.write(INFO, message)
+
+    def debug(self, message):
+        self.write(DEBUG, message)
+
+    def _flush_pending(self):
+        batch = '\n'.join(self._pending) + '\n'
+        self._pending.clear()
+        if self._queue is not None:
+            # Bloqueia enquanto a fila estiver cheia
+            self._queue.put(batch)
+        else:
+            self._file.write(batch)
+
+    def _write_batches(self):
+        while True:
+            batch = self._queue.get()
+            if batch is None:
+                return
+            if self._writer_error is None:
+                try:
+                    self._file.write(batch)
+                except OSError as e:
+                    # Relatado por close(), na thread de quem usa o log
+                    self._writer_error = e
+
+    def close(self):
+        """Grava as mensagens pendentes e fecha o arquivo; o log continua aceitando mensagens, só sem arquivo."""
+        if self._file is None:
+            return
+        if self._pending:
+            self._flush_pending()
+        if self._writer is not None:
+            self._queue.put(None)
+            self._writer.join()
+            self._writer = self._queue = None
+        self._file.close()
+        self._file = None
+        if self._writer_error is not None:
+            raise self._writer_error
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
@@ -0,0 +1,333 @@
+# dfa_cache.py
+#
+# Cache persistente dos DFAs de predição do parser. O ExprParser começa cada
+# processo com `decisionsToDFA` e `sharedContextCache` vazios e reaprende os
+# mesmos estados a cada compilação curta. Aqui esses estados são gravados em
+# disco ao fim da análise e recarregados na próxima execução.
+#
+# Os objetos do ANTLR guardam hashes calculados no processo que os criou (e
+# parte deles depende do hash de str e de id(), que mudam a cada execução),
+# então o arquivo não é um pickle dos objetos: ele descreve a estrutura com
+# inteiros (números de estados do ATN, índices em tabelas de contextos) e os
+# objetos são reconstruídos pelos construtores do runtime, recalculando tudo.
+# Esses dados (tuplas, listas, conjuntos, inteiros e textos) são gravados com
+# marshal, que não executa nada ao ler: o diretório do cache pode ser
+# compartilhado, e um arquivo plantado lá não pode virar código executado.
+#
+# O nome do arquivo inclui o hash do ATN serializado da gramática; qualquer
+# arquivo ilegível, de outra versão ou de outra gramática é simplesmente
+# ignorado e pode ser apagado a qualquer momento.
+
+import hashlib
+import marshal
+import os
+import sys
+import tempfile
+
+from antlr4.PredictionContext import (ArrayPredictionContext, PredictionContext,
+                                      SingletonPredictionContext)
+from antlr4.atn.ATNConfig import ATNConfig
+from antlr4.atn.ATNConfigSet import ATNConfigSet
+from antlr4.atn.ATNSimulator import ATNSimulator
+from antlr4.atn.SemanticContext import AND, OR, PrecedencePredicate, Predicate, SemanticContext
+from antlr4.dfa.DFA import DFA
+from antlr4.dfa.DFAState import DFAState, PredPrediction
+
+CACHE_MAGIC = b'LIONDFA'
+CACHE_VERSION = 2
+CACHE_ENV = 'LION_CACHE_DIR'
+
+# Índices reservados nas tabelas e nas arestas
+_EMPTY_CONTEXT = 0
+_NO_CONTEXT = -1
+_NO_SEMANTIC = 0
+_NO_EDGE = -1
+_ERROR_EDGE = -2
+
+
+def default_cache_dir():
+    """$LION_CACHE_DIR, ou $XDG_CACHE_HOME/lion, ou ~/.cache/lion."""
+    directory = os.environ.get(CACHE_ENV)
+    if directory:
+        return directory
+    base = os.environ.get('XDG_CACHE_HOME') or os.path.join(os.path.expanduser('~'), '.cache')
+    return os.path.join(base, 'lion')
+
+
+def atn_key(parser_class):
+    """Hash do ATN serializado da gramática (muda sempre que o parser é regerado)."""
+    serialized = sys.modules[parser_class.__module__].serializedATN()
+    return hashlib.sha256(','.join(map(str, serialized)).encode('ascii')).hexdigest()
+
+
+def cache_path(parser_class, directory=None):
+    directory = directory or default_cache_dir()
+    return os.path.join(directory, f"{parser_class.__name__}-{atn_key(parser_class)[:16]}.dfa")
+
+
+def dfa_state_count(parser_class):
+    return sum(len(dfa.states) for dfa in parser_class.decisionsToDFA)
+
+
+# --- Serialização ---
+
+class _Dumper:
+    """Achata contextos e predicados em tabelas indexadas por inteiros."""
+
+    def __init__(self):
+        self.contexts = [None]
+        self.context_index = {id(PredictionContext.EMPTY): _EMPTY_CONTEXT}
+        self.semantics = [None]
+        self.semantic_index = {id(SemanticContext.NONE): _NO_SEMANTIC}
+        self._alive = []  # mantém vivos os objetos cujos id() estão nos índices
+
+    def context(self, ctx):
+        if ctx is None:
+            return _NO_CONTEXT
+        index = self.context_index.get(id(ctx))
+        if index is not None:
+            return index
+        # Percurso pós-ordem iterativo: grafos de contexto podem ser profundos
+        stack = [ctx]
+        while stack:
+            node = stack[-1]
+            if id(node) in self.context_index:
+                stack.pop()
+                continue
+            parents = [node.parentCtx] if isinstance(node, SingletonPredictionContext) else node.parents
+            pending = [p for p in parents if p is not None and id(p) not in self.context_index]
+            if pending:
+                stack.extend(pending)
+                continue
+            stack.pop()
+            if isinstance(node, SingletonPredictionContext):
+                entry = ('s', self.context(node.parentCtx), node.returnState)
+            else:
+                entry = ('a', tuple(self.context(p) for p in node.parents), tuple(node.returnStates))
+            self.context_index[id(node)] = len(self.contexts)
+            self.contexts.append(entry)
+            self._alive.append(node)
+        return self.context_index[id(ctx)]
+
+    def semantic(self, sem):
+        index = self.semantic_index.get(id(sem))
+        if index is not None:
+            return index
+        if isinstance(sem, Predicate):
+            entry = ('p', sem.ruleIndex, sem.predIndex, sem.isCtxDependent)
+        elif isinstance(sem, PrecedencePredicate):
+            entry = ('r', sem.precedence)
+        elif isinstance(sem, AND):
+            entry = ('&', tuple(self.semantic(o) for o in sem.opnds))
+        elif isinstance(sem, OR):
+            entry = ('|', tuple(self.semantic(o) for o in sem.opnds))
+        else:
+            raise ValueError(f"Contexto semântico não suportado: {sem!r}")
+        self.semantic_index[id(sem)] = len(self.semantics)
+        self.semantics.append(entry)
+        self._alive.append(sem)
+        return self.semantic_index[id(sem)]
+
+    def config_set(self, configs):
+        return (
+            tuple((c.state.stateNumber, c.alt, self.context(c.context), self.semantic(c.semanticContext),
+                   c.reachesIntoOuterContext, c.precedenceFilterSuppressed) for c in configs.configs),
+            configs.fullCtx, configs.uniqueAlt, configs.conflictingAlts,
+            configs.hasSemanticContext, configs.dipsIntoOuterContext,
+        )
+
+    def dfa(self, dfa):
+        states = list(dfa.states)
+        index = {id(state): i for i, state in enumerate(states)}
+
+        def edge(target):
+            if target is None:
+                return _NO_EDGE
+            if target is ATNSimulator.ERROR:
+                return _ERROR_EDGE
+            return index[id(target)]
+
+        encoded = []
+        for state in states:
+            predicates = None
+            if state.predicates is not None:
+                predicates = tuple((self.semantic(p.pred), p.alt) for p in state.predicates)
+            encoded.append((
+                state.stateNumber, self.config_set(state.configs),
+                None if state.edges is None else tuple(edge(t) for t in state.edges),
+                state.isAcceptState, state.prediction, state.requiresFullContext, predicates,
+            ))
+        if dfa.precedenceDfa:
+            start = tuple(edge(t) for t in dfa.s0.edges)
+        else:
+            start = edge(dfa.s0)
+        return (dfa.decision, dfa.precedenceDfa, encoded, start)
+
+
+def dump_dfas(parser_class):
+    """
+    Descreve os DFAs da classe como dados simples. O sharedContextCache não é
+    gravado à parte: o runtime só guarda nele os contextos dos estados do DFA
+    (via optimizeConfigs), que a reconstrução devolve ao cache.
+    """
+    dumper = _Dumper()
+    dfas = [dumper.dfa(dfa) for dfa in parser_class.decisionsToDFA]
+    return {
+        'atn': atn_key(parser_class),
+        'contexts': dumper.contexts,
+        'semantics': dumper.semantics,
+        'dfas': dfas,
+    }
+
+
+# --- Reconstrução ---
+
+def _build_semantics(entries):
+    table = [SemanticContext.NONE]
+    for entry in entries[1:]:
+        kind = entry[0]
+        if kind == 'p':
+            sem = Predicate(entry[1], entry[2], entry[3])
+        elif kind == 'r':
+            sem = PrecedencePredicate(entry[1])
+        else:
+            # AND/OR guardam a lista de operandos já reduzida; o construtor
+            # binário refaria a redução, então a lista é restaurada como está
+            sem = object.__new__(AND if kind == '&' else OR)
+            sem.opnds = [table[i] for i in entry[1]]
+        table.append(sem)
+    return table
+
+
+def _build_contexts(entries, cache):
+    table = [PredictionContext.EMPTY]
+    for entry in entries[1:]:
+        if entry[0] == 's':
+            parent = None if entry[1] == _NO_CONTEXT else table[entry[1]]
+            ctx = SingletonPredictionContext(parent, entry[2])
+        else:
+            parents = [None if i == _NO_CONTEXT else table[i] for i in entry[1]]
+            ctx = ArrayPredictionContext(parents, list(entry[2]))
+        # Como em optimizeConfigs: contextos iguais viram o mesmo objeto do cache
+        table.append(cache.add(ctx))
+    return table
+
+
+def _build_config_set(encoded, atn, contexts, semantics):
+    configs, full_ctx, unique_alt, conflicting_alts, has_semantic, dips = encoded
+    result = ATNConfigSet(full_ctx)
+    for state_number, alt, ctx, sem, reaches, suppressed in configs:
+        config = ATNConfig(atn.states[state_number], alt, contexts[ctx], semantics[sem])
+        config.reachesIntoOuterContext = reaches
+        config.precedenceFilterSuppressed = suppressed
+        result.configs.append(config)
+    result.uniqueAlt = unique_alt
+    result.conflictingAlts = conflicting_alts
+    result.hasSemanticContext = has_semantic
+    result.dipsIntoOuterContext = dips
+    result.setReadonly(True)
+    return result
+
+
+def build_dfas(data, parser_class, cache):
+    """Reconstrói a lista de DFAs a partir de dump_dfas(), preenchendo `cache`."""
+    atn = parser_class.atn
+    if len(data['dfas']) != len(atn.decisionToState):
+        raise ValueError("Número de decisões não confere com o ATN")
+    semantics = _build_semantics(data['semantics'])
+    contexts = _build_contexts(data['contexts'], cache)
+
+    dfas = []
+    for decision, (number, precedence_dfa, encoded, start) in enumerate(data['dfas']):
+        dfa = DFA(atn.decisionToState[decision], decision)
+        if number != decision or dfa.precedenceDfa != precedence_dfa:
+            raise ValueError(f"DFA da decisão {decision} não confere com o ATN")
+        states = []
+        for state_number, configs, _, accept, prediction, full_context, predicates in encoded:
+            state = DFAState(state_number, _build_config_set(configs, atn, contexts, semantics))
+            state.isAcceptState = accept
+            state.prediction = prediction
+            state.requiresFullContext = full_context
+            if predicates is not None:
+                state.predicates = [PredPrediction(semantics[sem], alt) for sem, alt in predicates]
+            states.append(state)
+
+        def target(index):
+            if index == _NO_EDGE:
+                return None
+            if index == _ERROR_EDGE:
+                return ATNSimulator.ERROR
+            return states[index]
+
+        for state, (_, _, edges, *_) in zip(states, encoded):
+            if edges is not None:
+                state.edges = [target(i) for i in edges]
+            dfa.states[state] = state
+        if precedence_dfa:
+            dfa.s0.edges = [target(i) for i in start]
+        else:
+            dfa.s0 = target(start)
+        dfas.append(dfa)
+    return dfas
+
+
+# --- Arquivo ---
+
+def load_dfa_cache(parser_class, directory=None):
+    """
+    Carrega os DFAs gravados para a gramática atual. Só age enquanto os DFAs
+    da classe ainda estão vazios. Retorna o número de estados carregados
+    (0 se não havia cache utilizável).
+    """
+    if dfa_state_count(parser_class):
+        return 0
+    path = cache_path(parser_class, directory)
+    try:
+        with open(path, 'rb') as f:
+            header = f.read(len(CACHE_MAGIC) + 1)
+            if header != CACHE_MAGIC + bytes([CACHE_VERSION]):
+                return 0
+            data = marshal.load(f)
+    except (OSError, EOFError, ValueError, TypeError):
+        # Sem arquivo, ilegível ou truncado: segue a compilação com o parser frio
+        return 0
+    if type(data) is not dict or data.get('atn') != atn_key(parser_class):
+        return 0
+    # Monta tudo em objetos novos antes de tocar na classe: um arquivo
+    # corrompido no meio da leitura não deixa o parser meio aquecido
+    cache = type(parser_class.sharedContextCache)()
+    try:
+        dfas = build_dfas(data, parser_class, cache)
+    except (KeyError, IndexError, ValueError, TypeError):
+        # Estrutura que não confere com o ATN (índices fora das tabelas, ou
+        # valores de tipo errado em um marshal válido)
+        return 0
+
+    parser_class.decisionsToDFA[:] = dfas
+    parser_class.sharedContextCache.cache = cache.cache
+    return dfa_state_count(parser_class)
+
+
+def save_dfa_cache(parser_class, directory=None):
+    """
+    Grava os DFAs atuais da classe. A escrita vai para um arquivo temporário
+    no mesmo diretório e é trocada atomicamente, para que compilações
+    simultâneas nunca leiam um arquivo pela metade.
+    """
+    path = cache_path(parser_class, directory)
+    data = dump_dfas(parser_class)
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        fd, temp_path = tempfile.mkstemp(dir=os.path.dirname(path), prefix='.tmp-', suffix='.dfa')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                f.write(CACHE_MAGIC + bytes([CACHE_VERSION]))
+                marshal.dump(data, f)
+            os.replace(temp_path, path)
+        except BaseException:
+            os.unlink(temp_path)
+            raise
+    except OSError:
+        # Sem permissão ou sem espaço: o cache é só uma otimização
+        return False
+    return True
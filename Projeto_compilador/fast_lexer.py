@@ -0,0 +1,274 @@
+# fast_lexer.py
+#
+# Analisador léxico escrito à mão para a linguagem LION. Produz exatamente os
+# mesmos tokens do ExprLexer gerado pelo ANTLR (mesmos tipos, posições, linhas
+# e colunas), mas sem passar pelo simulador de ATN caractere a caractere.
+
+import re
+import sys
+
+from antlr4.Token import Token, CommonToken
+from antlr4.CommonTokenFactory import CommonTokenFactory
+
+# Tipos de token, idênticos aos de Expr.tokens / ExprLexer
+START = 1
+END = 2
+ROAR = 3
+AS = 4
+INT = 5
+TEXT = 6
+HUNT = 7
+ROAROUT = 8
+IF = 9
+THEN = 10
+ELSE = 11
+WHILE = 12
+STRIKE = 13
+EQUALS = 14
+NOT_EQUALS = 15
+LESS = 16
+GREATER = 17
+LESS_EQUALS = 18
+GREATER_EQUALS = 19
+PLUS = 20
+MINUS = 21
+MULT = 22
+DIV = 23
+AND = 24
+OR = 25
+NOT = 26
+ASSIGN = 27
+LPAREN = 28
+RPAREN = 29
+LBRACE = 30
+RBRACE = 31
+SEMICOLON = 32
+ID = 33
+NUMBER = 34
+STRING = 35
+WS = 36
+COMMENT = 37
+ErrorChar = 38
+
+symbolicNames = [ "<INVALID>",
+        "START", "END", "ROAR", "AS", "INT", "TEXT", "HUNT", "ROAROUT",
+        "IF", "THEN", "ELSE", "WHILE", "STRIKE", "EQUALS", "NOT_EQUALS",
+        "LESS", "GREATER", "LESS_EQUALS", "GREATER_EQUALS", "PLUS",
+        "MINUS", "MULT", "DIV", "AND", "OR", "NOT", "ASSIGN", "LPAREN",
+        "RPAREN", "LBRACE", "RBRACE", "SEMICOLON", "ID", "NUMBER", "STRING",
+        "WS", "COMMENT", "ErrorChar" ]
+
+# Palavras-chave: o ID mais longo é lido primeiro e só depois consultado aqui,
+# reproduzindo a regra do ANTLR (casamento mais longo, empate para a regra
+# declarada antes).
+KEYWORDS = {
+    'roar': ROAR, 'as': AS, 'int': INT, 'text': TEXT, 'hunt': HUNT,
+    'roarout': ROAROUT, 'if': IF, 'then': THEN, 'else': ELSE,
+    'while': WHILE, 'strike': STRIKE,
+}
+
+# Operadores de dois caracteres têm prioridade sobre os de um caractere.
+# '&' e '|' isolados não são operadores e viram ErrorChar.
+_DOUBLE_OPERATORS = {
+    '==': EQUALS, '!=': NOT_EQUALS, '<=': LESS_EQUALS, '>=': GREATER_EQUALS,
+    '&&': AND, '||': OR,
+}
+_SINGLE_OPERATORS = {
+    '<': LESS, '>': GREATER, '+': PLUS, '-': MINUS, '*': MULT,
+    '!': NOT, '=': ASSIGN, '(': LPAREN, ')': RPAREN, '{': LBRACE,
+    '}': RBRACE, ';': SEMICOLON,
+}
+
+# Classes de caractere, pré-calculadas para toda a faixa ASCII. Qualquer
+# caractere fora dela pertence a _C_OTHER (ErrorChar).
+_C_OTHER, _C_WS, _C_IDENT, _C_DIGIT, _C_QUOTE, _C_SLASH, _C_OPERATOR, _C_AT = range(8)
+
+_CHAR_CLASS = [_C_OTHER] * 128
+for _c in ' \t\r\n':
+    _CHAR_CLASS[ord(_c)] = _C_WS
+for _c in 'abcdefghijklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZ_':
+    _CHAR_CLASS[ord(_c)] = _C_IDENT
+for _c in '0123456789':
+    _CHAR_CLASS[ord(_c)] = _C_DIGIT
+for _c in '=!<>+-*&|(){};':
+    _CHAR_CLASS[ord(_c)] = _C_OPERATOR
+_CHAR_CLASS[ord('"')] = _C_QUOTE
+_CHAR_CLASS[ord('/')] = _C_SLASH
+_CHAR_CLASS[ord('@')] = _C_AT
+del _c
+
+# Consumo das "corridas" de caracteres de uma mesma classe
+_WS_RUN = re.compile(r'[ \t\r\n]+')
+_IDENT_RUN = re.compile(r'[a-zA-Z_0-9]*')
+_NUMBER_RUN = re.compile(r'[0-9]+(?:\.[0-9]+)?')
+_STRING_RUN = re.compile(r'"[^"\r\n]*"')
+_COMMENT_RUN = re.compile(r'[^\r\n]*')
+
+_new_token = object.__new__
+
+
+def make_token(source, ttype, start, stop, line, column):
+    """
+    Cria um CommonToken preenchendo os slots diretamente: o construtor
+    consultaria linha/coluna na fonte a cada token.
+    """
+    token = _new_token(CommonToken)
+    token.source = source
+    token.type = ttype
+    token.channel = Token.DEFAULT_CHANNEL
+    token.start = start
+    token.stop = stop
+    token.tokenIndex = -1
+    token.line = line
+    token.column = column
+    token._text = None
+    return token
+
+
+def scan(text, pos=0, line=1, column=0):
+    """
+    Percorre o texto e gera tuplas (tipo, início, fim, linha, coluna) para cada
+    token que chega ao parser. WS e COMMENT são descartados como no Expr.g4.
+    """
+    n = len(text)
+    char_class = _CHAR_CLASS
+    keywords = KEYWORDS
+    while pos < n:
+        c = text[pos]
+        code = ord(c)
+        cls = char_class[code] if code < 128 else _C_OTHER
+
+        if cls == _C_WS:
+            end = _WS_RUN.match(text, pos).end()
+            newlines = text.count('\n', pos, end)
+            if newlines:
+                line += newlines
+                column = end - text.rindex('\n', pos, end) - 1
+            else:
+                column += end - pos
+            pos = end
+            continue
+
+        if cls == _C_IDENT:
+            end = _IDENT_RUN.match(text, pos + 1).end()
+            ttype = keywords.get(text[pos:end], ID)
+        elif cls == _C_DIGIT:
+            end = _NUMBER_RUN.match(text, pos).end()
+            ttype = NUMBER
+        elif cls == _C_OPERATOR:
+            ttype = _DOUBLE_OPERATORS.get(text[pos:pos + 2])
+            if ttype is not None:
+                end = pos + 2
+            else:
+                ttype = _SINGLE_OPERATORS.get(c, ErrorChar)
+                end = pos + 1
+        elif cls == _C_QUOTE:
+            match = _STRING_RUN.match(text, pos)
+            if match:
+                ttype, end = STRING, match.end()
+            else:
+                ttype, end = ErrorChar, pos + 1
+        elif cls == _C_SLASH:
+            if text.startswith('/', pos + 1):
+                end = _COMMENT_RUN.match(text, pos + 2).end()
+                column += end - pos
+                pos = end
+                continue
+            ttype, end = DIV, pos + 1
+        elif cls == _C_AT:
+            if text.startswith('@start', pos):
+                ttype, end = START, pos + 6
+            elif text.startswith('@end', pos):
+                ttype, end = END, pos + 4
+            else:
+                ttype, end = ErrorChar, pos + 1
+        else:
+            ttype, end = ErrorChar, pos + 1
+
+        yield (ttype, pos, end - 1, line, column)
+        column += end - pos
+        pos = end
+
+
+class FastLexer:
+    """
+    Fonte de tokens compatível com o ExprLexer: pode ser passada para o
+    CommonTokenStream, para o ExprParser e para o Scanner.
+    """
+    symbolicNames = symbolicNames
+    grammarFileName = "Expr.g4"
+
+    def __init__(self, input=None, output=sys.stdout):
+        self._input = input
+        self._output = output
+        self._factory = CommonTokenFactory.DEFAULT
+        self.reset()
+
+    def reset(self):
+        self.line = 1
+        self.column = 0
+        self._hitEOF = False
+        text = str(self._input) if self._input is not None else ""
+        self._tokens = scan(text)
+        self._size = len(text)
+        self._source = (self, self._input)
+
+    def nextToken(self):
+        for ttype, start, stop, line, column in self._tokens:
+            token = make_token(self._source, ttype, start, stop, line, column)
+            self.line = line
+            self.column = column + stop - start + 1
+            return token
+        if not self._hitEOF:
+            # O gerador termina antes de saber a posição final; recalcula
+            # a linha/coluna do EOF a partir do fim do texto.
+            self._hitEOF = True
+            self._finish_position()
+        return make_token(self._source, Token.EOF, self._size, self._size - 1, self.line, self.column)
+
+    def _finish_position(self):
+        text = str(self._input) if self._input is not None else ""
+        last_newline = text.rfind('\n')
+        self.line = text.count('\n') + 1
+        self.column = len(text) - last_newline - 1
+
+    def getAllTokens(self):
+        tokens = []
+        token = self.nextToken()
+        while token.type != Token.EOF:
+            tokens.append(token)
+            token = self.nextToken()
+        return tokens
+
+    def getInputStream(self):
+        return self._input
+
+    def getSourceName(self):
+        return self._input.name if self._input is not None else "<empty>"
+
+    @property
+    def sourceName(self):
+        return self.getSourceName()
+
+    # O ErrorChar já cobre qualquer caractere inválido (como na gramática do
+    # ExprLexer), então não há erro a notificar: os listeners não são
+    # guardados, e estes métodos existem só pela compatibilidade de API com
+    # quem configura o ExprLexer.
+    def addErrorListener(self, listener):
+        pass
+
+    def removeErrorListeners(self):
+        pass
+
+
+LEXER_CHOICES = ('antlr', 'fast')
+
+
+def get_lexer_class(name):
+    """Retorna a classe de analisador léxico escolhida por --lexer."""
+    if name == 'fast':
+        return FastLexer
+    if name == 'antlr':
+        from ExprLexer import ExprLexer
+        return ExprLexer
+    raise ValueError(f"Analisador léxico desconhecido: '{name}'")
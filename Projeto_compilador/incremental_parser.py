@@ -0,0 +1,584 @@
+# incremental_parser.py
+#
+# Análise sintática incremental para o editor da IDE web. Depois de uma
+# edição, só as linhas tocadas são relexadas e só o menor trecho da árvore que
+# as contém é reanalisado; os tokens e as subárvores de `declarations`/`block`
+# fora dele são reaproveitados. A árvore, os tokens e os erros sintáticos
+# resultantes são os mesmos de uma análise completa (parse_two_stage) do texto
+# editado.
+#
+# Tokens. Nenhum token atravessa uma quebra de linha (ver parallel_lexer.py),
+# então basta relexar as linhas tocadas. Para que deslocar os tokens seguintes
+# não custe O(n) a cada tecla, a lista funciona como um gap buffer: os tokens
+# antes do gap guardam posições absolutas e os depois dele guardam posições
+# relativas ao fim do documento (tokenIndex, start/stop e line descontados do
+# número de tokens, do tamanho do texto e do número de linhas; o tokenIndex
+# fica <= -2, o que os distingue). Uma edição no gap não mexe nos tokens
+# seguintes, e mover o gap custa a distância percorrida: quase nada enquanto
+# se digita no mesmo lugar. O fluxo entregue ao parser converte para absoluto
+# todo token que ele lê.
+#
+# Árvore. Durante a análise, cada entrada em `declarations` e cada saída de
+# `declaration` registra um ponto de controle: o estado do DefaultErrorStrategy
+# e o horizonte, o maior índice de token que o parser já tinha examinado
+# (inclusive em lookahead). A reanálise começa no último ponto de controle
+# antes da edição cujo horizonte não alcança os tokens trocados (tudo antes
+# dele seria analisado exatamente igual), com o contexto `declarations`
+# original como pai: a predição LL e os conjuntos de recuperação de erro veem
+# a mesma pilha de regras da análise completa. O laço de `declarations` é
+# repetido comando a comando até o parser parar, no mesmo estado de erro e sem
+# ter olhado adiante, exatamente na posição de saída de um comando antigo
+# posterior à edição; dali em diante a análise completa seria idêntica à
+# anterior, e os comandos entre os dois pontos são trocados pelos novos. Se o
+# laço terminar antes (ex.: um '}' apagado), tenta-se o bloco de fora e, no
+# limite, o programa inteiro.
+#
+# Os trechos reanalisados usam LL completo com o DefaultErrorStrategy, como o
+# segundo estágio de parse_two_stage; o primeiro estágio (SLL) só prevê de
+# outro jeito quando desiste, e aí a análise completa também usaria LL.
+
+import bisect
+import math
+
+from antlr4 import CommonTokenStream, ParserRuleContext
+from antlr4.ListTokenSource import ListTokenSource
+from antlr4.Token import Token
+from antlr4.atn.ATNState import StarLoopEntryState, StarLoopbackState
+from antlr4.atn.Transition import RuleTransition
+from antlr4.error.ErrorListener import ErrorListener
+from antlr4.error.Errors import RecognitionException
+from antlr4.tree.Tree import ErrorNode, ErrorNodeImpl, ParseTreeListener, TerminalNode
+
+from ExprParser import ExprParser
+from fast_lexer import FastLexer, make_token
+from parser_driver import parse_two_stage
+from source_input import SourceStream
+from token_store import tokenize
+
+
+def _declarations_loop(atn):
+    """
+    Estados do laço `declaration*` de ExprParser.declarations() (entrada,
+    volta e chamada de `declaration`) e o conjunto FIRST(declaration) que o
+    mantém rodando.
+    """
+    entry = loopback = invoke = None
+    for state in atn.states:
+        if state.ruleIndex != ExprParser.RULE_declarations:
+            continue
+        if isinstance(state, StarLoopEntryState):
+            entry = state.stateNumber
+        elif isinstance(state, StarLoopbackState):
+            loopback = state.stateNumber
+        elif any(isinstance(transition, RuleTransition) for transition in state.transitions):
+            invoke = state.stateNumber
+    first = atn.nextTokens(atn.ruleToStartState[ExprParser.RULE_declaration])
+    return entry, loopback, invoke, first
+
+
+LOOP_ENTRY, LOOP_BACK, LOOP_INVOKE, DECLARATION_FIRST = _declarations_loop(ExprParser.atn)
+
+
+def _copy_states(states):
+    # recover() acrescenta estados à lista do DefaultErrorStrategy sem copiá-la
+    return None if states is None else list(states)
+
+
+def _blocks(statement):
+    """Blocos de um comando if/while (nenhum para os demais comandos)."""
+    command = statement.command()
+    structure = command and (command.ifCommand() or command.whileCommand())
+    if structure is None:
+        return ()
+    return [child for child in structure.children or () if isinstance(child, ExprParser.BlockContext)]
+
+
+class _GapTokenStream(CommonTokenStream):
+    """
+    CommonTokenStream sobre a lista de tokens do documento. Todo token lido
+    pelo parser passa para o lado absoluto do gap, e o maior índice lido fica
+    em `horizon`.
+    """
+
+    def __init__(self, document):
+        super().__init__(document.token_source)
+        self.document = document
+        self.tokens = document.tokens
+        self.fetchedEOF = True
+        self.horizon = 0
+
+    def LT(self, k):
+        if k <= 0:
+            return super().LT(k)
+        self.lazyInit()
+        i = min(self.index + k - 1, len(self.tokens) - 1)
+        if i >= self.document.gap:
+            self.document._move_gap(i + 1)
+        if i > self.horizon:
+            self.horizon = i
+        return self.tokens[i]
+
+    def get(self, index):
+        if index >= self.document.gap:
+            self.document._move_gap(index + 1)
+        return self.tokens[index]
+
+
+class _Recorder(ParseTreeListener, ErrorListener):
+    """
+    Listener de análise e de erros: registra os pontos de controle e guarda
+    cada erro sintático no primeiro ponto de controle seguinte (a chave None
+    fica com os erros depois do último, em `@end` e EOF).
+    """
+
+    def __init__(self, document, parser, stream):
+        self.document = document
+        self.parser = parser
+        self.stream = stream
+        # ctx -> (token do horizonte, errorRecoveryMode, token do último erro, lastErrorStates)
+        self.checkpoints = {}
+        # ctx -> [(token, mensagem)]
+        self.errors = {}
+        self.pending = []
+
+    def syntaxError(self, recognizer, offendingSymbol, line, column, msg, e):
+        self.pending.append((offendingSymbol, msg))
+
+    def enterEveryRule(self, ctx):
+        kind = type(ctx)
+        if kind is ExprParser.DeclarationsContext:
+            self._checkpoint(ctx)
+        elif kind is ExprParser.ProgramContext:
+            # Começo de uma análise completa, inclusive a do estágio LL de
+            # parse_two_stage: o que o estágio SLL registrou não vale mais
+            self.checkpoints.clear()
+            self.errors.clear()
+            self.pending = []
+            self.stream.horizon = self.stream.index
+
+    def exitEveryRule(self, ctx):
+        if type(ctx) is ExprParser.DeclarationContext:
+            self._checkpoint(ctx)
+
+    def _checkpoint(self, ctx):
+        handler = self.parser._errHandler
+        tokens = self.document.tokens
+        last_error = tokens[handler.lastErrorIndex] if handler.lastErrorIndex >= 0 else None
+        self.checkpoints[ctx] = (tokens[self.stream.horizon], handler.errorRecoveryMode,
+                                 last_error, _copy_states(handler.lastErrorStates))
+        if self.pending:
+            self.errors[ctx] = self.pending
+            self.pending = []
+
+    def finish(self):
+        if self.pending:
+            self.errors[None] = self.pending
+            self.pending = []
+
+
+class IncrementalParser:
+    """
+    Documento LION mantido entre edições. edit() troca um trecho do texto e
+    devolve os erros sintáticos atualizados; `tree` é a árvore do ExprParser,
+    igual à de uma análise completa do texto atual. As mensagens de erro são
+    formatadas por um listener criado com `error_listener_factory` (em geral o
+    CustomSyntaxErrorListener do compilador).
+    """
+
+    def __init__(self, text, error_listener_factory, lexer_class=FastLexer, name=None):
+        self.text = text
+        self.error_listener_factory = error_listener_factory
+        self.lexer_class = lexer_class
+        self.tokens = []
+        self.token_source = ListTokenSource(self.tokens, name)
+        self._pair = (self.token_source, None)
+        self.line_count = text.count('\n') + 1
+        self.tokens.extend(self._lex(text, 0, 1, 0, True))
+        self.gap = len(self.tokens)
+        self.checkpoints = {}
+        self.syntax_errors = {}
+        # Quantas edições foram resolvidas com reanálise parcial e quantas com a completa
+        self.partial_parses = 0
+        self.full_parses = 0
+        self._parse_all()
+
+    # --- Tokens e gap ---
+
+    def _lex(self, chunk, offset, line, index, eof):
+        """Tokens de `chunk`, que começa no início da linha `line`, na posição `offset`."""
+        store = tokenize(SourceStream(chunk), self.lexer_class)
+        pair = self._pair
+        tokens = []
+        for ttype, start, stop, token_line, column in zip(store.types, store.starts, store.stops,
+                                                          store.lines, store.columns):
+            token = make_token(pair, ttype, start + offset, stop + offset, token_line + line - 1, column)
+            token.tokenIndex = index
+            # O texto fica no token: as posições de quem está depois do gap são relativas
+            token._text = chunk[start:stop + 1]
+            tokens.append(token)
+            index += 1
+        if eof:
+            size = offset + len(chunk)
+            token = make_token(pair, Token.EOF, size, size - 1, line + chunk.count('\n'),
+                               len(chunk) - chunk.rfind('\n') - 1)
+            token.tokenIndex = index
+            token._text = "<EOF>"
+            tokens.append(token)
+        return tokens
+
+    def _move_gap(self, gap):
+        """Deixa tokens[:gap] com posições absolutas e tokens[gap:] com posições relativas ao fim."""
+        count, size, lines = len(self.tokens) + 1, len(self.text), self.line_count
+        if gap > self.gap:
+            for token in self.tokens[self.gap:gap]:
+                token.tokenIndex += count
+                token.start += size
+                token.stop += size
+                token.line += lines
+        else:
+            for token in self.tokens[gap:self.gap]:
+                token.tokenIndex -= count
+                token.start -= size
+                token.stop -= size
+                token.line -= lines
+        self.gap = gap
+
+    def index_of(self, token):
+        index = token.tokenIndex
+        return index if index >= 0 else index + len(self.tokens) + 1
+
+    def line_of(self, token):
+        return token.line if token.tokenIndex >= 0 else token.line + self.line_count
+
+    def _start_of(self, token):
+        return token.start if token.tokenIndex >= 0 else token.start + len(self.text)
+
+    def _last_index(self, node):
+        """Índice do último token de um filho de `declarations` (comando ou nó de erro)."""
+        if isinstance(node, TerminalNode):
+            return self.index_of(node.symbol)
+        return self.index_of(node.stop)
+
+    # --- Resultado ---
+
+    @property
+    def tree(self):
+        """Árvore de derivação, com todos os tokens em posições absolutas."""
+        self._move_gap(len(self.tokens))
+        return self._tree
+
+    @property
+    def errors(self):
+        """Erros sintáticos na ordem em que uma análise completa os relataria."""
+        records = []
+        for ctx, errors in self.syntax_errors.items():
+            order = self._order(ctx)
+            records.extend((order, sequence, token, msg) for sequence, (token, msg) in enumerate(errors))
+        records.sort(key=lambda record: record[:2])
+        listener = self.error_listener_factory()
+        for _, _, token, msg in records:
+            listener.syntaxError(None, token, self.line_of(token), token.column, msg, None)
+        return listener.errors
+
+    def _order(self, ctx):
+        """Posição de um ponto de controle na ordem da análise."""
+        if ctx is None:
+            return (math.inf, 0, 0)
+        if type(ctx) is ExprParser.DeclarationsContext:
+            return (self.index_of(ctx.start), 0, 0)
+        # Saídas na mesma posição (um '}' ausente fecha vários comandos): a mais interna primeiro
+        depth = 0
+        parent = ctx.parentCtx
+        while parent is not None:
+            depth += 1
+            parent = parent.parentCtx
+        return (self.index_of(ctx.stop) + 1, 1, -depth)
+
+    # --- Análise ---
+
+    def _parse_all(self):
+        stream = _GapTokenStream(self)
+        parser = ExprParser(stream)
+        recorder = _Recorder(self, parser, stream)
+        parser.addParseListener(recorder)
+        self._tree = parse_two_stage(parser, recorder)
+        recorder.finish()
+        self.checkpoints = recorder.checkpoints
+        self.syntax_errors = recorder.errors
+        self.full_parses += 1
+
+    def edit(self, start, end, new_text):
+        """Troca text[start:end] por `new_text` e devolve a lista de erros sintáticos."""
+        text = self.text
+        if not 0 <= start <= end <= len(text):
+            raise ValueError(f"trecho [{start}, {end}) fora do texto (tamanho {len(text)})")
+
+        # Linhas tocadas: [first, last) no texto antigo. Se a edição chega à
+        # última linha, o EOF (cuja coluna depende dela) também é refeito.
+        first = text.rfind('\n', 0, start) + 1
+        last = text.find('\n', end)
+        reaches_end = last < 0
+        if reaches_end:
+            last = len(text)
+        tokens = self.tokens
+        a = bisect.bisect_left(tokens, first, key=self._start_of)
+        b = len(tokens) if reaches_end else bisect.bisect_left(tokens, last, lo=a, key=self._start_of)
+        self._move_gap(b)
+        if a > 0:
+            previous = tokens[a - 1]
+            line = previous.line + text.count('\n', previous.stop + 1, first)
+        else:
+            line = text.count('\n', 0, first) + 1
+        plans = self._plan(a, b)
+        tail = self._junk_tail()
+
+        delta = len(new_text) - (end - start)
+        self.line_count += new_text.count('\n') - text.count('\n', start, end)
+        self.text = text = text[:start] + new_text + text[end:]
+        new_tokens = self._lex(text[first:last + delta], first, line, a, reaches_end)
+        removed = {id(token): token.tokenIndex for token in tokens[a:b]}
+        tokens[a:b] = new_tokens
+        self.gap = a + len(new_tokens)
+
+        for plan in plans:
+            if self._reparse(plan, a, b, len(new_tokens), removed):
+                self.partial_parses += 1
+                break
+        else:
+            if tail is not None and a >= tail + 2:
+                self._replace_tail(tail, a, b, len(new_tokens), removed)
+                self.partial_parses += 1
+            else:
+                self._parse_all()
+        return self.errors
+
+    def _plan(self, a, b):
+        """
+        Tentativas de reanálise para os tokens antigos [a, b), do bloco mais
+        interno que os contém até o programa: (declarations, filho do ponto de
+        controle inicial ou -1 para a entrada, posição inicial, ponto de
+        controle, primeiro filho candidato a ponto de encontro, fim da região).
+        """
+        levels = []
+        declarations = self._tree.declarations()
+        while declarations is not None:
+            levels.append(declarations)
+            children = declarations.children or []
+            i = bisect.bisect_left(children, a, key=self._last_index)
+            inner = None
+            if i < len(children) and isinstance(children[i], ExprParser.DeclarationContext):
+                for block in _blocks(children[i]):
+                    lbrace, rbrace = block.LBRACE(), block.RBRACE()
+                    if (lbrace is None or rbrace is None or block.declarations() is None
+                            or lbrace.symbol.tokenIndex == -1 or rbrace.symbol.tokenIndex == -1):
+                        continue
+                    if self.index_of(lbrace.symbol) < a and b <= self.index_of(rbrace.symbol):
+                        inner = block.declarations()
+                        break
+            declarations = inner
+
+        plans = []
+        lo, hi = a, b
+        for declarations in reversed(levels):
+            plan = self._level_plan(declarations, lo, hi, a)
+            if plan is not None:
+                plans.append(plan)
+            # No nível de fora, a região cobre o comando inteiro que contém este bloco
+            block = declarations.parentCtx
+            if not isinstance(block, ExprParser.BlockContext):
+                break
+            statement = block.parentCtx.parentCtx.parentCtx
+            lo = min(lo, self.index_of(statement.start))
+            hi = max(hi, self.index_of(statement.stop) + 1)
+        return plans
+
+    def _level_plan(self, declarations, lo, hi, a):
+        children = declarations.children or []
+        i = bisect.bisect_left(children, lo, key=self._last_index)
+        first_candidate = bisect.bisect_left(children, hi - 1, key=self._last_index)
+        for c in range(i - 1, -1, -1):
+            child = children[c]
+            if isinstance(child, ExprParser.DeclarationContext):
+                checkpoint = self.checkpoints.get(child)
+                if checkpoint is not None and self.index_of(checkpoint[0]) < a:
+                    return (declarations, c, self.index_of(child.stop) + 1, checkpoint,
+                            max(first_candidate, c + 1), hi)
+        # Sem comando anterior utilizável: recomeça na entrada de `declarations`.
+        # O horizonte ali inclui o LT(1) com que enterRule preenche ctx.start;
+        # entre o '{' (ou '@start') e a entrada não há decisão que olhe adiante.
+        checkpoint = self.checkpoints.get(declarations)
+        position = self.index_of(declarations.start)
+        if checkpoint is not None and position <= lo and self.index_of(checkpoint[0]) <= position:
+            return (declarations, -1, position, checkpoint, first_candidate, hi)
+        return None
+
+    def _reparse(self, plan, a, b, k, removed):
+        """
+        Reanalisa um nível a partir do ponto de controle do plano. Os tokens
+        antigos [a, b) já foram trocados por k novos; `removed` leva o id de
+        cada token retirado ao seu índice antigo. Devolve False (sem mexer na
+        árvore) se o parser não reencontrar a análise antiga neste nível.
+        """
+        declarations, start, position, checkpoint, first_candidate, hi = plan
+        threshold = hi + k - (b - a)
+        tokens = self.tokens
+
+        stream = _GapTokenStream(self)
+        parser = ExprParser(stream)
+        parser.removeErrorListeners()
+        recorder = _Recorder(self, parser, stream)
+        parser.addErrorListener(recorder)
+        parser.addParseListener(recorder)
+        horizon, recovering, last_error, states = checkpoint
+        handler = parser._errHandler
+        handler.errorRecoveryMode = recovering
+        handler.lastErrorIndex = -1 if last_error is None else self.index_of(last_error)
+        handler.lastErrorStates = _copy_states(states)
+        stream.seek(position)
+        stream.horizon = removed.get(id(horizon), None)
+        if stream.horizon is None:
+            stream.horizon = self.index_of(horizon)
+
+        had_children = declarations.children is not None
+        children = declarations.children = declarations.children or []
+        appended = len(children)
+        candidates = self._candidates(children, first_candidate, appended, a, b, k, threshold, removed)
+        target = next(candidates, None)
+        state = LOOP_ENTRY if start < 0 else LOOP_BACK
+        parser._ctx = declarations
+        found = False
+        try:
+            while target is not None:
+                here = stream.index
+                while target is not None and target[1] < here:
+                    target = next(candidates, None)
+                if target is None:
+                    break
+                if (target[1] == here and stream.horizon <= here
+                        and self._same_state(target[2], handler, here, removed)):
+                    found = True
+                    break
+                # Uma volta do laço de ExprParser.declarations()
+                parser.state = state
+                handler.sync(parser)
+                if stream.LA(1) not in DECLARATION_FIRST:
+                    break
+                parser.state = LOOP_INVOKE
+                parser.declaration()
+                state = LOOP_BACK
+        except RecognitionException:
+            found = False
+
+        new_children = children[appended:]
+        del children[appended:]
+        if not found:
+            if not had_children and not children:
+                declarations.children = None
+            return False
+
+        stop = target[0]
+        old_children = children[start + 1:stop + 1]
+        children[start + 1:stop + 1] = new_children
+        for child in old_children:
+            self._forget(child)
+        self.checkpoints.update(recorder.checkpoints)
+        self.syntax_errors.update(recorder.errors)
+        if not children:
+            declarations.children = None
+
+        # Contextos de fora que começavam ou terminavam em tokens trocados
+        here = stream.index
+        ctx = declarations
+        while ctx is not None:
+            if id(ctx.start) in removed:
+                ctx.start = tokens[a]
+            if id(ctx.stop) in removed:
+                ctx.stop = tokens[here - 1]
+            ctx = ctx.parentCtx
+        entry = self.checkpoints.get(declarations)
+        if entry is not None and id(entry[0]) in removed:
+            self.checkpoints[declarations] = (tokens[a],) + entry[1:]
+        return True
+
+    def _candidates(self, children, first, end, a, b, k, threshold, removed):
+        """
+        Comandos antigos depois da edição, com a posição (já no texto novo) em
+        que a análise antiga saiu de cada um: (filho, posição, ponto de controle).
+        """
+        for index in range(first, end):
+            child = children[index]
+            if not isinstance(child, ExprParser.DeclarationContext):
+                continue
+            old_stop = removed.get(id(child.stop))
+            if old_stop is None:
+                position = self.index_of(child.stop) + 1
+            elif old_stop == b - 1:
+                position = a + k
+            else:
+                continue
+            checkpoint = self.checkpoints.get(child)
+            if position >= threshold and checkpoint is not None:
+                yield index, position, checkpoint
+
+    def _same_state(self, checkpoint, handler, position, removed):
+        """
+        O DefaultErrorStrategy da reanálise se comportará, dali em diante,
+        como o da análise antiga no ponto de controle? Um lastErrorIndex antes
+        de `position` nunca mais é comparado com o índice atual.
+        """
+        _, recovering, last_error, states = checkpoint
+        if recovering != handler.errorRecoveryMode:
+            return False
+        if states != handler.lastErrorStates:
+            return False
+        if last_error is None or id(last_error) in removed:
+            old_index = -1
+        else:
+            old_index = self.index_of(last_error)
+        new_index = handler.lastErrorIndex
+        return old_index == new_index or (old_index < position and new_index < position)
+
+    def _junk_tail(self):
+        """
+        Índice do token em que `program` começou a descartar o resto do
+        arquivo, ou None. Quando o laço de `declarations` do nível de fora
+        termina antes do '@end' (ex.: um '}' ou ';' solto) e o '@end' não pode
+        ser recuperado com um token só, o DefaultErrorStrategy consome tudo até
+        o EOF como nós de erro. Nesse trecho o parser só olha LT(1) e LT(2)
+        antes de desistir, então editar depois deles não muda a análise.
+        """
+        program = self._tree
+        children = program.children or []
+        if program.exception is None or len(children) < 3:
+            return None
+        if not all(isinstance(child, ErrorNode) for child in children[2:]):
+            return None
+        first = self.index_of(children[2].symbol)
+        if len(children) - 2 != len(self.tokens) - 1 - first:
+            return None
+        return first
+
+    def _replace_tail(self, first, a, b, k, removed):
+        """Troca os nós de erro dos tokens antigos [a, b) pelos dos k tokens novos."""
+        program = self._tree
+        children = program.children
+        new_children = []
+        for token in self.tokens[a:a + k]:
+            if token.type == Token.EOF:
+                break
+            node = ErrorNodeImpl(token)
+            node.parentCtx = program
+            new_children.append(node)
+        children[2 + a - first:2 + b - first] = new_children
+        # O programa termina no último token descartado, o anterior ao EOF
+        program.stop = children[-1].symbol
+
+    def _forget(self, node):
+        """Descarta pontos de controle e erros de uma subárvore substituída."""
+        pending = [node]
+        while pending:
+            node = pending.pop()
+            if isinstance(node, ParserRuleContext):
+                self.checkpoints.pop(node, None)
+                self.syntax_errors.pop(node, None)
+                pending.extend(node.children or ())
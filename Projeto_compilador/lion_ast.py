@@ -0,0 +1,436 @@
+# lion_ast.py
+#
+# AST compacta da linguagem LION. A árvore de derivação do ANTLR guarda, em
+# cada nó, ponteiro para o pai, tokens de início/fim, lista de filhos com os
+# terminais e longas cadeias de um filho só (expression → logicExpr →
+# logicalExpression → logicalTerm → logicalFactor → comparison). lower()
+# converte essa árvore, vinda do ExprParser ou do RecursiveDescentParser, em
+# nós com __slots__: as cadeias são colapsadas, operadores encadeados viram um
+# único nó n-ário, identificadores são internados e cada nó guarda só a sua
+# posição no código-fonte. Os identificadores também recebem um ID da
+# tabela de nomes da compilação (symbol_table.NameTable), usado pelas fases
+# seguintes no lugar do texto. Depois disso a árvore de derivação pode ser
+# descartada; as fases seguintes (SemanticAnalyzer, TACGenerator, build_ast)
+# trabalham apenas sobre esta AST.
+
+import sys
+from types import GeneratorType
+
+from antlr4 import ParserRuleContext
+
+from ExprParser import ExprParser
+
+
+class Node:
+    """Base dos nós: posição (linha/coluna de início e de fim) no código-fonte."""
+    __slots__ = ('line', 'column', 'end_line', 'end_column')
+    # Atributos que guardam nós filhos (um nó, uma lista de nós ou None)
+    _fields = ()
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        cls._visit = 'visit' + cls.__name__
+
+    def accept(self, visitor):
+        return getattr(visitor, self._visit)(self)
+
+    def set_span(self, start, stop):
+        """Posição a partir dos tokens de início e de fim do contexto de origem."""
+        self.line = start.line
+        self.column = start.column
+        self.end_line = stop.line
+        self.end_column = stop.column + len(stop.text)
+        return self
+
+    def __repr__(self):
+        fields = ', '.join(f"{name}={getattr(self, name)!r}" for name in self.__slots__)
+        return f"{type(self).__name__}({fields})"
+
+
+def iter_children(node):
+    """Filhos de um nó, na ordem do código-fonte."""
+    for name in node._fields:
+        value = getattr(node, name)
+        if value is None:
+            continue
+        if isinstance(value, list):
+            yield from value
+        else:
+            yield value
+
+
+# --- Comandos ---
+
+class Program(Node):
+    __slots__ = ('body',)
+    _fields = ('body',)
+
+    def __init__(self, body):
+        self.body = body
+
+
+class VarDecl(Node):
+    # `symbol`: ID do símbolo criado pela declaração, preenchido pelo
+    # SemanticAnalyzer (-1: ainda não analisada ou redeclaração)
+    __slots__ = ('name', 'name_id', 'type_name', 'symbol')
+
+    def __init__(self, name, name_id, type_name):
+        self.name = name
+        self.name_id = name_id
+        self.type_name = type_name
+        self.symbol = -1
+
+
+class Assign(Node):
+    __slots__ = ('name', 'name_id', 'expr')
+    _fields = ('expr',)
+
+    def __init__(self, name, name_id, expr):
+        self.name = name
+        self.name_id = name_id
+        self.expr = expr
+
+
+class Read(Node):
+    __slots__ = ('name', 'name_id')
+
+    def __init__(self, name, name_id):
+        self.name = name
+        self.name_id = name_id
+
+
+class Write(Node):
+    __slots__ = ('expr',)
+    _fields = ('expr',)
+
+    def __init__(self, expr):
+        self.expr = expr
+
+
+class If(Node):
+    __slots__ = ('cond', 'then_body', 'else_body')
+    _fields = ('cond', 'then_body', 'else_body')
+
+    def __init__(self, cond, then_body, else_body=None):
+        self.cond = cond
+        self.then_body = then_body
+        # None quando não há 'else' (diferente de um 'else { }' vazio)
+        self.else_body = else_body
+
+
+class While(Node):
+    __slots__ = ('cond', 'body')
+    _fields = ('cond', 'body')
+
+    def __init__(self, cond, body):
+        self.cond = cond
+        self.body = body
+
+
+# --- Expressões ---
+
+class Expression(Node):
+    """
+    Base das expressões. `type` é o tipo inferido pelo SemanticAnalyzer
+    ('int', 'text' ou 'bool'; None enquanto não analisada ou se os operandos
+    não combinam), usado pelo TACGenerator e pelo gerador LLVM.
+    """
+    __slots__ = ('type',)
+
+
+class Name(Expression):
+    __slots__ = ('name', 'name_id')
+
+    def __init__(self, name, name_id):
+        self.name = name
+        self.name_id = name_id
+        self.type = None
+
+
+class Number(Expression):
+    __slots__ = ('text',)
+
+    def __init__(self, text):
+        self.text = text
+        self.type = None
+
+
+class String(Expression):
+    """Literal de texto; `text` mantém as aspas, como no token STRING."""
+    __slots__ = ('text',)
+
+    def __init__(self, text):
+        self.text = text
+        self.type = None
+
+
+class Paren(Expression):
+    __slots__ = ('expr',)
+    _fields = ('expr',)
+
+    def __init__(self, expr):
+        self.expr = expr
+        self.type = None
+
+
+class Concat(Expression):
+    """Concatenação de textos com '+', associativa à esquerda."""
+    __slots__ = ('operands',)
+    _fields = ('operands',)
+
+    def __init__(self, operands):
+        self.operands = operands
+        self.type = None
+
+
+class Arith(Expression):
+    """
+    Cadeia aritmética de um mesmo nível de precedência: ops[i] combina o
+    resultado acumulado com operands[i + 1] ('+'/'-' ou '*'/'/').
+    """
+    __slots__ = ('ops', 'operands')
+    _fields = ('operands',)
+
+    def __init__(self, ops, operands):
+        self.ops = ops
+        self.operands = operands
+        self.type = None
+
+
+class Compare(Expression):
+    __slots__ = ('op', 'left', 'right')
+    _fields = ('left', 'right')
+
+    def __init__(self, op, left, right):
+        self.op = op
+        self.left = left
+        self.right = right
+        self.type = None
+
+
+class Logical(Expression):
+    """Cadeia de '&&' ou de '||' (op), associativa à esquerda."""
+    __slots__ = ('op', 'operands')
+    _fields = ('operands',)
+
+    def __init__(self, op, operands):
+        self.op = op
+        self.operands = operands
+        self.type = None
+
+
+class Not(Expression):
+    __slots__ = ('operand',)
+    _fields = ('operand',)
+
+    def __init__(self, operand):
+        self.operand = operand
+        self.type = None
+
+
+class ASTVisitor:
+    """
+    Visitor genérico da AST, no mesmo formato do ExprVisitor gerado pelo ANTLR,
+    mas sem recursão em Python. Um método visitX que precisa do resultado de um
+    filho é um gerador: `valor = yield filho` suspende o método, e visit()
+    visita o filho e devolve o resultado com send(). Os métodos suspensos ficam
+    em uma pilha explícita, então a profundidade da árvore não é limitada pelo
+    limite de recursão. Métodos comuns (sem yield) devolvem o valor direto.
+    """
+
+    def visit(self, node):
+        result = node.accept(self)
+        if type(result) is not GeneratorType:
+            return result
+        stack = [result]
+        value = None
+        while stack:
+            try:
+                child = stack[-1].send(value)
+            except StopIteration as stop:
+                stack.pop()
+                value = stop.value
+                continue
+            value = child.accept(self)
+            if type(value) is GeneratorType:
+                stack.append(value)
+                value = None
+        return value
+
+    def visitChildren(self, node):
+        result = None
+        for child in iter_children(node):
+            result = yield child
+        return result
+
+    visitProgram = visitVarDecl = visitAssign = visitRead = visitWrite = visitChildren
+    visitIf = visitWhile = visitChildren
+    visitName = visitNumber = visitString = visitParen = visitChildren
+    visitConcat = visitArith = visitCompare = visitLogical = visitNot = visitChildren
+
+
+# --- Conversão da árvore de derivação ---
+#
+# Cada regra tem um construtor que recebe os filhos já convertidos (nós da
+# AST, listas de comandos ou, para terminais, o próprio Token), os tokens de
+# início e de fim da regra e a tabela de nomes em que os identificadores são
+# internados. lower() aplica os construtores de baixo para cima
+# sobre a árvore inteira; o front end em streaming (streaming_frontend.py)
+# aplica os mesmos construtores à medida que o parser sai de cada regra.
+
+def _name(token, names):
+    """Identificador internado na tabela de nomes: (texto, ID)."""
+    name_id = names.intern(token.text)
+    return names.names[name_id], name_id
+
+
+def _token(items, start, stop, names):
+    """type, arithmeticOperator, termOperator, comparisonOperator: o próprio token."""
+    return items[0]
+
+
+def _single(items, start, stop, names):
+    """declaration, command, logicExpr, arithExpr: cadeia de um filho só."""
+    return items[0]
+
+
+def _statements(items, start, stop, names):
+    return items
+
+
+def _block(items, start, stop, names):
+    return items[1]
+
+
+def _program(items, start, stop, names):
+    # O fim do programa é o '@end', não o EOF
+    return Program(items[1]).set_span(start, items[2])
+
+
+def _var_decl(items, start, stop, names):
+    return VarDecl(*_name(items[1], names), sys.intern(items[3].text)).set_span(start, stop)
+
+
+def _assign(items, start, stop, names):
+    return Assign(*_name(items[0], names), items[2]).set_span(start, stop)
+
+
+def _read(items, start, stop, names):
+    return Read(*_name(items[2], names)).set_span(start, stop)
+
+
+def _write(items, start, stop, names):
+    return Write(items[2]).set_span(start, stop)
+
+
+def _if(items, start, stop, names):
+    else_body = items[5] if len(items) > 4 else None
+    return If(items[1], items[3], else_body).set_span(start, stop)
+
+
+def _while(items, start, stop, names):
+    return While(items[1], items[3]).set_span(start, stop)
+
+
+def _primary(items, start, stop, names):
+    """factor e as alternativas stringExpr/idExpr/numberExpr/parenExpr."""
+    if len(items) == 3:
+        return Paren(items[1]).set_span(start, stop)
+    token = items[0]
+    if token.type == ExprParser.ID:
+        return Name(*_name(token, names)).set_span(start, stop)
+    if token.type == ExprParser.NUMBER:
+        return Number(token.text).set_span(start, stop)
+    return String(token.text).set_span(start, stop)
+
+
+def _concat(items, start, stop, names):
+    left, right = items[0], items[2]
+    if type(left) is Concat:
+        # a + b + c chega como ((a + b) + c): acumula em um só nó
+        left.operands.append(right)
+        return left.set_span(start, stop)
+    return Concat([left, right]).set_span(start, stop)
+
+
+def _arith_chain(items, start, stop, names):
+    """Regra 'operando (operador operando)*': colapsa quando há um só operando."""
+    if len(items) == 1:
+        return items[0]
+    return Arith(tuple(op.text for op in items[1::2]), items[::2]).set_span(start, stop)
+
+
+def _logical_chain(items, start, stop, names):
+    if len(items) == 1:
+        return items[0]
+    return Logical(items[1].text, items[::2]).set_span(start, stop)
+
+
+def _logical_factor(items, start, stop, names):
+    if len(items) == 2:
+        return Not(items[1]).set_span(start, stop)
+    if len(items) == 3:
+        return Paren(items[1]).set_span(start, stop)
+    return items[0]
+
+
+def _comparison(items, start, stop, names):
+    return Compare(items[1].text, items[0], items[2]).set_span(start, stop)
+
+
+BUILDERS = {
+    ExprParser.ProgramContext: _program,
+    ExprParser.DeclarationsContext: _statements,
+    ExprParser.DeclarationContext: _single,
+    ExprParser.VariableDeclarationContext: _var_decl,
+    ExprParser.TypeContext: _token,
+    ExprParser.CommandContext: _single,
+    ExprParser.InputCommandContext: _read,
+    ExprParser.OutputCommandContext: _write,
+    ExprParser.AssignmentContext: _assign,
+    ExprParser.IfCommandContext: _if,
+    ExprParser.WhileCommandContext: _while,
+    ExprParser.BlockContext: _block,
+    ExprParser.ConcatExprContext: _concat,
+    ExprParser.LogicExprContext: _single,
+    ExprParser.ArithExprContext: _single,
+    ExprParser.StringExprContext: _primary,
+    ExprParser.IdExprContext: _primary,
+    ExprParser.NumberExprContext: _primary,
+    ExprParser.ParenExprContext: _primary,
+    ExprParser.ArithmeticExpressionContext: _arith_chain,
+    ExprParser.TermContext: _arith_chain,
+    ExprParser.ArithmeticOperatorContext: _token,
+    ExprParser.TermOperatorContext: _token,
+    ExprParser.FactorContext: _primary,
+    ExprParser.LogicalExpressionContext: _logical_chain,
+    ExprParser.LogicalTermContext: _logical_chain,
+    ExprParser.LogicalFactorContext: _logical_factor,
+    ExprParser.ComparisonContext: _comparison,
+    ExprParser.ComparisonOperatorContext: _token,
+}
+
+
+def lower(ctx, names):
+    """
+    Converte a árvore devolvida pelo parser (normalmente o ProgramContext) na
+    AST compacta, internando os identificadores em `names` (a NameTable da
+    tabela de símbolos que vai analisar o programa). A árvore é percorrida em pós-ordem com uma pilha explícita
+    de (contexto, iterador dos filhos, filhos já convertidos), sem recursão:
+    blocos e parênteses aninhados e as espinhas de concatExpr (um nível por
+    '+') podem ter qualquer profundidade.
+    """
+    result = []
+    stack = [(ctx, iter(ctx.children or ()), [])]
+    while stack:
+        ctx, children, items = stack[-1]
+        for child in children:
+            if isinstance(child, ParserRuleContext):
+                stack.append((child, iter(child.children or ()), []))
+                break
+            items.append(child.symbol)
+        else:
+            stack.pop()
+            node = BUILDERS[type(ctx)](items, ctx.start, ctx.stop, names)
+            (stack[-1][2] if stack else result).append(node)
+    return result[0]
@@ -1,10 +1,27 @@
 # llvm_generator.py (VERSÃO FINAL E ROBUSTA)
 import ast
 from llvmlite import ir, binding
-from tac_generator import Var, Temp, Constant, Label
+from tac_generator import (Var, Temp, Constant,
+                           OP_ADD, OP_DIV, OP_EQ, OP_NE, OP_GE, OP_AND, OP_NOT, OP_ASSIGN,
+                           OP_GOTO, OP_IF_FALSE, OP_LABEL, OP_READ, OP_WRITE, OPCODE_NAMES)
+from tac_ssa import SSAVar
+
+# As instruções são escolhidas pelo tipo dos operandos do TAC, anotado pelo
+# SemanticAnalyzer: 'int' é double (a linguagem aceita 1.5 em variáveis int),
+# 'text' é um ponteiro para uma string C e 'bool' é i1. Funções da biblioteca
+# C usadas só por textos são declaradas no primeiro uso.
+#
+# emit() despacha pelo código da instrução, indexando a tabela `_emitters`;
+# os operadores binários (OP_ADD a OP_OR) compartilham um tradutor.
+#
+# generate() recebe o TAC comum: cada variável tem um alloca no bloco de
+# entrada, com um load em cada uso e um store em cada atribuição.
+# generate_ssa() recebe a forma SSA (tac_ssa.py): cada versão de variável é
+# o próprio valor LLVM que a define e os phi do TAC viram phi do LLVM, sem
+# memória para as variáveis.
 
 class LLVMGenerator:
-    def __init__(self):
+    def __init__(self, symbols=None):
         self.binding = binding
         self.binding.initialize()
         self.binding.initialize_native_target()
@@ -13,14 +30,34 @@ class LLVMGenerator:
         self.module = ir.Module(name="meu_programa")
         self.module.triple = self.binding.get_default_triple()
 
-        self.symbol_table = {}
-        self.blocks = {} # Dicionário para guardar os blocos já criados
+        # Tabela de símbolos do SemanticAnalyzer (opcional): dimensiona a lista
+        # de alocações, indexada pelo ID do símbolo de cada Var
+        self.symbols = symbols
+        self.variables = [None] * len(symbols) if symbols is not None else []
+        # Valores dos temporários e blocos dos rótulos, pelo número de cada um
+        self.temps = {}
+        self.blocks = []
+        # Valor LLVM de cada versão de variável (só em generate_ssa)
+        self.values = {}
         self.func = None # Para guardar a referência da função main
         self.builder = None
 
         self.int_type = ir.IntType(32)
         self.float_type = ir.DoubleType()
         self.void_ptr_type = ir.IntType(8).as_pointer()
+        self.bool_type = ir.IntType(1)
+        self.size_type = ir.IntType(64)
+        # Tipo LLVM das variáveis e dos valores de cada tipo da linguagem
+        self.value_types = {'int': self.float_type, 'text': self.void_ptr_type, 'bool': self.bool_type}
+        # Funções declaradas sob demanda: (retorno, parâmetros, argumentos variáveis)
+        self.runtime_signatures = {
+            'strlen': (self.size_type, [self.void_ptr_type], False),
+            'malloc': (self.void_ptr_type, [self.size_type], False),
+            'strcpy': (self.void_ptr_type, [self.void_ptr_type, self.void_ptr_type], False),
+            'strcat': (self.void_ptr_type, [self.void_ptr_type, self.void_ptr_type], False),
+            'strcmp': (self.int_type, [self.void_ptr_type, self.void_ptr_type], False),
+            'scanf': (self.int_type, [self.void_ptr_type], True),
+        }
 
     def _declare_runtime_functions(self):
         printf_type = ir.FunctionType(self.int_type, [self.void_ptr_type], var_arg=True)
@@ -28,29 +65,116 @@ class LLVMGenerator:
         read_double_type = ir.FunctionType(self.float_type, [])
         ir.Function(self.module, read_double_type, name="read_double")
 
+    def _runtime(self, name):
+        function = self.module.globals.get(name)
+        if function is None:
+            return_type, parameters, var_arg = self.runtime_signatures[name]
+            function = ir.Function(self.module, ir.FunctionType(return_type, parameters, var_arg=var_arg), name=name)
+        return function
+
+    def _global_string(self, text, name, as_constant=False):
+        """
+        String C global (terminada em zero) com `text`; devolve um i8*. Com
+        as_constant, o i8* é uma expressão constante em vez de uma instrução
+        no bloco atual (argumentos de phi).
+        """
+        data = bytearray((text + '\0').encode('utf-8'))
+        constant = ir.Constant(ir.ArrayType(ir.IntType(8), len(data)), data)
+        global_str = ir.GlobalVariable(self.module, constant.type, name=self.module.get_unique_name(name))
+        global_str.initializer = constant
+        global_str.linkage = 'internal'
+        if as_constant:
+            return global_str.bitcast(self.void_ptr_type)
+        return self.builder.bitcast(global_str, self.void_ptr_type)
+
+    def _text_constant(self, literal, as_constant=False):
+        # Usa ast.literal_eval para interpretar corretamente escapes como \n
+        try:
+            text = ast.literal_eval(literal)
+        except (ValueError, SyntaxError):
+            text = literal.strip('"') # Fallback
+        # Nome com o índice da instrução sendo traduzida
+        return self._global_string(text, f"str_const_{self._index - 1}", as_constant)
+
+    def _type_error(self, instr):
+        return TypeError(f"Tipos sem tradução para LLVM na instrução '{instr}'")
+
+    def _as_bool(self, value, value_type):
+        """Condição i1: bool como está; número comparado com zero."""
+        if value_type == 'bool':
+            return value
+        if value_type == 'int':
+            return self.builder.fcmp_ordered('!=', value, ir.Constant(self.float_type, 0.0))
+        return None
+
+    def _concat(self, lhs, rhs, name):
+        # Nova string com malloc(strlen(a) + strlen(b) + 1), strcpy e strcat
+        strlen = self._runtime('strlen')
+        size = self.builder.add(self.builder.call(strlen, [lhs]), self.builder.call(strlen, [rhs]))
+        size = self.builder.add(size, ir.Constant(self.size_type, 1))
+        buffer = self.builder.call(self._runtime('malloc'), [size], name=name)
+        self.builder.call(self._runtime('strcpy'), [buffer, lhs])
+        self.builder.call(self._runtime('strcat'), [buffer, rhs])
+        return buffer
+
     def _get_llvm_operand(self, tac_operand):
-        if isinstance(tac_operand, (Var, Temp)):
-            llvm_val = self.symbol_table.get(tac_operand.name)
+        kind = type(tac_operand)
+        if kind is Temp:
+            llvm_val = self.temps.get(tac_operand.id)
+            if llvm_val is None:
+                raise NameError(f"Operando desconhecido: {tac_operand.name}")
+            return llvm_val
+        if kind is Var:
+            llvm_val = self._variable(tac_operand)
             if llvm_val is None:
                 raise NameError(f"Operando desconhecido: {tac_operand.name}")
-            if isinstance(llvm_val, ir.AllocaInstr):
-                return self.builder.load(llvm_val, name=tac_operand.name + "_val")
-            else:
-                return llvm_val
-        elif isinstance(tac_operand, Constant):
-            if isinstance(tac_operand.name, float):
+            return self.builder.load(llvm_val, name=tac_operand.name + "_val")
+        if kind is SSAVar:
+            return self._ssa_value(tac_operand)
+        if kind is Constant:
+            if tac_operand.type == 'int':
                 return ir.Constant(self.float_type, tac_operand.name)
-            else:
-                return ir.Constant(self.int_type, tac_operand.name)
+            if tac_operand.type == 'text':
+                return self._text_constant(tac_operand.name)
+            raise TypeError(f"Constante sem tipo: {tac_operand.name}")
         return None
 
-    def _get_or_create_block(self, label_name):
+    def _ssa_value(self, version):
+        if version.version == 0:
+            # Lida antes de qualquer atribuição: como o load de um alloca
+            # nunca escrito, o valor é indefinido
+            value_type = self.value_types.get(version.type)
+            if value_type is None:
+                raise TypeError(f"Variável sem tipo: {version.var.name}")
+            return ir.Constant(value_type, ir.Undefined)
+        llvm_val = self.values.get(version)
+        if llvm_val is None:
+            raise NameError(f"Operando desconhecido: {version.name}")
+        return llvm_val
+
+    def _phi_argument(self, operand):
+        # Constantes de texto viram expressões constantes: o argumento não
+        # pode ser uma instrução do bloco em que o phi está
+        if type(operand) is Constant and operand.type == 'text':
+            return self._text_constant(operand.name, as_constant=True)
+        return self._get_llvm_operand(operand)
+
+    def _get_or_create_block(self, label):
         """Cria um bloco LLVM se ele não existir, ou retorna o existente."""
-        if label_name not in self.blocks:
-            self.blocks[label_name] = self.func.append_basic_block(name=label_name)
-        return self.blocks[label_name]
+        blocks = self.blocks
+        if label.id >= len(blocks):
+            blocks.extend([None] * (label.id + 1 - len(blocks)))
+        block = blocks[label.id]
+        if block is None:
+            block = blocks[label.id] = self.func.append_basic_block(name=label.name)
+        return block
 
-    def generate(self, tac_code):
+    def begin(self, lazy_allocation=False):
+        """
+        Prepara o módulo e a função main. Com lazy_allocation, cada variável é
+        alocada na primeira vez em que aparece (modo streaming, em que as
+        instruções seguintes ainda não são conhecidas).
+        """
         self._declare_runtime_functions()
 
         main_func_type = ir.FunctionType(self.int_type, [])
@@ -58,109 +182,242 @@ class LLVMGenerator:
         
         entry_block = self.func.append_basic_block(name="entry")
         self.builder = ir.IRBuilder(entry_block)
+        self.alloca_builder = ir.IRBuilder()
+        self._allocas = 0
+        self.lazy_allocation = lazy_allocation
+        self._index = 0
+        # Tradutor de cada código de operação (índice = opcode)
+        self._emitters = [self._emit_binary] * len(OPCODE_NAMES)
+        for opcode, emitter in ((OP_NOT, self._emit_not), (OP_ASSIGN, self._emit_assign),
+                                (OP_GOTO, self._emit_goto), (OP_IF_FALSE, self._emit_if_false),
+                                (OP_LABEL, self._emit_label), (OP_READ, self._emit_read),
+                                (OP_WRITE, self._emit_write)):
+            self._emitters[opcode] = emitter
+        self._float_ops = (self.builder.fadd, self.builder.fsub, self.builder.fmul, self.builder.fdiv)
+
+    def _allocate(self, var):
+        # As alocações ficam juntas no início do bloco de entrada, na ordem em
+        # que as variáveis aparecem, mesmo quando o builder já está mais adiante
+        entry = self.func.entry_basic_block
+        if self._allocas < len(entry.instructions):
+            self.alloca_builder.position_before(entry.instructions[self._allocas])
+        else:
+            self.alloca_builder.position_at_end(entry)
+        value_type = self.value_types.get(var.type)
+        if value_type is None:
+            raise TypeError(f"Variável sem tipo: {var.name}")
+        ptr = self.alloca_builder.alloca(value_type, name=var.name)
+        self._allocas += 1
+        if self.builder.block is entry:
+            self.builder.position_at_end(entry)
+        self.variables[var.symbol] = ptr
+        return ptr
+
+    def _variable(self, var):
+        symbol = var.symbol
+        if symbol < 0:
+            # Nome sem declaração: não há o que alocar
+            return None
+        variables = self.variables
+        if symbol >= len(variables):
+            # Tabela ainda crescendo (streaming) ou ausente
+            variables.extend([None] * (symbol + 1 - len(variables)))
+        ptr = variables[symbol]
+        if ptr is None and self.lazy_allocation:
+            ptr = self._allocate(var)
+        return ptr
+
+    def generate(self, tac_code):
+        self.begin()
 
         # Pré-passo para alocar variáveis
         for instr in tac_code:
-            if isinstance(instr.result, Var) and instr.result.name not in self.symbol_table:
-                ptr = self.builder.alloca(self.float_type, name=instr.result.name)
-                self.symbol_table[instr.result.name] = ptr
+            result = instr.result
+            if type(result) is Var and result.symbol >= 0 and self._variable(result) is None:
+                self._allocate(result)
+        # Variáveis só lidas em expressões (nunca atribuídas, ou cujas
+        # atribuições a otimização removeu) também precisam de espaço
+        for instr in tac_code:
+            for operand in (instr.arg1, instr.arg2):
+                if type(operand) is Var and operand.symbol >= 0 and self._variable(operand) is None:
+                    self._allocate(operand)
         
         # NÃO vamos mais pré-criar os blocos. Eles serão criados sob demanda.
 
-        for i, instr in enumerate(tac_code):
-            if instr.opcode == 'LABEL':
-                # Pega ou cria o bloco para este rótulo
-                block = self._get_or_create_block(instr.result.name)
-                # Se o bloco anterior não terminou com um salto, cria um salto para este novo bloco
-                if not self.builder.block.is_terminated:
-                    self.builder.branch(block)
-                # Move o builder para o novo bloco
-                self.builder.position_at_end(block)
-
-            elif instr.opcode == 'GOTO':
-                target_block = self._get_or_create_block(instr.result.name)
-                # Garante que o bloco atual termine com este salto incondicional
-                if not self.builder.block.is_terminated:
-                    self.builder.branch(target_block)
-
-            elif instr.opcode == 'IF_FALSE':
-                condition = self._get_llvm_operand(instr.arg1)
-                false_block = self._get_or_create_block(instr.result.name)
-                
-                # O bloco "true" é sempre o próximo, então criamos um novo para ele
-                true_block = self.func.append_basic_block(name=f"if_true_{i}")
-                
-                # Gera o salto condicional
-                self.builder.cbranch(condition, true_block, false_block)
-                # Move o builder para o bloco "true" para continuar a geração
-                self.builder.position_at_end(true_block)
-
-            # --- O restante da lógica de tradução de instruções permanece o mesmo ---
-            elif instr.opcode in ['+', '-', '*', '/', '==', '!=', '<', '>', '<=', '>=', '&&', '||']:
-                lhs = self._get_llvm_operand(instr.arg1)
-                rhs = self._get_llvm_operand(instr.arg2)
-                op_map = {
-                    '+': self.builder.fadd, '-': self.builder.fsub, '*': self.builder.fmul, '/': self.builder.fdiv,
-                    '&&': self.builder.and_, '||': self.builder.or_
-                }
-                if instr.opcode in op_map:
-                    result = op_map[instr.opcode](lhs, rhs, name=instr.result.name)
-                else: # Operadores de comparação
-                    result = self.builder.fcmp_ordered(instr.opcode, lhs, rhs, name=instr.result.name)
-                self.symbol_table[instr.result.name] = result
-
-            elif instr.opcode == 'ASSIGN':
-                source_val = self._get_llvm_operand(instr.arg1)
-                target_ptr = self.symbol_table[instr.result.name]
-                self.builder.store(source_val, target_ptr)
-
-            elif instr.opcode == 'READ':
-                target_ptr = self.symbol_table[instr.result.name]
-                read_func = self.module.get_global("read_double")
-                read_value = self.builder.call(read_func, [], name="input_val")
-                self.builder.store(read_value, target_ptr)
-
-
-            elif instr.opcode == 'WRITE':
-                operand_to_print = instr.result
-
-                # Determina o formato e o valor a ser passado para o printf
-                if isinstance(operand_to_print, Constant) and isinstance(operand_to_print.name, str) and operand_to_print.name.startswith('"'):
-                    # Cenário 1: É uma string literal
-                    format_str = "%s"  # O formato é para string
-
-                    # Usa ast.literal_eval para interpretar corretamente escapes como \n
-                    try:
-                        py_str = ast.literal_eval(operand_to_print.name)
-                    except (ValueError, SyntaxError):
-                        py_str = operand_to_print.name.strip('"') # Fallback
-
-                    # Cria a string global C, null-terminated
-                    c_str_val = bytearray((py_str + '\0').encode('utf-8'))
-                    c_str = ir.Constant(ir.ArrayType(ir.IntType(8), len(c_str_val)), c_str_val)
-                    str_ptr = ir.GlobalVariable(self.module, c_str.type, name=f"str_const_{i}")
-                    str_ptr.initializer = c_str
-                    str_ptr.linkage = 'internal'
-
-                    value_to_pass = self.builder.bitcast(str_ptr, self.void_ptr_type)
-                else:
-                    # Cenário 2: É um número
-                    format_str = "%f"  # O formato é para float, SEM \n
-                    value_to_pass = self._get_llvm_operand(operand_to_print)
-
-                # Agora, cria a string de formato global, também null-terminated
-                fmt_bytes = bytearray((format_str + '\0').encode('utf-8'))
-                global_fmt = ir.GlobalVariable(self.module, ir.ArrayType(ir.IntType(8), len(fmt_bytes)), name=f"fmt_str_{i}")
-                global_fmt.initializer = ir.Constant(ir.ArrayType(ir.IntType(8), len(fmt_bytes)), fmt_bytes)
-                global_fmt.linkage = 'internal'
-
-                # Pega um ponteiro para a string de formato
-                fmt_ptr = self.builder.bitcast(global_fmt, self.void_ptr_type)
-
-                # Chama a função printf
-                printf_func = self.module.get_global("printf")
-                self.builder.call(printf_func, [fmt_ptr, value_to_pass])
+        for instr in tac_code:
+            self.emit(instr)
+        return self.finish()
+
+    def generate_ssa(self, ssa):
+        """Gera o módulo a partir de uma SSAForm: versões como valores e phi do LLVM."""
+        self.begin()
+        cfg = ssa.cfg
+        blocks = cfg.blocks
+        # Bloco LLVM de onde sai cada aresta: o do salto no fim do bloco e o
+        # em que o builder está ao cair no bloco seguinte (depois de um
+        # IF_FALSE, o bloco "true" criado por ele)
+        jump_from = [None] * len(blocks)
+        fall_from = [None] * len(blocks)
+        pending_phis = []
+        for block in blocks:
+            instructions = block.instructions
+            last = len(instructions) - 1
+            for index, instr in enumerate(instructions):
+                if index == last and (instr.opcode == OP_GOTO or instr.opcode == OP_IF_FALSE):
+                    jump_from[block.id] = self.builder.block
+                self.emit(instr)
+                if index == 0 and instr.opcode == OP_LABEL:
+                    # Os phi abrem o bloco; os argumentos só são conhecidos
+                    # depois que todos os predecessores forem gerados
+                    for phi in ssa.phis[block.id]:
+                        value_type = self.value_types.get(phi.result.type)
+                        if value_type is None:
+                            raise TypeError(f"Variável sem tipo: {phi.result.var.name}")
+                        node = self.values[phi.result] = self.builder.phi(value_type, name=phi.result.name)
+                        pending_phis.append((node, phi, block))
+            fall_from[block.id] = self.builder.block
+
+        for node, phi, block in pending_phis:
+            label_id = block.label.id
+            for predecessor, operand in zip(block.predecessors, phi.args):
+                value = self._phi_argument(operand)
+                instructions = blocks[predecessor].instructions
+                end = instructions[-1] if instructions else None
+                if end is not None and (end.opcode == OP_GOTO or end.opcode == OP_IF_FALSE) \
+                        and end.result.id == label_id:
+                    node.add_incoming(value, jump_from[predecessor])
+                if predecessor == block.id - 1 and (end is None or end.opcode != OP_GOTO):
+                    node.add_incoming(value, fall_from[predecessor])
+        return self.finish()
+
+    def emit(self, instr):
+        """Traduz uma instrução TAC para LLVM IR."""
+        self._index += 1
+        self._emitters[instr.opcode](instr)
+
+    def _emit_label(self, instr):
+        # Pega ou cria o bloco para este rótulo
+        block = self._get_or_create_block(instr.result)
+        # Se o bloco anterior não terminou com um salto, cria um salto para este novo bloco
+        if not self.builder.block.is_terminated:
+            self.builder.branch(block)
+        # Move o builder para o novo bloco
+        self.builder.position_at_end(block)
+
+    def _emit_goto(self, instr):
+        target_block = self._get_or_create_block(instr.result)
+        # Garante que o bloco atual termine com este salto incondicional
+        if not self.builder.block.is_terminated:
+            self.builder.branch(target_block)
+
+    def _emit_if_false(self, instr):
+        condition = self._as_bool(self._get_llvm_operand(instr.arg1), instr.arg1.type)
+        if condition is None:
+            raise self._type_error(instr)
+        false_block = self._get_or_create_block(instr.result)
+
+        # O bloco "true" é sempre o próximo, então criamos um novo para ele
+        true_block = self.func.append_basic_block(name=f"if_true_{self._index - 1}")
+
+        # Gera o salto condicional
+        self.builder.cbranch(condition, true_block, false_block)
+        # Move o builder para o bloco "true" para continuar a geração
+        self.builder.position_at_end(true_block)
+
+    # --- Operadores: a instrução depende do tipo dos operandos ---
+
+    def _emit_binary(self, instr):
+        opcode = instr.opcode
+        op = OPCODE_NAMES[opcode]
+        operand_type = instr.arg1.type
+        lhs = self._get_llvm_operand(instr.arg1)
+        rhs = self._get_llvm_operand(instr.arg2)
+        name = instr.result.name
+        if opcode >= OP_AND:
+            lhs = self._as_bool(lhs, operand_type)
+            rhs = self._as_bool(rhs, instr.arg2.type)
+            if lhs is None or rhs is None:
+                raise self._type_error(instr)
+            result = (self.builder.and_ if opcode == OP_AND else self.builder.or_)(lhs, rhs, name=name)
+        elif operand_type != instr.arg2.type:
+            raise self._type_error(instr)
+        elif operand_type == 'int':
+            if opcode <= OP_DIV:
+                result = self._float_ops[opcode](lhs, rhs, name=name)
+            else: # Operadores de comparação
+                result = self.builder.fcmp_ordered(op, lhs, rhs, name=name)
+        elif operand_type == 'text' and opcode == OP_ADD:
+            result = self._concat(lhs, rhs, name)
+        elif operand_type == 'text' and OP_EQ <= opcode <= OP_GE:
+            # Ordem lexicográfica: strcmp(a, b) comparado com zero
+            order = self.builder.call(self._runtime('strcmp'), [lhs, rhs])
+            result = self.builder.icmp_signed(op, order, ir.Constant(self.int_type, 0), name=name)
+        elif operand_type == 'bool' and (opcode == OP_EQ or opcode == OP_NE):
+            result = self.builder.icmp_unsigned(op, lhs, rhs, name=name)
+        else:
+            raise self._type_error(instr)
+        self.temps[instr.result.id] = result
+
+    def _emit_not(self, instr):
+        operand = self._as_bool(self._get_llvm_operand(instr.arg1), instr.arg1.type)
+        if operand is None:
+            raise self._type_error(instr)
+        self.temps[instr.result.id] = self.builder.not_(operand, name=instr.result.name)
+
+    def _assign(self, target, value):
+        if type(target) is SSAVar:
+            # Em SSA a versão é só um nome para o valor
+            self.values[target] = value
+        else:
+            self.builder.store(value, self._variable(target))
+
+    def _emit_assign(self, instr):
+        self._assign(instr.result, self._get_llvm_operand(instr.arg1))
+
+    def _emit_read(self, instr):
+        if instr.result.type == 'text':
+            # Uma linha (até 1023 caracteres) em uma string nova
+            buffer = self.builder.call(self._runtime('malloc'), [ir.Constant(self.size_type, 1024)], name="input_text")
+            fmt_ptr = self._global_string(" %1023[^\n]", f"fmt_str_{self._index - 1}")
+            self.builder.call(self._runtime('scanf'), [fmt_ptr, buffer])
+            self._assign(instr.result, buffer)
+        else:
+            read_func = self.module.get_global("read_double")
+            read_value = self.builder.call(read_func, [], name="input_val")
+            self._assign(instr.result, read_value)
+
+    def _emit_write(self, instr):
+        operand_to_print = instr.result
+
+        # Determina o formato e o valor a ser passado para o printf pelo tipo
+        value_to_pass = self._get_llvm_operand(operand_to_print)
+        if operand_to_print.type == 'text':
+            # Cenário 1: É uma string (literal, variável ou concatenação)
+            format_str = "%s"  # O formato é para string
+        elif operand_to_print.type == 'int':
+            # Cenário 2: É um número
+            format_str = "%f"  # O formato é para float, SEM \n
+        elif operand_to_print.type == 'bool':
+            # Cenário 3: Resultado de comparação, impresso como 0 ou 1
+            format_str = "%d"
+            value_to_pass = self.builder.zext(value_to_pass, self.int_type)
+        else:
+            raise self._type_error(instr)
+
+        # Agora, cria a string de formato global, também null-terminated
+        fmt_bytes = bytearray((format_str + '\0').encode('utf-8'))
+        global_fmt = ir.GlobalVariable(self.module, ir.ArrayType(ir.IntType(8), len(fmt_bytes)), name=f"fmt_str_{self._index - 1}")
+        global_fmt.initializer = ir.Constant(ir.ArrayType(ir.IntType(8), len(fmt_bytes)), fmt_bytes)
+        global_fmt.linkage = 'internal'
+
+        # Pega um ponteiro para a string de formato
+        fmt_ptr = self.builder.bitcast(global_fmt, self.void_ptr_type)
+
+        # Chama a função printf
+        printf_func = self.module.get_global("printf")
+        self.builder.call(printf_func, [fmt_ptr, value_to_pass])
 
+    def finish(self):
         # Finalizar a função main com um retorno, caso o último bloco não tenha sido terminado
         if not self.builder.block.is_terminated:
             self.builder.ret(ir.Constant(self.int_type, 0))
@@ -0,0 +1,82 @@
+# parallel_lexer.py
+#
+# Análise léxica paralela por blocos de linhas. Nenhum token do Expr.g4
+# atravessa uma quebra de linha (STRING exclui \r\n, COMMENT para no fim da
+# linha e WS é descartado), então o texto pode ser dividido em fronteiras de
+# linha e cada bloco analisado em um processo separado. Depois os tokens são
+# reunidos com posições, linhas e índices globais.
+
+import os
+
+from antlr4 import InputStream
+
+from token_store import TokenStore, tokenize
+
+# Abaixo deste tamanho o custo de criar processos supera o ganho.
+MIN_PARALLEL_CHARS = 1 << 20
+
+
+def split_lines(text, chunks):
+    """
+    Divide o texto em até `chunks` blocos terminados em '\\n'. Retorna
+    tuplas (início, fim, linha_inicial) com linha_inicial contada a partir de 0.
+    """
+    n = len(text)
+    bounds = []
+    start = 0
+    line = 0
+    for i in range(1, chunks + 1):
+        if start >= n:
+            break
+        if i == chunks:
+            end = n
+        else:
+            end = text.find('\n', max(start, n * i // chunks))
+            end = n if end < 0 else end + 1
+        bounds.append((start, end, line))
+        line += text.count('\n', start, end)
+        start = end
+    return bounds
+
+
+def _lex_chunk(job):
+    """Executado nos processos filhos: analisa um bloco e devolve colunas compactas."""
+    lexer_class, chunk = job
+    store = tokenize(InputStream(chunk), lexer_class)
+    return store.types, store.starts, store.stops, store.lines, store.columns
+
+
+def lex_parallel_store(input_stream, lexer_class, jobs=None):
+    """
+    Analisa `input_stream` em `jobs` processos e reúne os blocos em um único
+    TokenStore, com posições e linhas relativas ao arquivo inteiro.
+    """
+    text = str(input_stream)
+    jobs = jobs or os.cpu_count() or 1
+
+    # Mais blocos que processos equilibra a carga entre linhas curtas e longas
+    bounds = split_lines(text, jobs * 4 if jobs > 1 and len(text) >= MIN_PARALLEL_CHARS else 1)
+    work = [(lexer_class, text[start:end]) for start, end, _ in bounds]
+    if len(work) > 1:
+        # Importado aqui: multiprocessing pesa na partida de toda compilação
+        from concurrent.futures import ProcessPoolExecutor
+        with ProcessPoolExecutor(max_workers=jobs) as pool:
+            results = list(pool.map(_lex_chunk, work))
+    else:
+        results = [_lex_chunk(job) for job in work]
+    del work
+
+    store = TokenStore(text)
+    chunk = TokenStore()
+    for (offset, _, line_offset), columns in zip(bounds, results):
+        chunk.types, chunk.starts, chunk.stops, chunk.lines, chunk.columns = columns
+        store.extend(chunk, offset, line_offset)
+    return store
+
+
+def lex_parallel(input_stream, lexer_class, jobs=None):
+    """
+    Como lex_parallel_store, mas devolve a lista completa de CommonTokens
+    (incluindo o EOF, com tokenIndex globais) e a fonte de tokens para o parser.
+    """
+    return lex_parallel_store(input_stream, lexer_class, jobs).to_tokens(input_stream)
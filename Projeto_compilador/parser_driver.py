@@ -0,0 +1,111 @@
+# parser_driver.py
+#
+# Estratégia de análise sintática em dois estágios. A regra `expression` é
+# recursiva à esquerda e ambígua (concatExpr x arithExpr x logicExpr x
+# idExpr), o que leva o adaptivePredict a lookaheads caros em contexto
+# completo (LL). Primeiro tentamos o modo SLL, mais barato, com uma estratégia
+# de erro que desiste na primeira falha; só quando ele falha o programa é
+# reanalisado em LL completo, que é quem reporta os erros sintáticos reais.
+#
+# A escolha entre as alternativas primárias de `expression` é a exceção: no SLL
+# o contexto do chamador vira curinga e o operando direito de concatExpr pode
+# reentrar em logicalExpression, então o SLL conflita e fica com logicExpr
+# (alternativa 1) para qualquer `a + b;`, falhando no primeiro ';'. Essa decisão
+# é sempre prevista em LL, mesmo no primeiro estágio.
+
+import time
+
+from antlr4.atn.ATNState import BasicBlockStartState
+from antlr4.atn.ParserATNSimulator import ParserATNSimulator
+from antlr4.atn.PredictionMode import PredictionMode
+from antlr4.error.ErrorStrategy import BailErrorStrategy, DefaultErrorStrategy
+from antlr4.error.Errors import ParseCancellationException
+
+
+class ParseStats:
+    """Contadores de quantas análises terminaram em SLL e quantas caíram para LL."""
+
+    def __init__(self):
+        self.sll_parses = 0
+        self.ll_fallbacks = 0
+        self.sll_time = 0.0
+        self.ll_time = 0.0
+
+    @property
+    def total(self):
+        return self.sll_parses + self.ll_fallbacks
+
+    def report(self):
+        total = self.total or 1
+        return (f"Análises sintáticas: {self.total} | SLL: {self.sll_parses} "
+                f"({100 * self.sll_parses / total:.1f}%) em {self.sll_time:.3f}s | "
+                f"fallback LL: {self.ll_fallbacks} ({100 * self.ll_fallbacks / total:.1f}%) "
+                f"em {self.ll_time:.3f}s")
+
+
+class TwoStageATNSimulator(ParserATNSimulator):
+    """Simulador que prevê `full_context_decisions` em LL mesmo no modo SLL."""
+
+    def __init__(self, parser, atn, decisionToDFA, sharedContextCache, full_context_decisions=()):
+        super().__init__(parser, atn, decisionToDFA, sharedContextCache)
+        self.full_context_decisions = frozenset(full_context_decisions)
+
+    def adaptivePredict(self, input, decision, outerContext):
+        if decision in self.full_context_decisions and self.predictionMode == PredictionMode.SLL:
+            self.predictionMode = PredictionMode.LL
+            try:
+                return super().adaptivePredict(input, decision, outerContext)
+            finally:
+                self.predictionMode = PredictionMode.SLL
+        return super().adaptivePredict(input, decision, outerContext)
+
+
+def expression_decisions(parser):
+    """Decisões de escolha de alternativa (não de laço) da regra `expression`."""
+    return [decision for decision, state in enumerate(parser.atn.decisionToState)
+            if state.ruleIndex == parser.RULE_expression and isinstance(state, BasicBlockStartState)]
+
+
+# Acumulado do processo, útil quando vários programas são compilados em sequência
+STATS = ParseStats()
+
+
+def parse_two_stage(parser, error_listener, stats=STATS):
+    """
+    Executa parser.program() primeiro em SLL e, se necessário, em LL completo.
+    O `error_listener` só é instalado no segundo estágio, pois falhas do SLL
+    não significam que o programa seja inválido.
+    """
+    token_stream = parser.getTokenStream()
+    if not isinstance(parser._interp, TwoStageATNSimulator):
+        parser._interp = TwoStageATNSimulator(parser, parser.atn, parser.decisionsToDFA,
+                                              parser.sharedContextCache, expression_decisions(parser))
+
+    parser.removeErrorListeners()
+    parser._errHandler = BailErrorStrategy()
+    parser._interp.predictionMode = PredictionMode.SLL
+    start = time.perf_counter()
+    try:
+        tree = parser.program()
+        stats.sll_parses += 1
+        stats.sll_time += time.perf_counter() - start
+        return tree
+    except ParseCancellationException:
+        stats.sll_time += time.perf_counter() - start
+
+    # --- Segundo estágio: LL completo com recuperação e relato de erros ---
+    stats.ll_fallbacks += 1
+    token_stream.seek(0)
+    # Parser.reset() tenta remover o tracer (None) da lista de listeners de
+    # análise e falha se ela existir: os listeners saem e voltam em volta dele
+    parse_listeners = parser.getParseListeners()
+    parser.removeParseListeners()
+    parser.reset()
+    parser._parseListeners = parse_listeners or None
+    parser.addErrorListener(error_listener)
+    parser._errHandler = DefaultErrorStrategy()
+    parser._interp.predictionMode = PredictionMode.LL
+    start = time.perf_counter()
+    tree = parser.program()
+    stats.ll_time += time.perf_counter() - start
+    return tree
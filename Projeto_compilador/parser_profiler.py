@@ -0,0 +1,140 @@
+# parser_profiler.py
+#
+# Perfil das decisões de predição do ExprParser, no espírito do
+# ProfilingATNSimulator do runtime Java (que o runtime Python não traz). Cada
+# chamada de adaptivePredict é cronometrada e os ganchos do simulador contam
+# quantos símbolos de lookahead foram examinados em SLL e em LL, quantas
+# transições vieram prontas do DFA e quantas exigiram simular o ATN, quantas
+# vezes o SLL precisou recorrer ao contexto completo e quantas ambiguidades
+# foram relatadas. O relatório associa cada decisão à regra do Expr.g4.
+
+import time
+
+from antlr4.atn.ATNState import StarLoopEntryState
+from antlr4.atn.ATNSimulator import ATNSimulator
+
+from parser_driver import TwoStageATNSimulator
+
+
+class DecisionInfo:
+    """Contadores de uma decisão (mesmos campos do DecisionInfo do ANTLR)."""
+    __slots__ = ('decision', 'invocations', 'time', 'sll_total_look', 'sll_max_look',
+                 'll_total_look', 'll_max_look', 'll_predictions', 'sll_dfa_transitions',
+                 'sll_atn_transitions', 'll_atn_transitions', 'll_fallbacks',
+                 'ambiguities', 'context_sensitivities', 'errors')
+
+    def __init__(self, decision):
+        self.decision = decision
+        for name in self.__slots__[1:]:
+            setattr(self, name, 0)
+
+
+class ProfilingATNSimulator(TwoStageATNSimulator):
+    """
+    Simulador que coleta DecisionInfo por decisão. Herda o comportamento do
+    primeiro estágio de parse_two_stage, então pode ser instalado no parser
+    antes da análise sem alterar a árvore produzida.
+    """
+
+    def __init__(self, parser, atn, decisionToDFA, sharedContextCache, full_context_decisions=()):
+        super().__init__(parser, atn, decisionToDFA, sharedContextCache, full_context_decisions)
+        self.decisions = [DecisionInfo(d) for d in range(len(atn.decisionToState))]
+        self._sll_stop = -1
+        self._ll_stop = -1
+        self._current = None
+        self._resolved_by_sll = 0
+
+    def adaptivePredict(self, input, decision, outerContext):
+        info = self.decisions[decision]
+        outer = self._current
+        self._current = info
+        self._sll_stop = -1
+        self._ll_stop = -1
+        start_index = input.index
+        start = time.perf_counter()
+        try:
+            return super().adaptivePredict(input, decision, outerContext)
+        finally:
+            info.time += time.perf_counter() - start
+            info.invocations += 1
+            if self._sll_stop >= 0:
+                look = self._sll_stop - start_index + 1
+                info.sll_total_look += look
+                info.sll_max_look = max(info.sll_max_look, look)
+            if self._ll_stop >= 0:
+                look = self._ll_stop - start_index + 1
+                info.ll_predictions += 1
+                info.ll_total_look += look
+                info.ll_max_look = max(info.ll_max_look, look)
+            self._current = outer
+
+    def getExistingTargetState(self, previousD, t):
+        self._sll_stop = self._input.index
+        existing = super().getExistingTargetState(previousD, t)
+        if existing is not None:
+            self._current.sll_dfa_transitions += 1
+            if existing is ATNSimulator.ERROR:
+                self._current.errors += 1
+        return existing
+
+    def computeReachSet(self, closure, t, fullCtx):
+        if fullCtx:
+            self._ll_stop = self._input.index
+        reach = super().computeReachSet(closure, t, fullCtx)
+        if fullCtx:
+            self._current.ll_atn_transitions += 1
+        else:
+            self._current.sll_atn_transitions += 1
+        if reach is None:
+            self._current.errors += 1
+        return reach
+
+    def reportAttemptingFullContext(self, dfa, conflictingAlts, configs, startIndex, stopIndex):
+        alts = conflictingAlts if conflictingAlts is not None else set(c.alt for c in configs)
+        self._resolved_by_sll = min(alts) if alts else 0
+        self.decisions[dfa.decision].ll_fallbacks += 1
+        super().reportAttemptingFullContext(dfa, conflictingAlts, configs, startIndex, stopIndex)
+
+    def reportContextSensitivity(self, dfa, prediction, configs, startIndex, stopIndex):
+        if prediction != self._resolved_by_sll:
+            self.decisions[dfa.decision].context_sensitivities += 1
+        super().reportContextSensitivity(dfa, prediction, configs, startIndex, stopIndex)
+
+    def reportAmbiguity(self, dfa, D, startIndex, stopIndex, exact, ambigAlts, configs):
+        self.decisions[dfa.decision].ambiguities += 1
+        super().reportAmbiguity(dfa, D, startIndex, stopIndex, exact, ambigAlts, configs)
+
+    # --- Relatório ---
+
+    def decision_label(self, decision):
+        """Regra do Expr.g4 e tipo da decisão (alternativas, laço ou laço de precedência)."""
+        state = self.atn.decisionToState[decision]
+        rule = self.parser.ruleNames[state.ruleIndex]
+        if isinstance(state, StarLoopEntryState):
+            kind = "laço de precedência" if state.isPrecedenceDecision else "laço"
+        else:
+            kind = "alternativas"
+        return rule, kind
+
+    def report(self):
+        """Tabela por decisão, da mais cara para a mais barata (só decisões usadas)."""
+        header = (f"{'dec':>3} {'regra':<21} {'tipo':<19} {'chamadas':>9} {'tempo ms':>9} "
+                  f"{'SLL k méd/máx':>14} {'DFA/ATN':>13} {'LL':>6} {'LL k méd/máx':>13} "
+                  f"{'ambig':>6} {'ctx':>5} {'erros':>6}")
+        lines = ["--- PERFIL DAS DECISÕES DO PARSER ---", header, "-" * len(header)]
+        used = sorted((d for d in self.decisions if d.invocations), key=lambda d: d.time, reverse=True)
+        for d in used:
+            rule, kind = self.decision_label(d.decision)
+            sll_look = f"{d.sll_total_look / d.invocations:.2f}/{d.sll_max_look}"
+            ll_look = f"{d.ll_total_look / d.ll_predictions:.2f}/{d.ll_max_look}" if d.ll_predictions else "-"
+            lines.append(
+                f"{d.decision:>3} {rule:<21} {kind:<19} {d.invocations:>9} {d.time * 1000:>9.1f} "
+                f"{sll_look:>14} {d.sll_dfa_transitions:>6}/{d.sll_atn_transitions:<6} {d.ll_fallbacks:>6} "
+                f"{ll_look:>13} {d.ambiguities:>6} {d.context_sensitivities:>5} {d.errors:>6}")
+        total_time = sum(d.time for d in used)
+        lines.append("-" * len(header))
+        lines.append(f"Total: {sum(d.invocations for d in used)} predições em {total_time * 1000:.1f} ms; "
+                     f"{sum(d.ll_fallbacks for d in used)} recorreram ao LL completo.")
+        lines.append("DFA/ATN: transições servidas pelo cache do DFA / simuladas no ATN (SLL). "
+                     "LL: fallbacks para contexto completo. ctx: sensibilidades de contexto.")
+        return "\n".join(lines)
@@ -0,0 +1,633 @@
+# rd_parser.py
+#
+# Analisador sintático descendente recursivo para a linguagem do Expr.g4, que
+# dispensa a simulação do ATN do ANTLR. Ele consome o mesmo fluxo de tokens e
+# constrói a mesma árvore (os contextos do ExprParser, com os mesmos start,
+# stop e invokingState), então SemanticAnalyzer e TACGenerator não percebem a
+# troca.
+#
+# As regras de comandos são LL(1). A dificuldade está em `expression`, onde o
+# ANTLR escolhe entre logicExpr, arithExpr, stringExpr e parenExpr com
+# lookahead ilimitado: em cada decisão ele fica com a menor alternativa que
+# ainda permite terminar a análise do restante da entrada (e, nos laços,
+# continua enquanto continuar for viável). Com os parênteses tratados como
+# átomos, a linguagem de cada nível de aninhamento é regular; um autômato
+# pequeno (estados abaixo) reconhece os três modos de um nível: expressão
+# completa, expressão lógica (conteúdo de `( logicalExpression )`) e
+# expressão aritmética (conteúdo de `factor`).
+#
+# Antes de descer em uma expressão, cada nível é percorrido de trás para a
+# frente calculando, para cada átomo, o conjunto de estados a partir dos quais
+# o resto do nível é aceito; os grupos entre parênteses são classificados
+# (aritmético / lógico / expressão) de dentro para fora. A descida então
+# resolve cada decisão consultando esse conjunto, com custo linear, e a
+# precedência dos operadores aritméticos e lógicos sai da própria estrutura
+# das regras (arithmeticExpression > term > factor, logicalExpression >
+# logicalTerm > logicalFactor > comparison), como em precedence climbing.
+#
+# A equivalência vale para os programas válidos. Nos inválidos a análise
+# para no primeiro erro sintático (o ANTLR se recupera e relata os seguintes),
+# com as mensagens do DefaultErrorStrategy repassadas ao mesmo listener usado
+# com o ANTLR; a posição e a mensagem desse erro são as do ANTLR na maioria
+# dos casos, não em todos (ver `benchmark.py parser-rd`).
+#
+# A descida continua com um método por regra, mas os métodos das regras que
+# se aninham (blocos e expressões) são geradores executados por _run() com
+# uma pilha explícita: a profundidade de aninhamento do programa não esbarra
+# no limite de recursão do Python, ao contrário do ExprParser gerado.
+
+from antlr4 import Token
+from antlr4.IntervalSet import IntervalSet
+
+from ExprParser import ExprParser
+
+PARSER_CHOICES = ('antlr', 'rd')
+
+P = ExprParser
+
+# --- Tipos de átomo dentro de um nível de expressão ---
+K_ID, K_NUMBER, K_STRING, K_NOT, K_AND, K_OR, K_COMPARE, K_PLUS, K_MINUS, K_MULDIV = range(10)
+# Grupos entre parênteses: K_GROUP | flags, com os modos que o conteúdo aceita
+K_GROUP = 16
+G_ARITH, G_LOGIC, G_EXPR = 1, 2, 4
+
+ATOM_KIND = {
+    P.ID: K_ID, P.NUMBER: K_NUMBER, P.STRING: K_STRING, P.NOT: K_NOT,
+    P.AND: K_AND, P.OR: K_OR, P.PLUS: K_PLUS, P.MINUS: K_MINUS,
+    P.MULT: K_MULDIV, P.DIV: K_MULDIV,
+    P.EQUALS: K_COMPARE, P.NOT_EQUALS: K_COMPARE, P.LESS: K_COMPARE,
+    P.GREATER: K_COMPARE, P.LESS_EQUALS: K_COMPARE, P.GREATER_EQUALS: K_COMPARE,
+}
+EXPRESSION_TOKENS = frozenset(ATOM_KIND) | {P.LPAREN, P.RPAREN}
+
+# --- Estados do autômato de um nível (um bit cada) ---
+# Modo expressão (E_*): alternativas primárias de `expression` e concatenação.
+(E_PRIMARY, E_ARITH, E_ARITH_OP, E_FACTOR, E_CMP_LEFT, E_CMP_LEFT_OP, E_CMP_OP,
+ E_CMP_RIGHT, E_CMP_RIGHT_OP, E_FACTOR_DONE, E_ATOM_DONE,
+ # Modo lógico (L_*): conteúdo de `'(' logicalExpression ')'`.
+ L_FACTOR, L_CMP_LEFT, L_CMP_LEFT_OP, L_CMP_OP, L_CMP_RIGHT, L_CMP_RIGHT_OP, L_FACTOR_DONE,
+ # Modo aritmético (A_*): conteúdo de `'(' arithmeticExpression ')'`.
+ A_OPERAND, A_DONE) = (1 << i for i in range(20))
+
+E_ACCEPT = E_ARITH | E_CMP_RIGHT | E_FACTOR_DONE | E_ATOM_DONE
+L_ACCEPT = L_CMP_RIGHT | L_FACTOR_DONE
+A_ACCEPT = A_DONE
+ACCEPT = E_ACCEPT | L_ACCEPT | A_ACCEPT
+
+
+def _group_kinds(flag):
+    return [K_GROUP | flags for flags in range(8) if flags & flag]
+
+
+def _build_transitions():
+    """Tabela tipo de átomo -> [(estado, máscara dos próximos estados)]."""
+    operands = [K_ID, K_NUMBER] + _group_kinds(G_ARITH)
+    arith_ops = [K_PLUS, K_MINUS, K_MULDIV]
+    edges = []
+
+    def logic(factor, cmp_left, cmp_left_op, cmp_op, cmp_right, cmp_right_op, factor_done):
+        edges.extend([
+            (factor, [K_NOT], factor),
+            (factor, operands, cmp_left),
+            (factor, _group_kinds(G_LOGIC), factor_done),
+            (cmp_left, arith_ops, cmp_left_op),
+            (cmp_left, [K_COMPARE], cmp_op),
+            (cmp_left_op, operands, cmp_left),
+            (cmp_op, operands, cmp_right),
+            (cmp_right, arith_ops, cmp_right_op),
+            (cmp_right, [K_AND, K_OR], factor),
+            (cmp_right_op, operands, cmp_right),
+            (factor_done, [K_AND, K_OR], factor),
+        ])
+
+    logic(E_FACTOR, E_CMP_LEFT, E_CMP_LEFT_OP, E_CMP_OP, E_CMP_RIGHT, E_CMP_RIGHT_OP, E_FACTOR_DONE)
+    logic(L_FACTOR, L_CMP_LEFT, L_CMP_LEFT_OP, L_CMP_OP, L_CMP_RIGHT, L_CMP_RIGHT_OP, L_FACTOR_DONE)
+    edges.extend([
+        # Alternativas primárias: logicExpr, arithExpr, stringExpr e parenExpr
+        (E_PRIMARY, [K_NOT], E_FACTOR),
+        (E_PRIMARY, operands, E_CMP_LEFT),
+        (E_PRIMARY, _group_kinds(G_LOGIC), E_FACTOR_DONE),
+        (E_PRIMARY, operands, E_ARITH),
+        (E_PRIMARY, [K_STRING], E_ATOM_DONE),
+        (E_PRIMARY, _group_kinds(G_EXPR), E_ATOM_DONE),
+        (E_ARITH, arith_ops, E_ARITH_OP),
+        (E_ARITH_OP, operands, E_ARITH),
+        (A_OPERAND, operands, A_DONE),
+        (A_DONE, arith_ops, A_OPERAND),
+    ])
+    # concatExpr: depois de qualquer primária, '+' recomeça uma primária
+    for state in (E_ARITH, E_CMP_RIGHT, E_FACTOR_DONE, E_ATOM_DONE):
+        edges.append((state, [K_PLUS], E_PRIMARY))
+
+    merged = {}
+    for state, kinds, target in edges:
+        for kind in kinds:
+            merged.setdefault(kind, {}).setdefault(state, 0)
+            merged[kind][state] |= target
+    return {kind: tuple(targets.items()) for kind, targets in merged.items()}
+
+
+TRANSITIONS = _build_transitions()
+# Estados que aceitam um grupo de cada modo (usado para localizar erros)
+WANTS_ARITH = sum(state for state, _ in TRANSITIONS[K_GROUP | G_ARITH])
+WANTS_LOGIC = sum(state for state, _ in TRANSITIONS[K_GROUP | G_LOGIC])
+WANTS_EXPR = sum(state for state, _ in TRANSITIONS[K_GROUP | G_EXPR])
+
+_VIABLE = {}
+
+
+def viability(kinds):
+    """
+    ok[t] = estados a partir dos quais os átomos kinds[t:] levam a um estado
+    de aceitação. ok[len(kinds)] é o próprio conjunto de aceitação.
+    """
+    ok = [0] * (len(kinds) + 1)
+    after = ok[-1] = ACCEPT
+    for t in range(len(kinds) - 1, -1, -1):
+        key = (kinds[t] << 20) | after
+        states = _VIABLE.get(key)
+        if states is None:
+            states = 0
+            for state, target in TRANSITIONS.get(kinds[t], ()):
+                if target & after:
+                    states |= state
+            _VIABLE[key] = states
+        ok[t] = after = states
+    return ok
+
+
+def step(states, kind):
+    """Estados alcançados a partir de `states` consumindo um átomo `kind`."""
+    reached = 0
+    for state, target in TRANSITIONS.get(kind, ()):
+        if state & states:
+            reached |= target
+    return reached
+
+
+def _token_set(*types):
+    result = IntervalSet()
+    for ttype in types:
+        result.addOne(ttype)
+    return result
+
+
+FIRST_DECLARATION = frozenset((P.ROAR, P.HUNT, P.ROAROUT, P.IF, P.WHILE, P.ID))
+FIRST_EXPRESSION = frozenset((P.NOT, P.LPAREN, P.ID, P.NUMBER, P.STRING))
+TYPE_TOKENS = frozenset((P.INT, P.TEXT))
+FIRST_OPERAND = (P.LPAREN, P.ID, P.NUMBER)
+COMPARISON_OPERATORS = (P.EQUALS, P.NOT_EQUALS, P.LESS, P.GREATER, P.LESS_EQUALS, P.GREATER_EQUALS)
+# Tokens esperados pelo ANTLR quando o erro acontece com um único estado vivo
+EXPECTED_AFTER = {
+    E_PRIMARY: tuple(FIRST_EXPRESSION),
+    E_FACTOR: (P.NOT,) + FIRST_OPERAND, L_FACTOR: (P.NOT,) + FIRST_OPERAND,
+    E_CMP_LEFT: COMPARISON_OPERATORS, L_CMP_LEFT: COMPARISON_OPERATORS,
+}
+EXPECTED_AFTER.update(dict.fromkeys((E_ARITH_OP, E_CMP_LEFT_OP, E_CMP_OP, E_CMP_RIGHT_OP, L_CMP_LEFT_OP,
+                                      L_CMP_OP, L_CMP_RIGHT_OP, A_OPERAND), FIRST_OPERAND))
+
+
+class _SyntaxError(Exception):
+    def __init__(self, token, msg):
+        super().__init__(msg)
+        self.token = token
+        self.msg = msg
+
+
+class RecursiveDescentParser:
+    """
+    Parser descendente recursivo equivalente ao ExprParser. program() devolve
+    um ProgramContext; erros vão para `error_listener.syntaxError`, como no
+    ANTLR, e a análise para no primeiro deles.
+    """
+    ruleNames = P.ruleNames
+    literalNames = P.literalNames
+    symbolicNames = P.symbolicNames
+
+    def __init__(self, token_stream, error_listener=None):
+        token_stream.fill()
+        self.tokens = [t for t in token_stream.tokens if t.channel == Token.DEFAULT_CHANNEL]
+        self.types = [t.type for t in self.tokens]
+        self.error_listener = error_listener
+        self.pos = 0
+        # Índice de cada token no seu nível de expressão e dados de cada grupo,
+        # indexados pelo '(' (válidos só durante a expressão corrente)
+        self._atom = [0] * len(self.tokens)
+        self._group_ok = {}
+        self._group_flags = {}
+
+    # --- Infraestrutura ---
+
+    def _enter(self, ctx_class, parent, invoking_state):
+        ctx = ctx_class(self, parent, invoking_state)
+        ctx.start = self.tokens[self.pos]
+        parent.addChild(ctx)
+        return ctx
+
+    def _consume(self, ctx):
+        ctx.addTokenNode(self.tokens[self.pos])
+        self.pos += 1
+
+    def _match(self, ctx, ttype, following=()):
+        if self.types[self.pos] != ttype:
+            self._mismatch((ttype,), following)
+        ctx.addTokenNode(self.tokens[self.pos])
+        if ttype != Token.EOF:
+            self.pos += 1
+
+    @staticmethod
+    def _quote(text):
+        return "'" + text.replace("\n", "\\n").replace("\r", "\\r").replace("\t", "\\t") + "'"
+
+    def _display(self, token):
+        text = token.text
+        if text is None:
+            text = "<EOF>" if token.type == Token.EOF else f"<{token.type}>"
+        return self._quote(text)
+
+    def _mismatch(self, expected, following=()):
+        """Mesmas mensagens de recoverInline/sync do DefaultErrorStrategy."""
+        token = self.tokens[self.pos]
+        expecting = _token_set(*expected).toString(self.literalNames, self.symbolicNames)
+        if self.pos + 1 < len(self.types) and self.types[self.pos + 1] in expected:
+            msg = f"extraneous input {self._display(token)} expecting {expecting}"
+        elif token.type in following:
+            msg = f"missing {expecting} at {self._display(token)}"
+        else:
+            msg = f"mismatched input {self._display(token)} expecting {expecting}"
+        raise _SyntaxError(token, msg)
+
+    def _no_viable_alternative(self, start, index):
+        token = self.tokens[index]
+        text = "".join(t.text for t in self.tokens[start:index + 1] if t.type != Token.EOF)
+        raise _SyntaxError(token, f"no viable alternative at input {self._quote(text or '<EOF>')}")
+
+    @staticmethod
+    def _run(rule):
+        """
+        Executa uma regra sem recursão em Python. Cada regra é um gerador que,
+        para invocar outra, faz `yield self._outra(...)`; as regras em
+        andamento ficam em uma pilha explícita, então blocos e parênteses
+        aninhados não são limitados pelo limite de recursão. Erros sintáticos
+        atravessam a pilha como exceções, como nas chamadas diretas.
+        """
+        stack = [rule]
+        while stack:
+            call = next(stack[-1], None)
+            if call is None:
+                stack.pop()
+            else:
+                stack.append(call)
+
+    # --- Regras de comandos (LL(1)) ---
+
+    def program(self):
+        ctx = P.ProgramContext(self, None, -1)
+        ctx.start = self.tokens[0]
+        try:
+            self._match(ctx, P.START, FIRST_DECLARATION | {P.END})
+            self._run(self._declarations(ctx, 47, P.END))
+            self._match(ctx, P.END, (Token.EOF,))
+            self._match(ctx, Token.EOF)
+        except _SyntaxError as e:
+            if self.error_listener is not None:
+                self.error_listener.syntaxError(self, e.token, e.token.line, e.token.column, e.msg, None)
+        ctx.stop = self.tokens[self.pos - 1] if self.pos else None
+        return ctx
+
+    def _declarations(self, parent, invoking_state, closer):
+        ctx = self._enter(P.DeclarationsContext, parent, invoking_state)
+        while self.types[self.pos] in FIRST_DECLARATION:
+            yield self._declaration(ctx, 51, closer)
+        ctx.stop = self.tokens[self.pos - 1]
+
+    def _declaration(self, parent, invoking_state, closer):
+        ctx = self._enter(P.DeclarationContext, parent, invoking_state)
+        if self.types[self.pos] == P.ROAR:
+            self._variable_declaration(ctx, 57, closer)
+        else:
+            yield self._command(ctx, 58, closer)
+        ctx.stop = self.tokens[self.pos - 1]
+
+    def _variable_declaration(self, parent, invoking_state, closer):
+        ctx = self._enter(P.VariableDeclarationContext, parent, invoking_state)
+        self._match(ctx, P.ROAR, (P.ID,))
+        self._match(ctx, P.ID, (P.AS,))
+        self._match(ctx, P.AS, TYPE_TOKENS)
+        type_ctx = self._enter(P.TypeContext, ctx, 64)
+        if self.types[self.pos] not in TYPE_TOKENS:
+            self._mismatch(TYPE_TOKENS, (P.SEMICOLON,))
+        self._consume(type_ctx)
+        type_ctx.stop = self.tokens[self.pos - 1]
+        self._match(ctx, P.SEMICOLON, FIRST_DECLARATION | {closer})
+        ctx.stop = self.tokens[self.pos - 1]
+
+    def _command(self, parent, invoking_state, closer):
+        ctx = self._enter(P.CommandContext, parent, invoking_state)
+        ttype = self.types[self.pos]
+        following = FIRST_DECLARATION | {closer}
+        if ttype == P.HUNT:
+            self._input_command(ctx, 69, following)
+        elif ttype == P.ROAROUT:
+            yield self._output_command(ctx, 70, following)
+        elif ttype == P.IF:
+            yield self._if_command(ctx, 71, following)
+        elif ttype == P.WHILE:
+            yield self._while_command(ctx, 72, following)
+        else:
+            yield self._assignment(ctx, 73, following)
+        ctx.stop = self.tokens[self.pos - 1]
+
+    def _input_command(self, parent, invoking_state, following):
+        ctx = self._enter(P.InputCommandContext, parent, invoking_state)
+        self._match(ctx, P.HUNT, (P.LPAREN,))
+        self._match(ctx, P.LPAREN, (P.ID,))
+        self._match(ctx, P.ID, (P.RPAREN,))
+        self._match(ctx, P.RPAREN, (P.SEMICOLON,))
+        self._match(ctx, P.SEMICOLON, following)
+        ctx.stop = self.tokens[self.pos - 1]
+
+    def _output_command(self, parent, invoking_state, following):
+        ctx = self._enter(P.OutputCommandContext, parent, invoking_state)
+        self._match(ctx, P.ROAROUT, (P.LPAREN,))
+        self._match(ctx, P.LPAREN, FIRST_EXPRESSION)
+        yield self._expression_statement(ctx, 84, P.RPAREN)
+        self._match(ctx, P.RPAREN, (P.SEMICOLON,))
+        self._match(ctx, P.SEMICOLON, following)
+        ctx.stop = self.tokens[self.pos - 1]
+
+    def _assignment(self, parent, invoking_state, following):
+        ctx = self._enter(P.AssignmentContext, parent, invoking_state)
+        self._match(ctx, P.ID, (P.ASSIGN,))
+        self._match(ctx, P.ASSIGN, FIRST_EXPRESSION)
+        yield self._expression_statement(ctx, 90, P.SEMICOLON)
+        self._match(ctx, P.SEMICOLON, following)
+        ctx.stop = self.tokens[self.pos - 1]
+
+    def _if_command(self, parent, invoking_state, following):
+        ctx = self._enter(P.IfCommandContext, parent, invoking_state)
+        self._match(ctx, P.IF)
+        yield self._expression_statement(ctx, 94, P.THEN)
+        self._match(ctx, P.THEN, (P.LBRACE,))
+        yield self._block(ctx, 96, following | {P.ELSE})
+        if self.types[self.pos] == P.ELSE:
+            self._match(ctx, P.ELSE, (P.LBRACE,))
+            yield self._block(ctx, 98, following)
+        ctx.stop = self.tokens[self.pos - 1]
+
+    def _while_command(self, parent, invoking_state, following):
+        ctx = self._enter(P.WhileCommandContext, parent, invoking_state)
+        self._match(ctx, P.WHILE)
+        yield self._expression_statement(ctx, 102, P.STRIKE)
+        self._match(ctx, P.STRIKE, (P.LBRACE,))
+        yield self._block(ctx, 104, following)
+        ctx.stop = self.tokens[self.pos - 1]
+
+    def _block(self, parent, invoking_state, following):
+        ctx = self._enter(P.BlockContext, parent, invoking_state)
+        self._match(ctx, P.LBRACE, FIRST_DECLARATION | {P.RBRACE})
+        yield self._declarations(ctx, 107, P.RBRACE)
+        self._match(ctx, P.RBRACE, following)
+        ctx.stop = self.tokens[self.pos - 1]
+
+    # --- Expressões ---
+
+    def _expression_statement(self, parent, invoking_state, terminator):
+        """Analisa a expressão que começa em self.pos e termina antes de `terminator`."""
+        start = self.pos
+        if self.types[start] not in FIRST_EXPRESSION:
+            self._mismatch(FIRST_EXPRESSION)
+        end = self._expression_end(start)
+        self._group_ok.clear()
+        self._group_flags.clear()
+        ok = self._prepare(start, end)
+        if ok is None or not ok[0] & E_PRIMARY:
+            self._expression_error(start, end, terminator)
+        yield self._expression(parent, invoking_state, ok, 0)
+
+    def _expression_end(self, start):
+        """Fim da sequência de tokens de expressão (para antes de um ')' sem par)."""
+        types = self.types
+        depth = 0
+        k = start
+        while True:
+            ttype = types[k]
+            if ttype == P.LPAREN:
+                depth += 1
+            elif ttype == P.RPAREN:
+                if not depth:
+                    return k
+                depth -= 1
+            elif ttype not in EXPRESSION_TOKENS:
+                return k
+            k += 1
+
+    def _prepare(self, start, end):
+        """
+        Classifica os grupos entre parênteses de dentro para fora e devolve o
+        vetor de viabilidade do nível externo (None se sobrar '(' aberto).
+        """
+        types, atom = self.types, self._atom
+        levels = [[]]
+        opens = []
+        for k in range(start, end):
+            ttype = types[k]
+            if ttype == P.LPAREN:
+                atom[k] = len(levels[-1])
+                levels.append([])
+                opens.append(k)
+            elif ttype == P.RPAREN:
+                ok = viability(levels.pop())
+                first = ok[0]
+                flags = ((G_ARITH if first & A_OPERAND else 0) | (G_LOGIC if first & L_FACTOR else 0)
+                         | (G_EXPR if first & E_PRIMARY else 0))
+                group = opens.pop()
+                self._group_ok[group] = ok
+                self._group_flags[group] = flags
+                levels[-1].append(K_GROUP | flags)
+            else:
+                atom[k] = len(levels[-1])
+                levels[-1].append(ATOM_KIND[ttype])
+        if opens:
+            return None
+        return viability(levels[0])
+
+    def _expression_error(self, start, end, terminator):
+        """
+        Simula o autômato da esquerda para a direita e relata o primeiro token
+        sem continuação possível. Se a expressão (ou o grupo) já podia terminar
+        ali, o erro é o terminador ausente, como no ANTLR.
+        """
+        types = self.types
+        states = E_PRIMARY
+        stack = []
+        k = start
+        while k < end:
+            ttype = types[k]
+            if ttype == P.LPAREN:
+                inner = ((A_OPERAND if states & WANTS_ARITH else 0) | (L_FACTOR if states & WANTS_LOGIC else 0)
+                         | (E_PRIMARY if states & WANTS_EXPR else 0))
+                if not inner:
+                    break
+                stack.append(states)
+                states = inner
+            elif ttype == P.RPAREN:
+                flags = ((G_ARITH if states & A_ACCEPT else 0) | (G_LOGIC if states & L_ACCEPT else 0)
+                         | (G_EXPR if states & E_ACCEPT else 0))
+                reached = step(stack[-1], K_GROUP | flags) if flags else 0
+                if not reached:
+                    break
+                stack.pop()
+                states = reached
+            else:
+                reached = step(states, ATOM_KIND[ttype])
+                if not reached:
+                    break
+                states = reached
+            k += 1
+        self.pos = k
+        if not stack and states & E_ACCEPT:
+            self._mismatch((terminator,))
+        if states in EXPECTED_AFTER:
+            # Um único caminho possível: o ANTLR já se comprometeu com a
+            # alternativa e o erro sai do sync/match da regra, não da predição
+            self._mismatch(EXPECTED_AFTER[states])
+        self._no_viable_alternative(start, k)
+
+    def _expression(self, parent, invoking_state, ok, precedence):
+        """expression[precedence], como o método gerado pelo ANTLR."""
+        tokens, types = self.tokens, self.types
+        base = P.ExpressionContext(self, parent, invoking_state)
+        base.start = tokens[self.pos]
+        ttype = types[self.pos]
+        after = ok[self._atom[self.pos] + 1]
+        if ttype == P.STRING:
+            ctx = P.StringExprContext(self, base)
+            self._consume(ctx)
+        elif ttype == P.NOT:
+            ctx = P.LogicExprContext(self, base)
+            yield self._logical_expression(ctx, 111, ok, E_FACTOR_DONE)
+        elif ttype == P.LPAREN:
+            flags = self._group_flags[self.pos]
+            if (flags & G_LOGIC and after & E_FACTOR_DONE) or (flags & G_ARITH and after & E_CMP_LEFT):
+                ctx = P.LogicExprContext(self, base)
+                yield self._logical_expression(ctx, 111, ok, E_FACTOR_DONE)
+            elif flags & G_ARITH and after & E_ARITH:
+                ctx = P.ArithExprContext(self, base)
+                yield self._arithmetic_expression(ctx, 112, ok, E_ARITH_OP)
+            else:
+                ctx = P.ParenExprContext(self, base)
+                group = self.pos
+                self._consume(ctx)
+                yield self._expression(ctx, 117, self._group_ok[group], 0)
+                self._consume(ctx)
+        elif after & E_CMP_LEFT:
+            ctx = P.LogicExprContext(self, base)
+            yield self._logical_expression(ctx, 111, ok, E_FACTOR_DONE)
+        else:
+            ctx = P.ArithExprContext(self, base)
+            yield self._arithmetic_expression(ctx, 112, ok, E_ARITH_OP)
+        ctx.stop = tokens[self.pos - 1]
+
+        # ( {precpred(7)}? '+' expression[8] )*, associativo à esquerda
+        while precedence <= 7 and types[self.pos] == P.PLUS:
+            concat = P.ConcatExprContext(self, P.ExpressionContext(self, parent, invoking_state))
+            ctx.parentCtx = concat
+            ctx.invokingState = 24
+            ctx.stop = tokens[self.pos - 1]
+            concat.start = ctx.start
+            concat.addChild(ctx)
+            self._consume(concat)
+            yield self._expression(concat, 124, ok, 8)
+            ctx = concat
+
+        ctx.stop = tokens[self.pos - 1]
+        ctx.parentCtx = parent
+        parent.addChild(ctx)
+        return ctx
+
+    def _logical_expression(self, parent, invoking_state, ok, factor_done):
+        ctx = self._enter(P.LogicalExpressionContext, parent, invoking_state)
+        yield self._logical_term(ctx, 160, ok, factor_done)
+        while self.types[self.pos] == P.OR:
+            self._consume(ctx)
+            yield self._logical_term(ctx, 162, ok, factor_done)
+        ctx.stop = self.tokens[self.pos - 1]
+
+    def _logical_term(self, parent, invoking_state, ok, factor_done):
+        ctx = self._enter(P.LogicalTermContext, parent, invoking_state)
+        yield self._logical_factor(ctx, 168, ok, factor_done)
+        while self.types[self.pos] == P.AND:
+            self._consume(ctx)
+            yield self._logical_factor(ctx, 170, ok, factor_done)
+        ctx.stop = self.tokens[self.pos - 1]
+
+    def _logical_factor(self, parent, invoking_state, ok, factor_done):
+        """`factor_done` é o estado após um fator lógico neste nível (E_ ou L_)."""
+        ctx = self._enter(P.LogicalFactorContext, parent, invoking_state)
+        ttype = self.types[self.pos]
+        if ttype == P.NOT:
+            self._consume(ctx)
+            yield self._logical_factor(ctx, 177, ok, factor_done)
+        elif (ttype == P.LPAREN and self._group_flags[self.pos] & G_LOGIC
+              and ok[self._atom[self.pos] + 1] & factor_done):
+            group = self.pos
+            self._consume(ctx)
+            yield self._logical_expression(ctx, 179, self._group_ok[group], L_FACTOR_DONE)
+            self._consume(ctx)
+        else:
+            yield self._comparison(ctx, 182, ok, factor_done)
+        ctx.stop = self.tokens[self.pos - 1]
+
+    def _comparison(self, parent, invoking_state, ok, factor_done):
+        ctx = self._enter(P.ComparisonContext, parent, invoking_state)
+        yield self._arithmetic_expression(ctx, 185, ok, 0)
+        operator = self._enter(P.ComparisonOperatorContext, ctx, 186)
+        self._consume(operator)
+        operator.stop = self.tokens[self.pos - 1]
+        # No modo expressão o lado direito pode devolver um '+' para concatExpr
+        yield self._arithmetic_expression(ctx, 187, ok, E_CMP_RIGHT_OP if factor_done == E_FACTOR_DONE else 0)
+        ctx.stop = self.tokens[self.pos - 1]
+
+    def _arithmetic_expression(self, parent, invoking_state, ok, continue_state):
+        """
+        `continue_state` é o estado após o operador quando um '+' também
+        poderia encerrar a expressão (concatExpr); 0 quando não há escolha.
+        """
+        types = self.types
+        ctx = self._enter(P.ArithmeticExpressionContext, parent, invoking_state)
+        yield self._term(ctx, 130)
+        while True:
+            ttype = types[self.pos]
+            if ttype == P.PLUS:
+                if continue_state and not ok[self._atom[self.pos] + 1] & continue_state:
+                    break
+            elif ttype != P.MINUS:
+                break
+            operator = self._enter(P.ArithmeticOperatorContext, ctx, 131)
+            self._consume(operator)
+            operator.stop = self.tokens[self.pos - 1]
+            yield self._term(ctx, 132)
+        ctx.stop = self.tokens[self.pos - 1]
+
+    def _term(self, parent, invoking_state):
+        types = self.types
+        ctx = self._enter(P.TermContext, parent, invoking_state)
+        yield self._factor(ctx, 139)
+        while types[self.pos] == P.MULT or types[self.pos] == P.DIV:
+            operator = self._enter(P.TermOperatorContext, ctx, 140)
+            self._consume(operator)
+            operator.stop = self.tokens[self.pos - 1]
+            yield self._factor(ctx, 141)
+        ctx.stop = self.tokens[self.pos - 1]
+
+    def _factor(self, parent, invoking_state):
+        ctx = self._enter(P.FactorContext, parent, invoking_state)
+        if self.types[self.pos] == P.LPAREN:
+            group = self.pos
+            self._consume(ctx)
+            yield self._arithmetic_expression(ctx, 153, self._group_ok[group], 0)
+            self._consume(ctx)
+        else:
+            self._consume(ctx)
+        ctx.stop = self.tokens[self.pos - 1]
@@ -0,0 +1,68 @@
+# source_input.py
+#
+# Camada de entrada do compilador. Substitui o FileStream do ANTLR, que lê o
+# arquivo inteiro para um objeto bytes, decodifica para uma str e ainda copia
+# tudo para uma lista com um inteiro por caractere. Aqui o arquivo é mapeado
+# em memória (ou lido do stdin quando o caminho é '-') e decodificado uma única
+# vez; o analisador léxico consulta a própria str.
+
+import codecs
+import mmap
+import sys
+
+from antlr4 import InputStream
+from antlr4.Token import Token
+
+STDIN_PATH = '-'
+
+
+class SourceStream(InputStream):
+    """
+    InputStream que não materializa o vetor de códigos (self.data): LA()
+    converte o caractere da str sob demanda.
+    """
+    __slots__ = 'fileName'
+
+    def __init__(self, data, fileName=None):
+        self.name = fileName or "<empty>"
+        self.fileName = fileName
+        self.strdata = data
+        self._index = 0
+        self._size = len(data)
+
+    def _loadString(self):
+        self._index = 0
+        self._size = len(self.strdata)
+
+    def LA(self, offset):
+        if offset == 0:
+            return 0 # indefinido
+        if offset < 0:
+            offset += 1 # LA(-1) corresponde ao caractere anterior
+        pos = self._index + offset - 1
+        if pos < 0 or pos >= self._size:
+            return Token.EOF
+        return ord(self.strdata[pos])
+
+    def LT(self, offset):
+        return self.LA(offset)
+
+
+def read_source(path, encoding='utf-8'):
+    """Lê o código-fonte de `path` (ou do stdin, se for '-') como uma str."""
+    if path == STDIN_PATH:
+        return codecs.decode(sys.stdin.buffer.read(), encoding)
+    with open(path, 'rb') as f:
+        try:
+            mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            # Arquivos vazios não podem ser mapeados
+            return ""
+        with mapped:
+            return codecs.decode(mapped, encoding)
+
+
+def open_source(path, encoding='utf-8'):
+    """Abre o código-fonte como um fluxo de caracteres pronto para o lexer."""
+    name = "<stdin>" if path == STDIN_PATH else path
+    return SourceStream(read_source(path, encoding), name)
@@ -0,0 +1,241 @@
+# streaming_frontend.py
+#
+# Front end em streaming: análise sintática, semântica e geração de TAC em
+# uma única passada, sem árvore de derivação. O ExprParser roda com
+# buildParseTrees = False sobre um UnbufferedTokenStream, e um listener de
+# análise (addParseListener) recebe os eventos de entrada/saída de regra e de
+# terminal enquanto o parser avança:
+#
+#   - expressões são montadas na AST compacta (lion_ast) com os mesmos
+#     construtores de lower(), a partir de uma pilha de quadros com os filhos
+#     de cada regra aberta;
+#   - cada comando simples (declaração, atribuição, hunt, roarout) é analisado
+#     pelo SemanticAnalyzer e traduzido pelo TACGenerator assim que termina, e
+#     as instruções vão direto para o consumidor (arquivo .tac, gerador LLVM);
+#   - if/while emitem rótulos e o IF_FALSE nos terminais THEN/STRIKE/ELSE e na
+#     saída da regra, sem esperar o corpo inteiro;
+#   - cada bloco abre e fecha o seu escopo na tabela de símbolos, que o
+#     SemanticAnalyzer e o TACGenerator compartilham.
+#
+# A predição segue parse_two_stage: SLL primeiro e LL completo só se o SLL
+# falhar. Sem buffer não há como voltar ao início do fluxo, então
+# compile_two_stage refaz a tentativa inteira com uma nova fonte de tokens
+# (na prática, só em programas com erro sintático).
+#
+# Nada do que já foi traduzido fica em memória: o pico é limitado pela
+# profundidade de aninhamento (quadros e contextos abertos) e pelo tamanho de
+# uma expressão, não pelo tamanho do programa. A saída (TAC, log e erros
+# semânticos) é a mesma do caminho em lotes (lower + SemanticAnalyzer +
+# TACGenerator), e um erro do consumidor só é levantado depois do parsing.
+
+import os
+
+from antlr4.atn.PredictionMode import PredictionMode
+from antlr4.error.ErrorStrategy import BailErrorStrategy
+from antlr4.error.Errors import ParseCancellationException
+from antlr4.tree.Tree import ParseTreeListener
+
+from ExprParser import ExprParser
+from lion_ast import BUILDERS
+from parser_driver import STATS, TwoStageATNSimulator, expression_decisions
+from tac_generator import OP_GOTO, OP_IF_FALSE, OP_LABEL, TACGenerator
+from tac_io import TAC_HEADER
+from unbuffered_token_stream import UnbufferedTokenStream
+
+# Comandos traduzidos inteiros na saída da regra
+SIMPLE_STATEMENTS = frozenset((ExprParser.VariableDeclarationContext, ExprParser.AssignmentContext,
+                               ExprParser.InputCommandContext, ExprParser.OutputCommandContext))
+# Regras de estrutura: não produzem nó (os comandos já foram consumidos)
+STRUCTURE = frozenset((ExprParser.ProgramContext, ExprParser.DeclarationsContext,
+                       ExprParser.DeclarationContext, ExprParser.CommandContext, ExprParser.BlockContext))
+
+
+class StreamingTranslator(ParseTreeListener):
+    """
+    Listener de análise que faz a análise semântica e gera TAC durante o
+    parsing. `emit` recebe cada TACInstruction; depois do primeiro erro
+    semântico nada mais é emitido (a compilação vai falhar de qualquer jeito).
+    Depois do primeiro erro sintático os eventos são ignorados.
+
+    Uma exceção de `emit` (o gerador LLVM diante de um operando que não
+    conhece, por exemplo) fica em `consumer_error` e `emit` não é mais
+    chamado; a análise continua, para relatar os erros semânticos que vierem
+    depois. Ela não pode sair de um callback: o ANTLR chamaria exitEveryRule
+    das regras ainda abertas ao desempilhá-las, com os quadros desencontrados.
+    """
+
+    def __init__(self, parser, semantic, emit):
+        self.parser = parser
+        self.stream = parser.getTokenStream()
+        self.semantic = semantic
+        # A AST dos comandos é montada com a tabela de nomes da análise
+        self.names = semantic.symbols.names
+        self.consumer = emit
+        self.tac = TACGenerator(self._emit, semantic.symbols)
+        # Filhos já convertidos (nós da AST ou tokens) de cada regra aberta
+        self.frames = []
+        # if: [rótulo do IF_FALSE, rótulo do fim ou None]; while: [fim, início]
+        self.control = []
+        # Uma regra terminou com exceção (inclusive o abandono do estágio SLL)
+        self.failed = False
+        self.consumer_error = None
+
+    def _emit(self, instruction):
+        if self.semantic.errors or self.consumer_error is not None:
+            return
+        try:
+            self.consumer(instruction)
+        except Exception as error:
+            self.consumer_error = error
+
+    def _stopped(self):
+        return self.failed or self.parser.getNumberOfSyntaxErrors() > 0
+
+    def enterEveryRule(self, ctx):
+        if self._stopped():
+            return
+        kind = type(ctx)
+        self.frames.append([])
+        if kind is ExprParser.ConcatExprContext:
+            # Recursão à esquerda: o operando esquerdo já saiu para o quadro de cima
+            self.frames[-1].append(self.frames[-2].pop())
+        elif kind is ExprParser.IfCommandContext:
+            if self.semantic.trace:
+                self.semantic.log("[LOG] Visitando nó: If")
+            self.control.append([self.tac._new_label(), None])
+        elif kind is ExprParser.WhileCommandContext:
+            if self.semantic.trace:
+                self.semantic.log("[LOG] Visitando nó: While")
+            label_start, label_end = self.tac._new_label(), self.tac._new_label()
+            self.tac.add_instruction(OP_LABEL, label_start)
+            self.control.append([label_end, label_start])
+        elif kind is ExprParser.BlockContext:
+            self.semantic.symbols.enter_scope()
+        elif kind is ExprParser.ProgramContext:
+            if self.semantic.trace:
+                self.semantic.log("[LOG] Visitando nó: Program")
+
+    def visitTerminal(self, node):
+        if self._stopped():
+            return
+        token = node.symbol
+        frame = self.frames[-1]
+        frame.append(token)
+        if token.type in (ExprParser.THEN, ExprParser.STRIKE):
+            # A condição acabou de sair: [IF/WHILE, condição, THEN/STRIKE]
+            condition = frame[1]
+            # Como em SemanticAnalyzer._visit_if: tipos e erros da condição
+            # antes das mensagens de log dos seus nós
+            self.semantic.symbols.reserve()
+            self.semantic.annotate(condition)
+            self.semantic.visit(condition)
+            condition_result = self.tac.visit(condition)
+            self.tac.add_instruction(OP_IF_FALSE, self.control[-1][0], condition_result)
+        elif token.type == ExprParser.ELSE:
+            labels = self.control[-1]
+            labels[1] = self.tac._new_label()
+            self.tac.add_instruction(OP_GOTO, labels[1])
+            self.tac.add_instruction(OP_LABEL, labels[0])
+
+    def visitErrorNode(self, node):
+        pass
+
+    def exitEveryRule(self, ctx):
+        if ctx.exception is not None:
+            self.failed = True
+        if self._stopped():
+            return
+        items = self.frames.pop()
+        kind = type(ctx)
+        if kind in SIMPLE_STATEMENTS:
+            statement = BUILDERS[kind](items, ctx.start, self.stream.LT(-1), self.names)
+            self.semantic.visit(statement)
+            self.tac.visit(statement)
+        elif kind is ExprParser.IfCommandContext:
+            label_false, label_end = self.control.pop()
+            self.tac.add_instruction(OP_LABEL, label_end or label_false)
+        elif kind is ExprParser.WhileCommandContext:
+            label_end, label_start = self.control.pop()
+            self.tac.add_instruction(OP_GOTO, label_start)
+            self.tac.add_instruction(OP_LABEL, label_end)
+        elif kind is ExprParser.BlockContext:
+            self.semantic.symbols.exit_scope()
+        elif kind not in STRUCTURE:
+            # Expressões: o fim é sempre o último token consumido (ctx.stop
+            # ainda não foi preenchido quando uma concatExpr vai ser aberta)
+            self.frames[-1].append(BUILDERS[kind](items, ctx.start, self.stream.LT(-1), self.names))
+
+
+class TACFileWriter:
+    """Consumidor que grava as instruções em um arquivo .tac à medida que chegam."""
+
+    def __init__(self, path):
+        self.path = path
+        self.temp_path = path + '.tmp'
+        self.file = open(self.temp_path, 'w', encoding='utf-8')
+        self.file.write(TAC_HEADER + "\n\n")
+
+    def __call__(self, instruction):
+        self.file.write(str(instruction) + '\n')
+
+    def commit(self):
+        self.file.close()
+        os.replace(self.temp_path, self.path)
+
+    def discard(self):
+        self.file.close()
+        os.remove(self.temp_path)
+
+
+def parse_streaming(token_source, error_listener, semantic, emit, mode=PredictionMode.SLL):
+    """
+    Analisa os tokens de `token_source` sem árvore e sem buffer, fazendo a
+    análise semântica e emitindo o TAC para `emit`. Os erros ficam em
+    error_listener.errors e semantic.errors.
+
+    Como em parse_two_stage, o modo SLL (com as decisões de `expression` em
+    LL) desiste no primeiro erro e devolve False; quem chama deve então
+    descartar o que foi emitido e repetir tudo em PredictionMode.LL, que é
+    quem relata os erros sintáticos. Devolve True quando a análise terminou.
+
+    Se `emit` falhou, a exceção é levantada aqui, depois do parsing, e só
+    quando não há erros sintáticos nem semânticos (que são os relatados).
+    """
+    parser = ExprParser(UnbufferedTokenStream(token_source))
+    parser.buildParseTrees = False
+    parser._interp = TwoStageATNSimulator(parser, parser.atn, parser.decisionsToDFA,
+                                          parser.sharedContextCache, expression_decisions(parser))
+    parser._interp.predictionMode = mode
+    parser.removeErrorListeners()
+    if mode == PredictionMode.SLL:
+        parser._errHandler = BailErrorStrategy()
+    else:
+        parser.addErrorListener(error_listener)
+    translator = StreamingTranslator(parser, semantic, emit)
+    parser.addParseListener(translator)
+    try:
+        parser.program()
+    except ParseCancellationException:
+        return False
+    if translator.consumer_error is not None and not semantic.errors \
+            and parser.getNumberOfSyntaxErrors() == 0:
+        raise translator.consumer_error
+    return True
+
+
+def compile_two_stage(make_token_source, start_attempt, stats=STATS):
+    """
+    Roda parse_streaming em SLL e, se ele desistir, de novo em LL. A cada
+    tentativa, start_attempt() descarta as saídas da anterior e devolve
+    (error_listener, semantic, emit) novos; make_token_source() devolve uma
+    fonte de tokens que recomeça do início do programa.
+    """
+    for mode in (PredictionMode.SLL, PredictionMode.LL):
+        error_listener, semantic, emit = start_attempt()
+        if parse_streaming(make_token_source(), error_listener, semantic, emit, mode):
+            break
+    if mode == PredictionMode.SLL:
+        stats.sll_parses += 1
+    else:
+        stats.ll_fallbacks += 1
+    return error_listener, semantic
@@ -0,0 +1,152 @@
+# symbol_table.py
+#
+# Tabela de símbolos compartilhada pelas fases do compilador.
+#
+# NameTable interna os identificadores: cada texto distinto recebe um ID
+# pequeno e denso (0, 1, 2...), atribuído uma única vez por token ID, quando a
+# AST é montada (lion_ast._name). Daí em diante os nós carregam o ID e
+# nenhuma fase precisa mais de um dicionário indexado pelo texto. Cada
+# SymbolTable tem a sua NameTable, e a AST que ela analisa deve ser montada
+# com essa mesma tabela (lower(tree, symbols.names)): as listas indexadas pelo
+# ID crescem só com os nomes daquela compilação, e um processo que compila
+# muitos programas não acumula os nomes de todos eles.
+#
+# SymbolTable guarda as declarações de uma compilação. Cada declaração vira
+# um Symbol com o seu próprio ID, que é o índice em `symbols`; o gerador de
+# TAC copia esse ID para os operandos Var e o gerador LLVM o usa como índice
+# da lista de alocações. `visible[id do nome]` é o símbolo visível no escopo
+# atual (-1: nenhum), então uma consulta é uma indexação de lista.
+#
+# Os escopos seguem os blocos ('{ ... }' de if/else/while): uma declaração
+# dentro de um bloco só vale até o fim dele e pode esconder uma variável de
+# mesmo nome de fora. Cada escopo aberto guarda (id do nome, símbolo
+# anterior) das ligações que fez, desfeitas em exit_scope().
+
+
+class NameTable:
+    """Identificadores internados: `ids` (texto -> ID) e `names` (ID -> texto)."""
+
+    def __init__(self):
+        self.ids = {}
+        self.names = []
+
+    def intern(self, text):
+        name_id = self.ids.get(text)
+        if name_id is None:
+            name_id = self.ids[text] = len(self.names)
+            self.names.append(text)
+        return name_id
+
+    def __len__(self):
+        return len(self.names)
+
+
+class Symbol:
+    """
+    Variável declarada. `display` é o nome usado no TAC e no LLVM: o próprio
+    nome na primeira declaração e 'nome.N' nas que escondem uma anterior.
+    """
+    __slots__ = ('id', 'name', 'name_id', 'type_name', 'depth', 'display')
+
+    def __init__(self, id, name, name_id, type_name, depth, display):
+        self.id = id
+        self.name = name
+        self.name_id = name_id
+        self.type_name = type_name
+        self.depth = depth
+        self.display = display
+
+    def __repr__(self):
+        return f"Symbol({self.id}, {self.display!r}, {self.type_name!r}, profundidade={self.depth})"
+
+
+class SymbolTable:
+    def __init__(self, names=None):
+        # Tabela de nomes da compilação (nova se não for dada)
+        self.names = names if names is not None else NameTable()
+        self.symbols = []
+        # Indexadas pelo ID do nome; crescem junto com a tabela de nomes
+        self.visible = []
+        self._declared = []
+        # Ligações feitas em cada escopo aberto; o primeiro é o global
+        self.scopes = [[]]
+
+    def __len__(self):
+        return len(self.symbols)
+
+    def __getitem__(self, symbol_id):
+        return self.symbols[symbol_id]
+
+    @property
+    def depth(self):
+        return len(self.scopes) - 1
+
+    def _grow(self, name_id):
+        missing = name_id + 1 - len(self.visible)
+        if missing > 0:
+            self.visible.extend([-1] * missing)
+            self._declared.extend([0] * missing)
+
+    def reserve(self):
+        """
+        Estende `visible` até o último nome internado. Depois disso quem
+        percorre uma AST já montada pode consultar `visible[node.name_id]`
+        direto, sem chamar lookup().
+        """
+        self._grow(len(self.names) - 1)
+
+    def lookup(self, name_id):
+        """Símbolo visível com esse nome no escopo atual, ou -1."""
+        visible = self.visible
+        return visible[name_id] if name_id < len(visible) else -1
+
+    def declare(self, name_id, type_name):
+        """
+        Cria um símbolo no escopo atual e devolve o seu ID, ou -1 se o nome
+        já foi declarado neste mesmo escopo.
+        """
+        self._grow(name_id)
+        previous = self.visible[name_id]
+        depth = self.depth
+        if previous >= 0 and self.symbols[previous].depth == depth:
+            return -1
+        name = self.names.names[name_id]
+        count = self._declared[name_id]
+        self._declared[name_id] = count + 1
+        symbol_id = len(self.symbols)
+        self.symbols.append(Symbol(symbol_id, name, name_id, type_name, depth,
+                                   f"{name}.{count}" if count else name))
+        self.scopes[-1].append((name_id, previous))
+        self.visible[name_id] = symbol_id
+        return symbol_id
+
+    def bind(self, symbol_id):
+        """
+        Torna visível, no escopo atual, um símbolo já declarado. Usado por quem
+        percorre o programa de novo depois da análise semântica (o gerador de
+        TAC), refazendo os escopos sem criar símbolos.
+        """
+        name_id = self.symbols[symbol_id].name_id
+        previous = self.visible[name_id]
+        if previous != symbol_id:
+            self.scopes[-1].append((name_id, previous))
+            self.visible[name_id] = symbol_id
+
+    def enter_scope(self):
+        self.scopes.append([])
+
+    def exit_scope(self):
+        visible = self.visible
+        for name_id, previous in reversed(self.scopes.pop()):
+            visible[name_id] = previous
+
+    def rewind(self):
+        """
+        Desfaz todas as ligações, inclusive as do escopo global, mantendo os
+        símbolos: quem percorre o programa depois (com bind()) volta a vê-los
+        só a partir das suas declarações.
+        """
+        while len(self.scopes) > 1:
+            self.exit_scope()
+        self.exit_scope()
+        self.scopes.append([])
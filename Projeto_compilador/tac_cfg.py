@@ -0,0 +1,317 @@
+# tac_cfg.py
+#
+# Grafo de fluxo de controle (CFG) sobre uma lista de instruções TAC, base
+# das análises e otimizações do código intermediário.
+#
+# Um bloco básico começa na primeira instrução, em cada LABEL e depois de cada
+# GOTO/IF_FALSE, e guarda as instruções que cobre (inclusive o LABEL e o
+# salto). Os blocos são numerados na ordem do programa; o bloco 0 é a
+# entrada, que nunca tem predecessores: se o programa começa com um LABEL
+# (um while logo no início), o bloco 0 fica vazio e cai no do rótulo.
+# Arestas: GOTO vai para o bloco do rótulo; IF_FALSE vai primeiro para o
+# bloco seguinte (condição verdadeira) e depois para o do rótulo; as demais
+# instruções caem no bloco seguinte. O último bloco não tem sucessores.
+#
+# Sobre o grafo:
+#   - reverse_postorder: blocos alcançáveis a partir da entrada em pós-ordem
+#     reversa (DFS com pilha explícita);
+#   - idom: dominador imediato de cada bloco pelo algoritmo iterativo de
+#     Cooper, Harvey e Kennedy ("A Simple, Fast Dominance Algorithm"), que
+#     converge em duas passadas sobre grafos redutíveis como os gerados por
+#     if/while. Blocos inalcançáveis ficam com idom -1;
+#   - dominates(a, b) em tempo constante, pela numeração da árvore de
+#     dominadores;
+#   - dominance_frontiers(), usada na construção do SSA;
+#   - loops: laços naturais (um por cabeçalho, com as arestas de retorno que
+#     chegam a ele), dos externos para os internos, com o laço mais interno
+#     de cada bloco (loop_of) e a profundidade.
+#
+# Tudo é indexado pelo número do bloco em listas, sem dicionários no caminho
+# quente, para que o grafo possa ser refeito depois de cada otimização.
+
+from tac_generator import OP_GOTO, OP_IF_FALSE, OP_LABEL
+
+
+class BasicBlock:
+    """Instruções de um bloco básico e as arestas, como números de blocos."""
+    __slots__ = ('id', 'instructions', 'successors', 'predecessors')
+
+    def __init__(self, id, instructions):
+        self.id = id
+        self.instructions = instructions
+        self.successors = []
+        self.predecessors = []
+
+    @property
+    def label(self):
+        """Rótulo que abre o bloco, ou None."""
+        first = self.instructions[0] if self.instructions else None
+        return first.result if first is not None and first.opcode == OP_LABEL else None
+
+    def __repr__(self):
+        return (f"BasicBlock({self.id}, {len(self.instructions)} instruções, "
+                f"sucessores={self.successors})")
+
+
+class Loop:
+    """
+    Laço natural: cabeçalho, arestas de retorno e o laço que o contém. blocks
+    guarda só os blocos cujo laço mais interno é este (com o cabeçalho); os
+    dos laços internos ficam nos filhos (ControlFlowGraph.in_loop).
+    """
+    __slots__ = ('header', 'blocks', 'back_edges', 'parent', 'depth')
+
+    def __init__(self, header):
+        self.header = header
+        self.blocks = {header}
+        self.back_edges = ()
+        self.parent = None
+        self.depth = 1
+
+    def __repr__(self):
+        return f"Loop(cabeçalho={self.header}, {len(self.blocks)} blocos, profundidade={self.depth})"
+
+
+class ControlFlowGraph:
+    def __init__(self, tac_code):
+        self.blocks = []
+        self._build(tac_code)
+        self.reverse_postorder = self._reverse_postorder()
+        self.idom = self._dominators()
+        self._number_dominator_tree()
+        self.loops, self.loop_of = self._natural_loops()
+
+    def __len__(self):
+        return len(self.blocks)
+
+    def __iter__(self):
+        return iter(self.blocks)
+
+    # --- Blocos e arestas ---
+
+    def _build(self, tac_code):
+        blocks = self.blocks
+        # Número do bloco aberto por cada rótulo (pelo número do rótulo)
+        label_blocks = {}
+        current = []
+        for instruction in tac_code:
+            opcode = instruction.opcode
+            if opcode == OP_LABEL and (current or not blocks):
+                blocks.append(BasicBlock(len(blocks), current))
+                current = []
+            if opcode == OP_LABEL:
+                label_blocks[instruction.result.id] = len(blocks)
+            current.append(instruction)
+            if opcode == OP_GOTO or opcode == OP_IF_FALSE:
+                blocks.append(BasicBlock(len(blocks), current))
+                current = []
+        if current or not blocks:
+            blocks.append(BasicBlock(len(blocks), current))
+
+        last = len(blocks) - 1
+        for block in blocks:
+            instructions = block.instructions
+            end = instructions[-1].opcode if instructions else None
+            successors = block.successors
+            if end == OP_GOTO:
+                successors.append(label_blocks[instructions[-1].result.id])
+            else:
+                if block.id < last:
+                    successors.append(block.id + 1)
+                if end == OP_IF_FALSE:
+                    target = label_blocks[instructions[-1].result.id]
+                    # IF_FALSE para o rótulo seguinte: uma aresta só
+                    if target not in successors:
+                        successors.append(target)
+            for successor in successors:
+                blocks[successor].predecessors.append(block.id)
+
+    def instructions(self):
+        """As instruções de todos os blocos, na ordem do programa."""
+        return [instruction for block in self.blocks for instruction in block.instructions]
+
+    # --- Ordens de visita ---
+
+    def _reverse_postorder(self):
+        blocks = self.blocks
+        visited = [False] * len(blocks)
+        postorder = []
+        visited[0] = True
+        # (bloco, índice do próximo sucessor a visitar)
+        stack = [(0, 0)]
+        while stack:
+            block, index = stack[-1]
+            successors = blocks[block].successors
+            if index < len(successors):
+                stack[-1] = (block, index + 1)
+                successor = successors[index]
+                if not visited[successor]:
+                    visited[successor] = True
+                    stack.append((successor, 0))
+            else:
+                stack.pop()
+                postorder.append(block)
+        postorder.reverse()
+        return postorder
+
+    def reachable(self, block):
+        """Se o bloco é alcançável a partir da entrada."""
+        return self.idom[block] >= 0
+
+    # --- Dominadores ---
+
+    def _dominators(self):
+        blocks = self.blocks
+        rpo = self.reverse_postorder
+        # Posição de cada bloco na pós-ordem reversa (-1: inalcançável)
+        order = [-1] * len(blocks)
+        for position, block in enumerate(rpo):
+            order[block] = position
+        self.rpo_number = order
+
+        idom = [-1] * len(blocks)
+        idom[0] = 0
+        changed = True
+        while changed:
+            changed = False
+            for block in rpo[1:]:
+                new_idom = -1
+                for predecessor in blocks[block].predecessors:
+                    if idom[predecessor] < 0:
+                        # Ainda não processado (ou inalcançável)
+                        continue
+                    if new_idom < 0:
+                        new_idom = predecessor
+                        continue
+                    # Interseção: sobe pelos dominadores até os dois caminhos se encontrarem
+                    finger = predecessor
+                    while finger != new_idom:
+                        while order[finger] > order[new_idom]:
+                            finger = idom[finger]
+                        while order[new_idom] > order[finger]:
+                            new_idom = idom[new_idom]
+                if idom[block] != new_idom:
+                    idom[block] = new_idom
+                    changed = True
+        return idom
+
+    def _number_dominator_tree(self):
+        # Filhos de cada bloco na árvore de dominadores e a numeração de uma
+        # DFS sobre ela: a domina b se o intervalo de b está dentro do de a
+        count = len(self.blocks)
+        children = [[] for _ in range(count)]
+        for block in self.reverse_postorder[1:]:
+            children[self.idom[block]].append(block)
+        self.dominator_children = children
+        pre = [-1] * count
+        post = [-1] * count
+        clock = 0
+        stack = [(0, 0)]
+        pre[0] = clock
+        while stack:
+            block, index = stack[-1]
+            if index < len(children[block]):
+                stack[-1] = (block, index + 1)
+                child = children[block][index]
+                clock += 1
+                pre[child] = clock
+                stack.append((child, 0))
+            else:
+                stack.pop()
+                post[block] = clock
+        self._dom_pre, self._dom_post = pre, post
+
+    def dominates(self, a, b):
+        """Se o bloco a domina o bloco b (todo bloco domina a si mesmo)."""
+        pre = self._dom_pre
+        if pre[a] < 0 or pre[b] < 0:
+            return False
+        return pre[a] <= pre[b] <= self._dom_post[a]
+
+    def dominance_frontiers(self):
+        """Fronteira de dominância de cada bloco, como conjuntos de números de blocos."""
+        blocks, idom = self.blocks, self.idom
+        frontiers = [set() for _ in blocks]
+        for block in self.reverse_postorder:
+            predecessors = blocks[block].predecessors
+            if len(predecessors) < 2:
+                continue
+            for predecessor in predecessors:
+                runner = predecessor
+                if idom[runner] < 0:
+                    continue
+                while runner != idom[block]:
+                    frontiers[runner].add(block)
+                    runner = idom[runner]
+        return frontiers
+
+    # --- Laços naturais ---
+
+    def _natural_loops(self):
+        # Cabeçalhos: destinos de arestas de retorno (o destino domina a origem)
+        blocks, idom, pre = self.blocks, self.idom, self._dom_pre
+        back_edges = {}
+        for block in self.reverse_postorder:
+            for successor in blocks[block].successors:
+                if self.dominates(successor, block):
+                    back_edges.setdefault(successor, []).append(block)
+
+        # Os laços são montados de dentro para fora (cabeçalhos em pré-ordem
+        # decrescente da árvore de dominadores). Cada bloco pertence só ao
+        # laço mais interno que o contém; ao encontrar um bloco de um laço já
+        # montado, a busca salta para o cabeçalho do laço mais externo já
+        # montado que o contém e o pendura neste. Assim cada bloco é visitado
+        # uma vez, mesmo com milhares de níveis de aninhamento, em vez de
+        # entrar no corpo de todos os laços que o envolvem.
+        loop_of = [None] * len(blocks)
+        # Laço mais externo já montado que contém cada laço (union-find)
+        outermost = {}
+
+        def find(loop):
+            while outermost[loop] is not loop:
+                outermost[loop] = outermost[outermost[loop]]
+                loop = outermost[loop]
+            return loop
+
+        loops = []
+        for header in sorted(back_edges, key=pre.__getitem__, reverse=True):
+            loop = Loop(header)
+            loop.back_edges = back_edges[header]
+            loop_of[header] = outermost[loop] = loop
+            loops.append(loop)
+            pending = [block for block in loop.back_edges if block != header]
+            while pending:
+                block = pending.pop()
+                inner = loop_of[block]
+                if inner is None:
+                    loop_of[block] = loop
+                    loop.blocks.add(block)
+                else:
+                    inner = find(inner)
+                    if inner is loop:
+                        continue
+                    inner.parent = outermost[inner] = loop
+                    block = inner.header
+                pending.extend(predecessor for predecessor in blocks[block].predecessors
+                               if idom[predecessor] >= 0)
+
+        # De fora para dentro: os pais vêm antes dos filhos
+        loops.reverse()
+        for loop in loops:
+            if loop.parent is not None:
+                loop.depth = loop.parent.depth + 1
+        return loops, loop_of
+
+    def loop_depth(self, block):
+        """Número de laços que contêm o bloco."""
+        loop = self.loop_of[block]
+        return loop.depth if loop is not None else 0
+
+    def in_loop(self, block, loop):
+        """Se o bloco está no laço, diretamente ou em um laço interno a ele."""
+        inner = self.loop_of[block]
+        while inner is not None and inner.depth >= loop.depth:
+            if inner is loop:
+                return True
+            inner = inner.parent
+        return False
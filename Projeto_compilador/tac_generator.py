@@ -1,209 +1,240 @@
 # tac_generator.py (VERSÃO CORRIGIDA)
 
-from ExprVisitor import ExprVisitor
-from ExprParser import ExprParser
-
-# As classes TACOperand e TACInstruction não mudam.
+from lion_ast import (ASTVisitor, Program, VarDecl, Assign, Read, Write, If, While,
+                      Name, Number, String, Paren, Concat, Arith, Compare, Logical, Not)
+from symbol_table import SymbolTable
+
+# --- Códigos de operação ---
+# Inteiros densos: os operadores binários vêm primeiro (aritméticos,
+# relacionais e lógicos, nessa ordem), então `opcode <= OP_OR` identifica uma
+# instrução `result := arg1 op arg2`. OPCODE_NAMES dá o texto de cada código
+# no TAC e OPCODES faz o caminho inverso (operadores da AST e nomes).
+(OP_ADD, OP_SUB, OP_MUL, OP_DIV,
+ OP_EQ, OP_NE, OP_LT, OP_GT, OP_LE, OP_GE,
+ OP_AND, OP_OR,
+ OP_NOT, OP_ASSIGN, OP_GOTO, OP_IF_FALSE, OP_LABEL, OP_READ, OP_WRITE) = range(19)
+OPCODE_NAMES = ('+', '-', '*', '/', '==', '!=', '<', '>', '<=', '>=', '&&', '||',
+                'NOT', 'ASSIGN', 'GOTO', 'IF_FALSE', 'LABEL', 'READ', 'WRITE')
+OPCODES = {name: opcode for opcode, name in enumerate(OPCODE_NAMES)}
+
+# Texto de cada instrução no arquivo .tac: {0} é result, {1} arg1 e {2} arg2
+FORMATS = tuple("{0} := {1} " + op + " {2}" for op in OPCODE_NAMES[:OP_NOT]) + (
+    "{0} := NOT {1}", "{0} := {1}", "GOTO {0}", "IF_FALSE {1} GOTO {0}", "{0}:", "READ {0}", "WRITE {0}")
+
+# Operandos com o tipo da linguagem ('int', 'text', 'bool' ou None), vindo
+# das anotações do SemanticAnalyzer; o texto do TAC não mostra os tipos.
+# Cada operando existe uma vez só e é compartilhado por todas as instruções
+# que o usam: um Var por símbolo, uma Constant por literal, e temporários e
+# rótulos são numerados (o nome '_tN'/'LN' só é montado quando pedido).
 class TACOperand:
-    def __init__(self, name): self.name = name
+    __slots__ = ('type',)
     def __str__(self): return str(self.name)
-class Var(TACOperand): pass
-class Temp(TACOperand): pass
-class Label(TACOperand): pass
+class Var(TACOperand):
+    # `symbol`: ID na tabela de símbolos (-1: nome não declarado)
+    __slots__ = ('name', 'symbol')
+    def __init__(self, name, symbol=-1, type=None):
+        self.name, self.symbol, self.type = name, symbol, type
 class Constant(TACOperand):
-    def __init__(self, name):
-        if isinstance(name, str) and name.startswith('"'): self.name = name
-        else: self.name = name
+    __slots__ = ('name',)
+    def __init__(self, name, type=None): self.name, self.type = name, type
+class Temp(TACOperand):
+    __slots__ = ('id',)
+    def __init__(self, id, type=None): self.id, self.type = id, type
+    @property
+    def name(self): return f"_t{self.id}"
+class Label(TACOperand):
+    __slots__ = ('id',)
+    def __init__(self, id): self.id, self.type = id, None
+    @property
+    def name(self): return f"L{self.id}"
 
 class TACInstruction:
+    __slots__ = ('opcode', 'result', 'arg1', 'arg2')
     def __init__(self, opcode, result, arg1=None, arg2=None):
         self.opcode, self.result, self.arg1, self.arg2 = opcode, result, arg1, arg2
     def __str__(self):
-        op = self.opcode
-        if op in ['+', '-', '*', '/', '==', '!=', '<', '>', '<=', '>=', '&&', '||']:
-            return f"{self.result} := {self.arg1} {op} {self.arg2}"
-        elif op == 'ASSIGN': return f"{self.result} := {self.arg1}"
-        elif op == 'NOT': return f"{self.result} := {op} {self.arg1}"
-        elif op == 'GOTO': return f"GOTO {self.result}"
-        elif op == 'IF_FALSE': return f"IF_FALSE {self.arg1} GOTO {self.result}"
-        elif op == 'LABEL': return f"{self.result}:"
-        elif op == 'READ': return f"READ {self.result}"
-        elif op == 'WRITE': return f"WRITE {self.result}"
-        else: return f"Unknown Opcode: {op}"
+        return FORMATS[self.opcode].format(self.result, self.arg1, self.arg2)
 
 # -----------------------------------------------------------------------------
-# O GERADOR DE TAC (Visitor) - CORRIGIDO
+# O GERADOR DE TAC (Visitor sobre a AST compacta)
 # -----------------------------------------------------------------------------
 
-class TACGenerator(ExprVisitor):
-    def __init__(self):
+class TACGenerator(ASTVisitor):
+    def __init__(self, emit=None, symbols=None):
         super().__init__()
         self.tac_code = []
+        # A tabela preenchida pelo SemanticAnalyzer: as declarações já têm
+        # símbolo, e os escopos dos blocos são refeitos durante a visita
+        self.symbols = symbols if symbols is not None else SymbolTable()
+        # Um operando Var por símbolo, criado no primeiro uso (indexado pelo ID)
+        self._vars = []
+        # Operandos internados: nomes não declarados (pelo ID do nome) e
+        # literais (pelo texto)
+        self._undeclared = {}
+        self._numbers = {}
+        self._strings = {}
+        # Destino das instruções: a lista tac_code ou, no modo streaming, um
+        # consumidor que as recebe uma a uma
+        self.emit = emit or self.tac_code.append
         self._temp_count = 0
         self._label_count = 0
 
-    def _new_temp(self):
-        temp = Temp(f"_t{self._temp_count}")
+    def _new_temp(self, type=None):
+        temp = Temp(self._temp_count, type)
         self._temp_count += 1
         return temp
 
     def _new_label(self):
-        label = Label(f"L{self._label_count}")
+        label = Label(self._label_count)
         self._label_count += 1
         return label
 
     def add_instruction(self, opcode, result, arg1=None, arg2=None):
-        self.tac_code.append(TACInstruction(opcode, result, arg1, arg2))
+        self.emit(TACInstruction(opcode, result, arg1, arg2))
+
+    def _var(self, node):
+        symbols = self.symbols
+        try:
+            symbol = symbols.visible[node.name_id]
+        except IndexError:
+            # Nome que a análise semântica não chegou a ver
+            symbol = -1
+        if symbol < 0:
+            var = self._undeclared.get(node.name_id)
+            if var is None:
+                var = self._undeclared[node.name_id] = Var(node.name)
+            return var
+        variables = self._vars
+        if symbol < len(variables):
+            return variables[symbol]
+        for missing in range(len(variables), len(symbols.symbols)):
+            declared = symbols.symbols[missing]
+            variables.append(Var(declared.display, missing, declared.type_name))
+        return variables[symbol]
+
+    # Os métodos que visitam filhos são geradores (ver ASTVisitor.visit):
+    # `yield filho` devolve o resultado da visita ao filho sem recursão.
+
+    def _visit_body(self, body):
+        for statement in body:
+            yield statement
+
+    def _visit_block(self, body):
+        self.symbols.enter_scope()
+        yield from self._visit_body(body)
+        self.symbols.exit_scope()
+
+    def _visit_chain(self, opcodes, operands, type):
+        # Cadeia associativa à esquerda: um temporário por operador, todos
+        # com o tipo anotado na cadeia
+        left = yield operands[0]
+        for opcode, operand in zip(opcodes, operands[1:]):
+            right = yield operand
+            result = self._new_temp(type)
+            self.add_instruction(opcode, result, left, right)
+            left = result
+        return left
 
-    # --- Métodos do Visitor para as regras da sua gramática ---
+    # --- Métodos do Visitor para os nós da AST (lion_ast.py) ---
 
-    def visitProgram(self, ctx:ExprParser.ProgramContext):
-        self.visit(ctx.declarations())
+    def visitProgram(self, node:Program):
+        yield from self._visit_body(node.body)
         return self.tac_code
 
-    def visitAssignment(self, ctx:ExprParser.AssignmentContext):
-        var_name = Var(ctx.ID().getText())
-        expr_result = self.visit(ctx.expression())
-        self.add_instruction('ASSIGN', var_name, expr_result)
+    def visitVarDecl(self, node:VarDecl):
+        # Declarações não geram código: as variáveis são alocadas pelo gerador
+        # LLVM. Só tornam o símbolo visível de novo no escopo do bloco.
+        if node.symbol >= 0:
+            self.symbols.bind(node.symbol)
 
-    def visitOutputCommand(self, ctx:ExprParser.OutputCommandContext):
-        expr_result = self.visit(ctx.expression())
-        self.add_instruction('WRITE', expr_result)
+    def visitAssign(self, node:Assign):
+        var_name = self._var(node)
+        expr_result = yield node.expr
+        self.add_instruction(OP_ASSIGN, var_name, expr_result)
 
-    def visitInputCommand(self, ctx:ExprParser.InputCommandContext):
-        var_name = Var(ctx.ID().getText())
-        self.add_instruction('READ', var_name)
+    def visitWrite(self, node:Write):
+        expr_result = yield node.expr
+        self.add_instruction(OP_WRITE, expr_result)
 
+    def visitRead(self, node:Read):
+        var_name = self._var(node)
+        self.add_instruction(OP_READ, var_name)
 
-    def visitIfCommand(self, ctx:ExprParser.IfCommandContext):
+
+    def visitIf(self, node:If):
         label_false = self._new_label()
-        
-        if ctx.ELSE():
-            # Se temos um bloco ELSE, precisamos de um rótulo para o final de tudo
+
+        # Gera o código da condição
+        condition_result = yield node.cond
+        self.add_instruction(OP_IF_FALSE, label_false, condition_result)
+
+        # Gera o código do bloco THEN
+        yield from self._visit_block(node.then_body)
+
+        if node.else_body is not None:
+            # O rótulo do final só é criado depois do THEN, quando o ELSE
+            # aparece: é nessa ordem que o front end em streaming o descobre
             label_end = self._new_label()
-            
-            # Gera o código da condição
-            condition_result = self.visit(ctx.expression())
-            self.add_instruction('IF_FALSE', label_false, condition_result)
-            
-            # Gera o código do bloco THEN
-            self.visit(ctx.block(0))
             # Após o THEN, pula para o final
-            self.add_instruction('GOTO', label_end)
-            
+            self.add_instruction(OP_GOTO, label_end)
+
             # Gera o código do bloco ELSE
-            self.add_instruction('LABEL', label_false)
-            self.visit(ctx.block(1))
-            
+            self.add_instruction(OP_LABEL, label_false)
+            yield from self._visit_block(node.else_body)
+
             # Marca o final de toda a estrutura
-            self.add_instruction('LABEL', label_end)
+            self.add_instruction(OP_LABEL, label_end)
         else:
-            # Se NÃO temos um bloco ELSE (if simples)
-            condition_result = self.visit(ctx.expression())
-            self.add_instruction('IF_FALSE', label_false, condition_result)
-            
-            # Gera o código do bloco THEN
-            self.visit(ctx.block(0))
-            
-            # Marca o final da estrutura
-            self.add_instruction('LABEL', label_false)
-
-    def visitWhileCommand(self, ctx:ExprParser.WhileCommandContext):
+            # Se NÃO temos um bloco ELSE (if simples), marca o final da estrutura
+            self.add_instruction(OP_LABEL, label_false)
+
+    def visitWhile(self, node:While):
         label_start, label_end = self._new_label(), self._new_label()
-        self.add_instruction('LABEL', label_start)
-        condition_result = self.visit(ctx.expression())
-        self.add_instruction('IF_FALSE', label_end, condition_result)
-        self.visit(ctx.block())
-        self.add_instruction('GOTO', label_start)
-        self.add_instruction('LABEL', label_end)
+        self.add_instruction(OP_LABEL, label_start)
+        condition_result = yield node.cond
+        self.add_instruction(OP_IF_FALSE, label_end, condition_result)
+        yield from self._visit_block(node.body)
+        self.add_instruction(OP_GOTO, label_start)
+        self.add_instruction(OP_LABEL, label_end)
 
     # --- Expressões (visitando os filhos e retornando o resultado) ---
 
-    def visitParenExpr(self, ctx:ExprParser.ParenExprContext):
-        return self.visit(ctx.expression())
+    def visitParen(self, node:Paren):
+        return (yield node.expr)
 
-    def visitStringExpr(self, ctx:ExprParser.StringExprContext):
-        return Constant(ctx.STRING().getText())
+    def visitString(self, node:String):
+        constant = self._strings.get(node.text)
+        if constant is None:
+            constant = self._strings[node.text] = Constant(node.text, node.type)
+        return constant
         
-    def visitIdExpr(self, ctx:ExprParser.IdExprContext):
-        return Var(ctx.ID().getText())
-
-    def visitNumberExpr(self, ctx:ExprParser.NumberExprContext):
-        return Constant(float(ctx.NUMBER().getText()))
-
-    def visitArithExpr(self, ctx:ExprParser.ArithExprContext):
-        return self.visit(ctx.arithmeticExpression())
-
-    def visitLogicExpr(self, ctx:ExprParser.LogicExprContext):
-        return self.visit(ctx.logicalExpression())
-    
-    def visitConcatExpr(self, ctx:ExprParser.ConcatExprContext):
-        left, right = self.visit(ctx.expression(0)), self.visit(ctx.expression(1))
-        result = self._new_temp()
-        self.add_instruction('+', result, left, right)
-        return result
+    def visitName(self, node:Name):
+        return self._var(node)
 
-    def visitArithmeticExpression(self, ctx:ExprParser.ArithmeticExpressionContext):
-        left = self.visit(ctx.term(0))
-        for i in range(len(ctx.term()))[1:]:
-            op, right = ctx.arithmeticOperator(i-1).getText(), self.visit(ctx.term(i))
-            result = self._new_temp()
-            self.add_instruction(op, result, left, right)
-            left = result
-        return left
+    def visitNumber(self, node:Number):
+        constant = self._numbers.get(node.text)
+        if constant is None:
+            constant = self._numbers[node.text] = Constant(float(node.text), node.type)
+        return constant
 
-    def visitTerm(self, ctx:ExprParser.TermContext):
-        left = self.visit(ctx.factor(0))
-        for i in range(len(ctx.factor()))[1:]:
-            op, right = ctx.termOperator(i-1).getText(), self.visit(ctx.factor(i))
-            result = self._new_temp()
-            self.add_instruction(op, result, left, right)
-            left = result
-        return left
+    def visitConcat(self, node:Concat):
+        return (yield from self._visit_chain((OP_ADD,) * (len(node.operands) - 1), node.operands, node.type))
 
-    # CORREÇÃO CRÍTICA 1: Implementação do visitFactor
-    def visitFactor(self, ctx:ExprParser.FactorContext):
-        if ctx.NUMBER():
-            return Constant(float(ctx.NUMBER().getText()))
-        if ctx.ID():
-            return Var(ctx.ID().getText())
-        if ctx.arithmeticExpression():
-            return self.visit(ctx.arithmeticExpression())
-        return None
-
-    def visitComparison(self, ctx:ExprParser.ComparisonContext):
-        left, right = self.visit(ctx.arithmeticExpression(0)), self.visit(ctx.arithmeticExpression(1))
-        op = ctx.comparisonOperator().getText()
-        result = self._new_temp()
-        self.add_instruction(op, result, left, right)
-        return result
+    def visitArith(self, node:Arith):
+        return (yield from self._visit_chain(map(OPCODES.__getitem__, node.ops), node.operands, node.type))
 
-    def visitLogicalExpression(self, ctx:ExprParser.LogicalExpressionContext):
-        left = self.visit(ctx.logicalTerm(0))
-        for i in range(len(ctx.logicalTerm()))[1:]:
-            op, right = ctx.OR(i-1).getText(), self.visit(ctx.logicalTerm(i))
-            result = self._new_temp()
-            self.add_instruction(op, result, left, right)
-            left = result
-        return left
+    def visitLogical(self, node:Logical):
+        return (yield from self._visit_chain((OPCODES[node.op],) * (len(node.operands) - 1), node.operands, node.type))
 
-    def visitLogicalTerm(self, ctx:ExprParser.LogicalTermContext):
-        left = self.visit(ctx.logicalFactor(0))
-        for i in range(len(ctx.logicalFactor()))[1:]:
-            op, right = ctx.AND(i-1).getText(), self.visit(ctx.logicalFactor(i))
-            result = self._new_temp()
-            self.add_instruction(op, result, left, right)
-            left = result
-        return left
-    
-    # CORREÇÃO CRÍTICA 2: Tornar visitLogicalFactor explícito
-    def visitLogicalFactor(self, ctx:ExprParser.LogicalFactorContext):
-        if ctx.NOT():
-            operand, result = self.visit(ctx.logicalFactor()), self._new_temp()
-            self.add_instruction('NOT', result, operand)
-            return result
-        if ctx.logicalExpression():
-            return self.visit(ctx.logicalExpression())
-        if ctx.comparison():
-            return self.visit(ctx.comparison())
-        return None
\ No newline at end of file
+    def visitCompare(self, node:Compare):
+        left = yield node.left
+        right = yield node.right
+        result = self._new_temp(node.type)
+        self.add_instruction(OPCODES[node.op], result, left, right)
+        return result
+
+    def visitNot(self, node:Not):
+        operand = yield node.operand
+        result = self._new_temp(node.type)
+        self.add_instruction(OP_NOT, result, operand)
+        return result
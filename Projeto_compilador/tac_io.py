@@ -0,0 +1,326 @@
+# tac_io.py
+#
+# Leitura e gravação do código de três endereços, para que o back end possa
+# partir de um TAC já gerado, sem refazer as análises léxica, sintática e
+# semântica.
+#
+# Formato texto (.tac): o que --gerar-tac sempre gravou, uma instrução por
+# linha no formato de TACInstruction.__str__. Ele não guarda os tipos dos
+# operandos, então read_text() os deduz das próprias instruções: literais
+# dão 'int' ou 'text', comparações e operadores lógicos dão 'bool', os demais
+# operadores o tipo dos operandos e uma variável o tipo do que lhe é
+# atribuído; uma variável que só recebe valores de READ fica 'int'. Nomes da
+# forma '_tN' são temporários quando aparecem como resultado de um operador.
+#
+# Formato binário (.tacb): como o dump do TokenStore, colunas array gravadas
+# como estão. Variáveis, constantes e rótulos ficam numa tabela (tipo de
+# operando, tipo da linguagem, número, índice de texto e valor numérico, uma
+# coluna para cada) e as instruções em quatro colunas: código de operação e
+# as referências de result, arg1 e arg2. Uma referência N >= 0 é a entrada N
+# da tabela, -1 é ausente e -2 - N é o temporário N; como quase todo
+# temporário é usado uma vez só, eles ficam fora da tabela e só o tipo de
+# cada um é gravado, numa coluna própria. Os nomes e os literais de texto
+# vêm por último, em UTF-8, separados por '\n' (que não aparece em
+# identificadores nem em literais da linguagem). Tipos e símbolos são
+# preservados exatamente.
+
+import re
+import struct
+import sys
+from array import array
+
+from tac_generator import (OP_OR, OP_EQ, OP_NOT, OP_ASSIGN, OP_GOTO, OP_IF_FALSE, OP_LABEL,
+                           OP_WRITE, OPCODES, Constant, Label, TACInstruction, Temp, Var)
+
+TAC_HEADER = "--- CÓDIGO DE TRÊS ENDEREÇOS (TAC) ---"
+# Extensões que compilador.py aceita como entrada já em TAC
+TAC_EXTENSIONS = ('.tac', '.tacb')
+
+# Cabeçalho: assinatura, versão, ordem dos bytes, quantidade de instruções,
+# de operandos, de temporários e tamanho em bytes dos textos
+DUMP_MAGIC = b'LIONTAC'
+DUMP_VERSION = 1
+_HEADER = struct.Struct('<7sBBxxxQQQQ')
+_BYTEORDER = {'little': 0, 'big': 1}
+
+# Tipo de operando na tabela do formato binário
+K_VAR, K_LABEL, K_NUMBER, K_STRING = range(4)
+KINDS = {Var: K_VAR, Label: K_LABEL}
+TYPE_NAMES = (None, 'int', 'text', 'bool')
+TYPE_CODES = {name: code for code, name in enumerate(TYPE_NAMES)}
+
+OPERAND_COLUMNS = (('kinds', 'b'), ('types', 'b'), ('ids', 'i'), ('texts', 'i'), ('numbers', 'd'))
+INSTRUCTION_COLUMNS = (('opcodes', 'b'), ('results', 'i'), ('arg1s', 'i'), ('arg2s', 'i'))
+
+
+# --- Formato texto ---
+
+def write_text(tac_code, path):
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write(TAC_HEADER + "\n\n")
+        for instruction in tac_code:
+            f.write(str(instruction) + '\n')
+
+
+# Um operando é um literal de texto (que pode ter espaços) ou uma palavra
+_OPERAND = r'("[^"]*"|[^\s"]+)'
+_BINARY = re.compile(rf'(\S+) := {_OPERAND} (\S+) {_OPERAND}$')
+_NOT = re.compile(rf'(\S+) := NOT {_OPERAND}$')
+_ASSIGN = re.compile(rf'(\S+) := {_OPERAND}$')
+_IF_FALSE = re.compile(rf'IF_FALSE {_OPERAND} GOTO (\S+)$')
+_WRITE = re.compile(rf'WRITE {_OPERAND}$')
+_SIMPLE = re.compile(r'(GOTO|READ) (\S+)$')
+_LABEL = re.compile(r'(\S+):$')
+_TEMP_NAME = re.compile(r'_t(\d+)$')
+_LABEL_NAME = re.compile(r'L(\d+)$')
+
+
+def _parse_line(line, number):
+    """(código, result, arg1, arg2) de uma linha, com os operandos ainda em texto."""
+    match = _BINARY.match(line)
+    if match:
+        result, left, op, right = match.groups()
+        opcode = OPCODES.get(op)
+        if opcode is not None and opcode <= OP_OR:
+            return opcode, result, left, right
+    match = _NOT.match(line)
+    if match:
+        return OP_NOT, match.group(1), match.group(2), None
+    match = _ASSIGN.match(line)
+    if match:
+        return OP_ASSIGN, match.group(1), match.group(2), None
+    match = _IF_FALSE.match(line)
+    if match:
+        return OP_IF_FALSE, match.group(2), match.group(1), None
+    match = _WRITE.match(line)
+    if match:
+        return OP_WRITE, match.group(1), None, None
+    match = _SIMPLE.match(line)
+    if match:
+        return OPCODES[match.group(1)], match.group(2), None, None
+    match = _LABEL.match(line)
+    if match:
+        return OP_LABEL, match.group(1), None, None
+    raise ValueError(f"Linha {number} do TAC inválida: {line!r}")
+
+
+def _infer_types(tac_code, variables):
+    """Tipos dos temporários e das variáveis, até não mudarem mais."""
+    def propagate():
+        changed = True
+        while changed:
+            changed = False
+            for instruction in tac_code:
+                opcode, result = instruction.opcode, instruction.result
+                if result is None or result.type is not None:
+                    continue
+                if opcode <= OP_OR:
+                    if opcode >= OP_EQ:
+                        result.type = 'bool'
+                    else:
+                        # Aritméticos e concatenação: o tipo dos operandos
+                        result.type = instruction.arg1.type or instruction.arg2.type
+                elif opcode == OP_NOT:
+                    result.type = 'bool'
+                elif opcode == OP_ASSIGN:
+                    result.type = instruction.arg1.type
+                else:
+                    continue
+                changed = changed or result.type is not None
+
+    propagate()
+    untyped = [var for var in variables if var.type is None]
+    if untyped:
+        # Só recebem valores de READ (ou de outras assim): números
+        for var in untyped:
+            var.type = 'int'
+        propagate()
+
+
+def parse_text(lines):
+    """
+    Lê as linhas de um TAC em texto e devolve a lista de TACInstruction, com
+    os operandos compartilhados como os do TACGenerator.
+    """
+    parsed = []
+    for number, line in enumerate(lines, 1):
+        line = line.rstrip('\r\n')
+        if not line.strip() or line == TAC_HEADER:
+            continue
+        parsed.append(_parse_line(line, number))
+
+    # Temporários são os nomes '_tN' definidos por operadores
+    temp_names = {result for opcode, result, _, _ in parsed
+                  if opcode <= OP_NOT and _TEMP_NAME.match(result)}
+    operands = {}
+    labels = {}
+    variables = []
+
+    def operand(text):
+        value = operands.get(text)
+        if value is None:
+            if text[0] == '"':
+                value = Constant(text, 'text')
+            elif text[0].isdigit() or text[0] == '-':
+                # Números negativos só aparecem no TAC otimizado (a linguagem não tem menos unário)
+                value = Constant(float(text), 'int')
+            elif text in temp_names:
+                value = Temp(int(text[2:]))
+            else:
+                value = Var(text, len(variables))
+                variables.append(value)
+            operands[text] = value
+        return value
+
+    def label(text):
+        value = labels.get(text)
+        if value is None:
+            match = _LABEL_NAME.match(text)
+            if match is None:
+                raise ValueError(f"Rótulo inválido no TAC: {text!r}")
+            value = labels[text] = Label(int(match.group(1)))
+        return value
+
+    tac_code = []
+    for opcode, result, arg1, arg2 in parsed:
+        if opcode == OP_LABEL or opcode == OP_GOTO or opcode == OP_IF_FALSE:
+            result = label(result)
+        else:
+            result = operand(result)
+        tac_code.append(TACInstruction(opcode, result,
+                                       operand(arg1) if arg1 is not None else None,
+                                       operand(arg2) if arg2 is not None else None))
+    _infer_types(tac_code, variables)
+    return tac_code
+
+
+def read_text(path):
+    with open(path, encoding='utf-8') as f:
+        return parse_text(f)
+
+
+# --- Formato binário ---
+
+def save_binary(tac_code, path):
+    """Grava a lista de instruções no formato binário (.tacb)."""
+    columns = {name: array(code) for name, code in OPERAND_COLUMNS + INSTRUCTION_COLUMNS}
+    kinds, types, ids = columns['kinds'], columns['types'], columns['ids']
+    texts, numbers = columns['texts'], columns['numbers']
+    temp_types = array('b')
+    index = {}
+    pool = []
+
+    def operand(value):
+        if value is None:
+            return -1
+        if type(value) is Temp:
+            if value.id >= len(temp_types):
+                temp_types.extend(bytes(value.id + 1 - len(temp_types)))
+            temp_types[value.id] = TYPE_CODES[value.type]
+            return -2 - value.id
+        position = index.get(id(value))
+        if position is None:
+            position = index[id(value)] = len(kinds)
+            kind = KINDS.get(type(value))
+            if kind is None:
+                kind = K_STRING if isinstance(value.name, str) else K_NUMBER
+            kinds.append(kind)
+            types.append(TYPE_CODES[value.type])
+            ids.append(value.symbol if kind == K_VAR else value.id if kind == K_LABEL else 0)
+            if kind == K_VAR or kind == K_STRING:
+                texts.append(len(pool))
+                pool.append(value.name)
+            else:
+                texts.append(-1)
+            numbers.append(value.name if kind == K_NUMBER else 0.0)
+        return position
+
+    opcodes, results = columns['opcodes'], columns['results']
+    arg1s, arg2s = columns['arg1s'], columns['arg2s']
+    for instruction in tac_code:
+        opcodes.append(instruction.opcode)
+        results.append(operand(instruction.result))
+        arg1s.append(operand(instruction.arg1))
+        arg2s.append(operand(instruction.arg2))
+
+    encoded = '\n'.join(pool).encode('utf-8')
+    with open(path, 'wb') as f:
+        f.write(_HEADER.pack(DUMP_MAGIC, DUMP_VERSION, _BYTEORDER[sys.byteorder],
+                             len(opcodes), len(kinds), len(temp_types), len(encoded)))
+        for name, _ in OPERAND_COLUMNS + INSTRUCTION_COLUMNS:
+            columns[name].tofile(f)
+        temp_types.tofile(f)
+        f.write(encoded)
+
+
+def load_binary(path):
+    """Lê um arquivo gravado por save_binary() e devolve a lista de instruções."""
+    with open(path, 'rb') as f:
+        data = f.read()
+    magic, version, byteorder, count, operand_count, temp_count, pool_size = _HEADER.unpack_from(data, 0)
+    if magic != DUMP_MAGIC or version != DUMP_VERSION:
+        raise ValueError(f"Arquivo TAC binário inválido ou de versão desconhecida: {path}")
+
+    columns = {}
+    offset = _HEADER.size
+    for names, size in ((OPERAND_COLUMNS, operand_count), (INSTRUCTION_COLUMNS, count),
+                        ((('temp_types', 'b'),), temp_count)):
+        for name, code in names:
+            column = array(code)
+            end = offset + size * column.itemsize
+            column.frombytes(data[offset:end])
+            if byteorder != _BYTEORDER[sys.byteorder]:
+                column.byteswap()
+            columns[name] = column
+            offset = end
+    pool = str(data[offset:offset + pool_size], 'utf-8').split('\n')
+
+    operands = []
+    for kind, type_code, number, text, value in zip(columns['kinds'], columns['types'], columns['ids'],
+                                                    columns['texts'], columns['numbers']):
+        type_name = TYPE_NAMES[type_code]
+        if kind == K_VAR:
+            operands.append(Var(pool[text], number, type_name))
+        elif kind == K_LABEL:
+            operands.append(Label(number))
+        elif kind == K_STRING:
+            operands.append(Constant(pool[text], type_name))
+        else:
+            operands.append(Constant(value, type_name))
+    # Referências negativas indexam o fim da lista: -1 é None e -2 - N o
+    # temporário N, então os temporários entram em ordem decrescente
+    operands.extend(Temp(number, TYPE_NAMES[columns['temp_types'][number]])
+                    for number in range(temp_count - 1, -1, -1))
+    operands.append(None)
+
+    return [TACInstruction(opcode, operands[result], operands[arg1], operands[arg2])
+            for opcode, result, arg1, arg2 in zip(columns['opcodes'], columns['results'],
+                                                  columns['arg1s'], columns['arg2s'])]
+
+
+def load(path):
+    """Lê um TAC em qualquer dos dois formatos, reconhecendo o binário pela assinatura."""
+    with open(path, 'rb') as f:
+        binary = f.read(len(DUMP_MAGIC)) == DUMP_MAGIC
+    return load_binary(path) if binary else read_text(path)
+
+
+class BinaryTACWriter:
+    """
+    Consumidor para o modo streaming com o mesmo protocolo do TACFileWriter.
+    As colunas só podem ser gravadas no fim, então as instruções ficam em
+    memória até commit().
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.instructions = []
+
+    def __call__(self, instruction):
+        self.instructions.append(instruction)
+
+    def commit(self):
+        save_binary(self.instructions, self.path)
+
+    def discard(self):
+        self.instructions.clear()
@@ -0,0 +1,579 @@
+# tac_optimizer.py
+#
+# Otimizações do TAC ligadas por -O no compilador, feitas sobre a forma SSA
+# (tac_ssa.py) e devolvidas como TAC comum:
+#
+#   - propagação de constantes condicional esparsa (SCCP, Wegman e Zadeck):
+#     cada valor (temporário ou versão de variável) começa desconhecido e
+#     desce para uma constante ou para "não constante"; só as instruções de
+#     blocos alcançáveis são avaliadas, e um IF_FALSE com condição constante
+#     só torna alcançável um dos lados, então constantes atravessam if e
+#     while cujo outro lado nunca executa. Valores lidos por READ ou antes de
+#     qualquer atribuição (versão 0) não são constantes;
+#   - dobra de operadores sobre constantes: aritmética em double como o LLVM
+#     (divisão por zero e resultados não finitos ficam para a execução),
+#     comparações, && e || (x && 0 e x || 1 são constantes mesmo com x
+#     desconhecido), NOT, concatenação de literais e comparação de textos
+#     pela ordem dos bytes, como o strcmp;
+#   - identidades algébricas: x - 0, x * 1, 1 * x e x / 1 valem x, e com x
+#     bool, x && 1 e x || 0 valem x. x + 0 não entra: em double, -0 + 0 é +0,
+#     e o printf mostra a diferença;
+#   - IF_FALSE com condição constante vira GOTO (condição falsa) ou some
+#     (verdadeira); o código entre um GOTO e o próximo rótulo nunca executa
+#     e é retirado.
+#
+# Os usos de valores constantes passam a usar a constante e a instrução que
+# os calculava é removida. Constantes bool não existem no TAC (não há como
+# escrevê-las no .tac), então uma comparação constante que ainda é lida por
+# uma instrução que ficou (um == entre bools, por exemplo) é mantida.
+#
+# Depois, sobre o CFG do TAC já sem SSA (tac_cfg.py), a eliminação de código
+# morto:
+#   - blocos inalcançáveis a partir da entrada saem inteiros (os lados de
+#     desvios resolvidos, o código depois de um laço infinito);
+#   - GOTO e IF_FALSE para o rótulo logo adiante não desviam nada, e um
+#     rótulo que nenhum salto usa não abre bloco no LLVM: os dois saem;
+#   - uma instrução cujo resultado nunca é lido sai, pela vivacidade forte:
+#     um uso só conta se a instrução que o faz fica, então uma cadeia de
+#     contas que só termina em variáveis não lidas sai toda, e um contador
+#     que só é lido para se incrementar sai do laço. WRITE, READ (consome a
+#     entrada) e as condições dos desvios sempre ficam.
+
+import ast
+import math
+
+from tac_cfg import ControlFlowGraph
+from tac_generator import (Constant, Temp, TACInstruction, Var,
+                           OP_ADD, OP_SUB, OP_MUL, OP_DIV, OP_EQ, OP_NE, OP_LT, OP_GT, OP_LE, OP_GE,
+                           OP_AND, OP_OR, OP_NOT, OP_ASSIGN, OP_GOTO, OP_IF_FALSE, OP_LABEL, OP_READ,
+                           OP_WRITE)
+from tac_ssa import Phi, SSAForm, SSAVar
+
+# Valor que não é constante; um valor ausente do reticulado ainda é desconhecido
+VARYING = object()
+
+_ARITHMETIC = (float.__add__, float.__sub__, float.__mul__, float.__truediv__)
+_COMPARISONS = {OP_EQ: lambda a, b: a == b, OP_NE: lambda a, b: a != b,
+                OP_LT: lambda a, b: a < b, OP_GT: lambda a, b: a > b,
+                OP_LE: lambda a, b: a <= b, OP_GE: lambda a, b: a >= b}
+
+
+class OptimizationStats:
+    """Contadores do que a otimização removeu ou trocou."""
+
+    def __init__(self):
+        self.instructions_before = 0
+        self.instructions_after = 0
+        self.folded = 0
+        self.simplified = 0
+        self.branches = 0
+        self.unreachable = 0
+        self.unreachable_blocks = 0
+        self.jumps = 0
+        self.dead = 0
+
+    def report(self):
+        removed = self.instructions_before - self.instructions_after
+        return (f"Otimização: {self.instructions_before} -> {self.instructions_after} instruções TAC "
+                f"({removed} a menos) | constantes dobradas: {self.folded} | identidades: {self.simplified} | "
+                f"desvios resolvidos: {self.branches} | instruções inalcançáveis: {self.unreachable} "
+                f"({self.unreachable_blocks} blocos) | saltos e rótulos inúteis: {self.jumps} | "
+                f"instruções mortas: {self.dead}")
+
+
+def _text_value(literal):
+    # Mesma interpretação do LLVMGenerator._text_constant, em bytes como o
+    # strcmp os compara (até o primeiro zero)
+    try:
+        text = ast.literal_eval(literal)
+    except (ValueError, SyntaxError):
+        text = literal.strip('"')
+    return text.encode('utf-8').split(b'\0')[0]
+
+
+class ConstantPropagation:
+    """SCCP sobre uma SSAForm: `values` dá o estado de cada valor e `executable` os blocos alcançáveis."""
+
+    def __init__(self, ssa):
+        self.ssa = ssa
+        self.values = {}
+        self._constants = {}
+        blocks = ssa.cfg.blocks
+        self.executable = [False] * len(blocks)
+        self._label_blocks = {block.label.id: block.id for block in blocks if block.label is not None}
+        self._edges = set()
+        # Onde cada valor é lido: (bloco, instrução ou phi)
+        self._uses = {}
+        for block in blocks:
+            for phi in ssa.phis[block.id]:
+                for arg in phi.args:
+                    self._add_use(arg, block.id, phi)
+            for instruction in block.instructions:
+                if instruction.opcode == OP_WRITE:
+                    self._add_use(instruction.result, block.id, instruction)
+                else:
+                    self._add_use(instruction.arg1, block.id, instruction)
+                    self._add_use(instruction.arg2, block.id, instruction)
+        self._propagate()
+
+    def _add_use(self, operand, block, item):
+        if type(operand) is Temp or type(operand) is SSAVar:
+            self._uses.setdefault(operand, []).append((block, item))
+
+    # --- Constantes ---
+
+    def constant(self, value, type_name):
+        """Constant compartilhada para um valor (-0.0 e 0.0 são diferentes)."""
+        key = (type_name, repr(value) if type_name == 'int' else value)
+        constant = self._constants.get(key)
+        if constant is None:
+            constant = self._constants[key] = Constant(value, type_name)
+        return constant
+
+    def value(self, operand):
+        """Constant, VARYING ou None (ainda desconhecido) para um operando."""
+        kind = type(operand)
+        if kind is Constant:
+            if operand.type == 'int':
+                return self.constant(float(operand.name), 'int')
+            return self.constant(operand.name, operand.type)
+        if kind is SSAVar and operand.version == 0:
+            # Lido antes de qualquer atribuição: pode ser qualquer coisa
+            return VARYING
+        return self.values.get(operand, VARYING if kind is not Temp and kind is not SSAVar else None)
+
+    def _truth(self, constant):
+        if constant.type == 'bool':
+            return constant.name
+        if constant.type == 'int':
+            return constant.name != 0
+        return None
+
+    def fold(self, opcode, left, right):
+        """Resultado de um operador sobre constantes, ou VARYING se não há como dobrar."""
+        if opcode == OP_NOT:
+            truth = self._truth(left)
+            return VARYING if truth is None else self.constant(not truth, 'bool')
+        if opcode >= OP_AND:
+            a, b = self._truth(left), self._truth(right)
+            if a is None or b is None:
+                return VARYING
+            return self.constant((a and b) if opcode == OP_AND else (a or b), 'bool')
+        if left.type != right.type:
+            return VARYING
+        a, b = left.name, right.name
+        if left.type == 'int':
+            if opcode <= OP_DIV:
+                if opcode == OP_DIV and b == 0:
+                    return VARYING
+                result = _ARITHMETIC[opcode](a, b)
+                return self.constant(result, 'int') if math.isfinite(result) else VARYING
+            return self.constant(_COMPARISONS[opcode](a, b), 'bool')
+        if left.type == 'text':
+            if opcode == OP_ADD:
+                # Junta os literais como estão; uma barra no fim mudaria o escape seguinte
+                if a.endswith('\\'):
+                    return VARYING
+                return self.constant(a[:-1] + b[1:], 'text')
+            if OP_EQ <= opcode <= OP_GE:
+                return self.constant(_COMPARISONS[opcode](_text_value(a), _text_value(b)), 'bool')
+            return VARYING
+        if left.type == 'bool' and (opcode == OP_EQ or opcode == OP_NE):
+            return self.constant(_COMPARISONS[opcode](a, b), 'bool')
+        return VARYING
+
+    # --- Propagação ---
+
+    def _set(self, result, value):
+        old = self.values.get(result)
+        if old is value or old is VARYING:
+            return
+        if old is not None:
+            # Só desce no reticulado: duas constantes diferentes não são constante
+            value = VARYING
+        self.values[result] = value
+        self._ssa_work.append(result)
+
+    def _add_edge(self, predecessor, block):
+        if (predecessor, block) not in self._edges:
+            self._cfg_work.append((predecessor, block))
+
+    def _visit_phi(self, block, phi):
+        result = None
+        for predecessor, arg in zip(self.ssa.cfg.blocks[block].predecessors, phi.args):
+            if (predecessor, block) not in self._edges:
+                continue
+            value = self.value(arg)
+            if value is None:
+                continue
+            if value is VARYING or (result is not None and result is not value):
+                result = VARYING
+                break
+            result = value
+        if result is not None:
+            self._set(phi.result, result)
+
+    def _visit(self, block, instruction):
+        opcode = instruction.opcode
+        if opcode <= OP_NOT:
+            left = self.value(instruction.arg1)
+            right = self.value(instruction.arg2) if opcode != OP_NOT else None
+            if opcode == OP_AND or opcode == OP_OR:
+                # Um lado que decide sozinho: x && 0, x || 1
+                absorbing = opcode == OP_OR
+                for side in (left, right):
+                    if side is not None and side is not VARYING and self._truth(side) is absorbing:
+                        self._set(instruction.result, self.constant(absorbing, 'bool'))
+                        return
+            if left is VARYING or right is VARYING:
+                self._set(instruction.result, VARYING)
+            elif left is not None and (right is not None or opcode == OP_NOT):
+                self._set(instruction.result, self.fold(opcode, left, right))
+        elif opcode == OP_ASSIGN:
+            value = self.value(instruction.arg1)
+            if value is not None:
+                self._set(instruction.result, value)
+        elif opcode == OP_READ:
+            self._set(instruction.result, VARYING)
+        elif opcode == OP_IF_FALSE:
+            condition = self.value(instruction.arg1)
+            target = self._label_blocks[instruction.result.id]
+            if condition is None:
+                return
+            truth = None if condition is VARYING else self._truth(condition)
+            if truth is None or truth:
+                self._add_edge(block, block + 1)
+            if truth is None or not truth:
+                self._add_edge(block, target)
+        elif opcode == OP_GOTO:
+            self._add_edge(block, self._label_blocks[instruction.result.id])
+
+    def _propagate(self):
+        blocks = self.ssa.cfg.blocks
+        phis = self.ssa.phis
+        self._cfg_work = [(-1, 0)]
+        self._ssa_work = []
+        while self._cfg_work or self._ssa_work:
+            while self._cfg_work:
+                edge = self._cfg_work.pop()
+                if edge in self._edges:
+                    continue
+                self._edges.add(edge)
+                block = edge[1]
+                for phi in phis[block]:
+                    self._visit_phi(block, phi)
+                if self.executable[block]:
+                    continue
+                self.executable[block] = True
+                instructions = blocks[block].instructions
+                for instruction in instructions:
+                    self._visit(block, instruction)
+                end = instructions[-1].opcode if instructions else None
+                if end != OP_GOTO and end != OP_IF_FALSE:
+                    for successor in blocks[block].successors:
+                        self._add_edge(block, successor)
+            while self._ssa_work:
+                for block, item in self._uses.get(self._ssa_work.pop(), ()):
+                    if not self.executable[block]:
+                        continue
+                    if type(item) is Phi:
+                        self._visit_phi(block, item)
+                    else:
+                        self._visit(block, item)
+
+
+def optimize(tac_code, stats=None):
+    """Devolve o TAC otimizado (lista nova); os contadores vão para `stats`, se dado."""
+    stats = stats if stats is not None else OptimizationStats()
+    stats.instructions_before += len(tac_code)
+    optimized = eliminate_dead_code(propagate_constants(tac_code, stats), stats)
+    stats.instructions_after += len(optimized)
+    return optimized
+
+
+def propagate_constants(tac_code, stats):
+    """SCCP, dobra, identidades e desvios constantes (ver o início do arquivo)."""
+    ssa = SSAForm(tac_code)
+    sccp = ConstantPropagation(ssa)
+    values = sccp.values
+    blocks = ssa.cfg.blocks
+
+    def known(operand):
+        # A constante de um operando (qualquer tipo), ou None
+        value = sccp.value(operand)
+        return value if value is not None and value is not VARYING else None
+
+    # Resultados que deixam de ser calculados: constantes (a instrução some e
+    # os usos leem a constante) e identidades (os usos leem o operando)
+    forward = {}
+
+    def replace(operand):
+        while operand in forward:
+            operand = forward[operand]
+        if type(operand) is Temp or type(operand) is SSAVar:
+            value = values.get(operand)
+            if value is not None and value is not VARYING and value.type != 'bool':
+                return value
+        return operand
+
+    removed = set()
+    for block in blocks:
+        if not sccp.executable[block.id]:
+            continue
+        for instruction in block.instructions:
+            opcode = instruction.opcode
+            if opcode > OP_ASSIGN:
+                continue
+            result = values.get(instruction.result)
+            if result is not None and result is not VARYING:
+                removed.add(instruction)
+                continue
+            if opcode > OP_OR:
+                continue
+            left, right = known(instruction.arg1), known(instruction.arg2)
+            identity = None
+            if right is not None and right.type == 'int' and (
+                    (opcode == OP_SUB and right.name == 0 and math.copysign(1, right.name) > 0)
+                    or ((opcode == OP_MUL or opcode == OP_DIV) and right.name == 1)):
+                identity = instruction.arg1
+            elif left is not None and left.type == 'int' and opcode == OP_MUL and left.name == 1:
+                identity = instruction.arg2
+            elif opcode == OP_AND or opcode == OP_OR:
+                neutral = opcode == OP_AND
+                if right is not None and sccp._truth(right) is neutral and instruction.arg1.type == 'bool':
+                    identity = instruction.arg1
+                elif left is not None and sccp._truth(left) is neutral and instruction.arg2.type == 'bool':
+                    identity = instruction.arg2
+            if identity is not None:
+                forward[instruction.result] = identity
+                removed.add(instruction)
+                stats.simplified += 1
+
+    # Comparações constantes ainda lidas por uma instrução que fica não podem
+    # virar constante no TAC: a instrução que as calcula volta
+    definitions = {instruction.result: instruction for instruction in removed
+                   if instruction.result not in forward}
+    pending = []
+    for block in blocks:
+        for instruction in block.instructions:
+            if instruction in removed:
+                continue
+            operands = (instruction.result,) if instruction.opcode == OP_WRITE else (instruction.arg1, instruction.arg2)
+            if instruction.opcode == OP_IF_FALSE and known(instruction.arg1) is not None:
+                operands = ()
+            pending.extend(operands)
+    while pending:
+        operand = pending.pop()
+        while operand in forward:
+            operand = forward[operand]
+        definition = definitions.get(operand)
+        if definition is not None and definition in removed and values[operand].type == 'bool':
+            removed.discard(definition)
+            pending.extend((definition.arg1, definition.arg2))
+    # Uma cópia de constante não conta: volta como cópia do phi, se houver
+    stats.folded += sum(1 for instruction in removed if instruction.result not in forward
+                        and not (instruction.opcode == OP_ASSIGN and type(instruction.arg1) is Constant))
+
+    # As instruções dos blocos já são cópias da SSA: mudam no lugar
+    for block in blocks:
+        rewritten = []
+        for instruction in block.instructions:
+            if instruction in removed:
+                continue
+            opcode = instruction.opcode
+            if opcode == OP_WRITE:
+                instruction.result = replace(instruction.result)
+            elif opcode == OP_IF_FALSE and sccp.executable[block.id] and known(instruction.arg1) is not None:
+                # Condição constante: o IF_FALSE é resolvido depois da volta da SSA
+                instruction.arg1 = sccp.constant(sccp._truth(known(instruction.arg1)), 'bool')
+            else:
+                instruction.arg1, instruction.arg2 = replace(instruction.arg1), replace(instruction.arg2)
+            rewritten.append(instruction)
+        block.instructions = rewritten
+        phis = ssa.phis[block.id]
+        kept = []
+        for phi in phis:
+            value = values.get(phi.result)
+            if value is not None and value is not VARYING and sccp.executable[block.id]:
+                stats.folded += 1
+                continue
+            phi.args = [replace(arg) for arg in phi.args]
+            kept.append(phi)
+        ssa.phis[block.id] = kept
+
+    optimized = []
+    reachable = True
+    for instruction in ssa.to_tac():
+        opcode = instruction.opcode
+        if opcode == OP_LABEL:
+            reachable = True
+        elif not reachable:
+            stats.unreachable += 1
+            continue
+        if opcode == OP_IF_FALSE and type(instruction.arg1) is Constant:
+            stats.branches += 1
+            truth = sccp._truth(instruction.arg1)
+            if truth:
+                continue
+            instruction = TACInstruction(OP_GOTO, instruction.result)
+            opcode = OP_GOTO
+        optimized.append(instruction)
+        if opcode == OP_GOTO:
+            reachable = False
+    return optimized
+
+
+def _operand_key(operand):
+    # Variáveis pelo símbolo (ou pelo nome, sem declaração), temporários pelo número
+    kind = type(operand)
+    if kind is Temp:
+        return -1 - operand.id
+    if kind is Var:
+        return operand.symbol if operand.symbol >= 0 else operand.name
+    return None
+
+
+def _remove_jumps_and_labels(code, stats):
+    # Saltos para um dos rótulos logo adiante e rótulos sem saltos
+    kept = []
+    for index, instruction in enumerate(code):
+        opcode = instruction.opcode
+        if opcode == OP_GOTO or opcode == OP_IF_FALSE:
+            target = instruction.result.id
+            following = index + 1
+            while following < len(code) and code[following].opcode == OP_LABEL:
+                if code[following].result.id == target:
+                    break
+                following += 1
+            else:
+                kept.append(instruction)
+                continue
+            stats.jumps += 1
+            continue
+        kept.append(instruction)
+    targets = {instruction.result.id for instruction in kept
+               if instruction.opcode == OP_GOTO or instruction.opcode == OP_IF_FALSE}
+    code = [instruction for instruction in kept
+            if instruction.opcode != OP_LABEL or instruction.result.id in targets]
+    stats.jumps += len(kept) - len(code)
+    return code
+
+
+def eliminate_dead_code(tac_code, stats=None):
+    """
+    Devolve o TAC sem blocos inalcançáveis, saltos e rótulos inúteis e
+    instruções cujo resultado nunca é lido (lista nova).
+    """
+    stats = stats if stats is not None else OptimizationStats()
+    cfg = ControlFlowGraph(tac_code)
+    code = []
+    for block in cfg.blocks:
+        if cfg.reachable(block.id):
+            code.extend(block.instructions)
+        elif block.instructions:
+            stats.unreachable_blocks += 1
+            stats.unreachable += len(block.instructions)
+    code = _remove_jumps_and_labels(code, stats)
+    cfg = ControlFlowGraph(code)
+    blocks = cfg.blocks
+
+    # Valores lidos em algum bloco antes de serem definidos nele: só estes
+    # podem estar vivos entre blocos e ganham um bit global. Os demais
+    # (quase todos os temporários) usam bits locais ao bloco, e as máscaras
+    # globais ficam do tamanho do número de variáveis.
+    exposed = set()
+    for block in blocks:
+        defined = set()
+        for instruction in block.instructions:
+            opcode = instruction.opcode
+            operands = (instruction.result,) if opcode == OP_WRITE else (instruction.arg1, instruction.arg2)
+            for operand in operands:
+                key = _operand_key(operand)
+                if key is not None and key not in defined:
+                    exposed.add(key)
+            if opcode <= OP_ASSIGN or opcode == OP_READ:
+                defined.add(_operand_key(instruction.result))
+    global_bits = {key: 1 << index for index, key in enumerate(exposed)}
+
+    # Cada instrução como (tipo, definição global, definição local, usos
+    # globais, usos locais), em ordem inversa por bloco. Tipo 0: só vale pelo
+    # resultado; 1: READ (mata a variável, mas fica); 2: só usa.
+    summaries = []
+    for block in blocks:
+        local_bits = {}
+
+        def masks(*operands):
+            global_mask = local_mask = 0
+            for operand in operands:
+                key = _operand_key(operand)
+                if key is None:
+                    continue
+                bit = global_bits.get(key)
+                if bit is not None:
+                    global_mask |= bit
+                else:
+                    bit = local_bits.get(key)
+                    if bit is None:
+                        bit = local_bits[key] = 1 << len(local_bits)
+                    local_mask |= bit
+            return global_mask, local_mask
+
+        summary = []
+        for instruction in reversed(block.instructions):
+            opcode = instruction.opcode
+            if opcode <= OP_ASSIGN:
+                summary.append((0, *masks(instruction.result), *masks(instruction.arg1, instruction.arg2)))
+            elif opcode == OP_READ:
+                summary.append((1, *masks(instruction.result), 0, 0))
+            elif opcode == OP_WRITE:
+                summary.append((2, 0, 0, *masks(instruction.result)))
+            else:
+                # IF_FALSE usa a condição; GOTO e LABEL, nada
+                summary.append((2, 0, 0, *masks(instruction.arg1)))
+        summaries.append(summary)
+
+    def transfer(block, live, dead=None):
+        # Vivos na entrada do bloco a partir dos vivos na saída; com `dead`,
+        # anota as posições (contadas do fim) das instruções mortas
+        local = 0
+        for position, (kind, define, define_local, use, use_local) in enumerate(summaries[block]):
+            if kind == 0:
+                if live & define or local & define_local:
+                    live = (live & ~define) | use
+                    local = (local & ~define_local) | use_local
+                elif dead is not None:
+                    dead.add(position)
+            elif kind == 1:
+                live &= ~define
+                local &= ~define_local
+            else:
+                live |= use
+                local |= use_local
+        return live
+
+    live_in = [0] * len(blocks)
+    postorder = cfg.reverse_postorder[::-1]
+    changed = True
+    while changed:
+        changed = False
+        for block in postorder:
+            live = 0
+            for successor in blocks[block].successors:
+                live |= live_in[successor]
+            live = transfer(block, live)
+            if live != live_in[block]:
+                live_in[block] = live
+                changed = True
+
+    optimized = []
+    for block in blocks:
+        live = 0
+        for successor in block.successors:
+            live |= live_in[successor]
+        dead = set()
+        transfer(block.id, live, dead)
+        last = len(block.instructions) - 1
+        optimized.extend(instruction for position, instruction in enumerate(block.instructions)
+                         if last - position not in dead)
+        stats.dead += len(dead)
+    return optimized
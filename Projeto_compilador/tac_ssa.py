@@ -0,0 +1,446 @@
+# tac_ssa.py
+#
+# Forma SSA (atribuição estática única) do TAC e a volta para o TAC comum.
+#
+# No TAC gerado as variáveis são reatribuídas livremente; só os temporários
+# já são definidos uma vez. SSAForm renomeia cada definição de uma variável
+# (ASSIGN e READ) para uma versão nova, SSAVar, e põe nos pontos de junção
+# instruções phi que escolhem a versão pelo bloco de onde se chegou:
+#
+#   - posição dos phi: fronteira de dominância iterada dos blocos que
+#     definem a variável (Cytron et al.), podada pela vivacidade: só há phi
+#     onde a variável está viva na entrada do bloco (SSA podado), então não
+#     sobram phi mortos para as otimizações ou o LLVM carregarem;
+#   - renomeação: uma visita à árvore de dominadores com a versão atual de
+#     cada variável, desfeita ao sair de cada bloco. Usos sem definição
+#     anterior leem a versão 0, o valor indefinido de antes da primeira
+#     atribuição. Blocos inalcançáveis são renomeados à parte, a partir da
+#     versão 0.
+#
+# Os phi ficam fora das listas de instruções, em `phis[bloco]`, com um
+# argumento por predecessor, na ordem de cfg.blocks[bloco].predecessors; as
+# instruções dos blocos do grafo são trocadas pelas renomeadas (as do TAC de
+# entrada não são alteradas).
+#
+# to_tac() faz o caminho de volta para os geradores que esperam variáveis
+# reatribuíveis. Cada versão volta a ser a variável original, a não ser que
+# interfira com outra versão dela (quando alguma otimização fez um uso ler
+# uma versão que a variável não guarda mais naquele ponto): essa versão
+# ganha uma variável própria, 'x.N'. Cada phi vira cópias no fim dos
+# predecessores; as arestas que saem de um IF_FALSE para um bloco com phi
+# são divididas, com um rótulo novo, para que as cópias só rodem no caminho
+# certo. As cópias de uma aresta são feitas como uma cópia paralela: a
+# ordem respeita quem lê o valor antigo de quem, e ciclos passam por uma
+# variável auxiliar.
+
+from tac_cfg import ControlFlowGraph
+from tac_generator import (Var, Label, TACOperand, TACInstruction,
+                           OP_ASSIGN, OP_GOTO, OP_IF_FALSE, OP_LABEL, OP_READ, OP_WRITE)
+
+
+class SSAVar(TACOperand):
+    """Versão de uma variável; a versão 0 é o valor antes de qualquer atribuição."""
+    __slots__ = ('var', 'version')
+
+    def __init__(self, var, version):
+        self.var, self.version, self.type = var, version, var.type
+
+    @property
+    def name(self):
+        return f"{self.var.name}.{self.version}"
+
+
+class Phi:
+    """`result := PHI(args)`: um argumento por predecessor do bloco."""
+    __slots__ = ('result', 'args')
+
+    def __init__(self, result, args):
+        self.result, self.args = result, args
+
+    def __str__(self):
+        return f"{self.result} := PHI({', '.join(map(str, self.args))})"
+
+
+def _uses(instruction):
+    # Operandos lidos: WRITE guarda o seu em result
+    if instruction.opcode == OP_WRITE:
+        return (instruction.result,)
+    return (instruction.arg1, instruction.arg2)
+
+
+def _defines(instruction):
+    return ((instruction.opcode == OP_ASSIGN or instruction.opcode == OP_READ)
+            and type(instruction.result) is Var)
+
+
+class SSAForm:
+    def __init__(self, tac_code):
+        self.cfg = ControlFlowGraph(tac_code)
+        self.phis = [[] for _ in self.cfg.blocks]
+        # Versões de cada variável, pelo número da versão (a 0 é criada no
+        # primeiro uso sem definição)
+        self.versions = {}
+        self._place_phis()
+        self._rename()
+
+    # --- Construção ---
+
+    def _place_phis(self):
+        cfg = self.cfg
+        blocks, idom = cfg.blocks, cfg.idom
+        # Blocos que definem cada variável e blocos em que ela é lida antes
+        # de ser definida (viva na entrada)
+        def_blocks, use_blocks = {}, {}
+        for block in blocks:
+            defined = set()
+            for instruction in block.instructions:
+                for operand in _uses(instruction):
+                    if type(operand) is Var and operand not in defined:
+                        uses = use_blocks.setdefault(operand, [])
+                        if not uses or uses[-1] != block.id:
+                            uses.append(block.id)
+                if _defines(instruction):
+                    var = instruction.result
+                    if var not in defined:
+                        defined.add(var)
+                        def_blocks.setdefault(var, []).append(block.id)
+
+        frontiers = cfg.dominance_frontiers()
+        for var, defining in def_blocks.items():
+            # Vivacidade da variável: subindo dos usos pelos predecessores
+            # até os blocos que a definem
+            live_in = set()
+            pending = [block for block in use_blocks.get(var, ()) if idom[block] >= 0]
+            defining_set = set(defining)
+            while pending:
+                block = pending.pop()
+                if block in live_in:
+                    continue
+                live_in.add(block)
+                for predecessor in blocks[block].predecessors:
+                    if predecessor not in defining_set and predecessor not in live_in and idom[predecessor] >= 0:
+                        pending.append(predecessor)
+            if not live_in:
+                continue
+            # Fronteira de dominância iterada, só onde a variável está viva
+            has_phi = set()
+            pending = [block for block in defining if idom[block] >= 0]
+            while pending:
+                for frontier in frontiers[pending.pop()]:
+                    if frontier in has_phi or frontier not in live_in:
+                        continue
+                    has_phi.add(frontier)
+                    self.phis[frontier].append(Phi(var, [None] * len(blocks[frontier].predecessors)))
+                    if frontier not in defining_set:
+                        pending.append(frontier)
+
+    def _new_version(self, var):
+        versions = self.versions.get(var)
+        if versions is None:
+            versions = self.versions[var] = [None]
+        version = SSAVar(var, len(versions))
+        versions.append(version)
+        return version
+
+    def version_zero(self, var):
+        """O valor de `var` antes da primeira atribuição."""
+        versions = self.versions.get(var)
+        if versions is None:
+            versions = self.versions[var] = [None]
+        if versions[0] is None:
+            versions[0] = SSAVar(var, 0)
+        return versions[0]
+
+    def _rename_block(self, block, current, undo):
+        # Renomeia o bloco com `current` (variável -> versão atual),
+        # anotando em `undo` o que precisa ser restaurado depois
+        cfg = self.cfg
+        for phi in self.phis[block]:
+            var = phi.result
+            undo.append((var, current.get(var)))
+            phi.result = current[var] = self._new_version(var)
+
+        def rename(operand):
+            if type(operand) is not Var:
+                return operand
+            version = current.get(operand)
+            return version if version is not None else self.version_zero(operand)
+
+        renamed = []
+        for instruction in cfg.blocks[block].instructions:
+            opcode = instruction.opcode
+            if _defines(instruction):
+                var = instruction.result
+                undo.append((var, current.get(var)))
+                renamed.append(TACInstruction(opcode, None, rename(instruction.arg1)))
+                renamed[-1].result = current[var] = self._new_version(var)
+            elif opcode == OP_WRITE:
+                renamed.append(TACInstruction(opcode, rename(instruction.result)))
+            else:
+                renamed.append(TACInstruction(opcode, instruction.result,
+                                              rename(instruction.arg1), rename(instruction.arg2)))
+        cfg.blocks[block].instructions = renamed
+
+        for successor in cfg.blocks[block].successors:
+            phis = self.phis[successor]
+            if phis:
+                index = cfg.blocks[successor].predecessors.index(block)
+                for phi in phis:
+                    # Antes da renomeação do sucessor, o result ainda é a Var
+                    var = phi.result if type(phi.result) is Var else phi.result.var
+                    phi.args[index] = rename(var)
+
+    def _rename(self):
+        cfg = self.cfg
+        children = cfg.dominator_children
+        current = {}
+        # Pilha da visita à árvore de dominadores: o número do bloco na
+        # entrada e, na saída, o registro do que restaurar
+        stack = [0]
+        while stack:
+            entry = stack.pop()
+            if type(entry) is list:
+                for var, previous in reversed(entry):
+                    if previous is None:
+                        del current[var]
+                    else:
+                        current[var] = previous
+                continue
+            undo = []
+            self._rename_block(entry, current, undo)
+            stack.append(undo)
+            stack.extend(reversed(children[entry]))
+        for block in range(len(cfg.blocks)):
+            if cfg.idom[block] < 0:
+                self._rename_block(block, {}, [])
+
+    # --- Consulta ---
+
+    def instructions(self):
+        """Instruções e phi de todos os blocos, na ordem do programa (os phi logo depois do rótulo)."""
+        listing = []
+        for block in self.cfg.blocks:
+            instructions = block.instructions
+            labeled = bool(instructions) and instructions[0].opcode == OP_LABEL
+            listing.extend(instructions[:labeled])
+            listing.extend(self.phis[block.id])
+            listing.extend(instructions[labeled:])
+        return listing
+
+    def phi_count(self):
+        return sum(map(len, self.phis))
+
+    # --- Saída da forma SSA ---
+
+    def _interfering_versions(self):
+        # Versões que não podem voltar a ser a variável original: as que
+        # estão vivas na definição de outra versão da mesma variável (o que
+        # acontece quando uma otimização faz um uso ler uma versão mais
+        # antiga). A vivacidade de cada versão é calculada subindo dos seus
+        # usos até a definição; das duas versões em conflito, a que está viva
+        # na definição da outra ganha variável própria.
+        cfg = self.cfg
+        blocks = cfg.blocks
+        # Definição de cada versão como (bloco, posição): os phi ficam na
+        # posição -1 e a versão 0 no bloco -1, antes da entrada
+        definitions = {}
+        uses = {}        # versão -> {bloco: [posições]}
+        phi_uses = {}    # versão -> predecessores de onde um phi a lê
+        for block in blocks:
+            for phi in self.phis[block.id]:
+                definitions[phi.result] = (block.id, -1)
+                for predecessor, arg in zip(block.predecessors, phi.args):
+                    if type(arg) is SSAVar:
+                        phi_uses.setdefault(arg, []).append(predecessor)
+            for position, instruction in enumerate(block.instructions):
+                for operand in _uses(instruction):
+                    if type(operand) is SSAVar:
+                        uses.setdefault(operand, {}).setdefault(block.id, []).append(position)
+                result = instruction.result
+                if type(result) is SSAVar and instruction.opcode != OP_WRITE:
+                    definitions[result] = (block.id, position)
+
+        def liveness(version):
+            # Blocos em que a versão está viva na entrada e na saída
+            definition_block, definition_position = definitions.get(version, (-1, -1))
+            live_in, live_out = set(), set()
+            pending = []
+            for block, positions in uses.get(version, {}).items():
+                # Um uso depois da definição, no mesmo bloco, não sobe
+                if block != definition_block or min(positions) <= definition_position:
+                    pending.append(block)
+            for predecessor in phi_uses.get(version, ()):
+                live_out.add(predecessor)
+                if predecessor != definition_block:
+                    pending.append(predecessor)
+            while pending:
+                block = pending.pop()
+                if block in live_in:
+                    continue
+                live_in.add(block)
+                for predecessor in blocks[block].predecessors:
+                    live_out.add(predecessor)
+                    if predecessor != definition_block and predecessor not in live_in:
+                        pending.append(predecessor)
+            return live_in, live_out
+
+        split = set()
+        for versions in self.versions.values():
+            if len(versions) < 3 and versions[0] is None:
+                # Uma versão só: nada com que interferir
+                continue
+            present = [version for version in versions if version is not None]
+            ranges = {version: liveness(version) for version in present}
+            # Versões vivas na entrada ou definidas em cada bloco
+            candidates = {}
+            for version in present:
+                for block in ranges[version][0]:
+                    candidates.setdefault(block, []).append(version)
+                block = definitions.get(version, (-1,))[0]
+                if block >= 0:
+                    candidates.setdefault(block, []).append(version)
+            for other in present:
+                # Sem definição: a versão 0 e as que uma otimização removeu
+                if other not in definitions or other in split:
+                    continue
+                block, position = definitions[other]
+                for version in candidates.get(block, ()):
+                    if version is other or version in split:
+                        continue
+                    live_in, live_out = ranges[version]
+                    definition_block, definition_position = definitions.get(version, (-1, -1))
+                    later = [use for use in uses.get(version, {}).get(block, ()) if use > position]
+                    if definition_block == block and definition_position > position:
+                        # Definida depois, no mesmo bloco: só o valor da
+                        # volta anterior de um laço pode estar vivo aqui
+                        live = block in live_in and any(use <= definition_position for use in later)
+                    else:
+                        available = block in live_in or (definition_block == block and definition_position < position)
+                        live = available and (bool(later) or block in live_out)
+                    if live:
+                        split.add(version)
+        return split
+
+    def to_tac(self):
+        """TAC sem SSA: versões de volta às variáveis e phi como cópias nos predecessores."""
+        cfg = self.cfg
+        blocks = cfg.blocks
+        split = self._interfering_versions()
+
+        # Variáveis próprias das versões separadas, com símbolos depois dos
+        # já usados, e rótulos novos depois dos já usados
+        next_symbol = max((var.symbol for var in self.versions), default=-1) + 1
+        next_label = 0
+        for block in blocks:
+            for instruction in block.instructions:
+                if instruction.opcode == OP_LABEL:
+                    next_label = max(next_label, instruction.result.id + 1)
+        homes = {}
+
+        def new_var(name, type_name):
+            nonlocal next_symbol
+            next_symbol += 1
+            return Var(name, next_symbol - 1, type_name)
+
+        def home(operand):
+            if type(operand) is not SSAVar:
+                return operand
+            if operand not in split:
+                return operand.var
+            var = homes.get(operand)
+            if var is None:
+                var = homes[operand] = new_var(operand.name, operand.type)
+            return var
+
+        def new_label():
+            nonlocal next_label
+            next_label += 1
+            return Label(next_label - 1)
+
+        def edge_copies(predecessor, successor):
+            # Cópias dos phi de `successor` para a aresta que vem de
+            # `predecessor`, em uma ordem que preserva a cópia paralela
+            index = blocks[successor].predecessors.index(predecessor)
+            pending = []
+            for phi in self.phis[successor]:
+                target, source = home(phi.result), home(phi.args[index])
+                if target is not source:
+                    pending.append((target, source))
+            copies = []
+            while pending:
+                sources = {source for _, source in pending}
+                for position, (target, source) in enumerate(pending):
+                    if target not in sources:
+                        copies.append(TACInstruction(OP_ASSIGN, target, source))
+                        del pending[position]
+                        break
+                else:
+                    # Ciclo: o valor antigo de um destino vai para uma auxiliar
+                    target = pending[0][0]
+                    saved = new_var(f"{target.name}.tmp", target.type)
+                    copies.append(TACInstruction(OP_ASSIGN, saved, target))
+                    pending = [(t, saved if s is target else s) for t, s in pending]
+            return copies
+
+        def translate(instruction):
+            opcode = instruction.opcode
+            if opcode == OP_WRITE:
+                return TACInstruction(opcode, home(instruction.result))
+            return TACInstruction(opcode, home(instruction.result),
+                                  home(instruction.arg1), home(instruction.arg2))
+
+        # Arestas de IF_FALSE que precisam de um bloco próprio para as
+        # cópias: rótulo novo e cópias, pelo bloco de destino
+        edge_blocks = [[] for _ in blocks]
+        label_blocks = {block.label.id: block.id for block in blocks if block.label is not None}
+        retarget = {}
+        for block in blocks:
+            instructions = block.instructions
+            if not instructions or instructions[-1].opcode != OP_IF_FALSE:
+                continue
+            target = label_blocks[instructions[-1].result.id]
+            if self.phis[target]:
+                copies = edge_copies(block.id, target)
+                if copies:
+                    label = retarget[block.id] = new_label()
+                    edge_blocks[target].append((block.id, label, copies))
+
+        tac_code = []
+        for block in blocks:
+            instructions = block.instructions
+            label = block.label
+            previous = blocks[block.id - 1].instructions if block.id else []
+            if edge_blocks[block.id]:
+                entries = edge_blocks[block.id]
+                # O bloco anterior que termina em IF_FALSE para este mesmo
+                # rótulo cai no bloco da sua aresta: ele vai primeiro
+                entries.sort(key=lambda entry: entry[0] != block.id - 1)
+                falls_into_edge = entries[0][0] == block.id - 1
+                if not falls_into_edge and block.id and (not previous or previous[-1].opcode != OP_GOTO):
+                    tac_code.append(TACInstruction(OP_GOTO, label))
+                for position, (_, edge_label, copies) in enumerate(entries):
+                    tac_code.append(TACInstruction(OP_LABEL, edge_label))
+                    tac_code.extend(copies)
+                    if position < len(entries) - 1:
+                        tac_code.append(TACInstruction(OP_GOTO, label))
+
+            end = instructions[-1].opcode if instructions else None
+            body = instructions[:-1] if end == OP_GOTO or end == OP_IF_FALSE else instructions
+            tac_code.extend(map(translate, body))
+            following = block.id + 1
+            if end == OP_IF_FALSE:
+                jump = translate(instructions[-1])
+                if block.id in retarget:
+                    jump.result = retarget[block.id]
+                tac_code.append(jump)
+                # Aresta para o bloco seguinte, quando ele não é o destino
+                if following < len(blocks) and following in block.successors and \
+                        label_blocks[instructions[-1].result.id] != following and self.phis[following]:
+                    tac_code.extend(edge_copies(block.id, following))
+            else:
+                for successor in block.successors:
+                    if self.phis[successor]:
+                        tac_code.extend(edge_copies(block.id, successor))
+                if end == OP_GOTO:
+                    tac_code.append(translate(instructions[-1]))
+        return tac_code
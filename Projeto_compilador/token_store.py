@@ -0,0 +1,198 @@
+# token_store.py
+#
+# Armazenamento compacto de tokens. Em vez de uma lista de CommonToken (um
+# objeto Python por token), os tokens ficam em colunas paralelas array('i')
+# com tipo, início, fim, linha e coluna, todas apontando para um único buffer
+# com o código-fonte. O formato binário grava essas colunas como estão e o
+# código-fonte em UTF-32 (um inteiro de 4 bytes por caractere), de modo que
+# as posições das colunas indexam o código-fonte gravado diretamente: outras
+# ferramentas podem mapear o arquivo em memória e lê-lo sem nenhuma
+# conversão, mesmo com texto não ASCII.
+
+import mmap
+import struct
+import sys
+from array import array
+
+from antlr4.Token import Token
+from antlr4.ListTokenSource import ListTokenSource
+
+from fast_lexer import FastLexer, make_token, scan
+
+# Cabeçalho: assinatura, versão, ordem dos bytes, quantidade de tokens e
+# quantidade de caracteres do código-fonte (UTF-32, na mesma ordem dos bytes
+# das colunas) que segue as colunas.
+DUMP_MAGIC = b'LIONTOK'
+DUMP_VERSION = 2
+_HEADER = struct.Struct('<7sBBxxxQQ')
+_BYTEORDER = {'little': 0, 'big': 1}
+_UTF32 = ('utf-32-le', 'utf-32-be')
+
+COLUMNS = ('types', 'starts', 'stops', 'lines', 'columns')
+
+
+class TokenStore:
+    """
+    Tokens em formato colunar. O token i é descrito por types[i], starts[i],
+    stops[i], lines[i] e columns[i]; o texto é source[starts[i]:stops[i] + 1].
+    Um store vindo de load() mantém o arquivo mapeado até close() (ou o fim
+    de um bloco with).
+    """
+    __slots__ = ('source', 'types', 'starts', 'stops', 'lines', 'columns', '_mapped', '_views')
+
+    def __init__(self, source=""):
+        self.source = source
+        self.types = array('i')
+        self.starts = array('i')
+        self.stops = array('i')
+        self.lines = array('i')
+        self.columns = array('i')
+        self._mapped = None
+        self._views = ()
+
+    def __len__(self):
+        return len(self.types)
+
+    def append(self, ttype, start, stop, line, column):
+        self.types.append(ttype)
+        self.starts.append(start)
+        self.stops.append(stop)
+        self.lines.append(line)
+        self.columns.append(column)
+
+    def extend(self, other, offset=0, line_offset=0):
+        """Anexa os tokens de outro store deslocando posições e linhas."""
+        self.types.extend(other.types)
+        if offset:
+            self.starts.extend(array('i', [s + offset for s in other.starts]))
+            self.stops.extend(array('i', [s + offset for s in other.stops]))
+        else:
+            self.starts.extend(other.starts)
+            self.stops.extend(other.stops)
+        if line_offset:
+            self.lines.extend(array('i', [l + line_offset for l in other.lines]))
+        else:
+            self.lines.extend(other.lines)
+        self.columns.extend(other.columns)
+
+    def text(self, i):
+        return self.source[self.starts[i]:self.stops[i] + 1]
+
+    def format_lines(self, symbolic_names):
+        """Gera a linha '<TIPO,texto> [Lx,Cy]' de cada token, uma única vez."""
+        source = self.source
+        for ttype, start, stop, line, column in zip(self.types, self.starts, self.stops, self.lines, self.columns):
+            token_name = symbolic_names[ttype] or str(ttype)
+            yield f"<{token_name},{source[start:stop + 1]}> [L{line},C{column}]"
+
+    def to_tokens(self, input_stream):
+        """
+        Materializa CommonTokens (com EOF e tokenIndex globais) para o parser.
+        Retorna a lista e a fonte de tokens que a alimenta.
+        """
+        tokens = []
+        source = ListTokenSource(tokens, getattr(input_stream, 'fileName', None))
+        pair = (source, input_stream)
+        index = 0
+        for ttype, start, stop, line, column in zip(self.types, self.starts, self.stops, self.lines, self.columns):
+            token = make_token(pair, ttype, start, stop, line, column)
+            token.tokenIndex = index
+            tokens.append(token)
+            index += 1
+        text = self.source
+        eof = make_token(pair, Token.EOF, len(text), len(text) - 1,
+                         text.count('\n') + 1, len(text) - text.rfind('\n') - 1)
+        eof.tokenIndex = index
+        tokens.append(eof)
+        return tokens, source
+
+    # --- Formato binário ---
+
+    def save(self, path):
+        """Grava o store no formato binário (cabeçalho, 5 colunas e código-fonte)."""
+        byteorder = _BYTEORDER[sys.byteorder]
+        encoded = self.source.encode(_UTF32[byteorder])
+        with open(path, 'wb') as f:
+            f.write(_HEADER.pack(DUMP_MAGIC, DUMP_VERSION, byteorder, len(self), len(self.source)))
+            for name in COLUMNS:
+                getattr(self, name).tofile(f)
+            f.write(encoded)
+
+    @classmethod
+    def load(cls, path):
+        """
+        Mapeia um arquivo gerado por save(). As colunas são memoryviews sobre o
+        mapeamento (sem cópia) quando a ordem dos bytes coincide com a local.
+        """
+        with open(path, 'rb') as f:
+            mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, byteorder, count, source_length = _HEADER.unpack_from(mapped, 0)
+        if magic != DUMP_MAGIC or version != DUMP_VERSION:
+            mapped.close()
+            raise ValueError(f"Arquivo de tokens inválido ou de versão desconhecida: {path}")
+
+        store = cls()
+        store._mapped = mapped
+        view = memoryview(mapped)
+        views = [view]
+        offset = _HEADER.size
+        size = count * 4
+        for name in COLUMNS:
+            column = view[offset:offset + size].cast('i')
+            views.append(column)
+            if byteorder != _BYTEORDER[sys.byteorder]:
+                column = array('i', column)
+                column.byteswap()
+            setattr(store, name, column)
+            offset += size
+        store._views = views
+        store.source = str(view[offset:offset + source_length * 4], _UTF32[byteorder])
+        return store
+
+    def close(self):
+        """Libera as colunas mapeadas e o mapeamento de um store vindo de load()."""
+        if self._mapped is None:
+            return
+        for name in COLUMNS:
+            setattr(self, name, array('i'))
+        for view in reversed(self._views):
+            view.release()
+        self._views = ()
+        self._mapped.close()
+        self._mapped = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+
+def tokenize(input_stream, lexer_class, error_listener=None):
+    """
+    Executa a análise léxica completa de `input_stream` direto para um
+    TokenStore, sem manter CommonTokens vivos. O FastLexer preenche as colunas
+    sem criar nenhum objeto token.
+    """
+    text = str(input_stream)
+    store = TokenStore(text)
+    if lexer_class is FastLexer:
+        types, starts, stops = store.types, store.starts, store.stops
+        lines, columns = store.lines, store.columns
+        for ttype, start, stop, line, column in scan(text):
+            types.append(ttype)
+            starts.append(start)
+            stops.append(stop)
+            lines.append(line)
+            columns.append(column)
+        return store
+
+    lexer = lexer_class(input_stream)
+    lexer.removeErrorListeners()
+    if error_listener is not None:
+        lexer.addErrorListener(error_listener)
+    token = lexer.nextToken()
+    while token.type != Token.EOF:
+        store.append(token.type, token.start, token.stop, token.line, token.column)
+        token = lexer.nextToken()
+    return store
@@ -0,0 +1,138 @@
+# unbuffered_token_stream.py
+#
+# Fluxo de tokens sem buffer, no estilo do UnbufferedTokenStream do runtime
+# Java (que o runtime Python não traz). O CommonTokenStream guarda todos os
+# tokens do programa até o fim da análise; aqui só fica em memória a janela
+# que o parser ainda pode revisitar: o token atual, o lookahead já pedido e,
+# enquanto houver marcas abertas (adaptivePredict marca a posição de início
+# de cada decisão), os tokens desde a marca mais antiga. O resto é descartado
+# à medida que o parser consome.
+#
+# Consequência: não é possível voltar para antes da janela. Isso basta para
+# uma análise LL comum, mas não para parse_two_stage, que reinicia do começo
+# do arquivo quando o SLL falha.
+
+from antlr4.BufferedTokenStream import TokenStream
+from antlr4.Token import Token
+
+# Tokens já consumidos mantidos antes de compactar a janela (amortiza o custo
+# de apagar o início da lista)
+_TRIM_THRESHOLD = 256
+
+
+class UnbufferedTokenStream(TokenStream):
+
+    def __init__(self, tokenSource, channel=Token.DEFAULT_CHANNEL):
+        self.tokenSource = tokenSource
+        self.channel = channel
+        self.tokens = []            # janela
+        self.p = 0                  # posição de LT(1) na janela
+        self.numMarkers = 0
+        self.currentTokenIndex = 0  # índice absoluto de LT(1)
+        self.lastToken = None       # LT(-1)
+        self.lastTokenBufferStart = None  # token imediatamente anterior à janela
+        self._sync(1)
+
+    @property
+    def index(self):
+        return self.currentTokenIndex
+
+    def _buffer_start_index(self):
+        return self.currentTokenIndex - self.p
+
+    def _sync(self, want):
+        """Garante `want` tokens na janela a partir de p (ou até o EOF)."""
+        need = self.p + want - len(self.tokens)
+        while need > 0:
+            if self.tokens and self.tokens[-1].type == Token.EOF:
+                return
+            token = self.tokenSource.nextToken()
+            if token.channel != self.channel:
+                continue
+            token.tokenIndex = self._buffer_start_index() + len(self.tokens)
+            self.tokens.append(token)
+            need -= 1
+
+    def _trim(self):
+        if self.numMarkers == 0 and self.p >= _TRIM_THRESHOLD:
+            self.lastTokenBufferStart = self.tokens[self.p - 1]
+            del self.tokens[:self.p]
+            self.p = 0
+
+    def LT(self, i):
+        if i == -1:
+            return self.lastToken
+        if i == 0:
+            return None
+        if i < 0:
+            raise ValueError(f"UnbufferedTokenStream só volta um token (LT({i}))")
+        self._sync(i)
+        index = self.p + i - 1
+        if index >= len(self.tokens):
+            # Além do EOF
+            return self.tokens[-1]
+        return self.tokens[index]
+
+    def LA(self, i):
+        return self.LT(i).type
+
+    def get(self, index):
+        start = self._buffer_start_index()
+        if index < start or index >= start + len(self.tokens):
+            raise IndexError(f"token {index} fora da janela [{start}, {start + len(self.tokens) - 1}]")
+        return self.tokens[index - start]
+
+    def consume(self):
+        if self.LA(1) == Token.EOF:
+            raise Exception("cannot consume EOF")
+        self.lastToken = self.tokens[self.p]
+        self.p += 1
+        self.currentTokenIndex += 1
+        self._trim()
+        self._sync(1)
+
+    def mark(self):
+        self.numMarkers += 1
+        return -self.numMarkers
+
+    def release(self, marker):
+        if -marker != self.numMarkers:
+            raise ValueError("release() fora de ordem")
+        self.numMarkers -= 1
+        self._trim()
+
+    def seek(self, index):
+        if index == self.currentTokenIndex:
+            return
+        if index > self.currentTokenIndex:
+            self._sync(index - self.currentTokenIndex + 1)
+            index = min(index, self._buffer_start_index() + len(self.tokens) - 1)
+        start = self._buffer_start_index()
+        if index < start:
+            raise ValueError(f"não é possível voltar ao token {index}: a janela começa em {start}")
+        self.p = index - start
+        self.currentTokenIndex = index
+        self.lastToken = self.tokens[self.p - 1] if self.p > 0 else self.lastTokenBufferStart
+
+    def getTokenSource(self):
+        return self.tokenSource
+
+    def getSourceName(self):
+        return self.tokenSource.getSourceName()
+
+    def getText(self, start=None, stop=None):
+        """Texto dos tokens entre `start` e `stop` (índices ou tokens) que ainda estão na janela."""
+        if isinstance(start, Token):
+            start = start.tokenIndex
+        if isinstance(stop, Token):
+            stop = stop.tokenIndex
+        first = self._buffer_start_index()
+        start = first if start is None else max(start, first)
+        stop = first + len(self.tokens) - 1 if stop is None else min(stop, first + len(self.tokens) - 1)
+        parts = []
+        for i in range(start, stop + 1):
+            token = self.tokens[i - first]
+            if token.type == Token.EOF:
+                break
+            parts.append(token.text)
+        return "".join(parts)